@@ -0,0 +1,120 @@
+"""Mide el tiempo de arranque de ``main.py``.
+
+Cada medición se hace en un intérprete nuevo para no reutilizar módulos ya
+importados. Se informa:
+
+- el tiempo de ``import main`` (mediana de varias repeticiones);
+- las dependencias pesadas que quedan cargadas después de ese import;
+- el tiempo acumulado de importación de cada dependencia pesada según
+  ``python -X importtime`` cuando se importa por sí sola.
+
+Uso::
+
+    python benchmarks/arranque.py --repeticiones 5
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+RAIZ = Path(__file__).resolve().parents[1]
+DEPENDENCIAS_PESADAS: tuple[str, ...] = (
+    "pandas",
+    "scipy.stats",
+    "statsmodels.api",
+    "matplotlib.pyplot",
+    "seaborn",
+)
+
+
+def _ejecutar(codigo: str, *opciones: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *opciones, "-c", codigo],
+        cwd=RAIZ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def tiempo_import_main(repeticiones: int = 5) -> List[float]:
+    """Segundos que tarda ``import main`` en cada repetición."""
+    codigo = (
+        "import time; inicio = time.perf_counter(); import main; "
+        "print(time.perf_counter() - inicio)"
+    )
+    return [float(_ejecutar(codigo).stdout.strip()) for _ in range(repeticiones)]
+
+
+def modulos_cargados_por_main() -> Dict[str, bool]:
+    """Indica qué dependencias pesadas quedan importadas tras ``import main``."""
+    codigo = (
+        "import json, sys; import main; "
+        f"print(json.dumps({{m: m in sys.modules for m in {list(DEPENDENCIAS_PESADAS)!r}}}))"
+    )
+    return json.loads(_ejecutar(codigo).stdout)
+
+
+def tiempo_import_modulo(modulo: str) -> float:
+    """Tiempo acumulado (s) de importar ``modulo`` según ``-X importtime``."""
+    salida = _ejecutar(f"import {modulo}", "-X", "importtime").stderr
+    patron = re.compile(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)$")
+    for linea in salida.splitlines():
+        coincidencia = patron.search(linea)
+        if coincidencia and coincidencia.group(2) == modulo:
+            return int(coincidencia.group(1)) / 1e6
+    return float("nan")
+
+
+def medir_arranque(repeticiones: int = 5) -> Dict[str, object]:
+    """Reúne todas las mediciones de arranque en un diccionario."""
+    tiempos = tiempo_import_main(repeticiones)
+    return {
+        "python": sys.version.split()[0],
+        "repeticiones": repeticiones,
+        "import_main_s": {
+            "mediana": statistics.median(tiempos),
+            "minimo": min(tiempos),
+            "maximo": max(tiempos),
+        },
+        "cargados_por_main": modulos_cargados_por_main(),
+        "import_dependencias_s": {
+            modulo: tiempo_import_modulo(modulo) for modulo in DEPENDENCIAS_PESADAS
+        },
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument(
+        "--salida", type=Path, help="Guarda las mediciones en este archivo JSON."
+    )
+    argumentos = parser.parse_args(argv)
+
+    resultado = medir_arranque(argumentos.repeticiones)
+    tiempos = resultado["import_main_s"]
+    print(
+        f"import main: mediana {tiempos['mediana']:.3f} s "
+        f"(mín {tiempos['minimo']:.3f}, máx {tiempos['maximo']:.3f}; "
+        f"{resultado['repeticiones']} repeticiones)"
+    )
+    print()
+    print(f"{'dependencia':<20}{'import (s)':>12}  cargada por main")
+    for modulo, segundos in resultado["import_dependencias_s"].items():
+        cargada = "sí" if resultado["cargados_por_main"][modulo] else "no"
+        print(f"{modulo:<20}{segundos:>12.3f}  {cargada}")
+
+    if argumentos.salida:
+        argumentos.salida.parent.mkdir(parents=True, exist_ok=True)
+        argumentos.salida.write_text(json.dumps(resultado, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""Mide cómo escala cada paso del análisis con el número de respuestas.
+
+Para cada tamaño ``n`` se genera (o se reutiliza) una encuesta sintética con
+:mod:`generar_encuesta` y se mide por separado cada paso: la carga
+(``cargar_excel`` sobre el ``.xlsx`` y ``pandas.read_csv`` sobre el ``.csv``),
+``preparar_datos``, cada función estadística, cada figura y
+``generar_reporte_markdown``. De cada paso se informa:
+
+- el tiempo (mediana y mínimo de varias repeticiones);
+- la memoria pico de Python durante una ejecución adicional, medida con
+  :mod:`tracemalloc` (incluye los arreglos de NumPy).
+
+Las cachés de memoización se vacían antes de cada ejecución, de modo que se
+mide el cálculo completo. Las mediciones se guardan en un JSON junto con la
+versión del código (commit de git) y de las bibliotecas; ``--comparar``
+muestra el cociente de tiempos entre dos de esos archivos.
+
+Uso::
+
+    python benchmarks/escalabilidad.py --tamanos 1000 10000 100000
+    python benchmarks/escalabilidad.py --comparar antes.json despues.json
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd  # noqa: E402
+
+from generar_encuesta import MAX_FILAS_EXCEL, PERFILES_LIKERT, escribir_encuesta  # noqa: E402
+
+RAIZ = Path(__file__).resolve().parents[1]
+DATOS_DIR: Path = RAIZ / "benchmarks" / "datos"
+RESULTADOS_DIR: Path = RAIZ / "benchmarks" / "resultados"
+TAMANOS_DEFAULT: tuple[int, ...] = (1_000, 10_000, 100_000)
+# Escribir y leer libros .xlsx grandes es muy lento; por encima solo se mide el .csv
+MAX_N_EXCEL_DEFAULT: int = 100_000
+
+MODULOS_MEDIDOS: tuple[str, ...] = (
+    "src.cargar_datos",
+    "src.limpiar_preparar",
+    "src.descriptivos",
+    "src.intervalos_confianza",
+    "src.prueba_hipotesis",
+    "src.diseno_factorial",
+    "statsmodels.formula.api",
+    "src.diagnosticos",
+    "src.imputacion",
+    "src.bayesiano",
+    "src.graficos",
+    "src.reporte_markdown",
+    "openpyxl",
+)
+
+# Archivos que escriben las funciones de figuras (ver las etapas de src/analisis.py)
+ARCHIVOS_FIGURAS: tuple[str, ...] = (
+    "hist_acuerdo.png",
+    "box_frecuencia.png",
+    "box_edad.png",
+    "barras_tratamientos.png",
+    "correlaciones.png",
+)
+
+Contexto = Dict[str, Any]
+
+
+def _paso_cargar_excel(contexto: Contexto) -> pd.DataFrame:
+    from src.cargar_datos import cargar_excel
+
+    return cargar_excel(contexto["ruta_xlsx"])
+
+
+def _paso_cargar_csv(contexto: Contexto) -> pd.DataFrame:
+    return pd.read_csv(contexto["ruta_csv"])
+
+
+def _paso_preparar_datos(contexto: Contexto) -> pd.DataFrame:
+    from src.limpiar_preparar import preparar_datos
+
+    return preparar_datos(contexto["crudo"])
+
+
+def _paso_resumen_general(contexto: Contexto) -> dict:
+    from src.descriptivos import resumen_general
+
+    return resumen_general(contexto["preparado"])
+
+
+def _paso_resumen_por_grupo(contexto: Contexto) -> pd.DataFrame:
+    from src.descriptivos import resumen_por_grupo
+
+    return resumen_por_grupo(contexto["preparado"], ["frecuencia_viaje", "grupo_edad", "tratamiento"])
+
+
+def _paso_ic_media(contexto: Contexto) -> dict:
+    from src.intervalos_confianza import intervalo_confianza_media
+
+    return intervalo_confianza_media(contexto["preparado"]["acuerdo_ampliacion"])
+
+
+def _paso_ic_proporcion(contexto: Contexto) -> dict:
+    from src.intervalos_confianza import intervalo_confianza_proporcion
+
+    return intervalo_confianza_proporcion(contexto["preparado"]["a_favor"])
+
+
+def _paso_prueba_hipotesis(contexto: Contexto) -> dict:
+    from src.prueba_hipotesis import prueba_media_mayor_que_5
+
+    return prueba_media_mayor_que_5(contexto["preparado"]["acuerdo_ampliacion"])
+
+
+def _paso_anova(contexto: Contexto) -> dict:
+    from src.diseno_factorial import anova_2x3
+
+    return anova_2x3(contexto["preparado"])
+
+
+def _paso_normalidad(contexto: Contexto) -> dict:
+    from src.diagnosticos import prueba_normalidad_acuerdo, prueba_normalidad_valores_residuales
+    from src.diseno_factorial import residuos_anova_2x3
+
+    resultado = {"acuerdo": prueba_normalidad_acuerdo(contexto["preparado"])}
+    if contexto["resultados"]["anova"].get("exito"):
+        resultado["residuos_anova"] = prueba_normalidad_valores_residuales(
+            residuos_anova_2x3(contexto["preparado"])
+        )
+    return resultado
+
+
+def _paso_imputacion(contexto: Contexto) -> Optional[dict]:
+    from src.imputacion import COLUMNAS_LIKERT, analisis_imputado
+
+    preparado = contexto["preparado"]
+    if not preparado[list(COLUMNAS_LIKERT)].isna().any(axis=None):
+        return None
+    return analisis_imputado(preparado)
+
+
+def _paso_bayesiano(contexto: Contexto) -> dict:
+    from src.bayesiano import analisis_bayesiano
+
+    return analisis_bayesiano(contexto["preparado"])
+
+
+def _paso_correlaciones(contexto: Contexto) -> pd.DataFrame:
+    from src.graficos import matriz_correlacion
+
+    return matriz_correlacion(contexto["preparado"])
+
+
+def _figura(nombre_funcion: str) -> Callable[[Contexto], Any]:
+    def paso(contexto: Contexto) -> Any:
+        from src import graficos
+
+        funcion = getattr(graficos, nombre_funcion)
+        return funcion(
+            contexto["preparado"], contexto["figuras_dir"], perfil=contexto["perfil_imagen"]
+        )
+
+    return paso
+
+
+def _paso_reporte(contexto: Contexto) -> Path:
+    from src.graficos import extraer_metricas, rutas_salida
+    from src.reporte_markdown import generar_reporte_markdown
+
+    resultados = contexto["resultados"]
+    rutas_figuras: Dict[str, Path] = {}
+    for archivo in ARCHIVOS_FIGURAS:
+        rutas_figuras.update(rutas_salida(contexto["figuras_dir"] / archivo, contexto["perfil_imagen"]))
+    reporte = {
+        "n_muestra": len(contexto["preparado"]),
+        "descriptivos": resultados["resumen_general"],
+        "resumen_por_grupo": resultados["resumen_por_grupo"],
+        "intervalos": {"media": resultados["ic_media"], "proporcion": resultados["ic_proporcion"]},
+        "prueba_hipotesis": resultados["prueba_hipotesis"],
+        "anova": resultados["anova"],
+        "normalidad": resultados["normalidad"],
+        "bayesiano": resultados["bayesiano"],
+        "imputacion": resultados["imputacion"],
+        "correlaciones": resultados["correlaciones"],
+        "metricas_figuras": pd.DataFrame(extraer_metricas()),
+    }
+    ruta = contexto["figuras_dir"] / "reporte.md"
+    generar_reporte_markdown(reporte, rutas_figuras, ruta)
+    return ruta
+
+
+# Pasos en orden de ejecución: los posteriores usan el resultado de los anteriores
+PASOS: Dict[str, Callable[[Contexto], Any]] = {
+    "cargar_excel": _paso_cargar_excel,
+    "cargar_csv": _paso_cargar_csv,
+    "preparar_datos": _paso_preparar_datos,
+    "resumen_general": _paso_resumen_general,
+    "resumen_por_grupo": _paso_resumen_por_grupo,
+    "ic_media": _paso_ic_media,
+    "ic_proporcion": _paso_ic_proporcion,
+    "prueba_hipotesis": _paso_prueba_hipotesis,
+    "anova": _paso_anova,
+    "normalidad": _paso_normalidad,
+    "imputacion": _paso_imputacion,
+    "bayesiano": _paso_bayesiano,
+    "correlaciones": _paso_correlaciones,
+    "histograma": _figura("guardar_histograma_acuerdo"),
+    "boxplots": _figura("guardar_boxplots_por_factores"),
+    "barras": _figura("guardar_barras_por_tratamiento"),
+    "mapa_correlacion": _figura("guardar_mapa_correlacion"),
+    "reporte": _paso_reporte,
+}
+
+# Pasos cuyo resultado usa cada paso; los que no aparecen usan solo preparar_datos
+DEPENDENCIAS: Dict[str, tuple[str, ...]] = {
+    "cargar_excel": (),
+    "cargar_csv": (),
+    "preparar_datos": ("cargar_csv",),
+    "normalidad": ("preparar_datos", "anova"),
+    "reporte": tuple(
+        nombre for nombre in PASOS if nombre not in ("cargar_excel", "cargar_csv", "reporte")
+    ),
+}
+
+
+def medir_paso(
+    paso: Callable[[Contexto], Any], contexto: Contexto, repeticiones: int = 3
+) -> tuple[Any, Dict[str, float]]:
+    """Ejecuta ``paso`` ``repeticiones`` veces más una con :mod:`tracemalloc`.
+
+    Returns
+    -------
+    tuple
+        El resultado de la última ejecución y ``segundos_mediana``,
+        ``segundos_min`` y ``memoria_pico_mb``.
+    """
+
+    from src.memoizacion import limpiar_memoizacion
+
+    tiempos: List[float] = []
+    for _ in range(repeticiones):
+        limpiar_memoizacion()
+        inicio = time.perf_counter()
+        resultado = paso(contexto)
+        tiempos.append(time.perf_counter() - inicio)
+
+    limpiar_memoizacion()
+    tracemalloc.start()
+    try:
+        resultado = paso(contexto)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, {
+        "segundos_mediana": statistics.median(tiempos),
+        "segundos_min": min(tiempos),
+        "memoria_pico_mb": pico / 1e6,
+    }
+
+
+def preparar_archivos(
+    n: int, datos_dir: Path, max_n_excel: int, **opciones: Any
+) -> Dict[str, Optional[Path]]:
+    """Genera (si no existen ya) el ``.csv`` y, si cabe, el ``.xlsx`` de tamaño ``n``."""
+    sufijo = "_".join(f"{clave}-{valor}" for clave, valor in sorted(opciones.items()))
+    base = datos_dir / f"encuesta_{n}_{sufijo}"
+    rutas: Dict[str, Optional[Path]] = {"ruta_csv": base.with_suffix(".csv"), "ruta_xlsx": None}
+    if n <= min(max_n_excel, MAX_FILAS_EXCEL):
+        rutas["ruta_xlsx"] = base.with_suffix(".xlsx")
+    for ruta in rutas.values():
+        if ruta is not None and not ruta.exists():
+            escribir_encuesta(ruta, n, **opciones)
+    return rutas
+
+
+def _necesarios(pasos: Sequence[str]) -> set[str]:
+    """Los ``pasos`` pedidos más los pasos de cuyos resultados dependen."""
+    necesarios: set[str] = set()
+    pendientes = list(pasos)
+    while pendientes:
+        nombre = pendientes.pop()
+        if nombre not in necesarios:
+            necesarios.add(nombre)
+            pendientes.extend(DEPENDENCIAS.get(nombre, ("preparar_datos",)))
+    return necesarios
+
+
+def medir_tamano(
+    n: int,
+    pasos: Sequence[str],
+    repeticiones: int = 3,
+    datos_dir: Path = DATOS_DIR,
+    max_n_excel: int = MAX_N_EXCEL_DEFAULT,
+    perfil_imagen: str = "web",
+    **opciones: Any,
+) -> List[Dict[str, Any]]:
+    """Mide los ``pasos`` sobre una encuesta sintética de ``n`` respuestas.
+
+    Los pasos no pedidos de los que dependen los pedidos (por ejemplo
+    ``preparar_datos``) se ejecutan una vez, sin medirlos.
+    """
+
+    contexto: Contexto = preparar_archivos(n, datos_dir, max_n_excel, **opciones)
+    contexto.update(resultados={}, perfil_imagen=perfil_imagen)
+    necesarios = _necesarios(pasos)
+    mediciones: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="escalabilidad_") as carpeta:
+        contexto["figuras_dir"] = Path(carpeta)
+        for nombre, paso in PASOS.items():
+            if nombre not in necesarios or (nombre == "cargar_excel" and contexto["ruta_xlsx"] is None):
+                continue
+            if nombre in pasos:
+                resultado, medicion = medir_paso(paso, contexto, repeticiones)
+                mediciones.append({"n": n, "paso": nombre, **medicion})
+                print(
+                    f"n = {n:>9}  {nombre:<18}{medicion['segundos_mediana']:>10.4f} s"
+                    f"{medicion['memoria_pico_mb']:>10.1f} MB",
+                    flush=True,
+                )
+            else:
+                resultado = paso(contexto)
+            contexto["resultados"][nombre] = resultado
+            if nombre == "cargar_csv":
+                contexto["crudo"] = resultado
+            elif nombre == "preparar_datos":
+                contexto["preparado"] = resultado
+    return mediciones
+
+
+def version_codigo() -> Dict[str, Any]:
+    """Commit de git, estado del árbol y versiones de Python y las bibliotecas."""
+    import matplotlib
+    import numpy
+    import scipy
+    import statsmodels
+
+    def git(*argumentos: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *argumentos], cwd=RAIZ, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "modificado": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "procesadores": os.cpu_count(),
+        "bibliotecas": {
+            modulo.__name__: modulo.__version__
+            for modulo in (numpy, pd, scipy, statsmodels, matplotlib)
+        },
+    }
+
+
+def comparar(base: Dict[str, Any], nuevo: Dict[str, Any]) -> pd.DataFrame:
+    """Tiempos y memoria de dos corridas por tamaño y paso, con el cociente nuevo/base."""
+    claves = ["n", "paso"]
+    tabla = pd.DataFrame(base["mediciones"]).merge(
+        pd.DataFrame(nuevo["mediciones"]), on=claves, suffixes=("_base", "_nuevo")
+    )
+    tabla["cociente_tiempo"] = tabla["segundos_mediana_nuevo"] / tabla["segundos_mediana_base"]
+    tabla["cociente_memoria"] = tabla["memoria_pico_mb_nuevo"] / tabla["memoria_pico_mb_base"]
+    return tabla[
+        claves
+        + ["segundos_mediana_base", "segundos_mediana_nuevo", "cociente_tiempo"]
+        + ["memoria_pico_mb_base", "memoria_pico_mb_nuevo", "cociente_memoria"]
+    ]
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tamanos", type=int, nargs="+", default=list(TAMANOS_DEFAULT))
+    parser.add_argument("--pasos", nargs="+", choices=list(PASOS), default=list(PASOS))
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--perfil", choices=sorted(PERFILES_LIKERT), default="real")
+    parser.add_argument("--faltantes", type=float, default=0.02)
+    parser.add_argument("--desbalance", type=float, default=3.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--max-n-excel", type=int, default=MAX_N_EXCEL_DEFAULT)
+    parser.add_argument("--datos", type=Path, default=DATOS_DIR, help="Carpeta de las encuestas generadas.")
+    parser.add_argument("--salida", type=Path, help="Archivo JSON de resultados.")
+    parser.add_argument(
+        "--comparar", nargs=2, type=Path, metavar=("BASE", "NUEVO"),
+        help="Compara dos archivos de resultados en lugar de medir.",
+    )
+    argumentos = parser.parse_args(argv)
+
+    if argumentos.comparar:
+        base, nuevo = (json.loads(ruta.read_text(encoding="utf-8")) for ruta in argumentos.comparar)
+        print(f"base: {base['version']['commit']}  nuevo: {nuevo['version']['commit']}")
+        print(comparar(base, nuevo).to_string(index=False, float_format="{:.4f}".format))
+        return
+
+    # Las advertencias de los datos sintéticos (edades fuera de rango, Shapiro
+    # con n > 5000) se repetirían en cada ejecución de cada paso
+    logging.disable(logging.WARNING)
+    warnings.simplefilter("ignore")
+    # Importar antes de medir, para no contar la importación en la primera repetición
+    for modulo in MODULOS_MEDIDOS:
+        importlib.import_module(modulo)
+    opciones = {
+        "perfil": argumentos.perfil,
+        "tasa_faltantes": argumentos.faltantes,
+        "desbalance": argumentos.desbalance,
+        "semilla": argumentos.semilla,
+    }
+    mediciones: List[Dict[str, Any]] = []
+    for n in argumentos.tamanos:
+        mediciones.extend(
+            medir_tamano(
+                n,
+                argumentos.pasos,
+                argumentos.repeticiones,
+                argumentos.datos,
+                argumentos.max_n_excel,
+                **opciones,
+            )
+        )
+
+    resultado = {
+        "version": version_codigo(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parametros": {**opciones, "repeticiones": argumentos.repeticiones},
+        "mediciones": mediciones,
+    }
+    salida = argumentos.salida or RESULTADOS_DIR / (
+        f"escalabilidad-{datetime.now():%Y%m%d-%H%M%S}-{resultado['version']['commit'] or 'sin-git'}.json"
+    )
+    salida.parent.mkdir(parents=True, exist_ok=True)
+    salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nMediciones guardadas en '{salida}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Genera encuestas sintéticas con el formato de ``data/Respuestas_final.xlsx``.
+
+Las columnas llevan los encabezados de :data:`src.config.COLUMN_MAP` (más la
+marca temporal y el nombre), de modo que los archivos generados pasan por
+``cargar_excel`` y ``preparar_datos`` igual que el libro real. Se controla:
+
+- ``n``: número de respuestas (de 10³ a 10⁷; los libros ``.xlsx`` admiten a
+  lo sumo :data:`MAX_FILAS_EXCEL`, más allá se usa ``.csv``);
+- ``perfil``: distribución marginal de las preguntas Likert (ver
+  :data:`PERFILES_LIKERT`); las tres preguntas dependen de una variable
+  latente común con correlación ``correlacion``, de modo que entre ellas se
+  correlacionan aproximadamente ``correlacion²``;
+- ``tasa_faltantes``: proporción de celdas vacías en la edad y en cada
+  pregunta Likert, al azar e independientes;
+- ``desbalance``: cociente entre la celda más y la menos poblada del diseño
+  2x3 (frecuencia de viaje x grupo de edad); ``1`` da celdas iguales;
+- ``efecto``: diferencia, en desviaciones de la variable latente, entre la
+  celda de mayor y la de menor acuerdo.
+
+Los archivos grandes se generan y escriben por bloques, con memoria acotada.
+
+Uso::
+
+    python benchmarks/generar_encuesta.py 100000 --salida data/sintetica.csv
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import special
+
+RAIZ = Path(__file__).resolve().parents[1]
+if str(RAIZ) not in sys.path:
+    sys.path.insert(0, str(RAIZ))
+
+from src.config import COLUMN_MAP  # noqa: E402
+
+# Filas de datos que caben en una hoja de Excel (más el encabezado)
+MAX_FILAS_EXCEL: int = 1_048_575
+TAMANO_BLOQUE: int = 500_000
+
+COLUMNA_MARCA: str = "Marca temporal"
+COLUMNA_NOMBRE: str = "Cómo te llamas?"
+VIAJES_FRECUENTE: str = "Más de 6 veces al año"
+VIAJES_NO_FRECUENTE: str = "Menos de 6 veces al año"
+
+# Probabilidad de cada nivel de 1 a 10. "real" reproduce el libro original.
+PERFILES_LIKERT: Dict[str, np.ndarray] = {
+    "real": np.array([1, 2, 2, 2, 7, 4, 15, 19, 12, 56], dtype=float),
+    "uniforme": np.ones(10),
+    "neutral": np.array([1, 3, 8, 15, 23, 23, 15, 8, 3, 1], dtype=float),
+    "polarizada": np.array([25, 10, 4, 2, 1, 1, 2, 4, 10, 41], dtype=float),
+}
+
+# Edades dentro de cada grupo de preparar_datos; "Sin categoría" son menores de 16
+RANGOS_EDAD: Dict[str, tuple[int, int]] = {
+    "Joven": (16, 24),
+    "Adulto": (25, 44),
+    "Adulto mayor": (45, 80),
+    "Sin categoría": (12, 15),
+}
+PROPORCION_SIN_CATEGORIA: float = 0.01
+
+NOMBRES: tuple[str, ...] = (
+    "Mariana", "Juan Esteban", "Daniel", "Sara López", "Andrés Ríos",
+    "Cruz Elena Restrepo", "Nicolás", "Isabella Rendón", "Carlos Mario", "Laura",
+)
+
+
+def probabilidades_celdas(desbalance: float = 1.0) -> np.ndarray:
+    """Probabilidad de cada celda 2x3 (filas: frecuente, no frecuente).
+
+    Las probabilidades crecen en progresión geométrica de modo que la celda
+    más poblada tiene ``desbalance`` veces la probabilidad de la menos poblada.
+    """
+    if desbalance < 1:
+        raise ValueError("El desbalance es un cociente y debe ser mayor o igual que 1.")
+    pesos = desbalance ** np.linspace(0.0, 1.0, 6)
+    # La celda mayor es la de no frecuentes jóvenes, como en el libro real
+    orden = np.array([0, 2, 1, 5, 4, 3])
+    return (pesos[orden] / pesos.sum()).reshape(2, 3)
+
+
+def _niveles_likert(
+    latente: np.ndarray, perfil: np.ndarray, correlacion: float, rng: np.random.Generator
+) -> np.ndarray:
+    """Respuestas de 1 a 10 con la distribución ``perfil`` y correlación con ``latente``."""
+    ruido = rng.standard_normal(latente.size)
+    z = correlacion * latente + np.sqrt(1.0 - correlacion**2) * ruido
+    acumulada = np.cumsum(perfil / perfil.sum())[:-1]
+    return (np.searchsorted(acumulada, special.ndtr(z)) + 1).astype(float)
+
+
+def generar_encuesta(
+    n: int,
+    perfil: str = "real",
+    tasa_faltantes: float = 0.0,
+    desbalance: float = 1.0,
+    efecto: float = 0.3,
+    correlacion: float = 0.7,
+    semilla: Optional[int] = 0,
+) -> pd.DataFrame:
+    """Genera ``n`` respuestas sintéticas con los encabezados del libro original."""
+
+    if perfil not in PERFILES_LIKERT:
+        raise ValueError(
+            f"Perfil Likert desconocido: {perfil!r}. Opciones: {', '.join(PERFILES_LIKERT)}."
+        )
+    if not 0.0 <= tasa_faltantes < 1.0:
+        raise ValueError("La tasa de faltantes debe estar en [0, 1).")
+
+    rng = np.random.default_rng(semilla)
+    celdas = probabilidades_celdas(desbalance)
+    celda = rng.choice(6, size=n, p=celdas.ravel())
+    frecuente, grupo = np.divmod(celda, 3)
+    frecuente = frecuente == 0
+
+    # Con dtype=object ningún nombre se trunca al asignarlo (un "<U12" cortaba
+    # "Sin categoría" y esas filas quedaban sin edad)
+    grupos = np.array(list(RANGOS_EDAD), dtype=object)[grupo]
+    sin_categoria = rng.random(n) < PROPORCION_SIN_CATEGORIA
+    grupos[sin_categoria] = "Sin categoría"
+    edad = np.full(n, np.nan)
+    for nombre, (minimo, maximo) in RANGOS_EDAD.items():
+        mascara = grupos == nombre
+        edad[mascara] = rng.integers(minimo, maximo + 1, size=int(mascara.sum()))
+
+    # El efecto de celda desplaza la variable latente común a las tres preguntas
+    desplazamientos = np.linspace(-efecto / 2, efecto / 2, 6)
+    latente = rng.standard_normal(n) + desplazamientos[celda]
+    latente /= np.sqrt(1.0 + np.var(desplazamientos))
+    probabilidades = PERFILES_LIKERT[perfil]
+    respuestas = {
+        clave: _niveles_likert(latente, probabilidades, correlacion, rng)
+        for clave in ("p1_acuerdo", "p2_economia", "p3_necesidad")
+    }
+
+    if tasa_faltantes > 0:
+        for valores in (edad, *respuestas.values()):
+            valores[rng.random(n) < tasa_faltantes] = np.nan
+
+    inicio = np.datetime64("2025-11-04T18:00:00", "ms")
+    marcas = inicio + np.sort(rng.integers(0, 30 * 24 * 3600 * 1000, size=n)).astype("timedelta64[ms]")
+    return pd.DataFrame(
+        {
+            COLUMNA_MARCA: marcas,
+            COLUMNA_NOMBRE: np.array(NOMBRES, dtype=object)[rng.integers(0, len(NOMBRES), size=n)],
+            COLUMN_MAP["edad"]: edad,
+            COLUMN_MAP["viajes_anio"]: np.where(frecuente, VIAJES_FRECUENTE, VIAJES_NO_FRECUENTE),
+            **{COLUMN_MAP[clave]: valores for clave, valores in respuestas.items()},
+        }
+    )
+
+
+def generar_bloques(
+    n: int, tamano_bloque: int = TAMANO_BLOQUE, semilla: Optional[int] = 0, **opciones: object
+) -> Iterator[pd.DataFrame]:
+    """Genera la encuesta de ``n`` filas en bloques independientes y reproducibles."""
+    bloques = -(-n // tamano_bloque)
+    semillas = np.random.SeedSequence(semilla).spawn(bloques)
+    for i, semilla_bloque in enumerate(semillas):
+        filas = min(tamano_bloque, n - i * tamano_bloque)
+        yield generar_encuesta(filas, semilla=semilla_bloque, **opciones)
+
+
+def escribir_encuesta(
+    ruta: Path,
+    n: int,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    semilla: Optional[int] = 0,
+    **opciones: object,
+) -> Path:
+    """Escribe una encuesta sintética de ``n`` filas en ``ruta`` (``.xlsx`` o ``.csv``).
+
+    Raises
+    ------
+    ValueError
+        Si la extensión no es ``.xlsx`` ni ``.csv``, o si ``n`` no cabe en una
+        hoja de Excel.
+    """
+
+    ruta = Path(ruta)
+    sufijo = ruta.suffix.lower()
+    if sufijo not in (".xlsx", ".csv"):
+        raise ValueError(f"Formato no soportado: {ruta.suffix!r}. Usa .xlsx o .csv.")
+    if sufijo == ".xlsx" and n > MAX_FILAS_EXCEL:
+        raise ValueError(
+            f"Una hoja de Excel admite a lo sumo {MAX_FILAS_EXCEL} respuestas; "
+            f"para n = {n} usa un archivo .csv."
+        )
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = ruta.with_name(f".{ruta.name}.tmp")
+    bloques = generar_bloques(n, tamano_bloque, semilla, **opciones)
+    try:
+        if sufijo == ".csv":
+            for i, bloque in enumerate(bloques):
+                bloque.to_csv(temporal, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        else:
+            pd.concat(bloques, ignore_index=True).to_excel(temporal, index=False, engine="openpyxl")
+        temporal.replace(ruta)
+    finally:
+        temporal.unlink(missing_ok=True)
+    return ruta
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("n", type=int, help="Número de respuestas.")
+    parser.add_argument("--salida", type=Path, required=True, help="Archivo .xlsx o .csv.")
+    parser.add_argument("--perfil", choices=sorted(PERFILES_LIKERT), default="real")
+    parser.add_argument("--faltantes", type=float, default=0.0, help="Tasa de celdas vacías.")
+    parser.add_argument("--desbalance", type=float, default=1.0, help="Celda mayor / celda menor.")
+    parser.add_argument("--efecto", type=float, default=0.3)
+    parser.add_argument("--correlacion", type=float, default=0.7)
+    parser.add_argument("--semilla", type=int, default=0)
+    argumentos = parser.parse_args(argv)
+
+    ruta = escribir_encuesta(
+        argumentos.salida,
+        argumentos.n,
+        semilla=argumentos.semilla,
+        perfil=argumentos.perfil,
+        tasa_faltantes=argumentos.faltantes,
+        desbalance=argumentos.desbalance,
+        efecto=argumentos.efecto,
+        correlacion=argumentos.correlacion,
+    )
+    print(f"Encuesta sintética de {argumentos.n} respuestas escrita en '{ruta}'.")
+
+
+if __name__ == "__main__":
+    main()
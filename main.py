@@ -1,28 +1,55 @@
-"""Script principal para ejecutar el análisis estadístico completo."""
+"""Script principal para ejecutar el análisis estadístico completo.
+
+Es una capa delgada sobre :func:`src.analisis.ejecutar_analisis`: lee las
+opciones de línea de comandos, configura las cachés y los puntos de control,
+y muestra los mensajes del análisis en consola.
+"""
 from __future__ import annotations
 
+import argparse
+import contextlib
+import textwrap
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence
 
-from src.cargar_datos import cargar_excel
-from src.config import DATA_PATH
-from src.descriptivos import resumen_general, resumen_por_grupo
-from src.diagnosticos import prueba_normalidad_acuerdo, prueba_normalidad_residuos
-from src.diseno_factorial import anova_2x3
-from src.graficos import (
-    guardar_barras_por_tratamiento,
-    guardar_boxplots_por_factores,
-    guardar_histograma_acuerdo,
-    guardar_mapa_correlacion,
-)
-from src.intervalos_confianza import intervalo_confianza_media, intervalo_confianza_proporcion
-from src.limpiar_preparar import preparar_datos
-from src.prueba_hipotesis import prueba_media_mayor_que_5
-from src.reporte_markdown import generar_reporte_markdown
+if TYPE_CHECKING:
+    import pandas as pd
 
+    from src.resultados import ResultadoAnalisis
+
+from src.analisis import configurar_registro, ejecutar_analisis
+from src.artefacto import cargar_artefacto
+from src.cache_figuras import CacheFiguras
+from src.calidad import REGLAS_CALIDAD, REGLAS_EXCLUSION_DEFAULT
+from src.config import (
+    ARTEFACTO_DIR,
+    CORRIDAS_CONSERVADAS,
+    CORRIDAS_DIR,
+    DATA_PATH,
+    FIGURAS_CACHE_DIR,
+    FIGURAS_CACHE_MAX_ENTRADAS,
+    FIGURAS_CACHE_MAX_MB,
+    FIGURAS_DIR,
+    LOTE_DIR,
+    MEMO_DIR,
+    PERFIL_IMAGEN_DEFAULT,
+    REPORTE_PATH,
+    REPORTE_VISTA_PREVIA_PATH,
+    SEGMENTOS_DIR,
+    TRAZA_PATH,
+)
+from src.instrumentacion import PERFILADORES_MUESTREO, Instrumentacion, muestreo
+from src.memoizacion import configurar_memoizacion
+from src.pipeline import CACHE_DIR_DEFAULT, DirectorioCorrida
+from src.ponderacion import cargar_margenes
+from src.reporte_markdown import escribir_reporte, renderizar_lote, tabla_metricas_figuras
+from src.servicio import HOST_DEFAULT, PUERTO_DEFAULT
+from src.vigilancia import ESPERA_DEFAULT, INTERVALO_DEFAULT
+from src.vista_previa import TAMANO_MUESTRA_DEFAULT
 
 DATA_DIR = Path("data")
-FIGURAS_DIR = Path("figuras")
-REPORTE_PATH = Path("reporte_estadistico.md")
+# Etapas que se muestran en consola con --perfilar (la traza y el CSV las tienen todas)
+MAX_FILAS_PERFIL: int = 10
 
 
 def verificar_estructura() -> bool:
@@ -41,101 +68,713 @@ def verificar_estructura() -> bool:
     return True
 
 
-def imprimir_intervalo(resultado: dict[str, float], descripcion: str) -> None:
-    """Imprime de forma formateada un intervalo de confianza."""
-    print(descripcion)
+def _tabla_perfil(resumen: "pd.DataFrame") -> "pd.DataFrame":
+    """Columnas del resumen de instrumentación que se muestran en consola."""
+    tabla = resumen[resumen["categoria"] != "cache"]
+    tabla = tabla[["etapa", "segundos", "porcentaje", "cpu_segundos", "rss_pico_mb", "filas_entrada"]]
+    return tabla.round({"segundos": 3, "porcentaje": 1, "cpu_segundos": 3, "rss_pico_mb": 1})
+
+
+def _texto_resultado(valor: object, sangria: str = "") -> str:
+    """Texto de consola para el resultado de una etapa (tablas, clases de resultado o dicts)."""
+    import dataclasses
+
+    import pandas as pd
+
+    if isinstance(valor, pd.DataFrame):
+        return textwrap.indent(valor.to_string(float_format="{:.4g}".format), sangria)
+    if dataclasses.is_dataclass(valor):
+        valor = {campo.name: getattr(valor, campo.name) for campo in dataclasses.fields(valor)}
+    if isinstance(valor, dict):
+        lineas = []
+        for clave, contenido in valor.items():
+            if isinstance(contenido, (pd.DataFrame, dict)) or dataclasses.is_dataclass(contenido):
+                lineas.append(f"{sangria}{clave}:")
+                lineas.append(_texto_resultado(contenido, sangria + "  "))
+            elif contenido is not None:
+                texto = f"{contenido:.4g}" if isinstance(contenido, float) else str(contenido)
+                lineas.append(f"{sangria}{clave} = {texto}")
+        return "\n".join(lineas)
+    return f"{sangria}{valor}"
+
+
+def _mostrar_objetivos(resultado: "ResultadoAnalisis", objetivos: Sequence[str]) -> None:
+    """Muestra el resultado de cada etapa pedida con ``--objetivos``.
+
+    Se muestra aunque la etapa se haya tomado de la caché, de modo que pedir
+    solo una sección siempre produce salida.
+    """
+    for objetivo in objetivos:
+        if objetivo.startswith("figura"):
+            valor = {clave: ruta.as_posix() for clave, ruta in resultado.figuras.items()}
+        elif objetivo in ("carga", "preparacion", "preparacion_cruda", "parcial", "datos_figuras"):
+            valor = {"n_muestra": resultado.n_muestra}
+        else:
+            valor = getattr(resultado, objetivo, None)
+        origen = "caché" if objetivo in resultado.etapas_reutilizadas else "recalculada"
+        print(f"===== {objetivo} ({origen}) =====")
+        print(_texto_resultado(valor) if valor not in (None, {}) else "Sin resultado.")
+        print()
+
+
+def main(
+    vista_previa: bool = False,
+    tamano_muestra: int = TAMANO_MUESTRA_DEFAULT,
+    objetivos: Optional[Sequence[str]] = None,
+    usar_cache: bool = True,
+    reanudar: bool = False,
+    cache_figuras_mb: float = FIGURAS_CACHE_MAX_MB,
+    cache_figuras_entradas: int = FIGURAS_CACHE_MAX_ENTRADAS,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras: bool = True,
+    silencioso: bool = False,
+    particiones: Optional[Sequence[str]] = None,
+    procesos: Optional[int] = None,
+    perfilar: Optional[Path] = None,
+    muestreador: Optional[str] = None,
+    ponderar: Optional[Path] = None,
+    depurar: Optional[Sequence[str]] = None,
+) -> None:
+    """Ejecuta todo el flujo de análisis estadístico.
+
+    Con ``vista_previa=True`` el pipeline corre sobre una muestra estratificada
+    por tratamiento de ``tamano_muestra`` filas y el reporte se marca como
+    aproximado, con cotas de error de muestreo para cada estadístico.
+
+    ``objetivos`` limita la ejecución a las etapas indicadas y sus
+    dependencias (por ejemplo ``["anova"]``) y muestra en consola el
+    resultado de cada una, se haya recalculado o no. Las etapas cuyas
+    entradas no cambiaron desde la última ejecución se toman de la caché en
+    disco.
+
+    Cada etapa terminada se guarda como punto de control en una carpeta de
+    ``corridas/``; se conservan las ``CORRIDAS_CONSERVADAS`` más recientes.
+    Con ``reanudar=True`` se continúa la corrida más reciente desde su última
+    etapa completada.
+
+    Las figuras se reutilizan de la caché de figuras cuando sus datos
+    agregados no cambiaron; ``cache_figuras_mb`` y ``cache_figuras_entradas``
+    limitan su tamaño (se desaloja lo menos usado). ``perfil_imagen`` elige
+    los formatos de salida; al final se informa el tamaño, el tiempo de
+    codificación y la memoria pico de cada archivo (también de las figuras
+    tomadas de la caché, con lo medido al dibujarlas). Con ``figuras=False``
+    solo se calcula la estadística y el reporte se escribe sin gráficas.
+
+    Los mensajes de las etapas se muestran en consola; con ``silencioso=True``
+    solo se muestran advertencias y el resumen final.
+
+    Los resultados se guardan también como artefacto en ``resultados/`` (o
+    ``resultados/vista_previa/``); :func:`renderizar` regenera el reporte a
+    partir de él sin volver a ejecutar el análisis.
+
+    Con ``particiones`` (carpetas o patrones glob de archivos ``.csv`` o de
+    Excel) las respuestas repartidas en esos archivos se analizan por
+    agregados parciales en ``procesos`` procesos, sin reunirlas en un solo
+    DataFrame (ver :mod:`src.particiones`).
+
+    Con ``perfilar`` se mide el tiempo, la CPU, la memoria y las filas de
+    cada etapa y figura: la traza (formato de Chrome) se escribe en esa ruta,
+    el resumen en el ``.csv`` del mismo nombre y las etapas más lentas se
+    muestran al final. ``muestreador`` (``pyinstrument`` o ``py-spy``) perfila
+    además la corrida completa por muestreo y guarda su salida junto a la
+    traza (o junto a :data:`src.config.TRAZA_PATH`).
+
+    Con ``ponderar`` (un JSON ``{factor: {nivel: proporción}}`` con las
+    marginales poblacionales) los descriptivos, intervalos, la prueba de
+    hipótesis y la ANOVA se ponderan por rastrillaje (ver
+    :mod:`src.ponderacion`).
+
+    Con ``depurar`` (nombres de :data:`src.calidad.REGLAS_CALIDAD`) se
+    excluyen antes del análisis las respuestas que marcan esas reglas y el
+    reporte cuenta cuántas excluyó cada una.
+    """
+    configurar_registro(silencioso)
+    if particiones is None and not verificar_estructura():
+        return
+    margenes = cargar_margenes(ponderar) if ponderar is not None else None
+
+    cache_figuras = (
+        CacheFiguras(
+            FIGURAS_CACHE_DIR, max_mb=cache_figuras_mb, max_entradas=cache_figuras_entradas
+        )
+        if usar_cache
+        else None
+    )
+    corrida = DirectorioCorrida.ultima(CORRIDAS_DIR) if reanudar else None
+    if corrida is None:
+        if reanudar:
+            print("No se encontró una corrida previa; se inicia una nueva.")
+        corrida = DirectorioCorrida.nueva(CORRIDAS_DIR)
+    else:
+        completadas = len(corrida.manifiesto["etapas"])
+        print(f"Reanudando la corrida '{corrida.ruta.as_posix()}' ({completadas} etapas completadas).")
+
+    instrumentacion = Instrumentacion() if perfilar is not None else None
+    ruta_muestreo = (perfilar or TRAZA_PATH).with_name(f"muestreo-{muestreador}")
+    medicion = instrumentacion.bloque("analisis") if instrumentacion else contextlib.nullcontext()
+    with muestreo(muestreador, ruta_muestreo), medicion:
+        resultado = ejecutar_analisis(
+            vista_previa=vista_previa,
+            tamano_muestra=tamano_muestra,
+            objetivos=objetivos,
+            figuras=figuras,
+            reporte=True,
+            artefacto=True,
+            perfil_imagen=perfil_imagen,
+            cache_dir=CACHE_DIR_DEFAULT if usar_cache else None,
+            cache_figuras=cache_figuras,
+            corrida=corrida,
+            particiones=particiones,
+            procesos_particiones=procesos,
+            instrumentacion=instrumentacion,
+            margenes=margenes,
+            reglas_calidad=depurar,
+        )
+
+    DirectorioCorrida.podar(CORRIDAS_DIR, conservar=CORRIDAS_CONSERVADAS)
+    if objetivos:
+        _mostrar_objetivos(resultado, objetivos)
+    if instrumentacion is not None:
+        ruta_traza = instrumentacion.escribir_traza(perfilar)
+        print("Etapas más lentas:")
+        print(_tabla_perfil(instrumentacion.resumen()).head(MAX_FILAS_PERFIL).to_string(index=False))
+        print(f"Traza de tiempos: '{ruta_traza.as_posix()}' (resumen en '.csv').")
+        print()
     print(
-        f"n = {resultado['n']:.0f}\n"
-        f"Media/Proporción = {resultado.get('media', resultado.get('p_hat', float('nan'))):.3f}\n"
-        f"Límite inferior = {resultado['limite_inferior']:.3f}\n"
-        f"Límite superior = {resultado['limite_superior']:.3f}\n"
-        f"Nivel de confianza = {100 * (1 - resultado['alpha']):.1f}%"
+        f"Etapas recalculadas: {len(resultado.etapas_recalculadas)}; "
+        f"reutilizadas desde caché: {len(resultado.etapas_reutilizadas)}."
     )
-    print()
+    if resultado.calidad is not None:
+        print(
+            f"Respuestas excluidas por calidad: {int(resultado.calidad['excluidas'].sum())} "
+            f"({', '.join(depurar or ()) or 'ninguna regla de exclusión'})."
+        )
+    if resultado.ponderacion is not None:
+        print(
+            f"Resultados ponderados por rastrillaje: n efectivo = "
+            f"{resultado.ponderacion.n_efectivo:.1f}, efecto de diseño = "
+            f"{resultado.ponderacion.efecto_diseno:.3f}."
+        )
+    if resultado.metricas_figuras is not None:
+        print("Archivos de imagen:")
+        print(tabla_metricas_figuras(resultado.metricas_figuras).to_string(index=False))
+        print()
+    if resultado.artefacto is not None:
+        print(f"Artefacto de resultados: '{resultado.artefacto.as_posix()}'.")
+    if resultado.reporte is not None and not figuras:
+        print(
+            f"Análisis completado sin gráficas. Se generó el archivo "
+            f"'{resultado.reporte.as_posix()}'."
+        )
+    elif resultado.reporte is not None:
+        figuras_dir = FIGURAS_DIR / "vista_previa" if vista_previa else FIGURAS_DIR
+        print(
+            f"Análisis completado. Las gráficas se guardaron en la carpeta "
+            f"'{figuras_dir.as_posix()}/' y se generó el archivo "
+            f"'{resultado.reporte.as_posix()}'."
+        )
 
 
-def main() -> None:
-    """Ejecuta todo el flujo de análisis estadístico."""
-    if not verificar_estructura():
+def renderizar(carpetas: Sequence[Path] = (ARTEFACTO_DIR,)) -> None:
+    """Regenera el reporte Markdown y HTML leyendo solo los artefactos guardados.
+
+    Con una sola carpeta el reporte se escribe en su ruta habitual. Con varias,
+    cada reporte se escribe dentro de la carpeta de su artefacto
+    (``reporte.md`` y ``reporte.html``) y se renderizan en paralelo.
+    """
+    if len(carpetas) == 1:
+        artefacto = cargar_artefacto(carpetas[0])
+        vista_previa = bool(artefacto["resultados"].get("vista_previa"))
+        reporte = REPORTE_VISTA_PREVIA_PATH if vista_previa else REPORTE_PATH
+        for destino in (reporte, reporte.with_suffix(".html")):
+            escribir_reporte(artefacto, destino)
+            print(f"Se generó el archivo '{destino.as_posix()}'.")
         return
 
-    FIGURAS_DIR.mkdir(exist_ok=True)
-    for archivo in FIGURAS_DIR.glob("*.png"):
-        archivo.unlink()
+    trabajos = [
+        (carpeta, (carpeta / "reporte.md", carpeta / "reporte.html")) for carpeta in carpetas
+    ]
+    escritas = renderizar_lote(trabajos)
+    print(f"Se generaron {len(escritas)} archivos de reporte en {len(carpetas)} carpetas.")
 
-    print("===== CARGA DE DATOS =====")
-    df = cargar_excel()
-    print()
 
-    print("===== PREPARACIÓN DE DATOS =====")
-    df_preparado = preparar_datos(df)
-    print("Columnas disponibles tras la preparación:")
-    print(list(df_preparado.columns))
-    print()
+def lote(
+    entradas: Sequence[str],
+    salida_dir: Path = LOTE_DIR,
+    procesos: Optional[int] = None,
+    memoria_mb: Optional[float] = None,
+    usar_cache: bool = True,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras: bool = True,
+    silencioso: bool = False,
+) -> None:
+    """Ejecuta el análisis sobre cada libro de ``entradas`` (carpetas o patrones glob).
+
+    Cada encuesta se escribe en su propia carpeta dentro de ``salida_dir`` y
+    al final se muestra y guarda la tabla resumen de todas ellas.
+    """
+    from src.lote import ARCHIVO_RESUMEN, ejecutar_lote
 
-    print("===== ANÁLISIS DESCRIPTIVO =====")
-    descriptivos = resumen_general(df_preparado)
-    resumen_grupos = resumen_por_grupo(
-        df_preparado, ["frecuencia_viaje", "grupo_edad", "tratamiento"]
+    configurar_registro(silencioso)
+    resumen = ejecutar_lote(
+        entradas,
+        salida_dir=salida_dir,
+        procesos=procesos,
+        memoria_mb=memoria_mb,
+        figuras=figuras,
+        perfil_imagen=perfil_imagen,
+        usar_cache=usar_cache,
     )
+    columnas = [
+        columna
+        for columna in (
+            "encuesta",
+            "estado",
+            "n",
+            "media_acuerdo",
+            "proporcion_a_favor",
+            "p_valor_t",
+            "p_interaccion",
+            "segundos",
+        )
+        if columna in resumen.columns
+    ]
+    print(resumen[columnas].to_string(index=False, float_format="{:.4g}".format))
+    errores = resumen.loc[resumen["estado"] == "error", ["encuesta", "error"]]
+    for encuesta, error in errores.itertuples(index=False):
+        print(f"Error en '{encuesta}': {error}")
+    print(
+        f"Se analizaron {len(resumen)} encuestas ({len(errores)} con error). "
+        f"Resumen: '{(Path(salida_dir) / ARCHIVO_RESUMEN).as_posix()}'."
+    )
+
 
-    print("===== INTERVALO DE CONFIANZA PARA LA MEDIA =====")
-    ic_media = intervalo_confianza_media(df_preparado["acuerdo_ampliacion"])
-    imprimir_intervalo(ic_media, "Intervalo de confianza para la media de acuerdo con la ampliación:")
+def segmentos(
+    factores: Sequence[str],
+    salida_dir: Path = SEGMENTOS_DIR,
+    procesos: Optional[int] = None,
+    usar_cache: bool = True,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras: bool = True,
+    silencioso: bool = False,
+) -> None:
+    """Ejecuta el análisis completo por separado para cada nivel de ``factores``.
 
-    print("===== INTERVALO DE CONFIANZA PARA LA PROPORCIÓN A FAVOR =====")
-    ic_prop = intervalo_confianza_proporcion(df_preparado["a_favor"])
-    imprimir_intervalo(ic_prop, "Intervalo de confianza para la proporción de personas a favor:")
+    Cada segmento se escribe en ``salida_dir/<factor>/<nivel>/`` con su propio
+    reporte, y ``salida_dir/indice.md`` enlaza todos los reportes.
+    """
+    from src.segmentos import ARCHIVO_INDICE, ejecutar_segmentos
 
-    print("===== PRUEBA DE HIPÓTESIS μ > 5 =====")
-    resultado_prueba = prueba_media_mayor_que_5(df_preparado["acuerdo_ampliacion"])
+    if not verificar_estructura():
+        return
+
+    configurar_registro(silencioso)
+    resumen = ejecutar_segmentos(
+        salida_dir=salida_dir,
+        factores=factores,
+        procesos=procesos,
+        figuras=figuras,
+        perfil_imagen=perfil_imagen,
+        usar_cache=usar_cache,
+    )
+    columnas = [
+        columna
+        for columna in (
+            "factor",
+            "nivel",
+            "estado",
+            "n",
+            "media_acuerdo",
+            "proporcion_a_favor",
+            "p_valor_t",
+            "segundos",
+        )
+        if columna in resumen.columns
+    ]
+    print(resumen[columnas].to_string(index=False, float_format="{:.4g}".format))
+    errores = resumen.loc[resumen["estado"] == "error", ["factor", "nivel", "error"]]
+    for factor, nivel, error in errores.itertuples(index=False):
+        print(f"Error en '{factor} = {nivel}': {error}")
+    print(
+        f"Se analizaron {len(resumen)} segmentos ({len(errores)} con error). "
+        f"Índice: '{(Path(salida_dir) / ARCHIVO_INDICE).as_posix()}'."
+    )
+
+
+def potencia(procesos: Optional[int] = None, silencioso: bool = False) -> None:
+    """Estima por simulación la potencia de la prueba t y de la ANOVA 2x3.
+
+    Las distribuciones de cada celda se ajustan a las respuestas del libro y
+    se muestra, para cada tamaño por celda, la potencia de cada prueba y el
+    menor tamaño que alcanza :data:`src.potencia.POTENCIA_OBJETIVO` (ver
+    :mod:`src.potencia`). Las simulaciones usan una semilla fija, de modo que
+    el resultado se repite entre corridas.
+    """
+    from src.cargar_datos import cargar_excel
+    from src.limpiar_preparar import preparar_datos
+    from src.potencia import POTENCIA_OBJETIVO, curvas_potencia, tamano_minimo
+
+    configurar_registro(silencioso)
+    if not verificar_estructura():
+        return
+
+    curvas = curvas_potencia(preparar_datos(cargar_excel(DATA_PATH)), max_workers=procesos)
+    print("Potencia por número de encuestados por celda:")
+    print(curvas.to_string(index=False, float_format="{:.3f}".format))
     print()
+    print(f"Menor número por celda con potencia ≥ {POTENCIA_OBJETIVO:.0%}:")
+    for prueba, n in tamano_minimo(curvas).items():
+        print(f"- {prueba}: {n if n is not None else 'no se alcanza en los tamaños evaluados'}")
 
-    print("===== ANOVA 2x3 =====")
-    resultado_anova = anova_2x3(df_preparado)
 
-    print("===== PRUEBAS DE NORMALIDAD =====")
-    resultado_normalidad: dict[str, dict[str, float | str]] = {}
-    resultado_normalidad["acuerdo"] = prueba_normalidad_acuerdo(df_preparado)
-    if resultado_anova.get("modelo") is not None:
-        resultado_normalidad["residuos_anova"] = prueba_normalidad_residuos(
-            resultado_anova.get("modelo")
+def vigilar(
+    intervalo: float,
+    espera: float,
+    usar_cache: bool = True,
+    cache_figuras_mb: float = FIGURAS_CACHE_MAX_MB,
+    cache_figuras_entradas: int = FIGURAS_CACHE_MAX_ENTRADAS,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras: bool = True,
+    silencioso: bool = False,
+) -> None:
+    """Analiza el libro de respuestas y rehace el análisis cada vez que cambia.
+
+    Se detiene con Ctrl+C. Cada actualización prepara solo las filas nuevas o
+    modificadas y recalcula solo las etapas cuyas entradas cambiaron (ver
+    :mod:`src.vigilancia`).
+    """
+    from src.vigilancia import EstadoVigilancia, vigilar as vigilar_libro
+
+    configurar_registro(silencioso)
+    if not verificar_estructura():
+        return
+
+    cache_figuras = (
+        CacheFiguras(
+            FIGURAS_CACHE_DIR, max_mb=cache_figuras_mb, max_entradas=cache_figuras_entradas
         )
+        if usar_cache
+        else None
+    )
+    estado = EstadoVigilancia(
+        DATA_PATH,
+        figuras=figuras,
+        perfil_imagen=perfil_imagen,
+        cache_dir=CACHE_DIR_DEFAULT if usar_cache else None,
+        cache_figuras=cache_figuras,
+    )
+    print(f"Vigilando '{DATA_PATH.as_posix()}' (Ctrl+C para terminar).")
+    try:
+        for actualizacion in vigilar_libro(estado, intervalo=intervalo, espera=espera):
+            resultado = actualizacion["resultado"]
+            print(
+                f"Actualización: {actualizacion['filas']} respuestas "
+                f"({actualizacion['nuevas']} nuevas o modificadas, "
+                f"{actualizacion['eliminadas']} eliminadas); "
+                f"etapas recalculadas: {len(resultado.etapas_recalculadas)}, "
+                f"reutilizadas: {len(resultado.etapas_reutilizadas)}; "
+                f"{actualizacion['segundos']:.1f} s. Reporte: '{resultado.reporte.as_posix()}'."
+            )
+    except KeyboardInterrupt:
+        print("Vigilancia terminada.")
 
-    columnas_opinion = ["acuerdo_ampliacion", "p2_economia", "p3_necesidad"]
-    df_correlaciones = df_preparado[columnas_opinion].corr()
-
-    print("===== GRÁFICAS =====")
-    rutas_figuras: dict[str, Path] = {}
-    rutas_figuras["hist_acuerdo"] = guardar_histograma_acuerdo(df_preparado, FIGURAS_DIR)
-    rutas_box = guardar_boxplots_por_factores(df_preparado, FIGURAS_DIR)
-    rutas_figuras.update(rutas_box)
-    rutas_figuras["barras_tratamientos"] = guardar_barras_por_tratamiento(
-        df_preparado, FIGURAS_DIR
-    )
-    rutas_figuras["correlaciones"] = guardar_mapa_correlacion(df_preparado, FIGURAS_DIR)
-
-    resultados = {
-        "n_muestra": int(len(df_preparado)),
-        "descriptivos": descriptivos,
-        "resumen_por_grupo": resumen_grupos,
-        "intervalos": {
-            "media": ic_media,
-            "proporcion": ic_prop,
-        },
-        "prueba_hipotesis": resultado_prueba,
-        "anova": resultado_anova,
-        "normalidad": resultado_normalidad,
-        "correlaciones": df_correlaciones,
-    }
-
-    generar_reporte_markdown(resultados, rutas_figuras, REPORTE_PATH)
 
-    print(
-        "Análisis completado. Las gráficas se guardaron en la carpeta 'figuras/' y se "
-        "generó el archivo 'reporte_estadistico.md'."
+def servir(host: str, puerto: int, silencioso: bool = False) -> None:
+    """Atiende consultas JSON sobre los datos preparados hasta que se interrumpa (Ctrl+C).
+
+    Ver las rutas disponibles en :mod:`src.servicio`.
+    """
+    from src.servicio import servir as servir_consultas
+
+    configurar_registro(silencioso)
+    if not verificar_estructura():
+        return
+    print(f"Servicio de consultas en http://{host}:{puerto} (Ctrl+C para terminar).")
+    try:
+        servir_consultas(DATA_PATH, host=host, puerto=puerto)
+    except KeyboardInterrupt:
+        print("Servicio terminado.")
+
+
+def _parsear_argumentos(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """Lee las opciones de línea de comandos."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--vista-previa",
+        action="store_true",
+        help="Ejecuta el análisis sobre una muestra estratificada (reporte aproximado).",
+    )
+    parser.add_argument(
+        "--tamano-muestra",
+        type=int,
+        default=TAMANO_MUESTRA_DEFAULT,
+        help="Número de filas de la muestra en modo vista previa.",
+    )
+    parser.add_argument(
+        "--objetivos",
+        nargs="+",
+        metavar="ETAPA",
+        help="Ejecuta solo estas etapas y sus dependencias (p. ej. 'anova').",
+    )
+    parser.add_argument(
+        "--reanudar",
+        action="store_true",
+        help="Continúa la corrida más reciente desde su última etapa completada.",
+    )
+    parser.add_argument(
+        "--sin-cache",
+        action="store_true",
+        help=(
+            "Recalcula todas las etapas, figuras y funciones estadísticas sin leer ni "
+            "escribir cachés en disco."
+        ),
+    )
+    parser.add_argument(
+        "--cache-figuras-mb",
+        type=float,
+        default=FIGURAS_CACHE_MAX_MB,
+        help="Tamaño máximo de la caché de figuras en MB.",
+    )
+    parser.add_argument(
+        "--cache-figuras-entradas",
+        type=int,
+        default=FIGURAS_CACHE_MAX_ENTRADAS,
+        help="Número máximo de entradas en la caché de figuras.",
     )
+    parser.add_argument(
+        "--perfil-imagen",
+        default=PERFIL_IMAGEN_DEFAULT,
+        help="Formatos y resolución de las figuras (impresion, web o vectorial).",
+    )
+    parser.add_argument(
+        "--sin-figuras",
+        action="store_true",
+        help="Solo estadística: no dibuja gráficas ni importa Matplotlib/Seaborn.",
+    )
+    parser.add_argument(
+        "--silencioso",
+        action="store_true",
+        help="Oculta los mensajes de las etapas; solo muestra advertencias y el resumen.",
+    )
+    parser.add_argument(
+        "--perfilar",
+        nargs="?",
+        type=Path,
+        const=TRAZA_PATH,
+        metavar="RUTA",
+        help=(
+            "Mide tiempo, CPU, memoria y filas de cada etapa y figura; escribe una traza "
+            f"de Chrome (por defecto '{TRAZA_PATH.as_posix()}') y un resumen CSV."
+        ),
+    )
+    parser.add_argument(
+        "--muestreo",
+        choices=sorted(PERFILADORES_MUESTREO),
+        help="Perfila además la corrida por muestreo con esta herramienta (si está instalada).",
+    )
+    parser.add_argument(
+        "--ponderar",
+        type=Path,
+        metavar="MARGENES.json",
+        help=(
+            "Pondera los resultados por rastrillaje a las marginales poblacionales del "
+            'JSON (p. ej. {"grupo_edad": {"Joven": 0.3, ...}, "frecuencia_viaje": {...}}).'
+        ),
+    )
+    parser.add_argument(
+        "--depurar",
+        nargs="*",
+        choices=list(REGLAS_CALIDAD),
+        metavar="REGLA",
+        help=(
+            "Excluye las respuestas que marcan estas reglas de calidad "
+            f"({', '.join(REGLAS_CALIDAD)}); sin reglas usa "
+            f"{', '.join(REGLAS_EXCLUSION_DEFAULT)}."
+        ),
+    )
+    parser.add_argument(
+        "--renderizar",
+        nargs="*",
+        type=Path,
+        metavar="CARPETA",
+        help=(
+            "No ejecuta el análisis: regenera el reporte Markdown y HTML desde el "
+            f"artefacto de resultados (por defecto '{ARTEFACTO_DIR.as_posix()}'). "
+            "Con varias carpetas, cada reporte se escribe dentro de la suya."
+        ),
+    )
+    parser.add_argument(
+        "--lote",
+        nargs="+",
+        metavar="ENTRADA",
+        help=(
+            "Analiza cada libro de estas carpetas o patrones glob (p. ej. 'data/regiones/*.xlsx'), "
+            "cada uno en su propia carpeta de salida, y arma un resumen conjunto."
+        ),
+    )
+    parser.add_argument(
+        "--particiones",
+        nargs="+",
+        metavar="ENTRADA",
+        help=(
+            "Analiza como una sola encuesta las respuestas repartidas en estos archivos "
+            "(carpetas o patrones glob de .csv/.xlsx), combinando agregados parciales "
+            "calculados en paralelo."
+        ),
+    )
+    parser.add_argument(
+        "--vigilar",
+        action="store_true",
+        help=(
+            "Queda en ejecución y rehace el análisis cada vez que cambia el libro de "
+            "respuestas, recalculando solo lo afectado."
+        ),
+    )
+    parser.add_argument(
+        "--intervalo",
+        type=float,
+        default=INTERVALO_DEFAULT,
+        help="Segundos entre revisiones del libro en modo vigilancia.",
+    )
+    parser.add_argument(
+        "--espera",
+        type=float,
+        default=ESPERA_DEFAULT,
+        help=(
+            "Segundos que el libro debe quedar sin cambios antes de analizarlo "
+            "en modo vigilancia."
+        ),
+    )
+    parser.add_argument(
+        "--potencia",
+        action="store_true",
+        help=(
+            "No ejecuta el análisis: estima por simulación la potencia de la prueba t y "
+            "de la ANOVA 2x3 para distintos tamaños de muestra por celda."
+        ),
+    )
+    parser.add_argument(
+        "--servir",
+        action="store_true",
+        help=(
+            "Prepara los datos una vez y atiende consultas JSON locales (intervalos, "
+            "prueba t, ANOVA, resúmenes y correlaciones) por HTTP."
+        ),
+    )
+    parser.add_argument(
+        "--host",
+        default=HOST_DEFAULT,
+        help="Dirección en la que escucha el servicio de consultas.",
+    )
+    parser.add_argument(
+        "--puerto",
+        type=int,
+        default=PUERTO_DEFAULT,
+        help="Puerto del servicio de consultas.",
+    )
+    parser.add_argument(
+        "--segmentos",
+        nargs="*",
+        metavar="FACTOR",
+        help=(
+            "Ejecuta el análisis completo para cada nivel de estos factores "
+            "(por defecto grupo_edad, frecuencia_viaje y tratamiento), con un "
+            "reporte por segmento y un índice."
+        ),
+    )
+    parser.add_argument(
+        "--salida-segmentos",
+        type=Path,
+        default=SEGMENTOS_DIR,
+        help="Carpeta de salida del modo por segmentos.",
+    )
+    parser.add_argument(
+        "--salida-lote",
+        type=Path,
+        default=LOTE_DIR,
+        help="Carpeta de salida del modo lote.",
+    )
+    parser.add_argument(
+        "--procesos",
+        type=int,
+        help=(
+            "Procesos en paralelo de los modos lote, particiones, segmentos y potencia "
+            "(por defecto, uno por CPU)."
+        ),
+    )
+    parser.add_argument(
+        "--memoria-mb",
+        type=float,
+        help="Límite de memoria por proceso del modo lote, en MB.",
+    )
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    main()
+    argumentos = _parsear_argumentos()
+    if not argumentos.sin_cache:
+        # Los resultados de las funciones estadísticas persisten entre ejecuciones
+        configurar_memoizacion(MEMO_DIR)
+    if argumentos.renderizar is not None:
+        renderizar(argumentos.renderizar or (ARTEFACTO_DIR,))
+    elif argumentos.lote:
+        lote(
+            argumentos.lote,
+            salida_dir=argumentos.salida_lote,
+            procesos=argumentos.procesos,
+            memoria_mb=argumentos.memoria_mb,
+            usar_cache=not argumentos.sin_cache,
+            perfil_imagen=argumentos.perfil_imagen,
+            figuras=not argumentos.sin_figuras,
+            silencioso=argumentos.silencioso,
+        )
+    elif argumentos.potencia:
+        potencia(argumentos.procesos, silencioso=argumentos.silencioso)
+    elif argumentos.servir:
+        servir(argumentos.host, argumentos.puerto, silencioso=argumentos.silencioso)
+    elif argumentos.vigilar:
+        vigilar(
+            argumentos.intervalo,
+            argumentos.espera,
+            usar_cache=not argumentos.sin_cache,
+            cache_figuras_mb=argumentos.cache_figuras_mb,
+            cache_figuras_entradas=argumentos.cache_figuras_entradas,
+            perfil_imagen=argumentos.perfil_imagen,
+            figuras=not argumentos.sin_figuras,
+            silencioso=argumentos.silencioso,
+        )
+    elif argumentos.segmentos is not None:
+        from src.segmentos import FACTORES_SEGMENTO
+
+        segmentos(
+            argumentos.segmentos or FACTORES_SEGMENTO,
+            salida_dir=argumentos.salida_segmentos,
+            procesos=argumentos.procesos,
+            usar_cache=not argumentos.sin_cache,
+            perfil_imagen=argumentos.perfil_imagen,
+            figuras=not argumentos.sin_figuras,
+            silencioso=argumentos.silencioso,
+        )
+    else:
+        main(
+            vista_previa=argumentos.vista_previa,
+            tamano_muestra=argumentos.tamano_muestra,
+            objetivos=argumentos.objetivos,
+            usar_cache=not argumentos.sin_cache,
+            reanudar=argumentos.reanudar,
+            cache_figuras_mb=argumentos.cache_figuras_mb,
+            cache_figuras_entradas=argumentos.cache_figuras_entradas,
+            perfil_imagen=argumentos.perfil_imagen,
+            figuras=not argumentos.sin_figuras,
+            silencioso=argumentos.silencioso,
+            particiones=argumentos.particiones,
+            procesos=argumentos.procesos,
+            perfilar=argumentos.perfilar,
+            muestreador=argumentos.muestreo,
+            ponderar=argumentos.ponderar,
+            depurar=(
+                argumentos.depurar or REGLAS_EXCLUSION_DEFAULT
+                if argumentos.depurar is not None
+                else None
+            ),
+        )
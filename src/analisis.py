@@ -0,0 +1,1125 @@
+"""API del análisis estadístico completo.
+
+:func:`ejecutar_analisis` ejecuta las etapas del análisis como un grafo
+(:class:`src.pipeline.Pipeline`) y devuelve un
+:class:`src.resultados.ResultadoAnalisis`. Por defecto no tiene efectos
+secundarios: no escribe cachés, figuras ni reportes, y no imprime nada.
+Los mensajes de cada etapa se emiten con :mod:`logging` (logger ``src``);
+:func:`configurar_registro` los muestra en consola como lo hace ``main.py``.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Sequence
+
+import pandas as pd
+
+from .bayesiano import analisis_bayesiano, analisis_bayesiano_desde_conteos
+from .cache_figuras import CacheFiguras, dibujar_con_cache
+from .cargar_datos import cargar_excel
+from .config import (
+    ARTEFACTO_DIR,
+    DATA_PATH,
+    DATOS_COMPARTIDOS_DIR,
+    FIGURAS_DIR,
+    PERFIL_IMAGEN_DEFAULT,
+    REPORTE_PATH,
+    REPORTE_VISTA_PREVIA_PATH,
+)
+from .descriptivos import resumen_general, resumen_general_desde_conteos, resumen_por_grupo
+from .instrumentacion import Instrumentacion
+from .limpiar_preparar import preparar_datos
+from .pipeline import (
+    CACHE_DIR_DEFAULT,
+    DirectorioCorrida,
+    Pipeline,
+    huella_archivo,
+    huella_codigo_fuente,
+)
+from .artefacto import construir_artefacto, guardar_artefacto
+from .reporte_markdown import escribir_reporte
+from .resultados import (
+    Descriptivos,
+    IntervaloConfianza,
+    Ponderacion,
+    PruebaHipotesis,
+    PruebaNormalidad,
+    ResultadoAnalisis,
+    ResultadoAnova,
+    ResultadoBayesiano,
+    ResultadoImputacion,
+)
+from .segmentos import Segmento
+from .vigilancia import DatosPreparados
+from .vista_previa import (
+    TAMANO_MUESTRA_DEFAULT,
+    cotas_error_muestreo,
+    muestra_reservorio_estratificada,
+)
+
+# SciPy, statsmodels, Matplotlib y Seaborn tardan en importarse; los módulos
+# que dependen de ellos se importan dentro de las etapas que los usan, de modo
+# que una corrida sin figuras nunca carga Matplotlib ni Seaborn.
+
+logger = logging.getLogger(__name__)
+
+
+def configurar_registro(silencioso: bool = False) -> None:
+    """Muestra en consola los mensajes del análisis.
+
+    Con ``silencioso=True`` solo se muestran advertencias y errores.
+    """
+    raiz = logging.getLogger("src")
+    if not raiz.handlers:
+        manejador = logging.StreamHandler(sys.stdout)
+        manejador.setFormatter(logging.Formatter("%(message)s"))
+        raiz.addHandler(manejador)
+    raiz.setLevel(logging.WARNING if silencioso else logging.INFO)
+
+
+def _registrar_intervalo(resultado: dict[str, float], descripcion: str) -> None:
+    """Registra de forma formateada un intervalo de confianza."""
+    logger.info(
+        f"{descripcion}\n"
+        f"n = {resultado['n']:.0f}\n"
+        f"Media/Proporción = {resultado.get('media', resultado.get('p_hat', float('nan'))):.3f}\n"
+        f"Límite inferior = {resultado['limite_inferior']:.3f}\n"
+        f"Límite superior = {resultado['limite_superior']:.3f}\n"
+        f"Nivel de confianza = {100 * (1 - resultado['alpha']):.1f}%\n"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Etapas del pipeline. Cada función recibe como argumentos con nombre los
+# resultados de las etapas de las que depende.
+# ---------------------------------------------------------------------------
+
+
+def _etapa_carga(
+    ruta_datos: Path, huella_datos: str, vista_previa: bool, tamano_muestra: int
+) -> tuple[pd.DataFrame, dict[str, int]]:
+    logger.info("===== CARGA DE DATOS =====")
+    poblacion_estratos: dict[str, int] = {}
+    if vista_previa:
+        df, poblacion_estratos = muestra_reservorio_estratificada(
+            ruta_datos, tamano=tamano_muestra
+        )
+        logger.info(
+            "Vista previa: %d filas muestreadas de %d respuestas.",
+            len(df),
+            sum(poblacion_estratos.values()),
+        )
+    else:
+        df = cargar_excel(ruta_datos)
+    logger.info("")
+    return df, poblacion_estratos
+
+
+def _etapa_segmento(segmento: Segmento) -> pd.DataFrame:
+    logger.info("===== SEGMENTO %s = %s =====", segmento.factor, segmento.nivel)
+    df_segmento = segmento.cargar()
+    logger.info("%d respuestas en el segmento.\n", len(df_segmento))
+    return df_segmento
+
+
+def _etapa_preparado(preparado: DatosPreparados) -> pd.DataFrame:
+    logger.info("===== DATOS PREPARADOS EN MEMORIA =====")
+    logger.info("%d respuestas.\n", len(preparado.datos))
+    return preparado.datos
+
+
+def _etapa_resumen_grupos_segmento(
+    preparacion: pd.DataFrame, segmento: Segmento
+) -> pd.DataFrame:
+    # Las celdas del segmento ya se calcularon sobre todas las respuestas
+    logger.info("Resumen por grupos:\n%s\n", segmento.resumen_grupos)
+    return segmento.resumen_grupos
+
+
+def _etapa_preparacion(carga: tuple[pd.DataFrame, dict[str, int]]) -> pd.DataFrame:
+    logger.info("===== PREPARACIÓN DE DATOS =====")
+    df_preparado = preparar_datos(carga[0])
+    logger.info("Columnas disponibles tras la preparación:\n%s\n", list(df_preparado.columns))
+    return df_preparado
+
+
+def _etapa_calidad(preparacion_cruda: pd.DataFrame, reglas: tuple[str, ...]) -> dict[str, object]:
+    from .calidad import depurar
+
+    logger.info("===== CONTROL DE CALIDAD DE LAS RESPUESTAS =====")
+    return depurar(preparacion_cruda, reglas)
+
+
+def _etapa_depuracion(preparacion_cruda: pd.DataFrame, calidad: dict[str, object]) -> pd.DataFrame:
+    return preparacion_cruda[~calidad["excluidas"].to_numpy()]
+
+
+def _etapa_ponderacion(
+    preparacion: pd.DataFrame, margenes: dict[str, dict[str, float]]
+) -> dict[str, object]:
+    from .ponderacion import ponderar
+
+    logger.info("===== PONDERACIÓN POR RASTRILLAJE =====")
+    return ponderar(preparacion, margenes)
+
+
+def _pesos(ponderacion: Optional[dict[str, object]]) -> Optional[pd.Series]:
+    return ponderacion["pesos"] if ponderacion is not None else None
+
+
+def _etapa_descriptivos(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> dict:
+    logger.info("===== ANÁLISIS DESCRIPTIVO =====")
+    return resumen_general(preparacion, pesos=_pesos(ponderacion))
+
+
+def _etapa_resumen_grupos(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> pd.DataFrame:
+    return resumen_por_grupo(
+        preparacion, ["frecuencia_viaje", "grupo_edad", "tratamiento"], pesos=_pesos(ponderacion)
+    )
+
+
+def _etapa_ic_media(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> dict[str, float]:
+    from .intervalos_confianza import intervalo_confianza_media
+
+    logger.info("===== INTERVALO DE CONFIANZA PARA LA MEDIA =====")
+    ic_media = intervalo_confianza_media(
+        preparacion["acuerdo_ampliacion"], pesos=_pesos(ponderacion)
+    )
+    _registrar_intervalo(ic_media, "Intervalo de confianza para la media de acuerdo con la ampliación:")
+    return ic_media
+
+
+def _etapa_ic_proporcion(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> dict[str, float]:
+    from .intervalos_confianza import intervalo_confianza_proporcion
+
+    logger.info("===== INTERVALO DE CONFIANZA PARA LA PROPORCIÓN A FAVOR =====")
+    ic_prop = intervalo_confianza_proporcion(preparacion["a_favor"], pesos=_pesos(ponderacion))
+    _registrar_intervalo(ic_prop, "Intervalo de confianza para la proporción de personas a favor:")
+    return ic_prop
+
+
+def _etapa_prueba_hipotesis(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> dict[str, float]:
+    from .prueba_hipotesis import prueba_media_mayor_que_5
+
+    logger.info("===== PRUEBA DE HIPÓTESIS μ > 5 =====")
+    resultado_prueba = prueba_media_mayor_que_5(
+        preparacion["acuerdo_ampliacion"], pesos=_pesos(ponderacion)
+    )
+    logger.info("")
+    return resultado_prueba
+
+
+def _etapa_anova(
+    preparacion: pd.DataFrame, ponderacion: Optional[dict[str, object]] = None
+) -> dict:
+    from .diseno_factorial import anova_2x3
+
+    logger.info("===== ANOVA 2x3 =====")
+    return anova_2x3(preparacion, pesos=_pesos(ponderacion))
+
+
+def _etapa_anova_segmento(preparacion: pd.DataFrame, segmento: Segmento) -> dict:
+    # Dentro de un segmento al menos uno de los factores del diseño es
+    # constante: la ANOVA 2x3 no aplica y no hay residuos que probar.
+    logger.info("===== ANOVA 2x3 =====")
+    logger.info("No aplica en el segmento %s = %s.\n", segmento.factor, segmento.nivel)
+    return {
+        "exito": False,
+        "mensaje": "La ANOVA 2x3 no aplica al análisis por segmentos.",
+        "tabla": None,
+        "tabla_texto": "",
+        "conclusion": (
+            f"El segmento fija {segmento.factor} = {segmento.nivel}, por lo que el diseño "
+            "factorial 2x3 no se evalúa; consulte el reporte de todas las respuestas."
+        ),
+    }
+
+
+def _etapa_normalidad(preparacion: pd.DataFrame, anova: dict) -> dict:
+    from .diagnosticos import prueba_normalidad_acuerdo, prueba_normalidad_valores_residuales
+    from .diseno_factorial import residuos_anova_2x3
+
+    logger.info("===== PRUEBAS DE NORMALIDAD =====")
+    resultado_normalidad: dict[str, dict[str, float | str]] = {}
+    resultado_normalidad["acuerdo"] = prueba_normalidad_acuerdo(preparacion)
+    if anova.get("exito"):
+        resultado_normalidad["residuos_anova"] = prueba_normalidad_valores_residuales(
+            residuos_anova_2x3(preparacion)
+        )
+    return resultado_normalidad
+
+
+def _etapa_imputacion(preparacion: pd.DataFrame) -> Optional[dict]:
+    from .imputacion import COLUMNAS_LIKERT, analisis_imputado
+
+    incompletos = int(preparacion[list(COLUMNAS_LIKERT)].isna().any(axis=1).sum())
+    if incompletos == 0:
+        return None
+    logger.info("===== IMPUTACIÓN MÚLTIPLE =====")
+    resultado_imputacion = analisis_imputado(preparacion)
+    logger.info("Encuestados con respuestas incompletas: %d", incompletos)
+    _registrar_intervalo(
+        resultado_imputacion["intervalos"]["media"],
+        f"Intervalo combinado (reglas de Rubin, m = {resultado_imputacion['m']}):",
+    )
+    return resultado_imputacion
+
+
+def _etapa_bayesiano(preparacion: pd.DataFrame) -> dict:
+    logger.info("===== ANÁLISIS BAYESIANO =====")
+    return _registrar_bayesiano(analisis_bayesiano(preparacion))
+
+
+def _registrar_bayesiano(resultado_bayesiano: dict) -> dict:
+    posterior_media = resultado_bayesiano["general"]["media"]
+    logger.info(
+        "P(μ > %.0f | datos) = %.3f\n",
+        posterior_media["umbral"],
+        posterior_media["prob_mayor_umbral"],
+    )
+    return resultado_bayesiano
+
+
+def _etapa_correlaciones(preparacion: pd.DataFrame) -> pd.DataFrame:
+    columnas_opinion = ["acuerdo_ampliacion", "p2_economia", "p3_necesidad"]
+    return preparacion[columnas_opinion].corr()
+
+
+# ---------------------------------------------------------------------------
+# Etapas del modo por particiones: reciben el parcial combinado de todos los
+# archivos (ver src/particiones.py) en lugar del DataFrame preparado.
+# ---------------------------------------------------------------------------
+
+
+def _etapa_parcial(
+    archivos: list[Path], huellas: list[str], procesos: Optional[int], tamano_lote: int
+) -> dict[str, object]:
+    from .particiones import reducir_particiones
+
+    logger.info("===== CARGA POR PARTICIONES =====")
+    parcial = reducir_particiones(archivos, procesos=procesos, tamano_lote=tamano_lote)
+    logger.info("%d respuestas en %d archivos.\n", parcial["filas"], len(archivos))
+    if parcial["fuera_rango"] > 0:
+        logger.warning(
+            "Advertencia: se encontraron %d registros con edades fuera del rango "
+            "definido (16 años en adelante).",
+            parcial["fuera_rango"],
+        )
+    return parcial
+
+
+def _etapa_descriptivos_parcial(parcial: dict[str, object]) -> dict:
+    from .particiones import COLUMNAS_OPINION, conteos_variable
+
+    logger.info("===== ANÁLISIS DESCRIPTIVO =====")
+    return resumen_general_desde_conteos(
+        {columna: conteos_variable(parcial, columna) for columna in COLUMNAS_OPINION}
+    )
+
+
+def _etapa_resumen_grupos_parcial(parcial: dict[str, object]) -> pd.DataFrame:
+    from .particiones import celdas_desde_parcial
+
+    resumen = celdas_desde_parcial(parcial).drop(columns="suma_cuadrados")
+    logger.info("Resumen por grupos:\n%s\n", resumen)
+    return resumen
+
+
+def _etapa_ic_media_parcial(parcial: dict[str, object]) -> dict[str, float]:
+    from .intervalos_confianza import intervalo_media_desde_momentos
+    from .particiones import momentos_acuerdo
+
+    logger.info("===== INTERVALO DE CONFIANZA PARA LA MEDIA =====")
+    ic_media = intervalo_media_desde_momentos(*momentos_acuerdo(parcial))
+    _registrar_intervalo(ic_media, "Intervalo de confianza para la media de acuerdo con la ampliación:")
+    return ic_media
+
+
+def _etapa_ic_proporcion_parcial(parcial: dict[str, object]) -> dict[str, float]:
+    from .intervalos_confianza import intervalo_proporcion_desde_conteos
+    from .particiones import a_favor_desde_parcial
+
+    logger.info("===== INTERVALO DE CONFIANZA PARA LA PROPORCIÓN A FAVOR =====")
+    ic_prop = intervalo_proporcion_desde_conteos(*a_favor_desde_parcial(parcial))
+    _registrar_intervalo(ic_prop, "Intervalo de confianza para la proporción de personas a favor:")
+    return ic_prop
+
+
+def _etapa_prueba_hipotesis_parcial(parcial: dict[str, object]) -> dict[str, float]:
+    from .particiones import momentos_acuerdo
+    from .prueba_hipotesis import prueba_media_desde_momentos
+
+    logger.info("===== PRUEBA DE HIPÓTESIS μ > 5 =====")
+    resultado_prueba = prueba_media_desde_momentos(*momentos_acuerdo(parcial))
+    logger.info("")
+    return resultado_prueba
+
+
+def _etapa_anova_parcial(parcial: dict[str, object]) -> dict:
+    from .diseno_factorial import anova_2x3_desde_celdas
+    from .particiones import celdas_desde_parcial
+
+    logger.info("===== ANOVA 2x3 =====")
+    return anova_2x3_desde_celdas(celdas_desde_parcial(parcial))
+
+
+def _etapa_normalidad_parcial(parcial: dict[str, object], anova: dict) -> dict:
+    from .diagnosticos import prueba_normalidad_acuerdo, prueba_normalidad_valores_residuales
+    from .particiones import muestra_acuerdo, residuos_anova
+
+    logger.info("===== PRUEBAS DE NORMALIDAD =====")
+    resultado_normalidad: dict[str, dict[str, float | str]] = {}
+    resultado_normalidad["acuerdo"] = prueba_normalidad_acuerdo(
+        pd.DataFrame({"acuerdo_ampliacion": muestra_acuerdo(parcial)})
+    )
+    if anova.get("exito"):
+        resultado_normalidad["residuos_anova"] = prueba_normalidad_valores_residuales(
+            residuos_anova(parcial)
+        )
+    return resultado_normalidad
+
+
+def _etapa_imputacion_parcial(parcial: dict[str, object]) -> None:
+    if parcial["incompletos"] > 0:
+        logger.warning(
+            "Hay %d encuestados con respuestas incompletas; la imputación múltiple "
+            "necesita las filas individuales y no se ejecuta en el modo por particiones.",
+            parcial["incompletos"],
+        )
+    return None
+
+
+def _etapa_bayesiano_parcial(parcial: dict[str, object]) -> dict:
+    from .particiones import tablas_bayesianas
+
+    logger.info("===== ANÁLISIS BAYESIANO =====")
+    return _registrar_bayesiano(analisis_bayesiano_desde_conteos(*tablas_bayesianas(parcial)))
+
+
+def _etapa_correlaciones_parcial(parcial: dict[str, object]) -> pd.DataFrame:
+    from .particiones import correlaciones_desde_parcial
+
+    return correlaciones_desde_parcial(parcial)
+
+
+def _etapa_datos_figuras_parcial(parcial: dict[str, object]) -> dict[str, object]:
+    from .particiones import datos_figuras_desde_parcial
+
+    return datos_figuras_desde_parcial(parcial)
+
+
+def _etapa_datos_figuras(preparacion: pd.DataFrame) -> dict[str, object]:
+    """Resume las respuestas en las tablas agregadas que dibujan las gráficas.
+
+    Es lo único que se envía a los procesos que dibujan y lo que identifica
+    cada figura en la caché; su tamaño no depende del número de encuestados.
+    """
+    from .graficos import (
+        conteos_acuerdo,
+        estadisticos_boxplot,
+        matriz_correlacion,
+        resumen_por_tratamiento,
+    )
+
+    return {
+        "conteos_acuerdo": conteos_acuerdo(preparacion),
+        "boxplots": {
+            factor: estadisticos_boxplot(preparacion, factor)
+            for factor in ("frecuencia_viaje", "grupo_edad")
+        },
+        "resumen_tratamientos": resumen_por_tratamiento(preparacion),
+        "correlaciones": matriz_correlacion(preparacion),
+    }
+
+
+def _resultado_figuras(
+    rutas: dict[str, Path], metricas: list[dict[str, object]]
+) -> dict[str, object]:
+    """Acompaña las rutas de una etapa de figuras con sus métricas de archivo.
+
+    Las figuras copiadas desde la caché traen las métricas medidas al
+    dibujarlas; si no las hay, solo se informa el tamaño de cada archivo.
+    ``huellas`` guarda el SHA-256 de cada archivo para validar la etapa al
+    reutilizarla.
+    """
+    from .graficos import describir_archivo
+
+    if not metricas:
+        metricas = [
+            {**describir_archivo(clave, ruta), "segundos": None, "memoria_pico_mb": None}
+            for clave, ruta in rutas.items()
+        ]
+    huellas = {clave: huella_archivo(Path(ruta)) for clave, ruta in rutas.items()}
+    return {"rutas": rutas, "metricas": metricas, "huellas": huellas}
+
+
+def _etapa_figura_histograma(
+    datos_figuras: dict[str, object],
+    figuras_dir: Path,
+    perfil: str,
+    cache_figuras: Optional[CacheFiguras],
+) -> dict[str, object]:
+    from .graficos import extraer_metricas, guardar_histograma_acuerdo, rutas_salida
+
+    conteos = datos_figuras["conteos_acuerdo"]
+    destinos = rutas_salida(figuras_dir / "hist_acuerdo.png", perfil)
+
+    def dibujar() -> dict[str, Path]:
+        guardar_histograma_acuerdo(None, figuras_dir, conteos=conteos, perfil=perfil)
+        return destinos
+
+    rutas, metricas = dibujar_con_cache(
+        cache_figuras,
+        "hist_acuerdo",
+        conteos,
+        destinos,
+        dibujar,
+        {"perfil": perfil},
+        metricas=extraer_metricas,
+    )
+    return _resultado_figuras(rutas, metricas)
+
+
+def _etapa_figuras_boxplots(
+    datos_figuras: dict[str, object],
+    figuras_dir: Path,
+    perfil: str,
+    cache_figuras: Optional[CacheFiguras],
+) -> dict[str, object]:
+    from .graficos import extraer_metricas, guardar_boxplots_por_factores, rutas_salida
+
+    estadisticos = datos_figuras["boxplots"]
+    destinos = {
+        **rutas_salida(figuras_dir / "box_frecuencia.png", perfil),
+        **rutas_salida(figuras_dir / "box_edad.png", perfil),
+    }
+
+    def dibujar() -> dict[str, Path]:
+        guardar_boxplots_por_factores(None, figuras_dir, estadisticos=estadisticos, perfil=perfil)
+        return destinos
+
+    rutas, metricas = dibujar_con_cache(
+        cache_figuras,
+        "boxplots",
+        estadisticos,
+        destinos,
+        dibujar,
+        {"perfil": perfil},
+        metricas=extraer_metricas,
+    )
+    return _resultado_figuras(rutas, metricas)
+
+
+def _etapa_figura_barras(
+    datos_figuras: dict[str, object],
+    figuras_dir: Path,
+    perfil: str,
+    cache_figuras: Optional[CacheFiguras],
+) -> dict[str, object]:
+    from .graficos import extraer_metricas, guardar_barras_por_tratamiento, rutas_salida
+
+    resumen = datos_figuras["resumen_tratamientos"]
+    destinos = rutas_salida(figuras_dir / "barras_tratamientos.png", perfil)
+
+    def dibujar() -> dict[str, Path]:
+        guardar_barras_por_tratamiento(None, figuras_dir, resumen=resumen, perfil=perfil)
+        return destinos
+
+    rutas, metricas = dibujar_con_cache(
+        cache_figuras,
+        "barras_tratamientos",
+        resumen,
+        destinos,
+        dibujar,
+        {"perfil": perfil},
+        metricas=extraer_metricas,
+    )
+    return _resultado_figuras(rutas, metricas)
+
+
+def _etapa_figura_correlaciones(
+    datos_figuras: dict[str, object],
+    figuras_dir: Path,
+    perfil: str,
+    cache_figuras: Optional[CacheFiguras],
+) -> dict[str, object]:
+    from .graficos import extraer_metricas, guardar_mapa_correlacion, rutas_salida
+
+    matriz = datos_figuras["correlaciones"]
+    destinos = rutas_salida(figuras_dir / "correlaciones.png", perfil)
+
+    def dibujar() -> dict[str, Path]:
+        guardar_mapa_correlacion(None, figuras_dir, correlaciones=matriz, perfil=perfil)
+        return destinos
+
+    rutas, metricas = dibujar_con_cache(
+        cache_figuras,
+        "correlaciones",
+        matriz,
+        destinos,
+        dibujar,
+        {"perfil": perfil},
+        metricas=extraer_metricas,
+    )
+    return _resultado_figuras(rutas, metricas)
+
+
+def _etapa_cotas(
+    carga: tuple[pd.DataFrame, dict[str, int]], preparacion: pd.DataFrame
+) -> dict[str, object]:
+    logger.info("===== COTAS DE ERROR DE MUESTREO =====")
+    cotas = cotas_error_muestreo(preparacion, carga[1])
+    logger.info("%s\n", cotas.to_string(index=False))
+    return {
+        "n_muestra": int(cotas.attrs["n_muestra"]),
+        "n_poblacion": int(cotas.attrs["n_poblacion"]),
+        "cotas": cotas,
+    }
+
+
+def _n_muestra(resultados: dict[str, object]) -> int:
+    """Número de respuestas analizadas, con o sin particiones (0 si no se cargaron)."""
+    if resultados.get("preparacion") is not None:
+        return int(len(resultados["preparacion"]))
+    if resultados.get("parcial") is not None:
+        return int(resultados["parcial"]["filas"])
+    return 0
+
+
+def _etapa_artefacto(artefacto_dir: Optional[Path], **entradas: object) -> dict[str, object]:
+    rutas_figuras: dict[str, Path] = {}
+    metricas_figuras: list[dict[str, object]] = []
+    for nombre in ETAPAS_FIGURAS:
+        if nombre in entradas:
+            rutas_figuras.update(entradas[nombre]["rutas"])
+            metricas_figuras.extend(entradas[nombre]["metricas"])
+
+    resultados = {
+        "n_muestra": _n_muestra(entradas),
+        "descriptivos": entradas["descriptivos"],
+        "resumen_por_grupo": entradas["resumen_grupos"],
+        "intervalos": {
+            "media": entradas["ic_media"],
+            "proporcion": entradas["ic_proporcion"],
+        },
+        "prueba_hipotesis": entradas["prueba_hipotesis"],
+        "anova": entradas["anova"],
+        "normalidad": entradas["normalidad"],
+        "bayesiano": entradas["bayesiano"],
+        "imputacion": entradas["imputacion"],
+        "correlaciones": entradas["correlaciones"],
+        "metricas_figuras": pd.DataFrame(metricas_figuras),
+    }
+    if "cotas" in entradas:
+        resultados["vista_previa"] = entradas["cotas"]
+    if "calidad" in entradas:
+        from .calidad import resumen_calidad
+
+        resultados["calidad"] = resumen_calidad(entradas["calidad"])
+    if "ponderacion" in entradas:
+        from .ponderacion import resumen_ponderacion
+
+        resultados["ponderacion"] = resumen_ponderacion(entradas["ponderacion"])
+
+    artefacto = construir_artefacto(resultados, rutas_figuras)
+    ruta = guardar_artefacto(artefacto, artefacto_dir) if artefacto_dir is not None else None
+    return {"artefacto": artefacto, "ruta": ruta}
+
+
+def _etapa_reporte(artefacto: dict[str, object], reporte_path: Path) -> Path:
+    return escribir_reporte(artefacto["artefacto"], reporte_path)
+
+
+# Etapas estadísticas en el orden en que se registran, para los datos
+# preparados y para el parcial del modo por particiones.
+ETAPAS_ESTADISTICAS: dict[str, object] = {
+    "datos_figuras": _etapa_datos_figuras,
+    "descriptivos": _etapa_descriptivos,
+    "resumen_grupos": _etapa_resumen_grupos,
+    "ic_media": _etapa_ic_media,
+    "ic_proporcion": _etapa_ic_proporcion,
+    "prueba_hipotesis": _etapa_prueba_hipotesis,
+    "anova": _etapa_anova,
+    "normalidad": _etapa_normalidad,
+    "imputacion": _etapa_imputacion,
+    "bayesiano": _etapa_bayesiano,
+    "correlaciones": _etapa_correlaciones,
+}
+ETAPAS_ESTADISTICAS_PARCIAL: dict[str, object] = {
+    "datos_figuras": _etapa_datos_figuras_parcial,
+    "descriptivos": _etapa_descriptivos_parcial,
+    "resumen_grupos": _etapa_resumen_grupos_parcial,
+    "ic_media": _etapa_ic_media_parcial,
+    "ic_proporcion": _etapa_ic_proporcion_parcial,
+    "prueba_hipotesis": _etapa_prueba_hipotesis_parcial,
+    "anova": _etapa_anova_parcial,
+    "normalidad": _etapa_normalidad_parcial,
+    "imputacion": _etapa_imputacion_parcial,
+    "bayesiano": _etapa_bayesiano_parcial,
+    "correlaciones": _etapa_correlaciones_parcial,
+}
+
+# Etapas cuyos estadísticos se ponderan cuando hay marginales de ponderación.
+ETAPAS_PONDERADAS: frozenset[str] = frozenset(
+    {"descriptivos", "resumen_grupos", "ic_media", "ic_proporcion", "prueba_hipotesis", "anova"}
+)
+
+ETAPAS_FIGURAS: tuple[str, ...] = (
+    "figura_histograma",
+    "figuras_boxplots",
+    "figura_barras",
+    "figura_correlaciones",
+)
+
+
+def _figuras_existen(resultado: dict[str, object]) -> bool:
+    """Una figura en caché solo es válida si sus archivos siguen en disco sin cambios.
+
+    Otra ejecución con otros datos pudo sobrescribirlos; por eso se compara
+    el contenido con las huellas registradas al escribirlos.
+    """
+    huellas = resultado.get("huellas", {})
+    for clave, ruta in resultado["rutas"].items():
+        ruta = Path(ruta)
+        if not ruta.exists() or huellas.get(clave) != huella_archivo(ruta):
+            return False
+    return True
+
+
+def construir_pipeline(
+    vista_previa: bool = False,
+    tamano_muestra: int = TAMANO_MUESTRA_DEFAULT,
+    cache_dir: Optional[Path] = CACHE_DIR_DEFAULT,
+    procesos_figuras: Optional[int] = None,
+    cache_figuras: Optional[CacheFiguras] = None,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras: bool = True,
+    reporte: bool = True,
+    ruta_datos: Optional[Path] = None,
+    figuras_dir: Optional[Path] = None,
+    reporte_path: Optional[Path] = None,
+    artefacto: bool = True,
+    artefacto_dir: Optional[Path] = None,
+    particiones: Optional[Sequence[str | Path]] = None,
+    procesos_particiones: Optional[int] = None,
+    segmento: Optional[Segmento] = None,
+    preparado: Optional[DatosPreparados] = None,
+    memoria: Optional[dict[str, tuple[str, object]]] = None,
+    margenes: Optional[dict[str, dict[str, float]]] = None,
+    reglas_calidad: Optional[Sequence[str]] = None,
+) -> Pipeline:
+    """Describe el análisis completo como un grafo de etapas con nombre.
+
+    ``ruta_datos`` es el archivo de respuestas (por defecto
+    :data:`src.config.DATA_PATH`). ``figuras_dir`` y ``reporte_path`` indican
+    dónde escribir las gráficas y el reporte; por defecto se usan las rutas de
+    :mod:`src.config`, separadas para la vista previa.
+
+    Las gráficas se dibujan en un pool de ``procesos_figuras`` procesos; con
+    ``0`` se dibujan en el proceso principal. Por defecto se usa un proceso por
+    figura, limitado al número de CPU (y ninguno si solo hay una).
+
+    Con ``cache_figuras`` cada gráfica se busca primero en la caché de figuras
+    por el hash de sus datos agregados y solo se dibuja si no está.
+
+    ``perfil_imagen`` elige los formatos y la resolución de las imágenes (ver
+    :data:`src.graficos.PERFILES_IMAGEN`).
+
+    Con ``figuras=False`` no se registran las etapas de gráficas: el reporte
+    se genera sin imágenes y nunca se importan Matplotlib ni Seaborn. Con
+    ``reporte=False`` no se registra la etapa que escribe el reporte.
+
+    Con ``artefacto=True`` los resultados se guardan además como artefacto
+    versionado en ``artefacto_dir`` (ver :mod:`src.artefacto`); el reporte se
+    renderiza siempre a partir de ese artefacto.
+
+    Con ``particiones`` (carpetas o patrones glob de archivos ``.csv`` o de
+    Excel) las respuestas no se cargan en un solo DataFrame: cada archivo se
+    reduce a agregados parciales en un pool de ``procesos_particiones``
+    procesos y las etapas estadísticas se calculan con su combinación (ver
+    :mod:`src.particiones`). Los resultados coinciden con los del análisis
+    sobre todos los archivos concatenados, salvo la imputación múltiple, que
+    no se ejecuta.
+
+    Con ``segmento`` (ver :mod:`src.segmentos`) el análisis se limita a las
+    filas de un nivel de un factor, tomadas de los datos compartidos ya
+    preparados; el resumen por grupos se toma del calculado sobre todas las
+    respuestas. La ANOVA 2x3 y la normalidad de sus residuos se marcan como no
+    aplicables, porque el segmento fija al menos uno de los factores.
+
+    Con ``preparado`` (ver :mod:`src.vigilancia`) el análisis parte de un
+    DataFrame ya preparado en memoria en lugar de leer ``ruta_datos``.
+    ``memoria`` conserva los resultados de las etapas entre ejecuciones (ver
+    :class:`src.pipeline.Pipeline`).
+
+    Con ``margenes`` (``{factor: {nivel: proporción}}``) se agrega la etapa
+    ``ponderacion``, que calcula pesos por rastrillaje sobre el cubo de
+    conteos de los factores (ver :mod:`src.ponderacion`), y las etapas de
+    :data:`ETAPAS_PONDERADAS` usan esos pesos. Las figuras, la normalidad,
+    la imputación, el análisis bayesiano y las correlaciones no se ponderan.
+    No está disponible con particiones ni segmentos.
+
+    Con ``reglas_calidad`` los datos preparados se registran como la etapa
+    ``preparacion_cruda``, la etapa ``calidad`` marca cada respuesta (ver
+    :mod:`src.calidad`) y ``preparacion`` pasa a ser los datos sin las filas
+    que marcan esas reglas; con una secuencia vacía solo se marcan. Tampoco
+    está disponible con particiones ni segmentos.
+
+    Cuando hay caché de etapas, los DataFrames que reciben las etapas
+    paralelas se comparten con los procesos como archivos mapeados en memoria
+    en :data:`src.config.DATOS_COMPARTIDOS_DIR` en lugar de copiarse a cada
+    uno (ver :mod:`src.datos_compartidos`).
+    """
+
+    if particiones is not None and vista_previa:
+        raise ValueError("La vista previa no está disponible en el modo por particiones.")
+    if segmento is not None and (vista_previa or particiones is not None):
+        raise ValueError("El modo por segmentos no admite vista previa ni particiones.")
+    if preparado is not None and (vista_previa or particiones is not None or segmento is not None):
+        raise ValueError(
+            "Los datos preparados en memoria no admiten vista previa, particiones ni segmentos."
+        )
+    if margenes is not None and (particiones is not None or segmento is not None):
+        raise ValueError("La ponderación no está disponible con particiones ni segmentos.")
+    if reglas_calidad is not None:
+        if particiones is not None or segmento is not None:
+            raise ValueError(
+                "El control de calidad no está disponible con particiones ni segmentos."
+            )
+        from .calidad import validar_reglas
+
+        validar_reglas(reglas_calidad)
+    # Con control de calidad, "preparacion" son los datos ya depurados
+    preparacion = "preparacion_cruda" if reglas_calidad is not None else "preparacion"
+
+    if figuras:
+        from .graficos import PERFILES_IMAGEN
+
+        if perfil_imagen not in PERFILES_IMAGEN:
+            raise ValueError(
+                f"Perfil de imagen desconocido: {perfil_imagen!r}. "
+                f"Opciones: {', '.join(sorted(PERFILES_IMAGEN))}."
+            )
+
+    if procesos_figuras is None:
+        procesos_figuras = min(len(ETAPAS_FIGURAS), os.cpu_count() or 1)
+        if procesos_figuras <= 1:
+            procesos_figuras = 0
+
+    ruta_datos = Path(ruta_datos or DATA_PATH)
+    if figuras_dir is None:
+        figuras_dir = FIGURAS_DIR / "vista_previa" if vista_previa else FIGURAS_DIR
+    if reporte_path is None:
+        reporte_path = REPORTE_VISTA_PREVIA_PATH if vista_previa else REPORTE_PATH
+    if artefacto_dir is None:
+        artefacto_dir = ARTEFACTO_DIR / "vista_previa" if vista_previa else ARTEFACTO_DIR
+
+    pipeline = Pipeline(
+        cache_dir,
+        version=huella_codigo_fuente(Path(__file__).parent),
+        max_workers=procesos_figuras,
+        compartidos_dir=DATOS_COMPARTIDOS_DIR if cache_dir is not None else None,
+        memoria=memoria,
+    )
+    parametros_etapas: dict[str, dict[str, object]] = {}
+    if segmento is not None:
+        pipeline.agregar("preparacion", _etapa_segmento, parametros={"segmento": segmento})
+        fuente = "preparacion"
+        etapas = {
+            **ETAPAS_ESTADISTICAS,
+            "resumen_grupos": _etapa_resumen_grupos_segmento,
+            "anova": _etapa_anova_segmento,
+        }
+        parametros_etapas["resumen_grupos"] = {"segmento": segmento}
+        parametros_etapas["anova"] = {"segmento": segmento}
+    elif preparado is not None:
+        pipeline.agregar(preparacion, _etapa_preparado, parametros={"preparado": preparado})
+        fuente = "preparacion"
+        etapas = ETAPAS_ESTADISTICAS
+    elif particiones is None:
+        pipeline.agregar(
+            "carga",
+            _etapa_carga,
+            parametros={
+                "ruta_datos": ruta_datos,
+                "huella_datos": huella_archivo(ruta_datos),
+                "vista_previa": vista_previa,
+                "tamano_muestra": tamano_muestra if vista_previa else 0,
+            },
+        )
+        pipeline.agregar(preparacion, _etapa_preparacion, ["carga"])
+        fuente = "preparacion"
+        etapas = ETAPAS_ESTADISTICAS
+    else:
+        from .particiones import TAMANO_LOTE_PARTICION, encontrar_particiones
+
+        archivos = encontrar_particiones(particiones)
+        pipeline.agregar(
+            "parcial",
+            _etapa_parcial,
+            parametros={
+                "archivos": archivos,
+                "huellas": [huella_archivo(archivo) for archivo in archivos],
+                "procesos": procesos_particiones,
+                "tamano_lote": TAMANO_LOTE_PARTICION,
+            },
+        )
+        fuente = "parcial"
+        etapas = ETAPAS_ESTADISTICAS_PARCIAL
+
+    if reglas_calidad is not None:
+        pipeline.agregar(
+            "calidad",
+            _etapa_calidad,
+            [preparacion],
+            parametros={"reglas": tuple(reglas_calidad)},
+        )
+        pipeline.agregar("preparacion", _etapa_depuracion, [preparacion, "calidad"])
+
+    # Las figuras se registran antes que la estadística para que se dibujen en
+    # procesos aparte mientras el proceso principal calcula los demás resultados.
+    etapas_figuras: list[str] = []
+    if figuras:
+        pipeline.agregar("datos_figuras", etapas["datos_figuras"], [fuente], cache=False)
+        funciones_figuras = (
+            _etapa_figura_histograma,
+            _etapa_figuras_boxplots,
+            _etapa_figura_barras,
+            _etapa_figura_correlaciones,
+        )
+        for nombre, funcion in zip(ETAPAS_FIGURAS, funciones_figuras):
+            pipeline.agregar(
+                nombre,
+                funcion,
+                ["datos_figuras"],
+                parametros={
+                    "figuras_dir": figuras_dir,
+                    "perfil": perfil_imagen,
+                    "cache_figuras": cache_figuras,
+                },
+                validar=_figuras_existen,
+                paralela=True,
+            )
+        etapas_figuras = list(ETAPAS_FIGURAS)
+
+    if margenes is not None:
+        pipeline.agregar(
+            "ponderacion", _etapa_ponderacion, [fuente], parametros={"margenes": margenes}
+        )
+
+    for nombre, funcion in etapas.items():
+        if nombre == "datos_figuras":
+            continue
+        dependencias = [fuente, "anova"] if nombre == "normalidad" else [fuente]
+        if margenes is not None and nombre in ETAPAS_PONDERADAS:
+            dependencias.append("ponderacion")
+        pipeline.agregar(nombre, funcion, dependencias, parametros=parametros_etapas.get(nombre))
+
+    dependencias_reporte = [
+        fuente,
+        "descriptivos",
+        "resumen_grupos",
+        "ic_media",
+        "ic_proporcion",
+        "prueba_hipotesis",
+        "anova",
+        "normalidad",
+        "imputacion",
+        "bayesiano",
+        "correlaciones",
+        *etapas_figuras,
+    ]
+    if vista_previa:
+        pipeline.agregar("cotas", _etapa_cotas, ["carga", "preparacion"])
+        dependencias_reporte.append("cotas")
+    if reglas_calidad is not None:
+        dependencias_reporte.append("calidad")
+    if margenes is not None:
+        dependencias_reporte.append("ponderacion")
+
+    if reporte or artefacto:
+        pipeline.agregar(
+            "artefacto",
+            _etapa_artefacto,
+            dependencias_reporte,
+            parametros={"artefacto_dir": artefacto_dir if artefacto else None},
+            cache=False,
+        )
+    if reporte:
+        pipeline.agregar(
+            "reporte",
+            _etapa_reporte,
+            ["artefacto"],
+            parametros={"reporte_path": reporte_path},
+            cache=False,
+        )
+    return pipeline
+
+
+def _resultado_analisis(
+    resultados: dict[str, object], pipeline: Pipeline
+) -> ResultadoAnalisis:
+    """Convierte los resultados de las etapas en un :class:`ResultadoAnalisis`."""
+
+    figuras: dict[str, Path] = {}
+    metricas: list[dict[str, object]] = []
+    for nombre in ETAPAS_FIGURAS:
+        if nombre in resultados:
+            figuras.update(resultados[nombre]["rutas"])
+            metricas.extend(resultados[nombre]["metricas"])
+
+    def convertir(nombre: str, constructor):
+        valor = resultados.get(nombre)
+        return constructor(valor) if valor is not None else None
+
+    cotas = resultados.get("cotas")
+    artefacto = resultados.get("artefacto")
+    return ResultadoAnalisis(
+        n_muestra=_n_muestra(resultados),
+        descriptivos={
+            columna: Descriptivos.desde_dict(valores, columna)
+            for columna, valores in (resultados.get("descriptivos") or {}).items()
+        },
+        resumen_grupos=resultados.get("resumen_grupos"),
+        ic_media=convertir("ic_media", IntervaloConfianza.desde_dict),
+        ic_proporcion=convertir("ic_proporcion", IntervaloConfianza.desde_dict),
+        prueba_hipotesis=convertir("prueba_hipotesis", PruebaHipotesis.desde_dict),
+        anova=convertir("anova", ResultadoAnova.desde_dict),
+        normalidad={
+            nombre: PruebaNormalidad.desde_dict(valores)
+            for nombre, valores in (resultados.get("normalidad") or {}).items()
+        },
+        bayesiano=convertir("bayesiano", ResultadoBayesiano.desde_dict),
+        imputacion=convertir("imputacion", ResultadoImputacion.desde_dict),
+        correlaciones=resultados.get("correlaciones"),
+        calidad=(resultados.get("calidad") or {}).get("conteos"),
+        ponderacion=convertir("ponderacion", Ponderacion.desde_dict),
+        cotas=cotas["cotas"] if cotas is not None else None,
+        figuras=figuras,
+        metricas_figuras=pd.DataFrame(metricas) if metricas else None,
+        reporte=resultados.get("reporte"),
+        artefacto=artefacto["ruta"] if artefacto is not None else None,
+        etapas_recalculadas=tuple(pipeline.recalculadas),
+        etapas_reutilizadas=tuple(pipeline.reutilizadas),
+    )
+
+
+def ejecutar_analisis(
+    ruta_datos: Optional[Path] = None,
+    *,
+    vista_previa: bool = False,
+    tamano_muestra: int = TAMANO_MUESTRA_DEFAULT,
+    objetivos: Optional[Sequence[str]] = None,
+    figuras: bool = False,
+    reporte: bool = False,
+    artefacto: bool = False,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    figuras_dir: Optional[Path] = None,
+    reporte_path: Optional[Path] = None,
+    artefacto_dir: Optional[Path] = None,
+    cache_dir: Optional[Path] = None,
+    cache_figuras: Optional[CacheFiguras] = None,
+    corrida: Optional[DirectorioCorrida] = None,
+    procesos_figuras: Optional[int] = None,
+    particiones: Optional[Sequence[str | Path]] = None,
+    procesos_particiones: Optional[int] = None,
+    segmento: Optional[Segmento] = None,
+    preparado: Optional[DatosPreparados] = None,
+    memoria: Optional[dict[str, tuple[str, object]]] = None,
+    instrumentacion: Optional[Instrumentacion] = None,
+    margenes: Optional[dict[str, dict[str, float]]] = None,
+    reglas_calidad: Optional[Sequence[str]] = None,
+) -> ResultadoAnalisis:
+    """Ejecuta el análisis y devuelve un :class:`ResultadoAnalisis`.
+
+    Parameters
+    ----------
+    ruta_datos:
+        Archivo de respuestas. Por defecto :data:`src.config.DATA_PATH`.
+    vista_previa:
+        Ejecuta el análisis sobre una muestra estratificada de
+        ``tamano_muestra`` filas y agrega las cotas de error de muestreo.
+    objetivos:
+        Etapas que se desean (por ejemplo ``["anova"]``); solo se ejecutan
+        ellas y sus dependencias.
+    figuras, reporte:
+        Dibujan las gráficas en ``figuras_dir`` y escriben el reporte en
+        ``reporte_path``. Están desactivados por defecto.
+    artefacto:
+        Guarda el artefacto de resultados (JSON y tablas) en
+        ``artefacto_dir``. Desactivado por defecto.
+    cache_dir, cache_figuras, corrida:
+        Caché de etapas, caché de figuras y carpeta de puntos de control.
+        Sin ellos no se escribe nada en disco.
+    particiones, procesos_particiones:
+        Carpetas o patrones glob con las respuestas repartidas en varios
+        archivos; se analizan por agregados parciales en ``procesos_particiones``
+        procesos en lugar de leer ``ruta_datos`` (ver :mod:`src.particiones`).
+    segmento:
+        Analiza solo las filas de un segmento de los datos compartidos en
+        lugar de leer ``ruta_datos`` (ver :mod:`src.segmentos`).
+    preparado, memoria:
+        Parte de datos ya preparados en memoria y conserva los resultados de
+        las etapas en ``memoria`` entre llamadas (ver :mod:`src.vigilancia`).
+    instrumentacion:
+        Registra tiempo, CPU, memoria y filas de cada etapa (ver
+        :mod:`src.instrumentacion`). Sin ella no se mide nada.
+    margenes:
+        Marginales poblacionales ``{factor: {nivel: proporción}}``; los
+        descriptivos, intervalos, la prueba de hipótesis y la ANOVA se
+        ponderan por rastrillaje (ver :mod:`src.ponderacion`).
+    reglas_calidad:
+        Reglas de :data:`src.calidad.REGLAS_CALIDAD` cuyas respuestas
+        marcadas se excluyen antes del análisis; con una secuencia vacía las
+        respuestas solo se marcan.
+
+    Returns
+    -------
+    ResultadoAnalisis
+        Resultados compactos con ``__slots__``; las etapas no ejecutadas
+        quedan vacías.
+    """
+
+    pipeline = construir_pipeline(
+        vista_previa,
+        tamano_muestra,
+        cache_dir=cache_dir,
+        procesos_figuras=procesos_figuras,
+        cache_figuras=cache_figuras,
+        perfil_imagen=perfil_imagen,
+        figuras=figuras,
+        reporte=reporte,
+        ruta_datos=ruta_datos,
+        figuras_dir=figuras_dir,
+        reporte_path=reporte_path,
+        artefacto=artefacto,
+        artefacto_dir=artefacto_dir,
+        particiones=particiones,
+        procesos_particiones=procesos_particiones,
+        segmento=segmento,
+        preparado=preparado,
+        memoria=memoria,
+        margenes=margenes,
+        reglas_calidad=reglas_calidad,
+    )
+    resultados = pipeline.ejecutar(
+        objetivos or None, corrida=corrida, instrumentacion=instrumentacion
+    )
+    return _resultado_analisis(resultados, pipeline)
+
+
+# Nombre en inglés usado por los servicios que integran el análisis.
+run_analysis = ejecutar_analisis
@@ -0,0 +1,189 @@
+"""Artefacto de resultados versionado: escalares en JSON y tablas en Parquet.
+
+Cada corrida guarda en una carpeta un ``resultados.json`` con todos los
+valores escalares del análisis y una referencia ``{"__tabla__": nombre}`` en
+lugar de cada tabla, que se escribe aparte en ``tablas/`` (Parquet si hay un
+motor disponible y CSV si no). El reporte se genera únicamente a partir de
+este artefacto, de modo que puede volver a renderizarse sin los datos ni el
+pipeline, y otras herramientas pueden leer los mismos números.
+"""
+from __future__ import annotations
+
+import io
+import json
+import math
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import escribir_atomico
+
+VERSION_ARTEFACTO: int = 1
+ARCHIVO_RESULTADOS: str = "resultados.json"
+CARPETA_TABLAS: str = "tablas"
+CLAVE_TABLA: str = "__tabla__"
+
+# Objetos de trabajo que no forman parte de los resultados reportables: el
+# modelo ajustado, la tabla ANOVA ya formateada y los conjuntos imputados.
+CLAVES_EXCLUIDAS: frozenset[str] = frozenset({"modelo", "tabla_texto", "imputaciones"})
+
+
+def _motor_parquet() -> Optional[str]:
+    """Devuelve el motor de Parquet instalado, o ``None`` si no hay ninguno."""
+    for motor in ("pyarrow", "fastparquet"):
+        try:
+            __import__(motor)
+        except ImportError:
+            continue
+        return motor
+    return None
+
+
+def _a_json(valor: Any, ruta: str, tablas: Dict[str, pd.DataFrame]) -> Any:
+    """Convierte ``valor`` a tipos de JSON y aparta las tablas en ``tablas``.
+
+    Los ``NaN`` se guardan como ``null`` para que el JSON sea estándar.
+    """
+    if isinstance(valor, pd.Series):
+        valor = valor.to_frame()
+    if isinstance(valor, pd.DataFrame):
+        tablas[ruta] = valor
+        return {CLAVE_TABLA: ruta}
+    if isinstance(valor, dict):
+        return {
+            str(clave): _a_json(contenido, f"{ruta}.{clave}" if ruta else str(clave), tablas)
+            for clave, contenido in valor.items()
+            if clave not in CLAVES_EXCLUIDAS
+        }
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [_a_json(elemento, f"{ruta}.{i}", tablas) for i, elemento in enumerate(valor)]
+    if isinstance(valor, Path):
+        return valor.as_posix()
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    return str(valor)
+
+
+def construir_artefacto(
+    resultados: Dict[str, Any], rutas_figuras: Optional[Dict[str, Path]] = None
+) -> Dict[str, Any]:
+    """Arma el artefacto en memoria a partir de los resultados de las etapas.
+
+    Returns
+    -------
+    dict
+        ``version``, ``generado`` (UTC, ISO 8601), ``resultados`` (solo tipos
+        de JSON), ``figuras`` (rutas POSIX) y ``tablas`` (nombre ->
+        DataFrame).
+    """
+
+    tablas: Dict[str, pd.DataFrame] = {}
+    return {
+        "version": VERSION_ARTEFACTO,
+        "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "resultados": _a_json(resultados, "", tablas),
+        "figuras": {clave: Path(ruta).as_posix() for clave, ruta in (rutas_figuras or {}).items()},
+        "tablas": tablas,
+    }
+
+
+def _bytes_tabla(tabla: pd.DataFrame, formato: str) -> bytes:
+    # El índice se guarda como columnas para que CSV y Parquet se lean igual
+    plana = tabla.reset_index()
+    plana.columns = [str(columna) for columna in plana.columns]
+    if formato == "parquet":
+        buffer = io.BytesIO()
+        plana.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    return plana.to_csv(index=False).encode("utf-8")
+
+
+def guardar_artefacto(artefacto: Dict[str, Any], directorio: Path) -> Path:
+    """Escribe el artefacto en ``directorio`` y devuelve la ruta del JSON.
+
+    Las tablas se escriben primero y ``resultados.json`` al final, cada
+    archivo de forma atómica: un lector nunca ve un JSON que apunte a tablas
+    que aún no existen.
+    """
+
+    directorio = Path(directorio)
+    formato = "parquet" if _motor_parquet() else "csv"
+    indice_tablas = {}
+    for nombre, tabla in artefacto["tablas"].items():
+        archivo = f"{CARPETA_TABLAS}/{nombre}.{formato}"
+        escribir_atomico(directorio / archivo, _bytes_tabla(tabla, formato))
+        indice_tablas[nombre] = {
+            "archivo": archivo,
+            "formato": formato,
+            "indice": [None if n is None else str(n) for n in tabla.index.names],
+            "filas": int(len(tabla)),
+        }
+
+    documento = {**artefacto, "tablas": indice_tablas}
+    ruta = directorio / ARCHIVO_RESULTADOS
+    escribir_atomico(
+        ruta, json.dumps(documento, ensure_ascii=False, indent=2).encode("utf-8")
+    )
+    return ruta
+
+
+def _leer_tabla(directorio: Path, descripcion: Dict[str, Any]) -> pd.DataFrame:
+    ruta = directorio / descripcion["archivo"]
+    if descripcion["formato"] == "parquet":
+        plana = pd.read_parquet(ruta)
+    else:
+        plana = pd.read_csv(ruta)
+    nombres = descripcion["indice"]
+    tabla = plana.set_index(list(plana.columns[: len(nombres)]))
+    tabla.index.names = nombres
+    return tabla
+
+
+def cargar_artefacto(directorio: Path) -> Dict[str, Any]:
+    """Lee un artefacto guardado con :func:`guardar_artefacto`.
+
+    Raises
+    ------
+    FileNotFoundError
+        Si la carpeta no contiene ``resultados.json``.
+    ValueError
+        Si el artefacto es de una versión más reciente que la soportada.
+    """
+
+    directorio = Path(directorio)
+    documento = json.loads((directorio / ARCHIVO_RESULTADOS).read_text(encoding="utf-8"))
+    version = documento.get("version")
+    if not isinstance(version, int) or version > VERSION_ARTEFACTO:
+        raise ValueError(
+            f"Versión de artefacto no soportada: {version!r} "
+            f"(se admite hasta la {VERSION_ARTEFACTO})."
+        )
+    documento["tablas"] = {
+        nombre: _leer_tabla(directorio, descripcion)
+        for nombre, descripcion in documento.get("tablas", {}).items()
+    }
+    return documento
+
+
+def resolver_tablas(artefacto: Dict[str, Any]) -> Dict[str, Any]:
+    """Devuelve ``artefacto["resultados"]`` con cada referencia sustituida por su tabla."""
+
+    tablas = artefacto.get("tablas", {})
+
+    def resolver(valor: Any) -> Any:
+        if isinstance(valor, dict):
+            if set(valor) == {CLAVE_TABLA}:
+                return tablas.get(valor[CLAVE_TABLA])
+            return {clave: resolver(contenido) for clave, contenido in valor.items()}
+        if isinstance(valor, list):
+            return [resolver(elemento) for elemento in valor]
+        return valor
+
+    return resolver(artefacto.get("resultados", {}))
@@ -0,0 +1,207 @@
+"""Estimaciones bayesianas conjugadas a partir de tablas de conteos Likert."""
+from __future__ import annotations
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .config import ESCALA_LIKERT_MAX, ESCALA_LIKERT_MIN
+
+NIVELES_LIKERT: np.ndarray = np.arange(ESCALA_LIKERT_MIN, ESCALA_LIKERT_MAX + 1)
+PRIOR_DIRICHLET: float = 1.0
+PRIOR_BETA: tuple[float, float] = (1.0, 1.0)
+N_SIMULACIONES: int = 10_000
+# Semilla por defecto: los resúmenes posteriores son simulaciones y deben
+# repetirse entre corridas (y coincidir con y sin particiones).
+SEMILLA_BAYESIANA: int = 20251104
+
+
+def posterior_dirichlet(conteos: np.ndarray, prior: float = PRIOR_DIRICHLET) -> np.ndarray:
+    """Actualiza un prior Dirichlet simétrico con los conteos observados."""
+    return np.asarray(conteos, dtype=float) + prior
+
+
+def posterior_beta(
+    exitos: float, n: float, prior: tuple[float, float] = PRIOR_BETA
+) -> tuple[float, float]:
+    """Actualiza un prior Beta con ``exitos`` de ``n`` ensayos."""
+    a0, b0 = prior
+    return float(a0 + exitos), float(b0 + n - exitos)
+
+
+def _resumir_simulaciones(
+    simulaciones: np.ndarray, umbral: float, alpha: float
+) -> Dict[str, float]:
+    """Resume un vector de simulaciones posteriores."""
+    limite_inferior, limite_superior = np.quantile(simulaciones, [alpha / 2, 1 - alpha / 2])
+    return {
+        "media_posterior": float(simulaciones.mean()),
+        "desviacion_posterior": float(simulaciones.std(ddof=1)),
+        "limite_inferior": float(limite_inferior),
+        "limite_superior": float(limite_superior),
+        "prob_mayor_umbral": float((simulaciones > umbral).mean()),
+        "umbral": float(umbral),
+        "alpha": float(alpha),
+    }
+
+
+def media_posterior_likert(
+    conteos: np.ndarray,
+    umbral: float = 7.0,
+    alpha: float = 0.05,
+    prior: float = PRIOR_DIRICHLET,
+    n_simulaciones: int = N_SIMULACIONES,
+    niveles: np.ndarray = NIVELES_LIKERT,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, float]:
+    """Distribución posterior de la media Likert con un modelo Dirichlet-multinomial.
+
+    Cada simulación de la Dirichlet es un vector de probabilidades sobre los
+    niveles; la media poblacional correspondiente es su producto punto con
+    ``niveles``. Todas las simulaciones se generan en una sola llamada.
+    """
+
+    rng = rng or np.random.default_rng()
+    alphas = posterior_dirichlet(conteos, prior)
+    probabilidades = rng.dirichlet(alphas, size=n_simulaciones)
+    medias = probabilidades @ niveles
+
+    resultado = _resumir_simulaciones(medias, umbral, alpha)
+    resultado["n"] = float(np.sum(conteos))
+    return resultado
+
+
+def proporcion_posterior(
+    exitos: float,
+    n: float,
+    umbral: float = 0.5,
+    alpha: float = 0.05,
+    prior: tuple[float, float] = PRIOR_BETA,
+    n_simulaciones: int = N_SIMULACIONES,
+    rng: Optional[np.random.Generator] = None,
+) -> Dict[str, float]:
+    """Distribución posterior Beta-binomial de la proporción a favor."""
+
+    rng = rng or np.random.default_rng()
+    a, b = posterior_beta(exitos, n, prior)
+    simulaciones = rng.beta(a, b, size=n_simulaciones)
+
+    resultado = _resumir_simulaciones(simulaciones, umbral, alpha)
+    resultado["n"] = float(n)
+    resultado["alpha_beta"] = a
+    resultado["beta_beta"] = b
+    return resultado
+
+
+def analisis_bayesiano(
+    df: pd.DataFrame,
+    umbral_media: float = 7.0,
+    umbral_proporcion: float = 0.5,
+    alpha: float = 0.05,
+    n_simulaciones: int = N_SIMULACIONES,
+    semilla: Optional[int] = SEMILLA_BAYESIANA,
+) -> Dict[str, object]:
+    """Calcula posteriores de la media de acuerdo y de ``a_favor``.
+
+    Los datos se reducen primero a tablas de conteos (general y por
+    ``tratamiento``), por lo que la actualización de cada posterior cuesta
+    O(niveles) sin importar el tamaño de la muestra. Las respuestas fuera de
+    la escala se descartan antes de contar, de modo que la media y la
+    proporción usan las mismas respuestas. Con ``semilla=None`` las
+    simulaciones cambian en cada llamada.
+
+    Returns
+    -------
+    dict
+        ``general`` con los resúmenes de media y proporción para toda la
+        muestra, y ``por_tratamiento`` con un DataFrame de resúmenes por celda.
+    """
+
+    datos = df[df["acuerdo_ampliacion"].isin(NIVELES_LIKERT)]
+    tabla = pd.crosstab(datos["tratamiento"], datos["acuerdo_ampliacion"])
+    favor = datos.groupby("tratamiento")["a_favor"].agg(["sum", "count"])
+    return analisis_bayesiano_desde_conteos(
+        tabla,
+        favor,
+        umbral_media=umbral_media,
+        umbral_proporcion=umbral_proporcion,
+        alpha=alpha,
+        n_simulaciones=n_simulaciones,
+        semilla=semilla,
+    )
+
+
+def analisis_bayesiano_desde_conteos(
+    tabla: pd.DataFrame,
+    favor: pd.DataFrame,
+    umbral_media: float = 7.0,
+    umbral_proporcion: float = 0.5,
+    alpha: float = 0.05,
+    n_simulaciones: int = N_SIMULACIONES,
+    semilla: Optional[int] = SEMILLA_BAYESIANA,
+) -> Dict[str, object]:
+    """:func:`analisis_bayesiano` a partir de las tablas de conteos ya reducidas.
+
+    ``tabla`` tiene una fila por tratamiento y una columna por valor de
+    ``acuerdo_ampliacion``; ``favor`` tiene, por tratamiento, ``sum`` (a
+    favor) y ``count`` (respuestas con acuerdo), ambos contados solo sobre
+    los valores de la escala.
+    """
+
+    rng = np.random.default_rng(semilla)
+    tabla = tabla.reindex(columns=NIVELES_LIKERT, fill_value=0)
+
+    general = {
+        "media": media_posterior_likert(
+            tabla.sum(axis=0).to_numpy(dtype=float),
+            umbral=umbral_media,
+            alpha=alpha,
+            n_simulaciones=n_simulaciones,
+            rng=rng,
+        ),
+        "proporcion": proporcion_posterior(
+            float(favor["sum"].sum()),
+            float(favor["count"].sum()),
+            umbral=umbral_proporcion,
+            alpha=alpha,
+            n_simulaciones=n_simulaciones,
+            rng=rng,
+        ),
+    }
+
+    filas = []
+    for tratamiento, conteos in tabla.iterrows():
+        media = media_posterior_likert(
+            conteos.to_numpy(dtype=float),
+            umbral=umbral_media,
+            alpha=alpha,
+            n_simulaciones=n_simulaciones,
+            rng=rng,
+        )
+        proporcion = proporcion_posterior(
+            float(favor.loc[tratamiento, "sum"]),
+            float(favor.loc[tratamiento, "count"]),
+            umbral=umbral_proporcion,
+            alpha=alpha,
+            n_simulaciones=n_simulaciones,
+            rng=rng,
+        )
+        filas.append(
+            {
+                "tratamiento": tratamiento,
+                "n": int(media["n"]),
+                "media_posterior": media["media_posterior"],
+                "media_li": media["limite_inferior"],
+                "media_ls": media["limite_superior"],
+                "prob_media_mayor_umbral": media["prob_mayor_umbral"],
+                "proporcion_posterior": proporcion["media_posterior"],
+                "proporcion_li": proporcion["limite_inferior"],
+                "proporcion_ls": proporcion["limite_superior"],
+            }
+        )
+
+    return {
+        "general": general,
+        "por_tratamiento": pd.DataFrame(filas),
+    }
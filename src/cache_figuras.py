@@ -0,0 +1,228 @@
+"""Caché de figuras direccionada por contenido.
+
+Cada figura se identifica con un hash de los datos agregados que dibuja, de
+sus parámetros de estilo, del código de :mod:`src.graficos` y de las
+versiones de las bibliotecas gráficas. Si la clave ya está en la caché, los
+archivos se copian a su destino en lugar de volver a dibujarse. Cada entrada
+guarda también las métricas medidas al dibujarla (``metricas.json``), que se
+informan de nuevo cuando se reutiliza.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .config import FIGURAS_CACHE_DIR, FIGURAS_CACHE_MAX_ENTRADAS, FIGURAS_CACHE_MAX_MB
+
+# Versión de la disposición de las entradas; cambiarla invalida las anteriores.
+VERSION_CACHE_FIGURAS: int = 3
+ARCHIVO_METRICAS: str = "metricas.json"
+
+
+def _versiones_bibliotecas() -> str:
+    """Versiones que pueden cambiar el aspecto de una imagen."""
+    import matplotlib
+    import seaborn
+
+    return f"matplotlib={matplotlib.__version__};seaborn={seaborn.__version__};numpy={np.__version__}"
+
+
+def _huella_graficos() -> str:
+    """Hash del código de :mod:`src.graficos`, donde vive el estilo de las figuras."""
+    ruta = Path(__file__).with_name("graficos.py")
+    return hashlib.sha256(ruta.read_bytes()).hexdigest()
+
+
+def _actualizar_digest(digest: "hashlib._Hash", valor: Any) -> None:
+    """Incorpora ``valor`` al hash de forma estable para tablas y arreglos."""
+    if isinstance(valor, (pd.DataFrame, pd.Series)):
+        etiquetas = valor.columns if isinstance(valor, pd.DataFrame) else [valor.name]
+        digest.update(repr(list(etiquetas)).encode("utf-8"))
+        digest.update(repr(list(valor.index)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    elif isinstance(valor, np.ndarray):
+        digest.update(str(valor.dtype).encode("utf-8"))
+        digest.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, dict):
+        for clave in sorted(valor):
+            digest.update(repr(clave).encode("utf-8"))
+            _actualizar_digest(digest, valor[clave])
+    else:
+        digest.update(repr(valor).encode("utf-8"))
+
+
+def clave_figura(nombre: str, agregados: Any, parametros: Optional[Dict[str, Any]] = None) -> str:
+    """Calcula la clave de una figura a partir de sus entradas agregadas."""
+    digest = hashlib.sha256()
+    digest.update(f"v{VERSION_CACHE_FIGURAS}".encode("utf-8"))
+    digest.update(nombre.encode("utf-8"))
+    digest.update(_versiones_bibliotecas().encode("utf-8"))
+    digest.update(_huella_graficos().encode("utf-8"))
+    _actualizar_digest(digest, agregados)
+    _actualizar_digest(digest, parametros or {})
+    return digest.hexdigest()
+
+
+class CacheFiguras:
+    """Carpeta de figuras ya dibujadas con desalojo del menos usado (LRU).
+
+    Parameters
+    ----------
+    directorio:
+        Carpeta de la caché. Cada entrada es una subcarpeta con la clave.
+    max_mb:
+        Tamaño máximo de la caché en megabytes.
+    max_entradas:
+        Número máximo de entradas (llamadas de dibujo) almacenadas.
+    """
+
+    def __init__(
+        self,
+        directorio: Path = FIGURAS_CACHE_DIR,
+        max_mb: float = FIGURAS_CACHE_MAX_MB,
+        max_entradas: int = FIGURAS_CACHE_MAX_ENTRADAS,
+    ) -> None:
+        self.directorio = Path(directorio)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.max_entradas = max_entradas
+
+    def __repr__(self) -> str:
+        # Representación estable: forma parte de las claves del pipeline
+        return (
+            f"CacheFiguras({self.directorio.as_posix()!r}, max_bytes={self.max_bytes}, "
+            f"max_entradas={self.max_entradas})"
+        )
+
+    @staticmethod
+    def _archivo_entrada(entrada: Path, nombre: str, ruta: Path) -> Path:
+        """Archivo de ``entrada`` para el destino ``nombre``.
+
+        Se nombra por la clave del destino y no por el nombre del archivo:
+        una figura y su miniatura se llaman igual en carpetas distintas.
+        """
+        return entrada / f"{nombre}{Path(ruta).suffix}"
+
+    def obtener(self, clave: str, destinos: Dict[str, Path]) -> bool:
+        """Copia los archivos de ``clave`` a ``destinos`` si están en la caché."""
+        entrada = self.directorio / clave
+        archivos = {
+            nombre: self._archivo_entrada(entrada, nombre, ruta) for nombre, ruta in destinos.items()
+        }
+        if not entrada.is_dir() or not all(ruta.exists() for ruta in archivos.values()):
+            return False
+
+        for nombre, origen in archivos.items():
+            destino = Path(destinos[nombre])
+            destino.parent.mkdir(parents=True, exist_ok=True)
+            temporal = destino.with_name(f".{destino.name}.tmp")
+            shutil.copyfile(origen, temporal)
+            os.replace(temporal, destino)
+        # La fecha de modificación de la entrada marca su último uso (LRU)
+        os.utime(entrada)
+        return True
+
+    def metricas(self, clave: str) -> List[Dict[str, Any]]:
+        """Métricas registradas al dibujar las figuras de ``clave`` (vacía si no hay)."""
+        ruta = self.directorio / clave / ARCHIVO_METRICAS
+        try:
+            return json.loads(ruta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return []
+
+    def guardar(
+        self, clave: str, rutas: Dict[str, Path], metricas: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """Guarda una copia de las figuras recién dibujadas (y sus métricas) bajo ``clave``."""
+        entrada = self.directorio / clave
+        if entrada.exists():
+            return
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        temporal = Path(tempfile.mkdtemp(dir=self.directorio, prefix=".tmp-"))
+        try:
+            for nombre, ruta in rutas.items():
+                shutil.copyfile(ruta, self._archivo_entrada(temporal, nombre, ruta))
+            if metricas:
+                (temporal / ARCHIVO_METRICAS).write_text(
+                    json.dumps(metricas, ensure_ascii=False), encoding="utf-8"
+                )
+            os.replace(temporal, entrada)
+        except OSError:
+            # Otro proceso guardó la misma clave al mismo tiempo
+            shutil.rmtree(temporal, ignore_errors=True)
+        self.desalojar()
+
+    def desalojar(self) -> None:
+        """Elimina las entradas menos usadas hasta respetar los límites."""
+        if not self.directorio.exists():
+            return
+        entradas = []
+        for entrada in self.directorio.iterdir():
+            if not entrada.is_dir() or entrada.name.startswith("."):
+                continue
+            try:
+                tamano = sum(archivo.stat().st_size for archivo in entrada.iterdir())
+                entradas.append((entrada.stat().st_mtime, tamano, entrada))
+            except FileNotFoundError:
+                continue
+
+        entradas.sort()
+        total = sum(tamano for _, tamano, _ in entradas)
+        while entradas and (total > self.max_bytes or len(entradas) > self.max_entradas):
+            _, tamano, entrada = entradas.pop(0)
+            shutil.rmtree(entrada, ignore_errors=True)
+            total -= tamano
+
+
+def dibujar_con_cache(
+    cache: Optional[CacheFiguras],
+    nombre: str,
+    agregados: Any,
+    destinos: Dict[str, Path],
+    dibujar: Callable[[], Dict[str, Path]],
+    parametros: Optional[Dict[str, Any]] = None,
+    metricas: Optional[Callable[[], List[Dict[str, Any]]]] = None,
+) -> Tuple[Dict[str, Path], List[Dict[str, Any]]]:
+    """Reutiliza las figuras de la caché o las dibuja y las guarda en ella.
+
+    Parameters
+    ----------
+    agregados:
+        Datos agregados que determinan por completo la figura (conteos,
+        matrices de correlación, etc.).
+    destinos:
+        Rutas finales esperadas, con las mismas claves que devuelve ``dibujar``.
+    dibujar:
+        Función sin argumentos que dibuja las figuras y devuelve sus rutas.
+    metricas:
+        Función sin argumentos que devuelve las métricas de lo que acaba de
+        dibujar ``dibujar`` (por ejemplo :func:`src.graficos.extraer_metricas`).
+
+    Returns
+    -------
+    tuple
+        Las rutas de las figuras y sus métricas; en un acierto, las guardadas
+        en la caché al dibujarlas.
+    """
+
+    def dibujar_y_medir() -> Tuple[Dict[str, Path], List[Dict[str, Any]]]:
+        rutas = dibujar()
+        return rutas, (metricas() if metricas is not None else [])
+
+    if cache is None:
+        return dibujar_y_medir()
+
+    clave = clave_figura(nombre, agregados, parametros)
+    if cache.obtener(clave, destinos):
+        return dict(destinos), cache.metricas(clave)
+
+    rutas, medidas = dibujar_y_medir()
+    cache.guardar(clave, rutas, medidas)
+    return rutas, medidas
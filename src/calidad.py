@@ -0,0 +1,195 @@
+"""Control de calidad de las respuestas de la encuesta.
+
+:func:`marcar_respuestas` calcula, en una sola pasada vectorizada sobre la
+matriz de respuestas, una marca por fila para cada regla de
+:data:`REGLAS_CALIDAD`:
+
+- ``fuera_rango``: alguna pregunta Likert con un valor fuera de la escala
+  (:data:`src.config.ESCALA_LIKERT_MIN` a :data:`src.config.ESCALA_LIKERT_MAX`)
+  o no entero (``pd.to_numeric(errors="coerce")`` los deja pasar);
+- ``edad_atipica``: edad imposible, fuera de
+  [:data:`EDAD_MINIMA_POSIBLE`, :data:`EDAD_MAXIMA_POSIBLE`] o no entera;
+- ``duplicado``: la misma huella (todas las columnas salvo la marca
+  temporal) que una respuesta anterior, que se conserva. Solo identifica
+  envíos repetidos si las filas incluyen un dato personal como el nombre:
+  sin él, en muestras grandes coinciden por azar muchas respuestas
+  distintas;
+- ``respuesta_plana``: la misma calificación en todas las preguntas Likert.
+
+:func:`depurar` excluye las filas marcadas por las reglas elegidas y
+cuenta cuántas marcó cada regla y cuántas excluyó (en el orden de las
+reglas, una fila se atribuye a la primera que la excluye). La respuesta
+plana y el duplicado solo se marcan por defecto: con tres preguntas,
+calificar todo con 10 es una opinión frecuente y legítima, y el libro no
+siempre tiene un dato que identifique a quien responde (con 100 000
+respuestas sintéticas sin nombre, el 40 % coincide con otra anterior).
+"""
+from __future__ import annotations
+
+import logging
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import ESCALA_LIKERT_MAX, ESCALA_LIKERT_MIN
+from .descriptivos import COLUMNAS_RESUMEN
+
+logger = logging.getLogger(__name__)
+
+COLUMNAS_LIKERT: tuple[str, ...] = tuple(COLUMNAS_RESUMEN)
+
+EDAD_MINIMA_POSIBLE: int = 10
+EDAD_MAXIMA_POSIBLE: int = 100
+
+# Columnas que no forman parte de la huella de duplicados: la marca temporal
+# distingue dos envíos idénticos de la misma persona.
+COLUMNAS_SIN_HUELLA: tuple[str, ...] = ("Marca temporal",)
+
+REGLAS_CALIDAD: Dict[str, str] = {
+    "fuera_rango": (
+        f"Calificación Likert fuera de {ESCALA_LIKERT_MIN}-{ESCALA_LIKERT_MAX} o no entera"
+    ),
+    "edad_atipica": (
+        f"Edad fuera de {EDAD_MINIMA_POSIBLE}-{EDAD_MAXIMA_POSIBLE} años o no entera"
+    ),
+    "duplicado": "Respuesta idéntica a una anterior",
+    "respuesta_plana": "Misma calificación en todas las preguntas",
+}
+REGLAS_EXCLUSION_DEFAULT: tuple[str, ...] = ("fuera_rango", "edad_atipica")
+
+
+def validar_reglas(reglas: Sequence[str]) -> None:
+    """Comprueba que todas las ``reglas`` estén en :data:`REGLAS_CALIDAD`.
+
+    Raises
+    ------
+    ValueError
+        Si alguna regla es desconocida; el mensaje lista las opciones.
+    """
+    desconocidas = [regla for regla in reglas if regla not in REGLAS_CALIDAD]
+    if desconocidas:
+        raise ValueError(
+            f"Reglas de calidad desconocidas: {', '.join(desconocidas)}. "
+            f"Opciones: {', '.join(REGLAS_CALIDAD)}."
+        )
+
+
+def marcar_respuestas(df: pd.DataFrame) -> pd.DataFrame:
+    """Marcas de calidad de cada fila de ``df`` (ya preparado), una columna por regla.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Columnas booleanas con los nombres de :data:`REGLAS_CALIDAD`,
+        alineadas con el índice de ``df``. Los valores faltantes nunca se
+        marcan.
+    """
+
+    columnas = [col for col in COLUMNAS_LIKERT if col in df.columns]
+    respuestas = df[columnas].to_numpy(dtype=float, na_value=np.nan)
+    edad = (
+        df["edad"].to_numpy(dtype=float, na_value=np.nan)
+        if "edad" in df.columns
+        else np.full(len(df), np.nan)
+    )
+
+    # Las comparaciones con NaN son falsas, de modo que los faltantes no se marcan
+    with np.errstate(invalid="ignore"):
+        fuera_rango = (
+            (respuestas < ESCALA_LIKERT_MIN)
+            | (respuestas > ESCALA_LIKERT_MAX)
+            | (respuestas != np.rint(respuestas))
+        ) & ~np.isnan(respuestas)
+        plana = (
+            np.all(respuestas == respuestas[:, :1], axis=1)
+            if len(columnas) > 1
+            else np.zeros(len(df), dtype=bool)
+        )
+        edad_atipica = (
+            (edad < EDAD_MINIMA_POSIBLE) | (edad > EDAD_MAXIMA_POSIBLE) | (edad != np.rint(edad))
+        ) & ~np.isnan(edad)
+
+    columnas_huella = [col for col in df.columns if col not in COLUMNAS_SIN_HUELLA]
+    huellas = pd.util.hash_pandas_object(df[columnas_huella], index=False)
+
+    return pd.DataFrame(
+        {
+            "fuera_rango": fuera_rango.any(axis=1),
+            "edad_atipica": edad_atipica,
+            "duplicado": huellas.duplicated(keep="first").to_numpy(),
+            "respuesta_plana": plana,
+        },
+        index=df.index,
+    )
+
+
+def conteos_calidad(marcas: pd.DataFrame, reglas: Sequence[str]) -> pd.DataFrame:
+    """Filas marcadas por cada regla y filas que excluye cada regla de ``reglas``.
+
+    Una fila marcada por varias reglas de exclusión se cuenta como excluida
+    solo por la primera de ``reglas``; las reglas que no excluyen tienen
+    ``excluidas = 0``.
+    """
+
+    validar_reglas(reglas)
+    orden = list(reglas) + [regla for regla in REGLAS_CALIDAD if regla not in reglas]
+    matriz = marcas[orden].to_numpy()
+    excluye = np.isin(orden, list(reglas))
+    # Una fila cuenta para la regla i si la marca y ninguna regla de exclusión anterior la marcó
+    previas = np.logical_or.accumulate(matriz & excluye, axis=1)
+    nuevas = matriz & excluye & ~np.hstack([np.zeros((len(matriz), 1), dtype=bool), previas[:, :-1]])
+    return pd.DataFrame(
+        {
+            "regla": orden,
+            "descripcion": [REGLAS_CALIDAD[regla] for regla in orden],
+            "excluye": excluye,
+            "marcadas": matriz.sum(axis=0),
+            "excluidas": nuevas.sum(axis=0),
+        }
+    )
+
+
+def depurar(
+    df: pd.DataFrame, reglas: Sequence[str] = REGLAS_EXCLUSION_DEFAULT
+) -> Dict[str, object]:
+    """Marca las respuestas de ``df`` y decide cuáles excluyen las ``reglas``.
+
+    Returns
+    -------
+    dict
+        ``excluidas`` (Series booleana alineada con ``df``; los datos
+        depurados son ``df[~excluidas]``), ``marcas`` (ver
+        :func:`marcar_respuestas`), ``conteos`` (ver :func:`conteos_calidad`),
+        ``reglas``, ``filas`` y ``filas_excluidas``.
+    """
+
+    validar_reglas(reglas)
+    marcas = marcar_respuestas(df)
+    conteos = conteos_calidad(marcas, reglas)
+    excluidas = marcas[list(reglas)].any(axis=1).rename("excluida")
+
+    resultado = {
+        "excluidas": excluidas,
+        "marcas": marcas,
+        "conteos": conteos,
+        "reglas": list(reglas),
+        "filas": int(len(df)),
+        "filas_excluidas": int(excluidas.sum()),
+    }
+    logger.info(
+        "Control de calidad: %d de %d respuestas excluidas.\n%s\n",
+        resultado["filas_excluidas"],
+        resultado["filas"],
+        conteos[["regla", "marcadas", "excluidas"]].to_string(index=False),
+    )
+    return resultado
+
+
+def resumen_calidad(calidad: Optional[Dict[str, object]]) -> Optional[Dict[str, object]]:
+    """El resultado de :func:`depurar` sin las marcas por fila, para reportarlo."""
+    if calidad is None:
+        return None
+    return {
+        clave: valor for clave, valor in calidad.items() if clave not in ("excluidas", "marcas")
+    }
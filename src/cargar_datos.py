@@ -1,16 +1,19 @@
 """Funciones para cargar los datos de la encuesta desde el archivo Excel."""
 from __future__ import annotations
 
+import logging
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 import pandas as pd
 
 from .config import DATA_PATH
 
+logger = logging.getLogger(__name__)
+
 
 def cargar_excel(path: Optional[Path] = None) -> pd.DataFrame:
-    """Carga el archivo de respuestas y muestra las columnas disponibles.
+    """Carga el archivo de respuestas y registra las columnas disponibles.
 
     Parameters
     ----------
@@ -39,7 +42,44 @@ def cargar_excel(path: Optional[Path] = None) -> pd.DataFrame:
             f"Ocurrió un error inesperado al leer el archivo '{ruta_excel}': {exc}"
         ) from exc
 
-    print("Columnas encontradas en el Excel:")
-    print(list(df.columns))
+    logger.info("Columnas encontradas en el Excel:\n%s", list(df.columns))
 
     return df
+
+
+def iterar_lotes(path: Optional[Path] = None, tamano_lote: int = 10_000) -> Iterator[pd.DataFrame]:
+    """Recorre el archivo de respuestas en lotes sin cargarlo completo en memoria.
+
+    Los libros ``.xlsx`` se leen en modo de solo lectura de ``openpyxl`` y los
+    archivos ``.csv`` con ``pandas.read_csv(chunksize=...)``. Cada lote conserva
+    los encabezados originales, igual que :func:`cargar_excel`.
+    """
+
+    ruta = Path(path or DATA_PATH)
+    if not ruta.exists():
+        raise FileNotFoundError(
+            f"No se encontró el archivo '{ruta}'. Verifica la carpeta 'data/'."
+        )
+
+    if ruta.suffix.lower() == ".csv":
+        yield from pd.read_csv(ruta, chunksize=tamano_lote)
+        return
+
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta, read_only=True, data_only=True)
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        encabezados = list(next(filas, ()))
+        lote: list[tuple] = []
+        for fila in filas:
+            if all(valor is None for valor in fila):
+                continue
+            lote.append(fila)
+            if len(lote) >= tamano_lote:
+                yield pd.DataFrame(lote, columns=encabezados)
+                lote = []
+        if lote:
+            yield pd.DataFrame(lote, columns=encabezados)
+    finally:
+        libro.close()
@@ -18,3 +18,43 @@ COLUMN_MAP: dict[str, str] = {
 # IMPORTANTE:
 # - Los valores (la parte derecha) deben coincidir EXACTAMENTE con los encabezados del Excel.
 # - Respeta tildes, signos de interrogación, comas y espacios.
+
+# Escala de las tres preguntas Likert ("En una escala de 1 a 10...").
+ESCALA_LIKERT_MIN: int = 1
+ESCALA_LIKERT_MAX: int = 10
+
+# Salidas del análisis completo y de la vista previa.
+FIGURAS_DIR: Path = Path("figuras")
+REPORTE_PATH: Path = Path("reporte_estadistico.md")
+REPORTE_VISTA_PREVIA_PATH: Path = Path("reporte_vista_previa.md")
+CORRIDAS_DIR: Path = Path("corridas")
+# Corridas (carpetas con puntos de control) que se conservan; las más antiguas se borran.
+CORRIDAS_CONSERVADAS: int = 5
+
+# Artefacto de resultados (JSON + tablas) a partir del cual se genera el reporte.
+ARTEFACTO_DIR: Path = Path("resultados")
+
+# Carpeta donde el modo lote escribe una subcarpeta por encuesta y el resumen.
+LOTE_DIR: Path = Path("lotes")
+
+# Carpeta donde el modo por segmentos escribe un reporte por segmento y el índice.
+SEGMENTOS_DIR: Path = Path("segmentos")
+
+# Caché de figuras ya dibujadas (ver src/cache_figuras.py).
+FIGURAS_CACHE_DIR: Path = Path(".cache") / "figuras"
+FIGURAS_CACHE_MAX_MB: float = 200.0
+FIGURAS_CACHE_MAX_ENTRADAS: int = 500
+
+# Almacén de datos preparados que comparten los procesos (ver src/datos_compartidos.py).
+DATOS_COMPARTIDOS_DIR: Path = Path(".cache") / "compartidos"
+
+# Traza de tiempos y memoria por etapa de --perfilar (ver src/instrumentacion.py);
+# el resumen se escribe junto a ella con extensión .csv.
+TRAZA_PATH: Path = Path("perfil") / "traza.json"
+
+# Memoización de las funciones estadísticas (ver src/memoizacion.py).
+MEMO_DIR: Path = Path(".cache") / "memo"
+MEMO_MAX_ENTRADAS: int = 128
+
+# Perfil de imagen por defecto (ver PERFILES_IMAGEN en src/graficos.py).
+PERFIL_IMAGEN_DEFAULT: str = "impresion"
@@ -0,0 +1,161 @@
+"""Datos preparados compartidos entre procesos mediante archivos mapeados en memoria.
+
+Enviar el DataFrame preparado a cada proceso de un pool lo serializa con
+:mod:`pickle` una vez por proceso, de modo que la memoria crece con el número
+de procesos. Aquí el DataFrame se guarda una sola vez como un almacén
+columnar: un ``.npy`` por columna y un ``manifiesto.json``. Las columnas
+numéricas se guardan tal cual; las de texto (factores como
+``frecuencia_viaje`` o ``grupo_edad``), como códigos enteros más la lista de
+categorías.
+
+Los procesos reciben solo un :class:`DatosCompartidos` (un nombre y una
+carpeta) y con :meth:`DatosCompartidos.cargar` obtienen un DataFrame cuyas
+columnas apuntan a los archivos mapeados con :func:`numpy.load`
+(``mmap_mode="r"``): todos comparten las mismas páginas del sistema
+operativo y nadie copia los datos. Las columnas de texto se cargan como
+``Categorical`` y todas las columnas son de solo lectura.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+from .config import DATOS_COMPARTIDOS_DIR
+
+ARCHIVO_MANIFIESTO: str = "manifiesto.json"
+
+
+@dataclass(frozen=True)
+class DatosCompartidos:
+    """Referencia serializable a un DataFrame publicado con :func:`compartir`."""
+
+    nombre: str
+    directorio: Path = DATOS_COMPARTIDOS_DIR
+
+    @property
+    def ruta(self) -> Path:
+        return Path(self.directorio) / self.nombre
+
+    def cargar(self) -> pd.DataFrame:
+        """Adjunta el DataFrame sin copiar sus columnas (ver :func:`adjuntar`)."""
+        return adjuntar(self.nombre, self.directorio)
+
+    def liberar(self) -> None:
+        """Borra los archivos; los procesos que ya los mapearon pueden seguir leyéndolos."""
+        shutil.rmtree(self.ruta, ignore_errors=True)
+
+
+def _codigos(columna: pd.Series) -> tuple[np.ndarray, list]:
+    """Códigos enteros (``-1`` para faltantes) y categorías de una columna de texto.
+
+    Las categorías se ordenan cuando es posible, para que agrupar por la
+    columna categórica dé los grupos en el mismo orden que con texto.
+    """
+    try:
+        codigos, categorias = pd.factorize(columna, sort=True, use_na_sentinel=True)
+    except TypeError:
+        codigos, categorias = pd.factorize(columna, use_na_sentinel=True)
+    tipo = np.min_scalar_type(-max(len(categorias), 1))
+    categorias = [
+        valor.item() if isinstance(valor, np.generic) else valor for valor in categorias
+    ]
+    if not all(isinstance(valor, (str, int, float, bool)) for valor in categorias):
+        categorias = [str(valor) for valor in categorias]
+    return codigos.astype(tipo), categorias
+
+
+def _guardar_columna(carpeta: Path, archivo: str, nombre: Any, serie: pd.Series) -> Dict[str, Any]:
+    descripcion: Dict[str, Any] = {"nombre": nombre, "archivo": archivo}
+    if isinstance(serie.dtype, np.dtype) and serie.dtype.kind in "biufmM":
+        np.save(carpeta / archivo, serie.to_numpy())
+    else:
+        codigos, categorias = _codigos(serie)
+        np.save(carpeta / archivo, codigos)
+        descripcion["categorias"] = categorias
+    return descripcion
+
+
+def _cargar_columna(carpeta: Path, descripcion: Dict[str, Any]) -> Any:
+    # ``asarray`` deja una vista ndarray común sobre el mismo mapeo, sin copiar
+    valores = np.asarray(np.load(carpeta / descripcion["archivo"], mmap_mode="r"))
+    if "categorias" in descripcion:
+        return pd.Categorical.from_codes(valores, categories=descripcion["categorias"])
+    return valores
+
+
+def compartir(
+    df: pd.DataFrame,
+    nombre: str,
+    directorio: Path = DATOS_COMPARTIDOS_DIR,
+) -> DatosCompartidos:
+    """Publica ``df`` en ``directorio/nombre`` y devuelve su referencia.
+
+    Las columnas se escriben en una carpeta temporal que se renombra al
+    final, de modo que un proceso nunca ve un almacén a medias. Si ya existe
+    un almacén con ese nombre se reutiliza.
+    """
+
+    datos = DatosCompartidos(nombre, Path(directorio))
+    if (datos.ruta / ARCHIVO_MANIFIESTO).exists():
+        return datos
+
+    datos.ruta.parent.mkdir(parents=True, exist_ok=True)
+    temporal = Path(tempfile.mkdtemp(dir=datos.ruta.parent, prefix=f".{nombre}."))
+    try:
+        columnas = [
+            _guardar_columna(temporal, f"{i:03d}.npy", columna, serie)
+            for i, (columna, serie) in enumerate(df.items())
+        ]
+        if isinstance(df.index, pd.RangeIndex):
+            indice: Dict[str, Any] = {
+                "inicio": df.index.start,
+                "fin": df.index.stop,
+                "paso": df.index.step,
+            }
+        else:
+            indice = _guardar_columna(temporal, "indice.npy", df.index.name, df.index.to_series())
+        manifiesto = {"filas": int(len(df)), "columnas": columnas, "indice": indice}
+        (temporal / ARCHIVO_MANIFIESTO).write_text(
+            json.dumps(manifiesto, ensure_ascii=False), encoding="utf-8"
+        )
+        try:
+            os.replace(temporal, datos.ruta)
+        except OSError:
+            # Otro proceso publicó el mismo almacén mientras tanto
+            if not (datos.ruta / ARCHIVO_MANIFIESTO).exists():
+                raise
+    finally:
+        shutil.rmtree(temporal, ignore_errors=True)
+    return datos
+
+
+def adjuntar(nombre: str, directorio: Path = DATOS_COMPARTIDOS_DIR) -> pd.DataFrame:
+    """Abre el almacén ``directorio/nombre`` como DataFrame de solo lectura.
+
+    Raises
+    ------
+    FileNotFoundError
+        Si no existe un almacén publicado con ese nombre.
+    """
+
+    ruta = Path(directorio) / nombre
+    manifiesto = json.loads((ruta / ARCHIVO_MANIFIESTO).read_text(encoding="utf-8"))
+
+    columnas = {
+        descripcion["nombre"]: _cargar_columna(ruta, descripcion)
+        for descripcion in manifiesto["columnas"]
+    }
+    indice = manifiesto["indice"]
+    if "archivo" in indice:
+        index = pd.Index(_cargar_columna(ruta, indice), name=indice["nombre"], copy=False)
+    else:
+        index = pd.RangeIndex(indice["inicio"], indice["fin"], indice["paso"])
+    return pd.DataFrame(columnas, index=index, copy=False)
@@ -1,26 +1,50 @@
 """Resumenes descriptivos del conjunto de datos."""
 from __future__ import annotations
 
-from typing import Dict, Iterable
+import logging
+from typing import Dict, Iterable, Optional
 
+import numpy as np
 import pandas as pd
 
+logger = logging.getLogger(__name__)
+
+
+COLUMNAS_RESUMEN: Dict[str, str] = {
+    "acuerdo_ampliacion": "Acuerdo con la ampliación",
+    "p2_economia": "Impacto en la economía",
+    "p3_necesidad": "Percepción de necesidad",
+}
+
+
+def _estadisticos_vacios() -> Dict[str, object]:
+    return {
+        "n": 0,
+        "media": float("nan"),
+        "mediana": float("nan"),
+        "moda": [],
+        "desviacion": float("nan"),
+        "q1": float("nan"),
+        "q2": float("nan"),
+        "q3": float("nan"),
+    }
+
+
+def percentil_desde_conteos(valores: np.ndarray, acumulados: np.ndarray, q: float) -> float:
+    """Percentil con interpolación lineal (como ``np.percentile``) sobre conteos."""
+    posicion = q * (acumulados[-1] - 1)
+    inferior, superior = int(np.floor(posicion)), int(np.ceil(posicion))
+    v_inf = valores[np.searchsorted(acumulados, inferior, side="right")]
+    v_sup = valores[np.searchsorted(acumulados, superior, side="right")]
+    return float(v_inf + (v_sup - v_inf) * (posicion - inferior))
+
 
 def _calcular_estadisticos_basicos(serie: pd.Series) -> Dict[str, object]:
     """Calcula medidas descriptivas básicas para una serie numérica."""
 
     serie_limpia = serie.dropna()
     if serie_limpia.empty:
-        return {
-            "n": 0,
-            "media": float("nan"),
-            "mediana": float("nan"),
-            "moda": [],
-            "desviacion": float("nan"),
-            "q1": float("nan"),
-            "q2": float("nan"),
-            "q3": float("nan"),
-        }
+        return _estadisticos_vacios()
 
     moda = serie_limpia.mode().tolist()
 
@@ -36,59 +60,153 @@ def _calcular_estadisticos_basicos(serie: pd.Series) -> Dict[str, object]:
     }
 
 
-def _imprimir_estadisticos_basicos(estadisticos: Dict[str, object], nombre: str) -> None:
-    """Imprime en consola un resumen descriptivo."""
+def _calcular_estadisticos_ponderados(serie: pd.Series, pesos: pd.Series) -> Dict[str, object]:
+    """Las medidas de :func:`_calcular_estadisticos_basicos` con un peso por respuesta.
+
+    Los pesos se agregan por valor observado y se reescalan para sumar ``n``;
+    la mediana, los cuartiles y la moda se calculan sobre esos conteos
+    ponderados y la media y la desviación con
+    :func:`src.ponderacion.momentos_ponderados`.
+    """
+
+    from .ponderacion import momentos_ponderados
+
+    n, media, desviacion, n_efectivo = momentos_ponderados(serie, pesos)
+    if n == 0:
+        return _estadisticos_vacios()
+
+    datos = pd.DataFrame({"x": serie, "w": pesos.reindex(serie.index)}).dropna()
+    conteos = datos.groupby("x")["w"].sum().sort_index()
+    conteos *= n / conteos.sum()
+    valores = conteos.index.to_numpy(dtype=float)
+    acumulados = np.cumsum(conteos.to_numpy())
+    acumulados[-1] = n
+
+    return {
+        "n": n,
+        "media": media,
+        "mediana": percentil_desde_conteos(valores, acumulados, 0.5),
+        "moda": conteos.index[conteos == conteos.max()].tolist(),
+        "desviacion": desviacion,
+        "q1": percentil_desde_conteos(valores, acumulados, 0.25),
+        "q2": percentil_desde_conteos(valores, acumulados, 0.5),
+        "q3": percentil_desde_conteos(valores, acumulados, 0.75),
+        "n_efectivo": n_efectivo,
+    }
+
+
+def _registrar_estadisticos_basicos(estadisticos: Dict[str, object], nombre: str) -> None:
+    """Registra (``logging``) un resumen descriptivo."""
 
     if estadisticos["n"] == 0:
-        print(f"No hay datos disponibles para calcular estadísticos de {nombre}.")
-        print()
+        logger.info("No hay datos disponibles para calcular estadísticos de %s.\n", nombre)
         return
 
     moda = estadisticos.get("moda", [])
     moda_str = ", ".join(f"{valor:.2f}" for valor in moda) if moda else "N/A"
 
-    print(f"--- {nombre} ---")
-    print(f"n = {estadisticos['n']}")
-    print(f"Media = {estadisticos['media']:.2f}")
-    print(f"Mediana = {estadisticos['mediana']:.2f}")
-    print(f"Moda = {moda_str}")
-    print(f"Desviación estándar = {estadisticos['desviacion']:.2f}")
-    print(
+    logger.info(
+        f"--- {nombre} ---\n"
+        f"n = {estadisticos['n']}\n"
+        f"Media = {estadisticos['media']:.2f}\n"
+        f"Mediana = {estadisticos['mediana']:.2f}\n"
+        f"Moda = {moda_str}\n"
+        f"Desviación estándar = {estadisticos['desviacion']:.2f}\n"
         "Cuartiles (Q1, Q2, Q3) = "
-        f"({estadisticos['q1']:.2f}, {estadisticos['q2']:.2f}, {estadisticos['q3']:.2f})"
+        f"({estadisticos['q1']:.2f}, {estadisticos['q2']:.2f}, {estadisticos['q3']:.2f})\n"
     )
-    print()
 
 
-def resumen_general(df: pd.DataFrame) -> Dict[str, Dict[str, object]]:
-    """Devuelve y muestra estadísticos descriptivos generales."""
+def estadisticos_desde_conteos(conteos: pd.Series) -> Dict[str, object]:
+    """Las medidas de :func:`_calcular_estadisticos_basicos` a partir de conteos.
+
+    ``conteos`` tiene como índice los valores observados y como valores el
+    número de respuestas con cada uno; equivale a ``serie.value_counts()``.
+    """
 
-    columnas = {
-        "acuerdo_ampliacion": "Acuerdo con la ampliación",
-        "p2_economia": "Impacto en la economía",
-        "p3_necesidad": "Percepción de necesidad",
+    conteos = conteos[conteos > 0].sort_index()
+    if conteos.empty:
+        return _estadisticos_vacios()
+
+    valores = conteos.index.to_numpy(dtype=float)
+    pesos = conteos.to_numpy(dtype=float)
+    acumulados = np.cumsum(conteos.to_numpy())
+    n = int(acumulados[-1])
+    media = float(np.dot(valores, pesos) / n)
+    desviacion = (
+        float(np.sqrt(np.dot(pesos, (valores - media) ** 2) / (n - 1))) if n > 1 else float("nan")
+    )
+
+    return {
+        "n": n,
+        "media": media,
+        "mediana": percentil_desde_conteos(valores, acumulados, 0.5),
+        "moda": conteos.index[pesos == pesos.max()].tolist(),
+        "desviacion": desviacion,
+        "q1": percentil_desde_conteos(valores, acumulados, 0.25),
+        "q2": percentil_desde_conteos(valores, acumulados, 0.5),
+        "q3": percentil_desde_conteos(valores, acumulados, 0.75),
     }
 
+
+def resumen_general_desde_conteos(
+    conteos: Dict[str, pd.Series],
+) -> Dict[str, Dict[str, object]]:
+    """Como :func:`resumen_general`, con los conteos por valor de cada columna."""
+
+    resultados: Dict[str, Dict[str, object]] = {}
+    for columna, nombre in COLUMNAS_RESUMEN.items():
+        if columna in conteos:
+            estadisticos = estadisticos_desde_conteos(conteos[columna])
+            estadisticos["nombre"] = nombre
+            resultados[columna] = estadisticos
+            _registrar_estadisticos_basicos(estadisticos, nombre)
+    return resultados
+
+
+def resumen_general(
+    df: pd.DataFrame, pesos: Optional[pd.Series] = None
+) -> Dict[str, Dict[str, object]]:
+    """Devuelve y registra estadísticos descriptivos generales.
+
+    Con ``pesos`` (alineados por índice con ``df``, ver
+    :mod:`src.ponderacion`) los estadísticos son ponderados.
+    """
+
     resultados: Dict[str, Dict[str, object]] = {}
-    for columna, nombre in columnas.items():
+    for columna, nombre in COLUMNAS_RESUMEN.items():
         if columna in df.columns:
-            estadisticos = _calcular_estadisticos_basicos(df[columna])
+            if pesos is None:
+                estadisticos = _calcular_estadisticos_basicos(df[columna])
+            else:
+                estadisticos = _calcular_estadisticos_ponderados(df[columna], pesos)
             estadisticos["nombre"] = nombre
             resultados[columna] = estadisticos
-            _imprimir_estadisticos_basicos(estadisticos, nombre)
+            _registrar_estadisticos_basicos(estadisticos, nombre)
         else:
-            print(f"La columna '{columna}' no se encuentra en el DataFrame.")
-            print()
+            logger.warning("La columna '%s' no se encuentra en el DataFrame.", columna)
 
     return resultados
 
 
-def resumen_por_grupo(df: pd.DataFrame, by_cols: Iterable[str]) -> pd.DataFrame:
-    """Calcula medias y desviaciones estándar agrupadas por factores."""
+def resumen_por_grupo(
+    df: pd.DataFrame, by_cols: Iterable[str], pesos: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """Calcula medias y desviaciones estándar agrupadas por factores.
+
+    Con ``pesos`` la media y la desviación de cada grupo son ponderadas (como
+    en :func:`src.ponderacion.momentos_ponderados`) y se agrega la columna
+    ``n_ponderado`` con la suma de los pesos del grupo.
+    """
     columnas_existentes = [col for col in by_cols if col in df.columns]
     if not columnas_existentes:
         raise ValueError("Ninguna de las columnas especificadas existe en el DataFrame.")
 
+    if pesos is not None:
+        resumen = _resumen_por_grupo_ponderado(df, list(columnas_existentes), pesos)
+        logger.info("Resumen por grupos (ponderado):\n%s\n", resumen)
+        return resumen
+
     resumen = (
         df.dropna(subset=["acuerdo_ampliacion"])
         .groupby(list(columnas_existentes))
@@ -98,8 +216,30 @@ def resumen_por_grupo(df: pd.DataFrame, by_cols: Iterable[str]) -> pd.DataFrame:
         .reset_index()
     )
 
-    print("Resumen por grupos:")
-    print(resumen)
-    print()
+    logger.info("Resumen por grupos:\n%s\n", resumen)
 
     return resumen
+
+
+def _resumen_por_grupo_ponderado(
+    df: pd.DataFrame, columnas: list[str], pesos: pd.Series
+) -> pd.DataFrame:
+    # Sumas por grupo de w, w·x y w·x², de las que salen media y varianza
+    datos = df[columnas].assign(x=df["acuerdo_ampliacion"], w=pesos.reindex(df.index))
+    datos = datos.dropna(subset=["x", "w"])
+    datos["wx"] = datos["w"] * datos["x"]
+    datos["wx2"] = datos["wx"] * datos["x"]
+    sumas = datos.groupby(columnas).agg(
+        n=("x", "size"), w=("w", "sum"), wx=("wx", "sum"), wx2=("wx2", "sum")
+    )
+    media = sumas["wx"] / sumas["w"]
+    varianza = (sumas["wx2"] / sumas["w"] - media**2).clip(lower=0.0)
+    correccion = sumas["n"] / (sumas["n"] - 1)
+    return pd.DataFrame(
+        {
+            "n": sumas["n"],
+            "media": media,
+            "desviacion": np.sqrt(varianza * correccion.where(sumas["n"] > 1)),
+            "n_ponderado": sumas["w"],
+        }
+    ).reset_index()
@@ -6,6 +6,8 @@ from typing import Dict, Optional
 import pandas as pd
 from scipy import stats
 
+from .memoizacion import memoizar
+
 ALPHA_DEFAULT = 0.05
 
 
@@ -19,6 +21,7 @@ def _interpretar_p_valor(p_valor: Optional[float], alpha: float = ALPHA_DEFAULT)
     return "No se rechaza la normalidad (p ≥ {:.3f}).".format(alpha)
 
 
+@memoizar
 def prueba_normalidad_acuerdo(df: pd.DataFrame, alpha: float = ALPHA_DEFAULT) -> Dict[str, float | str]:
     """Aplica la prueba Shapiro-Wilk a la variable ``acuerdo_ampliacion``."""
 
@@ -69,6 +72,14 @@ def prueba_normalidad_residuos(modelo, alpha: float = ALPHA_DEFAULT) -> Dict[str
             "decision_texto": "El objeto del modelo no expone residuos para aplicar la prueba.",
         }
 
+    return prueba_normalidad_valores_residuales(residuos, alpha)
+
+
+def prueba_normalidad_valores_residuales(
+    residuos, alpha: float = ALPHA_DEFAULT
+) -> Dict[str, float | str]:
+    """Shapiro-Wilk sobre residuos ya calculados (por ejemplo, a partir de conteos)."""
+
     residuos = pd.Series(residuos).dropna()
     if len(residuos) < 3:
         return {
@@ -1,11 +1,15 @@
 """Funciones para ajustar y reportar el diseño factorial (ANOVA 2x3)."""
 from __future__ import annotations
 
-from typing import Dict
+import logging
+from typing import Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
-import statsmodels.api as sm
-from statsmodels.formula.api import ols
+
+from .memoizacion import memoizar
+
+logger = logging.getLogger(__name__)
 
 
 def _generar_conclusion(tabla_anova: pd.DataFrame) -> str:
@@ -44,7 +48,119 @@ def _generar_conclusion(tabla_anova: pd.DataFrame) -> str:
     return " ".join(conclusiones)
 
 
-def anova_2x3(df: pd.DataFrame) -> Dict[str, object]:
+def sumas_cuadrados_lote(
+    Y: np.ndarray,
+    df: pd.DataFrame,
+    factores: Tuple[str, str] = ("frecuencia_viaje", "grupo_edad"),
+    pesos: Optional[np.ndarray] = None,
+) -> Dict[str, Tuple[np.ndarray, int]]:
+    """Sumas de cuadrados tipo II para varias respuestas con el mismo diseño.
+
+    ``Y`` tiene forma ``(n, m)``: cada columna es una variable respuesta
+    distinta (imputaciones, réplicas bootstrap, etc.) observada sobre las
+    mismas filas de ``df``. Como la matriz de diseño es común, cada modelo se
+    resuelve una sola vez con ``m`` columnas del lado derecho.
+
+    Con ``pesos`` cada fila representa ``pesos[i]`` observaciones (por ejemplo,
+    la media de una celda con ``pesos[i]`` respuestas): el ajuste es por
+    mínimos cuadrados ponderados y los grados de libertad residuales se
+    cuentan sobre ``pesos.sum()`` observaciones. La suma de cuadrados dentro
+    de las filas no está incluida en ``"Residual"``.
+
+    Returns
+    -------
+    dict
+        Para cada término (con las etiquetas de ``anova_lm``) y para
+        ``"Residual"``, una tupla ``(suma_cuadrados, grados_libertad)`` donde
+        la suma de cuadrados es un arreglo de largo ``m``.
+    """
+
+    a, b = factores
+    datos = df[list(factores)].astype(str)
+    n = len(datos)
+
+    dummies_a = pd.get_dummies(datos[a], drop_first=True, dtype=float).to_numpy()
+    dummies_b = pd.get_dummies(datos[b], drop_first=True, dtype=float).to_numpy()
+    interaccion = np.einsum("ni,nj->nij", dummies_a, dummies_b).reshape(n, -1)
+    uno = np.ones((n, 1))
+    raiz = np.ones((n, 1)) if pesos is None else np.sqrt(np.asarray(pesos, dtype=float))[:, None]
+    n_observaciones = n if pesos is None else int(round(float(np.sum(pesos))))
+
+    def rss(*bloques: np.ndarray) -> Tuple[np.ndarray, int]:
+        X = np.column_stack([uno, *bloques])
+        coef, *_ = np.linalg.lstsq(X * raiz, Y * raiz, rcond=None)
+        return (((Y - X @ coef) * raiz) ** 2).sum(axis=0), int(np.linalg.matrix_rank(X))
+
+    rss_a, rango_a = rss(dummies_a)
+    rss_b, rango_b = rss(dummies_b)
+    rss_ab, rango_ab = rss(dummies_a, dummies_b)
+    rss_full, rango_full = rss(dummies_a, dummies_b, interaccion)
+
+    return {
+        f"C({a})": (rss_b - rss_ab, rango_ab - rango_b),
+        f"C({b})": (rss_a - rss_ab, rango_ab - rango_a),
+        f"C({a}):C({b})": (rss_ab - rss_full, rango_full - rango_ab),
+        "Residual": (rss_full, n_observaciones - rango_full),
+    }
+
+
+_ERROR_NUMERICO: Tuple[str, str] = (
+    "Error numérico al ajustar el modelo ANOVA 2x3.",
+    "Aunque se intentó ajustar el modelo ANOVA 2×3, surgieron problemas numéricos "
+    "que impidieron obtener resultados válidos.",
+)
+
+
+def _anova_no_disponible(mensaje: str, conclusion: str) -> Dict[str, object]:
+    return {
+        "exito": False,
+        "mensaje": mensaje,
+        "tabla": None,
+        "tabla_texto": "",
+        "conclusion": conclusion,
+    }
+
+
+def _verificar_niveles(niveles_frec, niveles_edad) -> Optional[Dict[str, object]]:
+    """Devuelve el resultado fallido si algún factor tiene menos de 2 niveles."""
+
+    logger.info("Niveles en 'frecuencia_viaje': %s", niveles_frec)
+    logger.info("Niveles en 'grupo_edad': %s", niveles_edad)
+
+    if len(niveles_frec) >= 2 and len(niveles_edad) >= 2:
+        return None
+    logger.warning(
+        "No se puede realizar la ANOVA 2x3 porque alguno de los factores "
+        "no tiene al menos 2 niveles en los datos filtrados.\n"
+        "Esto suele ocurrir cuando, por ejemplo, casi todos los encuestados "
+        "pertenecen a un solo grupo (p. ej., solo 'No frecuente').\n"
+        "Puedes mencionarlo en el informe como una LIMITACIÓN del diseño: "
+        "no se logró cubrir adecuadamente todos los tratamientos del diseño factorial 2x3."
+    )
+    return _anova_no_disponible(
+        "Los datos no contienen niveles suficientes para ambos factores.",
+        "No se pudo ajustar el modelo ANOVA porque algún factor quedó representado con "
+        "un único nivel tras el filtrado de datos.",
+    )
+
+
+def _anova_ajustada(tabla_anova: pd.DataFrame) -> Dict[str, object]:
+    logger.info("\nTabla ANOVA (tipo II):\n%s", tabla_anova)
+
+    conclusion = _generar_conclusion(tabla_anova)
+    logger.info("\n%s", conclusion)
+
+    return {
+        "exito": True,
+        "mensaje": "Modelo ANOVA ajustado correctamente.",
+        "tabla": tabla_anova,
+        "tabla_texto": tabla_anova.to_string(),
+        "conclusion": conclusion,
+    }
+
+
+@memoizar
+def anova_2x3(df: pd.DataFrame, pesos: Optional[pd.Series] = None) -> Dict[str, object]:
     """Ajusta un modelo ANOVA 2x3 para 'acuerdo_ampliacion'.
 
     Factores:
@@ -56,26 +172,30 @@ def anova_2x3(df: pd.DataFrame) -> Dict[str, object]:
         - verifica que haya al menos 2 niveles en cada factor
         - intenta ajustar el modelo:
               acuerdo_ampliacion ~ C(frecuencia_viaje) * C(grupo_edad)
-        - imprime la tabla ANOVA si es posible
-        - si no se puede ajustar, imprime una explicación en español.
+        - registra la tabla ANOVA (``logging``) si es posible
+        - si no se puede ajustar, registra una explicación en español.
+
+    Con ``pesos`` (alineados por índice con ``df``, ver
+    :mod:`src.ponderacion`) el modelo se ajusta por mínimos cuadrados
+    ponderados y la tabla usa las sumas de cuadrados ponderadas.
+
+    El resultado se memoiza, por eso no incluye el modelo de statsmodels
+    ajustado (pesado de serializar): solo la tabla, con los p-valores, y su
+    interpretación. Los residuos se obtienen con :func:`residuos_anova_2x3`.
     """
     # Trabajamos sobre una copia para no tocar el DataFrame original
     df_anova = df.copy()
 
     # Eliminar filas con grupo_edad "Sin categoría" (edades fuera de rango, etc.)
     if "grupo_edad" not in df_anova.columns or "frecuencia_viaje" not in df_anova.columns:
-        print(
+        logger.warning(
             "No se encontraron las columnas 'grupo_edad' y/o 'frecuencia_viaje' en el DataFrame. "
             "No es posible realizar la ANOVA 2x3."
         )
-        return {
-            "exito": False,
-            "mensaje": "Faltan columnas necesarias para ejecutar la ANOVA 2x3.",
-            "tabla": None,
-            "tabla_texto": "",
-            "conclusion": "No fue posible estimar el modelo por ausencia de factores clave.",
-            "modelo": None,
-        }
+        return _anova_no_disponible(
+            "Faltan columnas necesarias para ejecutar la ANOVA 2x3.",
+            "No fue posible estimar el modelo por ausencia de factores clave.",
+        )
 
     df_anova = df_anova[df_anova["grupo_edad"] != "Sin categoría"]
 
@@ -88,74 +208,96 @@ def anova_2x3(df: pd.DataFrame) -> Dict[str, object]:
     niveles_frec = df_anova["frecuencia_viaje"].unique()
     niveles_edad = df_anova["grupo_edad"].unique()
 
-    print("Niveles en 'frecuencia_viaje':", niveles_frec)
-    print("Niveles en 'grupo_edad':", niveles_edad)
+    fallo = _verificar_niveles(niveles_frec, niveles_edad)
+    if fallo is not None:
+        return fallo
 
-    if len(niveles_frec) < 2 or len(niveles_edad) < 2:
-        print(
-            "\nNo se puede realizar la ANOVA 2x3 porque alguno de los factores "
-            "no tiene al menos 2 niveles en los datos filtrados."
-        )
-        print(
-            "Esto suele ocurrir cuando, por ejemplo, casi todos los encuestados "
-            "pertenecen a un solo grupo (p. ej., solo 'No frecuente')."
-        )
-        print(
-            "Puedes mencionarlo en el informe como una LIMITACIÓN del diseño: "
-            "no se logró cubrir adecuadamente todos los tratamientos del diseño factorial 2x3."
-        )
-        return {
-            "exito": False,
-            "mensaje": "Los datos no contienen niveles suficientes para ambos factores.",
-            "tabla": None,
-            "tabla_texto": "",
-            "conclusion": (
-                "No se pudo ajustar el modelo ANOVA porque algún factor quedó representado con "
-                "un único nivel tras el filtrado de datos."
-            ),
-            "modelo": None,
-        }
+    # statsmodels tarda en importarse; solo se carga cuando se ajusta el modelo
+    import statsmodels.api as sm
+    from statsmodels.formula.api import ols, wls
 
     # Si hay suficientes niveles, intentamos ajustar el modelo
+    formula = "acuerdo_ampliacion ~ C(frecuencia_viaje) * C(grupo_edad)"
     try:
-        modelo = ols(
-            "acuerdo_ampliacion ~ C(frecuencia_viaje) * C(grupo_edad)",
-            data=df_anova,
-        ).fit()
+        if pesos is None:
+            modelo = ols(formula, data=df_anova).fit()
+        else:
+            modelo = wls(
+                formula, data=df_anova, weights=pesos.reindex(df_anova.index).to_numpy(dtype=float)
+            ).fit()
 
         tabla_anova = sm.stats.anova_lm(modelo, typ=2)
-        print("\nTabla ANOVA (tipo II):")
-        print(tabla_anova)
-
-        conclusion = _generar_conclusion(tabla_anova)
-        print("\n" + conclusion)
-
-        return {
-            "exito": True,
-            "mensaje": "Modelo ANOVA ajustado correctamente.",
-            "tabla": tabla_anova,
-            "tabla_texto": tabla_anova.to_string(),
-            "conclusion": conclusion,
-            "modelo": modelo,
-        }
+        return _anova_ajustada(tabla_anova)
     except Exception as e:
-        print(
-            "No fue posible ajustar el modelo ANOVA 2x3 por un problema numérico o de diseño."
-        )
-        print("Detalle técnico del error:", repr(e))
-        print(
+        logger.warning(
+            "No fue posible ajustar el modelo ANOVA 2x3 por un problema numérico o de diseño.\n"
+            "Detalle técnico del error: %r\n"
             "Puedes mencionar en el informe que, aunque se intentó ajustar una ANOVA 2x3, "
             "la estructura real de los datos (tratamientos vacíos o casi vacíos) "
-            "impidió realizar el análisis factorial completo."
+            "impidió realizar el análisis factorial completo.",
+            e,
         )
-        return {
-            "exito": False,
-            "mensaje": "Error numérico al ajustar el modelo ANOVA 2x3.",
-            "tabla": None,
-            "tabla_texto": "",
-            "conclusion": (
-                "Aunque se intentó ajustar el modelo ANOVA 2×3, surgieron problemas numéricos "
-                "que impidieron obtener resultados válidos."
-            ),
-            "modelo": None,
-        }
+        return _anova_no_disponible(*_ERROR_NUMERICO)
+
+
+def residuos_anova_2x3(df: pd.DataFrame) -> np.ndarray:
+    """Residuos del modelo de :func:`anova_2x3`: cada respuesta menos la media de su celda.
+
+    El modelo con interacción ajusta exactamente la media de cada celda, así
+    que no hace falta ajustarlo. Con los pesos de rastrillaje, constantes en
+    cada celda, la media ponderada coincide con la simple y los residuos son
+    los mismos.
+    """
+
+    if "grupo_edad" not in df.columns or "frecuencia_viaje" not in df.columns:
+        return np.array([], dtype=float)
+    datos = df.loc[
+        df["grupo_edad"] != "Sin categoría", ["acuerdo_ampliacion", "frecuencia_viaje", "grupo_edad"]
+    ].dropna()
+    medias = datos.groupby(["frecuencia_viaje", "grupo_edad"], observed=True)[
+        "acuerdo_ampliacion"
+    ].transform("mean")
+    return (datos["acuerdo_ampliacion"] - medias).to_numpy(dtype=float)
+
+
+def anova_2x3_desde_celdas(celdas: pd.DataFrame) -> Dict[str, object]:
+    """La ANOVA de :func:`anova_2x3` a partir de agregados por celda.
+
+    ``celdas`` tiene una fila por combinación de ``frecuencia_viaje`` y
+    ``grupo_edad`` con ``n``, ``media`` y ``suma_cuadrados`` (la suma de
+    cuadrados de ``acuerdo_ampliacion`` respecto de la media de la celda).
+    Como el modelo con interacción ajusta la media de cada celda, las sumas
+    de cuadrados tipo II se obtienen por mínimos cuadrados ponderados sobre
+    las medias y la tabla coincide con la de ``anova_lm``.
+    """
+
+    from scipy import stats
+
+    celdas = celdas[(celdas["grupo_edad"] != "Sin categoría") & (celdas["n"] > 0)]
+    fallo = _verificar_niveles(
+        pd.unique(celdas["frecuencia_viaje"]), pd.unique(celdas["grupo_edad"])
+    )
+    if fallo is not None:
+        return fallo
+
+    sumas = sumas_cuadrados_lote(
+        celdas[["media"]].to_numpy(dtype=float),
+        celdas,
+        pesos=celdas["n"].to_numpy(dtype=float),
+    )
+    ss_residual = float(sumas["Residual"][0][0] + celdas["suma_cuadrados"].sum())
+    gl_residual = sumas["Residual"][1]
+    if gl_residual <= 0:
+        return _anova_no_disponible(*_ERROR_NUMERICO)
+
+    filas = {}
+    for termino, (suma, gl) in sumas.items():
+        if termino == "Residual":
+            continue
+        f = (float(suma[0]) / gl) / (ss_residual / gl_residual) if gl > 0 else float("nan")
+        filas[termino] = (float(suma[0]), float(gl), f, float(stats.f.sf(f, gl, gl_residual)))
+    filas["Residual"] = (ss_residual, float(gl_residual), float("nan"), float("nan"))
+    tabla_anova = pd.DataFrame.from_dict(
+        filas, orient="index", columns=["sum_sq", "df", "F", "PR(>F)"]
+    )
+    return _anova_ajustada(tabla_anova)
@@ -1,18 +1,159 @@
 """Funciones para generar y guardar visualizaciones del proyecto."""
 from __future__ import annotations
 
+import io
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict
+from typing import Any, Dict, List, Optional
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
+from PIL import Image
+
+from .config import PERFIL_IMAGEN_DEFAULT
+from .descriptivos import percentil_desde_conteos
+from .pipeline import escribir_atomico
 
 sns.set_theme(style="whitegrid")
 
 
-def _guardar_figura(fig: plt.Figure, ruta: Path, mostrar: bool = False) -> Path:
+@dataclass(frozen=True)
+class PerfilImagen:
+    """Formatos y resolución con que se escriben las figuras.
+
+    El primer formato de ``formatos`` es el principal (el que se inserta en el
+    reporte); los demás se escriben junto a él con la misma ruta base.
+    """
+
+    nombre: str
+    formatos: tuple[str, ...]
+    dpi: int
+    opciones: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    ancho_miniatura: Optional[int] = 480
+
+
+PERFILES_IMAGEN: Dict[str, PerfilImagen] = {
+    "impresion": PerfilImagen("impresion", ("png",), dpi=300),
+    "web": PerfilImagen(
+        "web",
+        ("webp", "png"),
+        dpi=110,
+        opciones={"webp": {"quality": 85, "method": 4}, "png": {"optimize": True}},
+    ),
+    "vectorial": PerfilImagen("vectorial", ("svg", "pdf"), dpi=300),
+}
+
+FORMATOS_RASTER: tuple[str, ...] = ("png", "webp", "jpg")
+# Resolución con la que se rasteriza la figura cuando solo hace falta la miniatura
+DPI_MINIATURA: int = 100
+CARPETA_MINIATURAS: str = "miniaturas"
+
+_METRICAS: List[Dict[str, Any]] = []
+
+
+def rutas_salida(
+    ruta: Path, perfil: str = PERFIL_IMAGEN_DEFAULT, clave: Optional[str] = None
+) -> Dict[str, Path]:
+    """Archivos que escribe :func:`_guardar_figura` para ``ruta`` con ``perfil``.
+
+    Returns
+    -------
+    dict
+        ``clave`` apunta al archivo principal, ``{clave}_{formato}`` a los
+        formatos adicionales y ``{clave}_miniatura`` a la miniatura PNG.
+    """
+
+    ruta = Path(ruta)
+    clave = clave or ruta.stem
+    config = PERFILES_IMAGEN[perfil]
+    salidas = {clave: ruta.with_suffix(f".{config.formatos[0]}")}
+    for formato in config.formatos[1:]:
+        salidas[f"{clave}_{formato}"] = ruta.with_suffix(f".{formato}")
+    if config.ancho_miniatura:
+        salidas[f"{clave}_miniatura"] = ruta.parent / CARPETA_MINIATURAS / f"{ruta.stem}.png"
+    return salidas
+
+
+def describir_archivo(clave: str, archivo: Path) -> Dict[str, Any]:
+    """Figura, nombre, formato y tamaño de un archivo de :func:`rutas_salida`."""
+    archivo = Path(archivo)
+    if clave.endswith("_miniatura"):
+        return {
+            "figura": archivo.stem,
+            "archivo": f"{CARPETA_MINIATURAS}/{archivo.name}",
+            "formato": "miniatura",
+            "bytes": archivo.stat().st_size,
+        }
+    return {
+        "figura": archivo.stem,
+        "archivo": archivo.name,
+        "formato": archivo.suffix.lstrip("."),
+        "bytes": archivo.stat().st_size,
+    }
+
+
+def extraer_metricas() -> List[Dict[str, Any]]:
+    """Devuelve y vacía las métricas de las figuras guardadas en este proceso.
+
+    Hay una fila por archivo escrito con ``figura``, ``archivo``, ``formato``,
+    ``bytes``, ``segundos`` (codificación de ese archivo; la rasterización
+    compartida se suma al primer formato de mapa de bits o, si no hay, a la
+    miniatura) y ``memoria_pico_mb`` (memoria de Python de toda la figura,
+    medida con :mod:`tracemalloc`).
+    """
+
+    metricas = list(_METRICAS)
+    _METRICAS.clear()
+    return metricas
+
+
+def _cronometrar(funcion, *args: Any) -> float:
+    """Ejecuta ``funcion(*args)`` y devuelve los segundos que tardó."""
+    inicio = time.perf_counter()
+    funcion(*args)
+    return time.perf_counter() - inicio
+
+
+def _rasterizar(fig: plt.Figure, dpi: int) -> Image.Image:
+    """Dibuja la figura una sola vez como imagen RGBA en memoria."""
+    buffer = io.BytesIO()
+    # Sin compresión: el PNG intermedio solo sirve para recuperar los píxeles
+    fig.savefig(
+        buffer, dpi=dpi, bbox_inches="tight", format="png", pil_kwargs={"compress_level": 0}
+    )
+    buffer.seek(0)
+    imagen = Image.open(buffer)
+    imagen.load()
+    return imagen
+
+
+def _codificar(
+    imagen: Image.Image, destino: Path, formato: str, dpi: int, opciones: Dict[str, Any]
+) -> None:
+    if formato == "jpg":
+        imagen = imagen.convert("RGB")
+    nombre_pil = "JPEG" if formato == "jpg" else formato.upper()
+    buffer = io.BytesIO()
+    imagen.save(buffer, format=nombre_pil, dpi=(dpi, dpi), **opciones)
+    escribir_atomico(destino, buffer.getvalue())
+
+
+def _codificar_miniatura(imagen: Image.Image, destino: Path, ancho: int) -> None:
+    alto = max(1, round(imagen.height * ancho / imagen.width))
+    miniatura = imagen.resize((ancho, alto), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    miniatura.save(buffer, format="PNG", optimize=True)
+    escribir_atomico(destino, buffer.getvalue())
+
+
+def _guardar_figura(
+    fig: plt.Figure, ruta: Path, mostrar: bool = False, perfil: str = PERFIL_IMAGEN_DEFAULT
+) -> Path:
     """Guarda una figura de Matplotlib en ``ruta`` y la cierra.
 
     Parameters
@@ -20,28 +161,268 @@ def _guardar_figura(fig: plt.Figure, ruta: Path, mostrar: bool = False) -> Path:
     fig:
         Objeto :class:`matplotlib.figure.Figure` que se desea guardar.
     ruta:
-        Ruta de destino para la imagen.
+        Ruta de destino para la imagen. La extensión se reemplaza por la del
+        formato principal del perfil.
     mostrar:
         Si es ``True`` se muestra la figura después de guardarla.
+    perfil:
+        Nombre de un perfil de :data:`PERFILES_IMAGEN`.
+
+    Returns
+    -------
+    pathlib.Path
+        Ruta del archivo principal. Los demás archivos del perfil se obtienen
+        con :func:`rutas_salida`.
+
+    Notes
+    -----
+    La figura se rasteriza una sola vez y los formatos de mapa de bits y la
+    miniatura se codifican en hilos (Pillow libera el GIL al comprimir)
+    mientras el hilo principal escribe los formatos vectoriales.
     """
 
-    ruta.parent.mkdir(parents=True, exist_ok=True)
+    config = PERFILES_IMAGEN[perfil]
+    salidas = rutas_salida(ruta, perfil, clave="figura")
+    claves = {
+        formato: "figura" if i == 0 else f"figura_{formato}"
+        for i, formato in enumerate(config.formatos)
+    }
+    destinos = {formato: salidas[clave] for formato, clave in claves.items()}
+    raster = [formato for formato in config.formatos if formato in FORMATOS_RASTER]
+
     fig.tight_layout()
-    fig.savefig(ruta, dpi=300, bbox_inches="tight")
+    ya_medido = tracemalloc.is_tracing()
+    if not ya_medido:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    memoria_inicial = tracemalloc.get_traced_memory()[0]
+
+    segundos: Dict[str, float] = {}
+    with ThreadPoolExecutor(max_workers=len(raster) + 1) as pool:
+        tareas = {}
+        if raster or config.ancho_miniatura:
+            dpi_raster = config.dpi if raster else DPI_MINIATURA
+            clave_raster = claves[raster[0]] if raster else "figura_miniatura"
+            inicio = time.perf_counter()
+            imagen = _rasterizar(fig, dpi_raster)
+            segundos[clave_raster] = time.perf_counter() - inicio
+            for formato in raster:
+                tareas[claves[formato]] = pool.submit(
+                    _cronometrar,
+                    _codificar,
+                    imagen,
+                    destinos[formato],
+                    formato,
+                    dpi_raster,
+                    config.opciones.get(formato, {}),
+                )
+            if config.ancho_miniatura:
+                tareas["figura_miniatura"] = pool.submit(
+                    _cronometrar,
+                    _codificar_miniatura,
+                    imagen,
+                    salidas["figura_miniatura"],
+                    min(config.ancho_miniatura, imagen.width),
+                )
+        for formato, destino in destinos.items():
+            if formato not in raster:
+                inicio = time.perf_counter()
+                buffer = io.BytesIO()
+                fig.savefig(buffer, dpi=config.dpi, bbox_inches="tight", format=formato)
+                escribir_atomico(destino, buffer.getvalue())
+                segundos[claves[formato]] = time.perf_counter() - inicio
+        for clave, tarea in tareas.items():
+            segundos[clave] = segundos.get(clave, 0.0) + tarea.result()
+
+    memoria_pico = (tracemalloc.get_traced_memory()[1] - memoria_inicial) / 1024**2
+    if not ya_medido:
+        tracemalloc.stop()
+
+    for clave, archivo in salidas.items():
+        metrica = describir_archivo(clave, archivo)
+        metrica.update({"segundos": segundos[clave], "memoria_pico_mb": memoria_pico})
+        _METRICAS.append(metrica)
+
     if mostrar:  # pragma: no cover - uso interactivo opcional
         plt.show()
     plt.close(fig)
-    return ruta
+    return destinos[config.formatos[0]]
+
+
+# ---------------------------------------------------------------------------
+# Agregados de entrada. Las funciones ``guardar_*`` dibujan a partir de estas
+# tablas, cuyo tamaño depende de los niveles de la escala y de los grupos, no
+# del número de encuestados.
+# ---------------------------------------------------------------------------
+
+MAX_REPETICIONES_ATIPICOS: int = 25
+
+ORDEN_TRATAMIENTOS: tuple[str, ...] = (
+    "Frecuente - Joven",
+    "Frecuente - Adulto",
+    "Frecuente - Adulto mayor",
+    "No frecuente - Joven",
+    "No frecuente - Adulto",
+    "No frecuente - Adulto mayor",
+)
+
+
+def conteos_acuerdo(df: pd.DataFrame) -> pd.Series:
+    """Número de respuestas por valor de ``acuerdo_ampliacion``."""
+    return df["acuerdo_ampliacion"].dropna().value_counts().sort_index()
 
 
-def guardar_histograma_acuerdo(df: pd.DataFrame, output_dir: Path, mostrar: bool = False) -> Path:
-    """Genera y guarda el histograma del acuerdo con la ampliación."""
+def estadisticos_boxplot(
+    df: pd.DataFrame, factor: str, columna: str = "acuerdo_ampliacion", whis: float = 1.5
+) -> pd.DataFrame:
+    """Cuartiles, bigotes y valores atípicos de ``columna`` por nivel de ``factor``.
+
+    Los estadísticos se obtienen de la tabla de conteos por valor y siguen las
+    mismas reglas que :func:`matplotlib.cbook.boxplot_stats`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una fila por nivel (en orden de aparición) con ``n``, ``q1``, ``med``,
+        ``q3``, ``whislo``, ``whishi`` y ``fliers``, una tupla de pares
+        ``(valor, conteo)`` con los valores fuera de los bigotes.
+    """
+
+    datos = df[[factor, columna]].dropna()
+    niveles = pd.unique(datos[factor])
+    tabla = pd.crosstab(datos[factor], datos[columna]).reindex(niveles)
+    return estadisticos_boxplot_desde_conteos(tabla, factor, whis)
+
+
+def estadisticos_boxplot_desde_conteos(
+    tabla: pd.DataFrame, factor: str, whis: float = 1.5
+) -> pd.DataFrame:
+    """Como :func:`estadisticos_boxplot`, a partir de la tabla de conteos.
+
+    ``tabla`` tiene una fila por nivel de ``factor`` (en el orden en que se
+    dibujan) y una columna por valor de la respuesta.
+    """
+
+    valores = tabla.columns.to_numpy(dtype=float)
+
+    filas = []
+    for nivel, conteos in tabla.iterrows():
+        presentes = conteos.to_numpy() > 0
+        v, c = valores[presentes], conteos.to_numpy()[presentes]
+        acumulados = np.cumsum(c)
+        q1, med, q3 = (percentil_desde_conteos(v, acumulados, q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        dentro_alto = v[v <= q3 + whis * iqr]
+        dentro_bajo = v[v >= q1 - whis * iqr]
+        whishi = dentro_alto.max() if dentro_alto.size and dentro_alto.max() > q3 else q3
+        whislo = dentro_bajo.min() if dentro_bajo.size and dentro_bajo.min() < q1 else q1
+        atipicos = (v < whislo) | (v > whishi)
+        filas.append(
+            {
+                factor: nivel,
+                "n": int(acumulados[-1]),
+                "q1": q1,
+                "med": med,
+                "q3": q3,
+                "whislo": float(whislo),
+                "whishi": float(whishi),
+                "fliers": tuple(zip(v[atipicos].tolist(), c[atipicos].tolist())),
+            }
+        )
+    return pd.DataFrame(filas).set_index(factor)
+
+
+def _datos_representativos(estadisticos: pd.Series) -> np.ndarray:
+    """Arreglo mínimo cuyo boxplot coincide con ``estadisticos``.
+
+    Se construye con ``4m + 1`` elementos para que los percentiles 25, 50 y 75
+    caigan exactamente en las posiciones ``m``, ``2m`` y ``3m``. Los valores
+    atípicos se repiten a lo sumo :data:`MAX_REPETICIONES_ATIPICOS` veces.
+    """
+
+    bajos: list[float] = []
+    altos: list[float] = []
+    for valor, conteo in sorted(estadisticos["fliers"]):
+        copias = [valor] * min(int(conteo), MAX_REPETICIONES_ATIPICOS)
+        (bajos if valor < estadisticos["whislo"] else altos).extend(copias)
+
+    m = max(len(bajos), len(altos)) + 1
+    inicio = bajos + [estadisticos["whislo"]]
+    fin = [estadisticos["whishi"]] + altos
+    return np.array(
+        inicio
+        + [estadisticos["q1"]] * (m + 1 - len(inicio))
+        + [estadisticos["med"]] * m
+        + [estadisticos["q3"]] * (2 * m - len(fin))
+        + fin,
+        dtype=float,
+    )
+
+
+def resumen_por_tratamiento(df: pd.DataFrame) -> pd.DataFrame:
+    """Media, n, desviación y error estándar del acuerdo por tratamiento."""
+
+    resumen = (
+        df.dropna(subset=["acuerdo_ampliacion", "tratamiento"])
+        .groupby("tratamiento", observed=True)
+        ["acuerdo_ampliacion"]
+        .agg(["mean", "count", "std"])
+        .rename(columns={"mean": "media", "count": "n", "std": "desviacion"})
+    )
+    resumen["error_estandar"] = resumen["desviacion"] / np.sqrt(resumen["n"])
+    return resumen
+
+
+def matriz_correlacion(df: pd.DataFrame) -> pd.DataFrame:
+    """Correlaciones de Pearson entre las variables de opinión presentes."""
+
+    columnas = ["acuerdo_ampliacion", "p2_economia", "p3_necesidad"]
+    presentes = [col for col in columnas if col in df.columns]
+    if len(presentes) < 2:
+        raise ValueError(
+            "Se requieren al menos dos variables de opinión para calcular correlaciones."
+        )
+    return df[presentes].dropna(how="all").corr()
+
+
+def guardar_histograma_acuerdo(
+    df: Optional[pd.DataFrame],
+    output_dir: Path,
+    mostrar: bool = False,
+    conteos: Optional[pd.Series] = None,
+    perfil: str = PERFIL_IMAGEN_DEFAULT,
+) -> Path:
+    """Genera y guarda el histograma del acuerdo con la ampliación.
+
+    Si se entrega ``conteos`` (ver :func:`conteos_acuerdo`) no se necesita
+    ``df``. El histograma y la curva KDE se calculan con los valores distintos
+    ponderados por su conteo; el ancho de banda se ajusta para que coincida
+    con el de Scott sobre los datos sin agrupar.
+    """
+
+    if conteos is None:
+        conteos = conteos_acuerdo(df)
+    valores = conteos.index.to_numpy(dtype=float)
+    pesos = conteos.to_numpy(dtype=float)
+
+    kde_kws = {}
+    n = pesos.sum()
+    if n > 1:
+        media = np.average(valores, weights=pesos)
+        varianza = np.sum(pesos * (valores - media) ** 2) / (n - 1)
+        p = pesos / n
+        # Varianza que calcula gaussian_kde con ``weights`` (aweights normalizados)
+        varianza_ponderada = np.sum(p * (valores - media) ** 2) / (1 - np.sum(p**2))
+        if varianza_ponderada > 0:
+            kde_kws["bw_method"] = float(np.sqrt(varianza / varianza_ponderada) * n ** (-1 / 5))
 
     fig, ax = plt.subplots(figsize=(10, 6))
     sns.histplot(
-        df["acuerdo_ampliacion"].dropna(),
+        x=pd.Series(valores, name="acuerdo_ampliacion"),
+        weights=pesos,
         bins=10,
         kde=True,
+        kde_kws=kde_kws,
         color="#4c72b0",
         ax=ax,
     )
@@ -50,19 +431,44 @@ def guardar_histograma_acuerdo(df: pd.DataFrame, output_dir: Path, mostrar: bool
     ax.set_ylabel("Número de personas", fontsize=12)
 
     ruta = output_dir / "hist_acuerdo.png"
-    return _guardar_figura(fig, ruta, mostrar)
+    return _guardar_figura(fig, ruta, mostrar, perfil)
+
+
+def _dataframe_representativo(estadisticos: pd.DataFrame, factor: str) -> pd.DataFrame:
+    """Datos sustitutos, grupo por grupo, para dibujar con ``sns.boxplot``."""
+
+    bloques = [
+        pd.DataFrame({factor: nivel, "acuerdo_ampliacion": _datos_representativos(fila)})
+        for nivel, fila in estadisticos.iterrows()
+    ]
+    return pd.concat(bloques, ignore_index=True)
 
 
 def guardar_boxplots_por_factores(
-    df: pd.DataFrame, output_dir: Path, mostrar: bool = False
+    df: Optional[pd.DataFrame],
+    output_dir: Path,
+    mostrar: bool = False,
+    estadisticos: Optional[Dict[str, pd.DataFrame]] = None,
+    perfil: str = PERFIL_IMAGEN_DEFAULT,
 ) -> Dict[str, Path]:
-    """Guarda los boxplots de acuerdo por frecuencia de viaje y grupo etario."""
+    """Guarda los boxplots de acuerdo por frecuencia de viaje y grupo etario.
+
+    ``estadisticos`` puede traer, para ``"frecuencia_viaje"`` y
+    ``"grupo_edad"``, las tablas de :func:`estadisticos_boxplot`; en ese caso
+    las cajas se dibujan a partir de ellas sin recorrer las respuestas.
+    """
+
+    if estadisticos is None:
+        estadisticos = {
+            factor: estadisticos_boxplot(df, factor)
+            for factor in ("frecuencia_viaje", "grupo_edad")
+        }
 
     rutas: Dict[str, Path] = {}
 
     fig_frec, ax_frec = plt.subplots(figsize=(10, 6))
     sns.boxplot(
-        data=df,
+        data=_dataframe_representativo(estadisticos["frecuencia_viaje"], "frecuencia_viaje"),
         x="frecuencia_viaje",
         y="acuerdo_ampliacion",
         palette="Set2",
@@ -73,12 +479,12 @@ def guardar_boxplots_por_factores(
     ax_frec.set_ylabel("Calificación (1–10)", fontsize=12)
     ax_frec.tick_params(axis="x", rotation=10)
     rutas["box_frecuencia"] = _guardar_figura(
-        fig_frec, output_dir / "box_frecuencia.png", mostrar
+        fig_frec, output_dir / "box_frecuencia.png", mostrar, perfil
     )
 
     fig_edad, ax_edad = plt.subplots(figsize=(10, 6))
     sns.boxplot(
-        data=df,
+        data=_dataframe_representativo(estadisticos["grupo_edad"], "grupo_edad"),
         x="grupo_edad",
         y="acuerdo_ampliacion",
         palette="Set3",
@@ -88,38 +494,33 @@ def guardar_boxplots_por_factores(
     ax_edad.set_xlabel("Grupo de edad", fontsize=12)
     ax_edad.set_ylabel("Calificación (1–10)", fontsize=12)
     ax_edad.tick_params(axis="x", rotation=15)
-    rutas["box_edad"] = _guardar_figura(fig_edad, output_dir / "box_edad.png", mostrar)
+    rutas["box_edad"] = _guardar_figura(
+        fig_edad, output_dir / "box_edad.png", mostrar, perfil
+    )
 
     return rutas
 
 
 def guardar_barras_por_tratamiento(
-    df: pd.DataFrame, output_dir: Path, mostrar: bool = False
+    df: Optional[pd.DataFrame],
+    output_dir: Path,
+    mostrar: bool = False,
+    resumen: Optional[pd.DataFrame] = None,
+    perfil: str = PERFIL_IMAGEN_DEFAULT,
 ) -> Path:
-    """Guarda la gráfica de barras con la media de acuerdo por tratamiento."""
+    """Guarda la gráfica de barras con la media de acuerdo por tratamiento.
 
-    resumen = (
-        df.dropna(subset=["acuerdo_ampliacion", "tratamiento"])
-        .groupby("tratamiento")
-        ["acuerdo_ampliacion"]
-        .agg(["mean", "count", "std"])
-        .rename(columns={"mean": "media", "count": "n", "std": "desviacion"})
-    )
+    ``resumen`` es la tabla de :func:`resumen_por_tratamiento` (medias y
+    errores estándar por celda); si no se entrega se calcula a partir de ``df``.
+    """
 
-    resumen["error_estandar"] = resumen["desviacion"] / np.sqrt(resumen["n"])
+    if resumen is None:
+        resumen = resumen_por_tratamiento(df)
     resumen = resumen.fillna(0.0)
     resumen_original = resumen.copy()
 
-    orden_tratamientos = [
-        "Frecuente - Joven",
-        "Frecuente - Adulto",
-        "Frecuente - Adulto mayor",
-        "No frecuente - Joven",
-        "No frecuente - Adulto",
-        "No frecuente - Adulto mayor",
-    ]
     tratamientos_presentes = [
-        tratamiento for tratamiento in orden_tratamientos if tratamiento in resumen.index
+        tratamiento for tratamiento in ORDEN_TRATAMIENTOS if tratamiento in resumen.index
     ]
     if tratamientos_presentes:
         resumen = resumen.loc[tratamientos_presentes]
@@ -160,24 +561,23 @@ def guardar_barras_por_tratamiento(
         )
 
     ruta = output_dir / "barras_tratamientos.png"
-    return _guardar_figura(fig, ruta, mostrar)
+    return _guardar_figura(fig, ruta, mostrar, perfil)
 
 
 def guardar_mapa_correlacion(
-    df: pd.DataFrame, output_dir: Path, mostrar: bool = False
+    df: Optional[pd.DataFrame],
+    output_dir: Path,
+    mostrar: bool = False,
+    correlaciones: Optional[pd.DataFrame] = None,
+    perfil: str = PERFIL_IMAGEN_DEFAULT,
 ) -> Path:
-    """Genera un mapa de calor de correlaciones entre variables de opinión."""
+    """Genera un mapa de calor de correlaciones entre variables de opinión.
 
-    columnas = ["acuerdo_ampliacion", "p2_economia", "p3_necesidad"]
-    presentes = [col for col in columnas if col in df.columns]
-
-    if len(presentes) < 2:
-        raise ValueError(
-            "Se requieren al menos dos variables de opinión para calcular correlaciones."
-        )
+    ``correlaciones`` es la matriz de :func:`matriz_correlacion`; si no se
+    entrega se calcula a partir de ``df``.
+    """
 
-    df_opinion = df[presentes].dropna(how="all")
-    df_corr = df_opinion.corr()
+    df_corr = matriz_correlacion(df) if correlaciones is None else correlaciones
 
     etiquetas = {
         "acuerdo_ampliacion": "Acuerdo con la ampliación",
@@ -218,4 +618,4 @@ def guardar_mapa_correlacion(
     ax.set_yticklabels(ax.get_yticklabels(), fontsize=11)
 
     ruta = output_dir / "correlaciones.png"
-    return _guardar_figura(fig, ruta, mostrar)
+    return _guardar_figura(fig, ruta, mostrar, perfil)
@@ -0,0 +1,308 @@
+"""Imputación múltiple de respuestas Likert faltantes y combinación por reglas de Rubin.
+
+Las ``m`` imputaciones se guardan como un único arreglo con forma
+``(m, n, p)``. Los estadísticos de cada imputación se calculan a la vez sobre
+el eje de imputaciones y luego se combinan con las reglas de Rubin.
+"""
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .config import ESCALA_LIKERT_MAX, ESCALA_LIKERT_MIN
+from .diseno_factorial import sumas_cuadrados_lote
+
+COLUMNAS_LIKERT: tuple[str, ...] = ("acuerdo_ampliacion", "p2_economia", "p3_necesidad")
+FACTORES: tuple[str, ...] = ("frecuencia_viaje", "grupo_edad")
+ESCALA_MIN: int = ESCALA_LIKERT_MIN
+ESCALA_MAX: int = ESCALA_LIKERT_MAX
+# Semilla por defecto: las imputaciones son aleatorias y los resultados
+# combinados deben repetirse entre corridas.
+SEMILLA_IMPUTACION: int = 20251104
+
+
+def _matriz_factores(df: pd.DataFrame, factores: Sequence[str]) -> np.ndarray:
+    """Codifica los factores como variables indicadoras con intercepto."""
+    indicadoras = pd.get_dummies(df[list(factores)].astype(str), drop_first=True, dtype=float)
+    return np.column_stack([np.ones(len(df)), indicadoras.to_numpy()])
+
+
+def _ajustar_y_muestrear(
+    X: np.ndarray, y: np.ndarray, observados: np.ndarray, rng: np.random.Generator
+) -> np.ndarray:
+    """Ajusta una regresión por imputación y simula valores para los faltantes.
+
+    ``X`` tiene forma ``(m, n, k)`` e ``y`` forma ``(m, n)``. Los coeficientes y
+    la varianza residual se extraen de su distribución posterior aproximada
+    para que las imputaciones reflejen la incertidumbre del modelo.
+    """
+
+    m, _, k = X.shape
+    Xo = X[:, observados, :]
+    yo = y[:, observados]
+    gl = max(int(observados.sum()) - k, 1)
+
+    XtX = np.einsum("mnk,mnl->mkl", Xo, Xo) + 1e-8 * np.eye(k)
+    Xty = np.einsum("mnk,mn->mk", Xo, yo)
+    beta = np.linalg.solve(XtX, Xty[..., None])[..., 0]
+    residuos = yo - np.einsum("mnk,mk->mn", Xo, beta)
+    sigma2 = (residuos**2).sum(axis=1) / rng.chisquare(gl, size=m)
+
+    cov = np.linalg.inv(XtX) * sigma2[:, None, None]
+    chol = np.linalg.cholesky(cov + 1e-12 * np.eye(k))
+    beta_sim = beta + np.einsum("mkl,ml->mk", chol, rng.standard_normal((m, k)))
+
+    Xf = X[:, ~observados, :]
+    predichos = np.einsum("mnk,mk->mn", Xf, beta_sim)
+    ruido = rng.standard_normal(predichos.shape) * np.sqrt(sigma2)[:, None]
+    return np.clip(np.rint(predichos + ruido), ESCALA_MIN, ESCALA_MAX)
+
+
+def imputar_multiple(
+    df: pd.DataFrame,
+    m: int = 20,
+    iteraciones: int = 10,
+    columnas: Sequence[str] = COLUMNAS_LIKERT,
+    factores: Sequence[str] = FACTORES,
+    semilla: Optional[int] = SEMILLA_IMPUTACION,
+) -> np.ndarray:
+    """Genera ``m`` conjuntos imputados mediante ecuaciones encadenadas.
+
+    Cada columna con faltantes se modela a partir de las demás preguntas
+    Likert (con sus valores imputados vigentes) y de los factores del diseño.
+    Las ``m`` cadenas avanzan en paralelo dentro del mismo arreglo.
+
+    Returns
+    -------
+    numpy.ndarray
+        Arreglo con forma ``(m, n, p)`` en el orden de ``columnas``. Los
+        valores observados se conservan en todas las imputaciones.
+    """
+
+    rng = np.random.default_rng(semilla)
+    valores = df[list(columnas)].to_numpy(dtype=float)
+    faltantes = np.isnan(valores)
+    factores_X = _matriz_factores(df, factores)
+
+    medias = np.nanmean(valores, axis=0)
+    relleno = np.where(faltantes, np.rint(medias), valores)
+    imputados = np.repeat(relleno[None, :, :], m, axis=0)
+
+    columnas_faltantes = [j for j in range(len(columnas)) if faltantes[:, j].any()]
+    if not columnas_faltantes:
+        return imputados
+
+    for _ in range(iteraciones):
+        for j in columnas_faltantes:
+            observados = ~faltantes[:, j]
+            otras = np.delete(imputados, j, axis=2)
+            X = np.concatenate(
+                [np.broadcast_to(factores_X, (m, *factores_X.shape)), otras], axis=2
+            )
+            imputados[:, ~observados, j] = _ajustar_y_muestrear(
+                X, imputados[:, :, j], observados, rng
+            )
+
+    return imputados
+
+
+def combinar_rubin(
+    estimaciones: np.ndarray, varianzas: np.ndarray, n: Optional[float] = None
+) -> Dict[str, float]:
+    """Combina ``m`` estimaciones escalares con las reglas de Rubin.
+
+    Si se indica ``n`` se aplica la corrección de grados de libertad de
+    Barnard y Rubin (1999) para muestras pequeñas.
+    """
+
+    m = estimaciones.size
+    q_barra = float(estimaciones.mean())
+    u_barra = float(varianzas.mean())
+    b = float(estimaciones.var(ddof=1)) if m > 1 else 0.0
+    total = u_barra + (1 + 1 / m) * b
+
+    if b == 0.0:
+        gl = float("inf") if n is None else float(n - 1)
+        fmi = 0.0
+    else:
+        r = (1 + 1 / m) * b / u_barra if u_barra > 0 else float("inf")
+        gl = (m - 1) * (1 + 1 / r) ** 2
+        lambda_ = (1 + 1 / m) * b / total
+        if n is not None:
+            gl_obs = (n - 1 + 1) / (n - 1 + 3) * (n - 1) * (1 - lambda_)
+            gl = 1 / (1 / gl + 1 / gl_obs)
+        fmi = lambda_
+
+    return {
+        "estimacion": q_barra,
+        "varianza_intra": u_barra,
+        "varianza_entre": b,
+        "varianza_total": total,
+        "error_estandar": float(np.sqrt(total)),
+        "gl": float(gl),
+        "fraccion_info_faltante": float(fmi),
+    }
+
+
+def _descriptivos_combinados(
+    imputados: np.ndarray, columnas: Sequence[str]
+) -> Dict[str, Dict[str, object]]:
+    """Promedia los descriptivos de cada imputación, calculados en lote."""
+
+    n = imputados.shape[1]
+    medias = imputados.mean(axis=1)
+    desviaciones = imputados.std(axis=1, ddof=1)
+    cuartiles = np.quantile(imputados, [0.25, 0.5, 0.75], axis=1)
+
+    resultados: Dict[str, Dict[str, object]] = {}
+    for j, columna in enumerate(columnas):
+        media = combinar_rubin(medias[:, j], desviaciones[:, j] ** 2 / n, n=n)
+        resultados[columna] = {
+            "n": int(n),
+            "media": media["estimacion"],
+            "mediana": float(cuartiles[1, :, j].mean()),
+            "desviacion": float(desviaciones[:, j].mean()),
+            "q1": float(cuartiles[0, :, j].mean()),
+            "q2": float(cuartiles[1, :, j].mean()),
+            "q3": float(cuartiles[2, :, j].mean()),
+            "fraccion_info_faltante": media["fraccion_info_faltante"],
+        }
+    return resultados
+
+
+def _anova_combinada(
+    y: np.ndarray, df: pd.DataFrame, factores: Sequence[str]
+) -> pd.DataFrame:
+    """ANOVA 2x3 tipo II sobre todas las imputaciones y combinación D2.
+
+    Las sumas de cuadrados de las ``m`` imputaciones se obtienen en lote con
+    :func:`src.diseno_factorial.sumas_cuadrados_lote`. Los estadísticos
+    F se combinan con el procedimiento D2 de Li, Meng, Raghunathan y Rubin.
+    """
+
+    validos = (df[factores[1]] != "Sin categoría").to_numpy()
+    m = y.shape[0]
+    sumas = sumas_cuadrados_lote(y[:, validos].T, df.loc[validos], tuple(factores))
+    rss_full, gl_error = sumas.pop("Residual")
+    cme = rss_full / gl_error
+
+    filas = {}
+    for efecto, (ss, k) in sumas.items():
+        f = (ss / k) / cme
+        d = f * k
+        raices = np.sqrt(d)
+        if m > 1 and np.ptp(raices) > 1e-9 * max(1.0, float(raices.max())):
+            r2 = (1 + 1 / m) * np.var(raices, ddof=1)
+            d2 = (d.mean() / k - (m + 1) / (m - 1) * r2) / (1 + r2)
+            d2 = max(d2, 0.0)
+            gl_den = k ** (-3 / m) * (m - 1) * (1 + 1 / r2) ** 2
+        else:
+            d2 = float(f.mean())
+            gl_den = float(gl_error)
+        filas[efecto] = {
+            "sum_sq": float(ss.mean()),
+            "df": float(k),
+            "F": float(d2),
+            "df_den": float(gl_den),
+            "PR(>F)": float(stats.f.sf(d2, k, gl_den)),
+        }
+    filas["Residual"] = {
+        "sum_sq": float(rss_full.mean()),
+        "df": float(gl_error),
+        "F": float("nan"),
+        "df_den": float("nan"),
+        "PR(>F)": float("nan"),
+    }
+    return pd.DataFrame.from_dict(filas, orient="index")
+
+
+def analisis_imputado(
+    df: pd.DataFrame,
+    m: int = 20,
+    alpha: float = 0.05,
+    mu0: float = 5.0,
+    iteraciones: int = 10,
+    semilla: Optional[int] = SEMILLA_IMPUTACION,
+) -> Dict[str, object]:
+    """Ejecuta descriptivos, intervalos, prueba t y ANOVA sobre ``m`` imputaciones.
+
+    Returns
+    -------
+    dict
+        Resultados combinados con las mismas claves que las funciones de
+        :mod:`src.descriptivos`, :mod:`src.intervalos_confianza` y
+        :mod:`src.prueba_hipotesis`, además de la tabla ANOVA combinada y el
+        número de respuestas imputadas por columna. No incluye el arreglo de
+        imputaciones (``m`` veces los datos), que se obtiene con
+        :func:`imputar_multiple`.
+    """
+
+    columnas = [col for col in COLUMNAS_LIKERT if col in df.columns]
+    imputados = imputar_multiple(
+        df, m=m, iteraciones=iteraciones, columnas=columnas, semilla=semilla
+    )
+    _, n, _ = imputados.shape
+    j_acuerdo = columnas.index("acuerdo_ampliacion")
+    acuerdo = imputados[:, :, j_acuerdo]
+
+    descriptivos = _descriptivos_combinados(imputados, columnas)
+
+    medias = acuerdo.mean(axis=1)
+    varianzas = acuerdo.var(axis=1, ddof=1) / n
+    pooled_media = combinar_rubin(medias, varianzas, n=n)
+    t_critico = stats.t.ppf(1 - alpha / 2, df=pooled_media["gl"])
+    margen = t_critico * pooled_media["error_estandar"]
+    ic_media = {
+        "n": float(n),
+        "media": pooled_media["estimacion"],
+        "error_estandar": pooled_media["error_estandar"],
+        "t_critico": float(t_critico),
+        "limite_inferior": float(pooled_media["estimacion"] - margen),
+        "limite_superior": float(pooled_media["estimacion"] + margen),
+        "alpha": float(alpha),
+        "gl": pooled_media["gl"],
+        "fraccion_info_faltante": pooled_media["fraccion_info_faltante"],
+    }
+
+    a_favor = (acuerdo >= 6).astype(float)
+    p_hats = a_favor.mean(axis=1)
+    pooled_prop = combinar_rubin(p_hats, p_hats * (1 - p_hats) / n)
+    z_critico = stats.norm.ppf(1 - alpha / 2)
+    margen_prop = z_critico * pooled_prop["error_estandar"]
+    ic_prop = {
+        "n": float(n),
+        "p_hat": pooled_prop["estimacion"],
+        "error_estandar": pooled_prop["error_estandar"],
+        "z_critico": float(z_critico),
+        "limite_inferior": float(max(0.0, pooled_prop["estimacion"] - margen_prop)),
+        "limite_superior": float(min(1.0, pooled_prop["estimacion"] + margen_prop)),
+        "alpha": float(alpha),
+        "fraccion_info_faltante": pooled_prop["fraccion_info_faltante"],
+    }
+
+    estadistico_t = (pooled_media["estimacion"] - mu0) / pooled_media["error_estandar"]
+    p_valor = float(stats.t.sf(estadistico_t, df=pooled_media["gl"]))
+    prueba = {
+        "media_muestral": pooled_media["estimacion"],
+        "estadistico_t": float(estadistico_t),
+        "p_valor_unilateral": p_valor,
+        "decision": "Rechazar H0" if p_valor < alpha else "No rechazar H0",
+        "alpha": float(alpha),
+        "mu0": float(mu0),
+        "gl": pooled_media["gl"],
+    }
+
+    return {
+        "m": int(m),
+        "n": int(n),
+        "imputados_por_columna": {
+            col: int(df[col].isna().sum()) for col in columnas
+        },
+        "descriptivos": descriptivos,
+        "intervalos": {"media": ic_media, "proporcion": ic_prop},
+        "prueba_hipotesis": prueba,
+        "anova": _anova_combinada(acuerdo, df, FACTORES),
+    }
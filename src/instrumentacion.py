@@ -0,0 +1,372 @@
+"""Medición de tiempo, CPU, memoria y filas de cada etapa del análisis.
+
+Una :class:`Instrumentacion` se pasa a :meth:`src.pipeline.Pipeline.ejecutar`
+(o a :func:`src.analisis.ejecutar_analisis`), que registra un evento por cada
+etapa (incluidas las figuras y las que se ejecutan en el pool de procesos)
+con:
+
+- ``segundos`` (tiempo de reloj) y ``cpu_segundos`` (tiempo de CPU del
+  proceso que la ejecutó);
+- ``rss_mb`` y ``rss_pico_mb``: memoria residente al terminar y máxima del
+  proceso hasta ese momento; ``incremento_pico_mb`` es cuánto subió ese
+  máximo durante la etapa;
+- ``filas_entrada`` y ``filas_salida``: filas de los DataFrames recibidos y
+  devueltos, cuando los hay.
+
+Las etapas tomadas de la caché se registran como eventos instantáneos.
+:meth:`Instrumentacion.escribir_traza` guarda los eventos en el formato de
+trazas de Chrome (se abre en ``chrome://tracing`` o en Perfetto) y
+:meth:`Instrumentacion.resumen` los reúne en una tabla.
+
+Sin instrumentación el pipeline no mide nada: el único costo es comprobar
+que el argumento es ``None``.
+
+:func:`muestreo` envuelve un bloque con un perfilador por muestreo
+registrado en :data:`PERFILADORES_MUESTREO` (``pyinstrument`` o ``py-spy``,
+si están instalados); se pueden registrar otros.
+"""
+from __future__ import annotations
+
+import contextlib
+import json
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .pipeline import escribir_atomico
+
+Evento = Dict[str, Any]
+
+COLUMNAS_RESUMEN: tuple[str, ...] = (
+    "etapa",
+    "categoria",
+    "segundos",
+    "porcentaje",
+    "cpu_segundos",
+    "rss_mb",
+    "rss_pico_mb",
+    "incremento_pico_mb",
+    "filas_entrada",
+    "filas_salida",
+    "proceso",
+)
+
+
+def rss_pico_mb() -> float:
+    """Memoria residente máxima del proceso actual en MB (``nan`` si no se conoce)."""
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa kilobytes; macOS, bytes
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _rss_mb() -> float:
+    """Memoria residente actual del proceso en MB (``nan`` fuera de Linux)."""
+    try:
+        with open("/proc/self/statm", "rb") as archivo:
+            paginas = int(archivo.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return float("nan")
+    return paginas * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def _reiniciar_rss_pico() -> bool:
+    """Reinicia el máximo de memoria residente del proceso (solo Linux).
+
+    Devuelve ``False`` si el sistema no lo permite.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as archivo:
+            archivo.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _rss_pico_reiniciable_mb() -> float:
+    """Máximo de memoria residente desde el último :func:`_reiniciar_rss_pico`, en MB."""
+    try:
+        with open("/proc/self/status", "rb") as archivo:
+            for linea in archivo:
+                if linea.startswith(b"VmHWM:"):
+                    return int(linea.split()[1]) / 1024
+    except (OSError, IndexError, ValueError):
+        pass
+    return float("nan")
+
+
+@contextlib.contextmanager
+def incremento_memoria() -> Iterator[Dict[str, float]]:
+    """Mide cuánto sube la memoria residente del proceso durante el bloque.
+
+    Al salir, ``medicion["mb"]`` es el máximo de memoria residente alcanzado
+    en el bloque menos la memoria residente al entrar. En Linux el máximo se
+    reinicia al entrar, así que la medición no depende de lo que el proceso
+    hizo antes (un trabajador reutilizado, por ejemplo). En otros sistemas
+    solo se sabe cuánto subió el máximo histórico del proceso, que es una
+    cota inferior (``0`` si el bloque no lo superó).
+
+    Se usa para la columna ``incremento_memoria_mb`` de los resúmenes de los
+    modos lote y por segmentos.
+    """
+    medicion = {"mb": float("nan")}
+    reiniciado = _reiniciar_rss_pico()
+    base = _rss_mb() if reiniciado else rss_pico_mb()
+    try:
+        yield medicion
+    finally:
+        pico = _rss_pico_reiniciable_mb() if reiniciado else rss_pico_mb()
+        medicion["mb"] = max(0.0, pico - base)
+
+
+def contar_filas(valor: Any) -> Optional[int]:
+    """Filas de un resultado o entrada de etapa, o ``None`` si no son datos tabulares.
+
+    Reconoce DataFrames, Series y arreglos, tuplas cuyo primer elemento lo es
+    (como la salida de la etapa de carga), diccionarios con ``"filas"``
+    (como los parciales) y objetos con un atributo ``datos`` o ``filas``
+    (como los datos preparados y los segmentos).
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series)) or hasattr(valor, "shape"):
+        return int(len(valor)) if getattr(valor, "ndim", 1) else None
+    if isinstance(valor, tuple) and valor:
+        return contar_filas(valor[0])
+    if isinstance(valor, dict):
+        filas = valor.get("filas")
+        return filas if isinstance(filas, int) else None
+    for atributo in ("datos", "filas"):
+        interno = getattr(valor, atributo, None)
+        if interno is not None and not callable(interno):
+            return contar_filas(interno)
+    return None
+
+
+def _max_filas(valores: Iterator[Any]) -> Optional[int]:
+    filas = [n for n in map(contar_filas, valores) if n is not None]
+    return max(filas) if filas else None
+
+
+def _iniciar_medicion() -> Dict[str, float]:
+    return {
+        "inicio_us": time.time_ns() // 1000,
+        "reloj": time.perf_counter(),
+        "cpu": time.process_time(),
+        "pico": rss_pico_mb(),
+    }
+
+
+def _terminar_medicion(inicio: Dict[str, float]) -> Evento:
+    pico = rss_pico_mb()
+    return {
+        "inicio_us": inicio["inicio_us"],
+        "segundos": time.perf_counter() - inicio["reloj"],
+        "cpu_segundos": time.process_time() - inicio["cpu"],
+        "rss_mb": _rss_mb(),
+        "rss_pico_mb": pico,
+        "incremento_pico_mb": pico - inicio["pico"],
+        "proceso": os.getpid(),
+        "hilo": threading.get_native_id(),
+    }
+
+
+def medir_llamada(
+    funcion: Callable[..., Any], entradas: Dict[str, Any], parametros: Dict[str, Any]
+) -> Tuple[Any, Evento]:
+    """Ejecuta ``funcion(**entradas, **parametros)`` y mide la llamada.
+
+    Es lo que usa :class:`Instrumentacion` en el proceso principal y lo que
+    ejecutan los procesos del pool, que devuelven el evento junto con el
+    resultado.
+    """
+
+    inicio = _iniciar_medicion()
+    resultado = funcion(**entradas, **parametros)
+    evento = _terminar_medicion(inicio)
+    evento["filas_entrada"] = _max_filas(iter([*entradas.values(), *parametros.values()]))
+    evento["filas_salida"] = contar_filas(resultado)
+    return resultado, evento
+
+
+class Instrumentacion:
+    """Eventos medidos durante una o varias ejecuciones del pipeline."""
+
+    def __init__(self) -> None:
+        self.eventos: List[Evento] = []
+        self.origen_us = time.time_ns() // 1000
+        self._candado = threading.Lock()
+
+    def _agregar(self, evento: Evento) -> None:
+        with self._candado:
+            self.eventos.append(evento)
+
+    def ejecutar(
+        self,
+        nombre: str,
+        funcion: Callable[..., Any],
+        entradas: Dict[str, Any],
+        parametros: Dict[str, Any],
+        categoria: str = "etapa",
+    ) -> Any:
+        """Ejecuta y mide una etapa en este proceso."""
+        resultado, evento = medir_llamada(funcion, entradas, parametros)
+        self.registrar(nombre, evento, categoria)
+        return resultado
+
+    def registrar(self, nombre: str, evento: Evento, categoria: str = "etapa") -> None:
+        """Agrega un evento ya medido (por ejemplo, en un proceso del pool)."""
+        self._agregar({"nombre": nombre, "categoria": categoria, **evento})
+
+    def registrar_reutilizada(self, nombre: str, filas: Optional[int] = None) -> None:
+        """Marca que la etapa ``nombre`` se tomó de la caché."""
+        self._agregar(
+            {
+                "nombre": nombre,
+                "categoria": "cache",
+                "inicio_us": time.time_ns() // 1000,
+                "segundos": 0.0,
+                "filas_salida": filas,
+                "proceso": os.getpid(),
+                "hilo": threading.get_native_id(),
+            }
+        )
+
+    @contextlib.contextmanager
+    def bloque(self, nombre: str, categoria: str = "corrida") -> Iterator[None]:
+        """Mide un bloque de código cualquiera, por ejemplo la corrida completa."""
+        inicio = _iniciar_medicion()
+        try:
+            yield
+        finally:
+            self.registrar(nombre, _terminar_medicion(inicio), categoria)
+
+    def resumen(self) -> pd.DataFrame:
+        """Una fila por evento, de la etapa más lenta a la más rápida.
+
+        ``porcentaje`` es la fracción del tiempo de la corrida completa (o,
+        si no se midió, de la suma de las etapas).
+        """
+        if not self.eventos:
+            return pd.DataFrame(columns=list(COLUMNAS_RESUMEN))
+        tabla = pd.DataFrame(self.eventos).rename(columns={"nombre": "etapa"})
+        tabla = tabla.reindex(columns=list(COLUMNAS_RESUMEN))
+        tabla[["filas_entrada", "filas_salida"]] = tabla[["filas_entrada", "filas_salida"]].astype("Int64")
+        corridas = tabla["categoria"] == "corrida"
+        total = tabla.loc[corridas, "segundos"].sum() or tabla["segundos"].sum()
+        tabla["porcentaje"] = 100 * tabla["segundos"] / total if total else 0.0
+        return tabla.sort_values(["segundos", "etapa"], ascending=[False, True], ignore_index=True)
+
+    def traza(self) -> Dict[str, Any]:
+        """Los eventos en el formato JSON de trazas de Chrome (``traceEvents``)."""
+        eventos: List[Dict[str, Any]] = []
+        procesos = sorted({evento["proceso"] for evento in self.eventos})
+        for pid in procesos:
+            nombre = "principal" if pid == os.getpid() else f"trabajador {pid}"
+            eventos.append(
+                {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": nombre}}
+            )
+        for evento in self.eventos:
+            argumentos = {
+                clave: valor
+                for clave, valor in evento.items()
+                if clave not in ("nombre", "categoria", "inicio_us", "proceso", "hilo")
+                and valor is not None
+                and not (isinstance(valor, float) and math.isnan(valor))
+            }
+            registro = {
+                "name": evento["nombre"],
+                "cat": evento["categoria"],
+                "ts": evento["inicio_us"] - self.origen_us,
+                "pid": evento["proceso"],
+                "tid": evento["hilo"],
+                "args": argumentos,
+            }
+            if evento["categoria"] == "cache":
+                registro.update(ph="i", s="t")
+            else:
+                registro.update(ph="X", dur=round(evento["segundos"] * 1e6))
+            eventos.append(registro)
+        return {"traceEvents": eventos, "displayTimeUnit": "ms"}
+
+    def escribir_traza(self, ruta: Path) -> Path:
+        """Escribe la traza en ``ruta`` y el resumen en el CSV del mismo nombre."""
+        ruta = Path(ruta)
+        contenido = json.dumps(self.traza(), ensure_ascii=False, allow_nan=False, default=str)
+        escribir_atomico(ruta, contenido.encode("utf-8"))
+        escribir_atomico(
+            ruta.with_suffix(".csv"), self.resumen().to_csv(index=False).encode("utf-8")
+        )
+        return ruta
+
+
+# ---------------------------------------------------------------------------
+# Perfiladores por muestreo
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def _muestreo_pyinstrument(ruta: Path) -> Iterator[None]:
+    try:
+        from pyinstrument import Profiler
+    except ImportError as exc:
+        raise RuntimeError("El muestreo con pyinstrument requiere 'pip install pyinstrument'.") from exc
+    perfilador = Profiler()
+    perfilador.start()
+    try:
+        yield
+    finally:
+        perfilador.stop()
+        escribir_atomico(ruta.with_suffix(".html"), perfilador.output_html().encode("utf-8"))
+
+
+@contextlib.contextmanager
+def _muestreo_py_spy(ruta: Path) -> Iterator[None]:
+    # py-spy corre como proceso aparte y muestrea también los procesos hijos
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    comando = [
+        "py-spy", "record", "--pid", str(os.getpid()), "--subprocesses",
+        "--format", "speedscope", "--output", str(ruta.with_suffix(".speedscope.json")),
+    ]
+    try:
+        proceso = subprocess.Popen(comando, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    except FileNotFoundError as exc:
+        raise RuntimeError("El muestreo con py-spy requiere 'pip install py-spy'.") from exc
+    try:
+        yield
+    finally:
+        proceso.send_signal(signal.SIGINT)
+        proceso.wait()
+
+
+# Cada perfilador recibe la ruta base de su salida y devuelve un gestor de contexto.
+PERFILADORES_MUESTREO: Dict[str, Callable[[Path], ContextManager[None]]] = {
+    "pyinstrument": _muestreo_pyinstrument,
+    "py-spy": _muestreo_py_spy,
+}
+
+
+def muestreo(herramienta: Optional[str], ruta: Path) -> ContextManager[None]:
+    """Gestor de contexto que perfila el bloque con ``herramienta`` (o no hace nada).
+
+    Raises
+    ------
+    KeyError
+        Si ``herramienta`` no está en :data:`PERFILADORES_MUESTREO`.
+    """
+    if herramienta is None:
+        return contextlib.nullcontext()
+    if herramienta not in PERFILADORES_MUESTREO:
+        raise KeyError(
+            f"Perfilador desconocido: {herramienta!r}. "
+            f"Opciones: {', '.join(PERFILADORES_MUESTREO)}."
+        )
+    return PERFILADORES_MUESTREO[herramienta](Path(ruta))
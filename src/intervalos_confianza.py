@@ -1,22 +1,59 @@
 """Cálculo de intervalos de confianza para media y proporción."""
 from __future__ import annotations
 
-from typing import Dict
+from typing import Dict, Optional
 
 import numpy as np
 import pandas as pd
 from scipy import stats
 
+from .memoizacion import memoizar
+
+
+def _ajustar_por_diseno(resultado: Dict[str, float], n: int, n_efectivo: float) -> Dict[str, float]:
+    """Guarda ``n`` real junto al tamaño efectivo con el que se calculó el intervalo."""
+    resultado["n"] = float(n)
+    resultado["n_efectivo"] = float(n_efectivo)
+    resultado["efecto_diseno"] = float(n / n_efectivo)
+    return resultado
+
+
+@memoizar
+def intervalo_confianza_media(
+    serie: pd.Series, alpha: float = 0.05, pesos: Optional[pd.Series] = None
+) -> Dict[str, float]:
+    """Calcula el intervalo de confianza para la media poblacional.
+
+    Con ``pesos`` (alineados por índice con ``serie``, ver
+    :mod:`src.ponderacion`) la media y la desviación son ponderadas y el
+    error estándar usa el tamaño efectivo de Kish en lugar de ``n``.
+    """
+    if pesos is not None:
+        from .ponderacion import momentos_ponderados
+
+        n, media, desviacion, n_efectivo = momentos_ponderados(serie, pesos)
+        if n == 0:
+            raise ValueError(
+                "La serie no contiene datos válidos para calcular el intervalo de confianza."
+            )
+        resultado = intervalo_media_desde_momentos(n_efectivo, media, desviacion, alpha)
+        return _ajustar_por_diseno(resultado, n, n_efectivo)
 
-def intervalo_confianza_media(serie: pd.Series, alpha: float = 0.05) -> Dict[str, float]:
-    """Calcula el intervalo de confianza para la media poblacional."""
     datos = serie.dropna().astype(float)
     n = datos.size
     if n == 0:
         raise ValueError("La serie no contiene datos válidos para calcular el intervalo de confianza.")
 
-    media = datos.mean()
-    desviacion = datos.std(ddof=1)
+    return intervalo_media_desde_momentos(n, datos.mean(), datos.std(ddof=1), alpha)
+
+
+def intervalo_media_desde_momentos(
+    n: float, media: float, desviacion: float, alpha: float = 0.05
+) -> Dict[str, float]:
+    """Intervalo t para la media a partir de ``n``, la media y la desviación muestral.
+
+    ``n`` puede ser un tamaño efectivo no entero.
+    """
     error_estandar = desviacion / np.sqrt(n)
     gl = n - 1
     t_critico = stats.t.ppf(1 - alpha / 2, df=gl)
@@ -35,16 +72,36 @@ def intervalo_confianza_media(serie: pd.Series, alpha: float = 0.05) -> Dict[str
     return resultado
 
 
+@memoizar
 def intervalo_confianza_proporcion(
-    serie_binaria: pd.Series, alpha: float = 0.05
+    serie_binaria: pd.Series, alpha: float = 0.05, pesos: Optional[pd.Series] = None
 ) -> Dict[str, float]:
-    """Calcula el intervalo de confianza para una proporción poblacional."""
+    """Calcula el intervalo de confianza para una proporción poblacional.
+
+    Con ``pesos`` la proporción es ponderada y el intervalo se calcula con
+    el tamaño efectivo de Kish, como en :func:`intervalo_confianza_media`.
+    """
+    if pesos is not None:
+        from .ponderacion import momentos_ponderados
+
+        n, p_hat, _, n_efectivo = momentos_ponderados(serie_binaria, pesos)
+        if n == 0:
+            raise ValueError("La serie binaria no contiene datos válidos.")
+        resultado = intervalo_proporcion_desde_conteos(p_hat * n_efectivo, n_efectivo, alpha)
+        return _ajustar_por_diseno(resultado, n, n_efectivo)
+
     datos = serie_binaria.dropna().astype(float)
-    n = datos.size
+    return intervalo_proporcion_desde_conteos(datos.sum(), datos.size, alpha)
+
+
+def intervalo_proporcion_desde_conteos(
+    exitos: float, n: float, alpha: float = 0.05
+) -> Dict[str, float]:
+    """Intervalo de Wald para la proporción con ``exitos`` de ``n`` casos."""
     if n == 0:
         raise ValueError("La serie binaria no contiene datos válidos.")
 
-    p_hat = datos.mean()
+    p_hat = exitos / n
     error_estandar = np.sqrt(p_hat * (1 - p_hat) / n)
     z_critico = stats.norm.ppf(1 - alpha / 2)
     margen = z_critico * error_estandar
@@ -1,6 +1,7 @@
 """Funciones para limpiar y preparar los datos para el análisis."""
 from __future__ import annotations
 
+import logging
 from typing import Iterable
 
 import numpy as np
@@ -8,6 +9,7 @@ import pandas as pd
 
 from .config import COLUMN_MAP
 
+logger = logging.getLogger(__name__)
 
 EDAD_MINIMA: int = 16
 EDAD_LIMITE_JOVEN: int = 24
@@ -89,10 +91,10 @@ def preparar_datos(df: pd.DataFrame) -> pd.DataFrame:
     # Contar registros fuera del rango esperado (edad < 16 o datos raros)
     registros_fuera_rango = (df_trabajo["grupo_edad"] == "Sin categoría").sum()
     if registros_fuera_rango > 0:
-        print(
-            "Advertencia: se encontraron",
+        logger.warning(
+            "Advertencia: se encontraron %d registros con edades fuera del rango "
+            "definido (16 años en adelante).",
             registros_fuera_rango,
-            "registros con edades fuera del rango definido (16 años en adelante).",
         )
 
     # Normalizar nombre de la pregunta principal
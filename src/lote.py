@@ -0,0 +1,284 @@
+"""Ejecución del mismo análisis sobre muchos libros de encuesta.
+
+Cada libro se analiza en un proceso del pool con su propia carpeta de salida
+(``<salida>/<encuesta>/`` con ``figuras/``, ``resultados/`` y el reporte), de
+modo que las corridas no comparten archivos. Al terminar se arma una tabla
+resumen con los resultados principales de todas las encuestas.
+"""
+from __future__ import annotations
+
+import glob
+import importlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .config import LOTE_DIR, PERFIL_IMAGEN_DEFAULT
+from .instrumentacion import incremento_memoria
+from .pipeline import CACHE_DIR_DEFAULT, escribir_atomico
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_LIBRO: tuple[str, ...] = (".xlsx", ".xls")
+ARCHIVO_RESUMEN: str = "resumen.csv"
+ETIQUETAS_ANOVA: Dict[str, str] = {
+    "p_frecuencia": "C(frecuencia_viaje)",
+    "p_edad": "C(grupo_edad)",
+    "p_interaccion": "C(frecuencia_viaje):C(grupo_edad)",
+}
+
+
+def encontrar_libros(
+    entradas: Sequence[str | Path], extensiones: Sequence[str] = EXTENSIONES_LIBRO
+) -> List[Path]:
+    """Expande carpetas y patrones glob en la lista ordenada de libros a analizar.
+
+    Una carpeta aporta sus archivos con alguna de las ``extensiones`` (por
+    defecto ``.xlsx``/``.xls``, sin recorrer subcarpetas); cualquier otra
+    entrada se interpreta como patrón glob (``data/regiones/*.xlsx``,
+    ``data/**/*.xlsx``). Se omiten los archivos temporales de Excel
+    (``~$...``) y los duplicados.
+    """
+
+    libros: Dict[Path, None] = {}
+    for entrada in entradas:
+        ruta = Path(entrada)
+        if ruta.is_dir():
+            candidatos = sorted(ruta.iterdir())
+        else:
+            candidatos = sorted(Path(p) for p in glob.glob(str(entrada), recursive=True))
+        for candidato in candidatos:
+            if (
+                candidato.is_file()
+                and candidato.suffix.lower() in extensiones
+                and not candidato.name.startswith("~$")
+            ):
+                libros[candidato.resolve()] = None
+    return list(libros)
+
+
+def _nombres_salida(libros: Sequence[Path]) -> List[str]:
+    """Nombre de carpeta por libro; los nombres repetidos se numeran."""
+    nombres: List[str] = []
+    usados: Dict[str, int] = {}
+    for libro in libros:
+        base = libro.stem
+        usados[base] = usados.get(base, 0) + 1
+        nombres.append(base if usados[base] == 1 else f"{base}_{usados[base]}")
+    return nombres
+
+
+def _limitar_memoria(memoria_mb: Optional[float]) -> None:
+    """Limita el espacio de direcciones del proceso a ``memoria_mb`` megabytes.
+
+    Si el sistema no admite el límite (por ejemplo en Windows) solo se avisa.
+    Al superarlo, las asignaciones fallan con :class:`MemoryError` y ese libro
+    se marca con error sin afectar a los demás.
+    """
+    if not memoria_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        logger.warning("El límite de memoria no está disponible en este sistema.")
+        return
+    limite = int(memoria_mb * 1024 * 1024)
+    _, maximo = resource.getrlimit(resource.RLIMIT_AS)
+    if maximo != resource.RLIM_INFINITY:
+        limite = min(limite, maximo)
+    resource.setrlimit(resource.RLIMIT_AS, (limite, maximo))
+
+
+MODULOS_PRECARGADOS: tuple[str, ...] = (
+    "scipy.stats",
+    "statsmodels.api",
+    "statsmodels.formula.api",
+    "src.analisis",
+)
+
+
+def inicializar_trabajador(memoria_mb: Optional[float], figuras: bool) -> None:
+    """Prepara un proceso del pool: backend sin pantalla, registro y memoria.
+
+    Es el inicializador de los pools de este módulo y de :mod:`src.segmentos`.
+
+    Las bibliotecas que el análisis importa de forma diferida se cargan antes
+    de fijar el límite, que así acota solo la memoria de los datos. (OpenBLAS,
+    además, puede quedar reintentando sin fin si se inicializa sin memoria.)
+    """
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+    modulos = MODULOS_PRECARGADOS + (("src.graficos",) if figuras else ())
+    for modulo in modulos:
+        importlib.import_module(modulo)
+
+    logging.getLogger("src").setLevel(logging.WARNING)
+    _limitar_memoria(memoria_mb)
+
+
+def fila_resumen(resultado: Any) -> Dict[str, Any]:
+    """Extrae de un :class:`~src.resultados.ResultadoAnalisis` las columnas del resumen."""
+    fila: Dict[str, Any] = {"n": resultado.n_muestra}
+    acuerdo = resultado.descriptivos.get("acuerdo_ampliacion")
+    fila["media_acuerdo"] = acuerdo.media if acuerdo else float("nan")
+    if resultado.ic_media is not None:
+        fila["ic_media_li"] = resultado.ic_media.limite_inferior
+        fila["ic_media_ls"] = resultado.ic_media.limite_superior
+    if resultado.ic_proporcion is not None:
+        fila["proporcion_a_favor"] = resultado.ic_proporcion.estimacion
+        fila["ic_proporcion_li"] = resultado.ic_proporcion.limite_inferior
+        fila["ic_proporcion_ls"] = resultado.ic_proporcion.limite_superior
+    if resultado.prueba_hipotesis is not None:
+        fila["t"] = resultado.prueba_hipotesis.estadistico_t
+        fila["p_valor_t"] = resultado.prueba_hipotesis.p_valor
+    tabla = resultado.anova.tabla if resultado.anova is not None else None
+    for columna, etiqueta in ETIQUETAS_ANOVA.items():
+        if isinstance(tabla, pd.DataFrame) and etiqueta in tabla.index:
+            fila[columna] = float(tabla.loc[etiqueta, "PR(>F)"])
+    return fila
+
+
+def analizar_libro(
+    libro: Path,
+    salida: Path,
+    figuras: bool = False,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    cache_dir: Optional[Path] = CACHE_DIR_DEFAULT,
+) -> Dict[str, Any]:
+    """Analiza un libro escribiendo todo en ``salida`` y devuelve su fila del resumen.
+
+    Los errores no se propagan: quedan en las columnas ``estado`` y ``error``
+    para que un libro defectuoso no detenga el lote.
+    """
+
+    from .analisis import ejecutar_analisis
+
+    inicio = time.perf_counter()
+    fila: Dict[str, Any] = {
+        "encuesta": salida.name,
+        "archivo": Path(libro).as_posix(),
+        "salida": salida.as_posix(),
+    }
+    with incremento_memoria() as memoria:
+        try:
+            resultado = ejecutar_analisis(
+                libro,
+                figuras=figuras,
+                reporte=True,
+                artefacto=True,
+                perfil_imagen=perfil_imagen,
+                figuras_dir=salida / "figuras",
+                reporte_path=salida / "reporte_estadistico.md",
+                artefacto_dir=salida / "resultados",
+                cache_dir=cache_dir,
+                procesos_figuras=0,
+            )
+        except Exception as exc:
+            fila.update(estado="error", error=f"{type(exc).__name__}: {exc}")
+        else:
+            fila.update(estado="ok", error="", **fila_resumen(resultado))
+    fila["segundos"] = time.perf_counter() - inicio
+    fila["incremento_memoria_mb"] = memoria["mb"]
+    return fila
+
+
+def ejecutar_lote(
+    entradas: Sequence[str | Path],
+    salida_dir: Path = LOTE_DIR,
+    procesos: Optional[int] = None,
+    memoria_mb: Optional[float] = None,
+    tareas_por_proceso: Optional[int] = None,
+    figuras: bool = False,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    usar_cache: bool = True,
+) -> pd.DataFrame:
+    """Analiza cada libro de ``entradas`` y devuelve la tabla resumen del lote.
+
+    Parameters
+    ----------
+    entradas:
+        Carpetas o patrones glob con los libros (ver :func:`encontrar_libros`).
+    salida_dir:
+        Carpeta del lote. Cada encuesta escribe en ``salida_dir/<nombre>/`` y
+        el resumen se guarda en ``salida_dir/resumen.csv``.
+    procesos:
+        Procesos en paralelo; por defecto uno por CPU. Con ``0`` o ``1`` los
+        libros se analizan uno tras otro en el proceso actual.
+    memoria_mb:
+        Límite de memoria por proceso del pool. El libro que lo supera
+        termina con error y el resto continúa.
+    tareas_por_proceso:
+        Libros que analiza cada proceso antes de reemplazarse por uno nuevo,
+        lo que devuelve al sistema la memoria acumulada. Por defecto los
+        procesos se reutilizan durante todo el lote.
+    figuras, perfil_imagen:
+        Dibujan también las gráficas de cada encuesta. Desactivado por
+        defecto: en un lote suele bastar con los reportes y el resumen.
+    usar_cache:
+        Comparte la caché de etapas en disco; es segura entre procesos porque
+        las claves incluyen el hash del libro y las rutas de salida.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una fila por libro, en el orden de ``entradas``, con su estado, los
+        estadísticos principales, el tiempo y cuánto subió la memoria residente
+        durante su análisis (``incremento_memoria_mb``).
+    """
+
+    libros = encontrar_libros(entradas)
+    if not libros:
+        raise FileNotFoundError(
+            f"No se encontraron libros de Excel en {[str(e) for e in entradas]}."
+        )
+
+    salida_dir = Path(salida_dir)
+    salidas = [salida_dir / nombre for nombre in _nombres_salida(libros)]
+    cache_dir = CACHE_DIR_DEFAULT if usar_cache else None
+    argumentos = [
+        (libro, salida, figuras, perfil_imagen, cache_dir) for libro, salida in zip(libros, salidas)
+    ]
+
+    if procesos is None:
+        procesos = min(len(libros), os.cpu_count() or 1)
+    filas: List[Optional[Dict[str, Any]]] = [None] * len(libros)
+    if procesos <= 1:
+        if memoria_mb:
+            logger.warning("El límite de memoria solo se aplica al analizar en procesos aparte.")
+        for i, args in enumerate(argumentos):
+            filas[i] = analizar_libro(*args)
+            logger.info("[%d/%d] %s: %s", i + 1, len(libros), salidas[i].name, filas[i]["estado"])
+    else:
+        with ProcessPoolExecutor(
+            max_workers=procesos,
+            initializer=inicializar_trabajador,
+            initargs=(memoria_mb, figuras),
+            max_tasks_per_child=tareas_por_proceso,
+        ) as pool:
+            futuros = {pool.submit(analizar_libro, *args): i for i, args in enumerate(argumentos)}
+            for completados, futuro in enumerate(as_completed(futuros), start=1):
+                i = futuros[futuro]
+                try:
+                    filas[i] = futuro.result()
+                except Exception as exc:
+                    # El proceso murió (p. ej. por falta de memoria) antes de responder
+                    filas[i] = {
+                        "encuesta": salidas[i].name,
+                        "archivo": libros[i].as_posix(),
+                        "salida": salidas[i].as_posix(),
+                        "estado": "error",
+                        "error": f"{type(exc).__name__}: {exc}",
+                    }
+                logger.info(
+                    "[%d/%d] %s: %s", completados, len(libros), salidas[i].name, filas[i]["estado"]
+                )
+
+    resumen = pd.DataFrame(filas)
+    escribir_atomico(salida_dir / ARCHIVO_RESUMEN, resumen.to_csv(index=False).encode("utf-8"))
+    return resumen
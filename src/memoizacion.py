@@ -0,0 +1,215 @@
+"""Memoización de las funciones estadísticas por huella de los datos.
+
+Las funciones decoradas con :func:`memoizar` guardan su resultado asociado a
+una clave formada por el código de la función, una huella barata de cada
+DataFrame, Series o arreglo recibido (el hash vectorizado de sus filas con
+:func:`pandas.util.hash_pandas_object`) y el resto de los argumentos. Una
+llamada repetida con los mismos datos y parámetros, como ocurre en un
+cuaderno o en un barrido de ``alpha`` o ``mu0``, devuelve el resultado
+guardado sin volver a calcularlo.
+
+Cada función tiene su propia caché en memoria, acotada a ``max_entradas`` y
+con desalojo de la entrada usada hace más tiempo (LRU). Con
+:func:`configurar_memoizacion` los resultados se guardan además en disco y
+sobreviven al proceso. :func:`estadisticas_memoizacion` informa aciertos y
+fallos de cada función.
+
+Los resultados se comparten entre llamadas: un diccionario se devuelve como
+copia superficial, pero su contenido no debe modificarse. En un acierto la
+función no se ejecuta, por lo que tampoco emite sus mensajes de registro.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from .config import MEMO_MAX_ENTRADAS
+from .pipeline import escribir_atomico, huella_codigo, huella_codigo_fuente
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_CACHES: Dict[str, "CacheMemo"] = {}
+_directorio: Optional[Path] = None
+
+
+@functools.lru_cache(maxsize=1)
+def _huella_paquete() -> str:
+    """Hash del código de todo ``src/``, calculado una vez por proceso."""
+    return huella_codigo_fuente(Path(__file__).parent)
+
+
+def huella_datos(valor: Any) -> Any:
+    """Representación corta y estable de un argumento para la clave de caché.
+
+    DataFrames, Series e índices se resumen con el SHA-256 del hash de sus
+    filas (incluido el índice), sus tipos y sus nombres; los arreglos de
+    NumPy, con el de sus bytes. Los demás valores se usan tal cual.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series, pd.Index)):
+        digest = hashlib.sha256(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+        if isinstance(valor, pd.DataFrame):
+            digest.update(repr((list(valor.columns), list(map(str, valor.dtypes)))).encode())
+        else:
+            digest.update(repr((valor.name, str(valor.dtype))).encode())
+        return (type(valor).__name__, len(valor), digest.hexdigest())
+    if isinstance(valor, np.ndarray):
+        contiguo = np.ascontiguousarray(valor)
+        digest = hashlib.sha256(contiguo.tobytes())
+        return ("ndarray", valor.shape, str(valor.dtype), digest.hexdigest())
+    return valor
+
+
+class CacheMemo:
+    """Caché LRU de una función, con contadores y persistencia opcional en disco.
+
+    Es segura entre hilos: el servicio de consultas llama a las funciones
+    desde varios hilos a la vez.
+    """
+
+    def __init__(self, nombre: str, max_entradas: int = MEMO_MAX_ENTRADAS) -> None:
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self.entradas: "OrderedDict[str, Any]" = OrderedDict()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self._candado = threading.Lock()
+
+    def _ruta(self, clave: str) -> Optional[Path]:
+        if _directorio is None:
+            return None
+        return _directorio / self.nombre / f"{clave[:32]}.pkl"
+
+    def buscar(self, clave: str) -> Tuple[bool, Any]:
+        with self._candado:
+            if clave in self.entradas:
+                self.entradas.move_to_end(clave)
+                self.aciertos += 1
+                return True, self.entradas[clave]
+        ruta = self._ruta(clave)
+        if ruta is not None and ruta.exists():
+            try:
+                with open(ruta, "rb") as archivo:
+                    resultado = pickle.load(archivo)
+            except Exception:  # pragma: no cover - archivo corrupto, se recalcula
+                pass
+            else:
+                ruta.touch()
+                with self._candado:
+                    self.aciertos_disco += 1
+                    self._agregar(clave, resultado)
+                return True, resultado
+        with self._candado:
+            self.fallos += 1
+        return False, None
+
+    def _agregar(self, clave: str, resultado: Any) -> None:
+        self.entradas[clave] = resultado
+        self.entradas.move_to_end(clave)
+        while len(self.entradas) > self.max_entradas:
+            self.entradas.popitem(last=False)
+
+    def guardar(self, clave: str, resultado: Any) -> None:
+        with self._candado:
+            self._agregar(clave, resultado)
+        ruta = self._ruta(clave)
+        if ruta is None:
+            return
+        escribir_atomico(ruta, pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL))
+        # En disco también se conservan solo las max_entradas usadas más recientemente
+        archivos = sorted(ruta.parent.glob("*.pkl"), key=lambda p: p.stat().st_mtime_ns)
+        for viejo in archivos[: max(0, len(archivos) - self.max_entradas)]:
+            viejo.unlink(missing_ok=True)
+
+    def limpiar(self) -> None:
+        with self._candado:
+            self.entradas.clear()
+            self.aciertos = self.aciertos_disco = self.fallos = 0
+
+
+def memoizar(funcion: Optional[F] = None, *, max_entradas: int = MEMO_MAX_ENTRADAS):
+    """Decora ``funcion`` para memoizar sus resultados (ver el módulo).
+
+    Puede usarse como ``@memoizar`` o ``@memoizar(max_entradas=...)``. La
+    clave incluye el hash del código fuente de la función y el de todo el
+    paquete (como la versión de :class:`src.pipeline.Pipeline`), de modo que
+    los resultados guardados en disco se descartan al modificar la función o
+    cualquier auxiliar que use.
+    """
+
+    def decorar(funcion: F) -> F:
+        firma = inspect.signature(funcion)
+        nombre = f"{funcion.__module__}.{funcion.__qualname__}"
+        cache = _CACHES.setdefault(nombre, CacheMemo(nombre, max_entradas))
+        version = huella_codigo(funcion)
+
+        @functools.wraps(funcion)
+        def envoltura(*args: Any, **kwargs: Any) -> Any:
+            argumentos = firma.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            huellas = [(n, huella_datos(v)) for n, v in argumentos.arguments.items()]
+            clave = hashlib.sha256(
+                repr((_huella_paquete(), version, huellas)).encode("utf-8")
+            ).hexdigest()
+
+            encontrado, resultado = cache.buscar(clave)
+            if not encontrado:
+                resultado = funcion(*args, **kwargs)
+                cache.guardar(clave, resultado)
+            return dict(resultado) if isinstance(resultado, dict) else resultado
+
+        envoltura.cache_memo = cache  # type: ignore[attr-defined]
+        return envoltura  # type: ignore[return-value]
+
+    return decorar(funcion) if funcion is not None else decorar
+
+
+def configurar_memoizacion(
+    directorio: Optional[Path] = None, max_entradas: Optional[int] = None
+) -> None:
+    """Activa (o, con ``directorio=None``, desactiva) la persistencia en disco.
+
+    ``main.py`` llama a ``configurar_memoizacion(MEMO_DIR)`` con
+    :data:`src.config.MEMO_DIR` salvo con ``--sin-cache``.
+
+    ``max_entradas`` cambia el límite de todas las cachés; las entradas que
+    sobran se desalojan en el siguiente guardado.
+    """
+    global _directorio
+    _directorio = Path(directorio) if directorio is not None else None
+    if max_entradas is not None:
+        for cache in _CACHES.values():
+            cache.max_entradas = max_entradas
+
+
+def estadisticas_memoizacion() -> pd.DataFrame:
+    """Aciertos (en memoria y en disco), fallos y tamaño de cada caché."""
+    return pd.DataFrame(
+        [
+            {
+                "funcion": cache.nombre,
+                "aciertos": cache.aciertos,
+                "aciertos_disco": cache.aciertos_disco,
+                "fallos": cache.fallos,
+                "entradas": len(cache.entradas),
+                "max_entradas": cache.max_entradas,
+            }
+            for cache in _CACHES.values()
+        ],
+        columns=["funcion", "aciertos", "aciertos_disco", "fallos", "entradas", "max_entradas"],
+    )
+
+
+def limpiar_memoizacion() -> None:
+    """Vacía las cachés en memoria y reinicia sus contadores (no borra el disco)."""
+    for cache in _CACHES.values():
+        cache.limpiar()
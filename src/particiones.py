@@ -0,0 +1,351 @@
+"""Análisis por particiones: agregados parciales por archivo y su combinación.
+
+Cuando las respuestas están repartidas en muchos archivos (``.csv`` o libros
+de Excel) que juntos no caben en un solo DataFrame, cada archivo se prepara
+en un proceso aparte y se reduce a un *parcial*: tablas pequeñas cuyo tamaño
+no depende del número de respuestas y que se combinan sumándolas.
+
+Un parcial contiene:
+
+``filas``, ``incompletos``, ``fuera_rango``
+    Número de respuestas, de respuestas con alguna pregunta Likert sin
+    contestar y de edades fuera de rango.
+``conteos``
+    Número de respuestas por celda (``frecuencia_viaje`` x ``grupo_edad``),
+    variable de opinión y valor. De esta tabla salen los descriptivos
+    (medias, desviaciones, cuantiles y modas exactos), los agregados por
+    celda de la ANOVA, las tablas de conteos del análisis bayesiano y la
+    proporción a favor.
+``comomentos``
+    Para cada par de variables de opinión, ``n``, medias, sumas de cuadrados
+    centradas y co-momento sobre las filas con ambas respuestas; se combinan
+    con las fórmulas de Chan et al. y dan las correlaciones de Pearson.
+``orden``
+    Niveles de cada factor en el orden en que aparecen, que es el orden en
+    que se dibujan los diagramas de caja.
+
+Las funciones ``*_desde_parcial`` rearman con estas tablas los mismos
+resultados que las etapas del análisis completo (ver
+:func:`src.analisis.construir_pipeline` con ``particiones``). La imputación
+múltiple necesita las filas individuales y no está disponible en este modo.
+"""
+from __future__ import annotations
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from itertools import combinations_with_replacement, repeat
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .bayesiano import NIVELES_LIKERT
+from .cargar_datos import iterar_lotes
+from .limpiar_preparar import preparar_datos
+from .lote import encontrar_libros
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONES_PARTICION: tuple[str, ...] = (".csv", ".xlsx", ".xls")
+TAMANO_LOTE_PARTICION: int = 50_000
+FACTORES: tuple[str, str] = ("frecuencia_viaje", "grupo_edad")
+COLUMNAS_OPINION: tuple[str, ...] = ("acuerdo_ampliacion", "p2_economia", "p3_necesidad")
+UMBRAL_A_FAVOR: float = 6.0
+
+Parcial = Dict[str, Any]
+
+
+def encontrar_particiones(entradas: Sequence[str | Path]) -> List[Path]:
+    """Archivos de partición (``.csv``, ``.xlsx``, ``.xls``) en carpetas o patrones glob."""
+
+    archivos = encontrar_libros(entradas, EXTENSIONES_PARTICION)
+    if not archivos:
+        raise FileNotFoundError(
+            f"No se encontraron archivos de partición en {[str(e) for e in entradas]}."
+        )
+    return archivos
+
+
+# ---------------------------------------------------------------------------
+# Mapeo y combinación
+# ---------------------------------------------------------------------------
+
+
+def _comomentos(df: pd.DataFrame) -> pd.DataFrame:
+    filas = {}
+    for x, y in combinations_with_replacement(COLUMNAS_OPINION, 2):
+        pares = df[[x, y]].dropna().to_numpy(dtype=float).reshape(-1, 2)
+        n = len(pares)
+        medias = pares.mean(axis=0) if n else np.zeros(2)
+        centrados = pares - medias
+        filas[(x, y)] = {
+            "n": n,
+            "media_x": medias[0],
+            "media_y": medias[1],
+            "m2_x": float(np.dot(centrados[:, 0], centrados[:, 0])),
+            "m2_y": float(np.dot(centrados[:, 1], centrados[:, 1])),
+            "c_xy": float(np.dot(centrados[:, 0], centrados[:, 1])),
+        }
+    tabla = pd.DataFrame.from_dict(filas, orient="index")
+    tabla.index.names = ["x", "y"]
+    return tabla
+
+
+def parcial_desde_datos(df: pd.DataFrame) -> Parcial:
+    """Reduce un DataFrame ya preparado (ver :func:`preparar_datos`) a su parcial."""
+
+    largo = df.melt(
+        id_vars=list(FACTORES),
+        value_vars=list(COLUMNAS_OPINION),
+        var_name="variable",
+        value_name="valor",
+    ).dropna(subset=["valor"])
+    conteos = largo.groupby([*FACTORES, "variable", "valor"]).size().rename("conteo")
+
+    con_acuerdo = df[df["acuerdo_ampliacion"].notna()]
+    return {
+        "filas": int(len(df)),
+        "incompletos": int(df[list(COLUMNAS_OPINION)].isna().any(axis=1).sum()),
+        "fuera_rango": int((df["grupo_edad"] == "Sin categoría").sum()),
+        "conteos": conteos.astype("int64"),
+        "comomentos": _comomentos(df),
+        "orden": {factor: list(pd.unique(con_acuerdo[factor])) for factor in FACTORES},
+    }
+
+
+def _combinar_comomentos(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    b = b.reindex(a.index)
+    n_a, n_b = a["n"].to_numpy(dtype=float), b["n"].to_numpy(dtype=float)
+    n = n_a + n_b
+    with np.errstate(invalid="ignore", divide="ignore"):
+        peso_b = np.where(n > 0, n_b / n, 0.0)
+        cruzado = np.where(n > 0, n_a * n_b / n, 0.0)
+    dx = b["media_x"].to_numpy() - a["media_x"].to_numpy()
+    dy = b["media_y"].to_numpy() - a["media_y"].to_numpy()
+    return pd.DataFrame(
+        {
+            "n": (a["n"] + b["n"]).to_numpy(),
+            "media_x": a["media_x"].to_numpy() + dx * peso_b,
+            "media_y": a["media_y"].to_numpy() + dy * peso_b,
+            "m2_x": a["m2_x"].to_numpy() + b["m2_x"].to_numpy() + dx**2 * cruzado,
+            "m2_y": a["m2_y"].to_numpy() + b["m2_y"].to_numpy() + dy**2 * cruzado,
+            "c_xy": a["c_xy"].to_numpy() + b["c_xy"].to_numpy() + dx * dy * cruzado,
+        },
+        index=a.index,
+    )
+
+
+def combinar_parciales(a: Parcial, b: Parcial) -> Parcial:
+    """Combina dos parciales; ``a`` va antes que ``b`` en el orden de los archivos.
+
+    La combinación es asociativa, por lo que los parciales pueden reducirse
+    en cualquier agrupación siempre que se respete su orden.
+    """
+
+    return {
+        "filas": a["filas"] + b["filas"],
+        "incompletos": a["incompletos"] + b["incompletos"],
+        "fuera_rango": a["fuera_rango"] + b["fuera_rango"],
+        "conteos": a["conteos"].add(b["conteos"], fill_value=0).astype("int64"),
+        "comomentos": _combinar_comomentos(a["comomentos"], b["comomentos"]),
+        "orden": {
+            factor: a["orden"][factor]
+            + [nivel for nivel in b["orden"][factor] if nivel not in a["orden"][factor]]
+            for factor in FACTORES
+        },
+    }
+
+
+def parcial_particion(ruta: Path, tamano_lote: int = TAMANO_LOTE_PARTICION) -> Parcial:
+    """Lee un archivo por lotes, prepara cada lote y devuelve el parcial del archivo.
+
+    La advertencia de edades fuera de rango de :func:`preparar_datos` se
+    silencia aquí; el total se informa una sola vez al reducir.
+    """
+
+    registro = logging.getLogger(preparar_datos.__module__)
+    nivel = registro.level
+    registro.setLevel(logging.ERROR)
+    parcial: Optional[Parcial] = None
+    try:
+        for lote in iterar_lotes(ruta, tamano_lote):
+            nuevo = parcial_desde_datos(preparar_datos(lote))
+            parcial = nuevo if parcial is None else combinar_parciales(parcial, nuevo)
+    finally:
+        registro.setLevel(nivel)
+    if parcial is None:
+        raise ValueError(f"El archivo '{ruta}' no contiene respuestas.")
+    return parcial
+
+
+def _inicializar_trabajador() -> None:
+    logging.getLogger("src").setLevel(logging.WARNING)
+
+
+def reducir_particiones(
+    archivos: Sequence[Path],
+    procesos: Optional[int] = None,
+    tamano_lote: int = TAMANO_LOTE_PARTICION,
+) -> Parcial:
+    """Calcula el parcial de cada archivo en un pool de procesos y los combina.
+
+    Los parciales se combinan a medida que llegan, en el orden de
+    ``archivos``, por lo que en memoria solo hay unos pocos a la vez. Con
+    ``procesos`` ``0`` o ``1`` los archivos se procesan en el proceso actual;
+    por defecto se usa uno por CPU.
+    """
+
+    if procesos is None:
+        procesos = min(len(archivos), os.cpu_count() or 1)
+    if procesos <= 1:
+        parciales = (parcial_particion(archivo, tamano_lote) for archivo in archivos)
+        return reduce(combinar_parciales, parciales)
+
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_trabajador) as pool:
+        # Tandas de varios archivos por tarea reducen la comunicación entre procesos
+        tanda = max(1, len(archivos) // (4 * procesos))
+        parciales = pool.map(parcial_particion, archivos, repeat(tamano_lote), chunksize=tanda)
+        return reduce(combinar_parciales, parciales)
+
+
+# ---------------------------------------------------------------------------
+# Reducción a los resultados del análisis
+# ---------------------------------------------------------------------------
+
+
+def conteos_variable(parcial: Parcial, variable: str, por: Sequence[str] = ()) -> pd.Series:
+    """Conteos por valor de ``variable``, opcionalmente por los factores ``por``."""
+
+    conteos = parcial["conteos"].xs(variable, level="variable")
+    conteos = conteos.groupby(level=[*por, "valor"]).sum()
+    return conteos[conteos > 0]
+
+
+def celdas_desde_parcial(parcial: Parcial) -> pd.DataFrame:
+    """Agregados de ``acuerdo_ampliacion`` por celda del diseño.
+
+    Una fila por combinación observada de ``frecuencia_viaje`` y
+    ``grupo_edad`` (ordenadas) con ``tratamiento``, ``n``, ``media``,
+    ``desviacion`` y ``suma_cuadrados`` (respecto de la media de la celda).
+    """
+
+    conteos = conteos_variable(parcial, "acuerdo_ampliacion", FACTORES).reset_index()
+    valores = conteos["valor"].to_numpy(dtype=float)
+    pesos = conteos["conteo"].to_numpy(dtype=float)
+    conteos["ponderado"] = valores * pesos
+    celdas = conteos.groupby(list(FACTORES)).agg(n=("conteo", "sum"), suma=("ponderado", "sum"))
+    celdas["media"] = celdas["suma"] / celdas["n"]
+
+    medias = celdas["media"].reindex(pd.MultiIndex.from_frame(conteos[list(FACTORES)]))
+    conteos["cuadrados"] = pesos * (valores - medias.to_numpy()) ** 2
+    celdas["suma_cuadrados"] = conteos.groupby(list(FACTORES))["cuadrados"].sum()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        celdas["desviacion"] = np.where(
+            celdas["n"] > 1, np.sqrt(celdas["suma_cuadrados"] / (celdas["n"] - 1)), np.nan
+        )
+
+    celdas = celdas.reset_index()
+    celdas.insert(
+        2, "tratamiento", celdas["frecuencia_viaje"] + " - " + celdas["grupo_edad"]
+    )
+    return celdas[
+        [*FACTORES, "tratamiento", "n", "media", "desviacion", "suma_cuadrados"]
+    ]
+
+
+def momentos_acuerdo(parcial: Parcial) -> tuple[int, float, float]:
+    """``n``, media y desviación muestral de ``acuerdo_ampliacion``."""
+
+    from .descriptivos import estadisticos_desde_conteos
+
+    estadisticos = estadisticos_desde_conteos(conteos_variable(parcial, "acuerdo_ampliacion"))
+    return estadisticos["n"], estadisticos["media"], estadisticos["desviacion"]
+
+
+def a_favor_desde_parcial(parcial: Parcial) -> tuple[int, int]:
+    """Respuestas a favor (acuerdo >= 6) y total de filas, como la columna ``a_favor``."""
+
+    conteos = conteos_variable(parcial, "acuerdo_ampliacion")
+    a_favor = int(conteos[conteos.index.to_numpy(dtype=float) >= UMBRAL_A_FAVOR].sum())
+    return a_favor, parcial["filas"]
+
+
+def muestra_acuerdo(parcial: Parcial) -> np.ndarray:
+    """Respuestas de ``acuerdo_ampliacion`` reconstruidas (ordenadas) desde los conteos.
+
+    Shapiro-Wilk necesita la muestra completa; es el único resultado que
+    ocupa memoria proporcional al número de respuestas (8 bytes por valor).
+    """
+
+    conteos = conteos_variable(parcial, "acuerdo_ampliacion")
+    return np.repeat(conteos.index.to_numpy(dtype=float), conteos.to_numpy())
+
+
+def residuos_anova(parcial: Parcial) -> np.ndarray:
+    """Residuos del modelo con interacción: cada respuesta menos la media de su celda."""
+
+    conteos = conteos_variable(parcial, "acuerdo_ampliacion", FACTORES).reset_index()
+    conteos = conteos[conteos["grupo_edad"] != "Sin categoría"]
+    medias = celdas_desde_parcial(parcial).set_index(list(FACTORES))["media"]
+    media_fila = medias.reindex(pd.MultiIndex.from_frame(conteos[list(FACTORES)])).to_numpy()
+    return np.repeat(conteos["valor"].to_numpy(dtype=float) - media_fila, conteos["conteo"])
+
+
+def correlaciones_desde_parcial(parcial: Parcial) -> pd.DataFrame:
+    """Matriz de correlaciones de Pearson por pares completos, como ``DataFrame.corr``."""
+
+    comomentos = parcial["comomentos"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r = comomentos["c_xy"] / np.sqrt(comomentos["m2_x"] * comomentos["m2_y"])
+    r = r.where(np.isfinite(r))
+    matriz = pd.DataFrame(np.nan, index=list(COLUMNAS_OPINION), columns=list(COLUMNAS_OPINION))
+    for (x, y), valor in r.items():
+        matriz.loc[x, y] = matriz.loc[y, x] = valor
+    return matriz
+
+
+def tablas_bayesianas(parcial: Parcial) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Tabla tratamiento x valor del acuerdo y conteos a favor por tratamiento."""
+
+    celdas = conteos_variable(parcial, "acuerdo_ampliacion", FACTORES).reset_index()
+    # Como en analisis_bayesiano, solo cuentan los valores de la escala
+    celdas = celdas[celdas["valor"].isin(NIVELES_LIKERT)]
+    celdas["tratamiento"] = celdas["frecuencia_viaje"] + " - " + celdas["grupo_edad"]
+    tabla = celdas.pivot_table(
+        index="tratamiento", columns="valor", values="conteo", aggfunc="sum", fill_value=0
+    )
+    celdas["a_favor"] = np.where(celdas["valor"] >= UMBRAL_A_FAVOR, celdas["conteo"], 0)
+    favor = celdas.groupby("tratamiento").agg(sum=("a_favor", "sum"), count=("conteo", "sum"))
+    return tabla, favor
+
+
+def datos_figuras_desde_parcial(parcial: Parcial) -> Dict[str, object]:
+    """Las tablas agregadas de las gráficas (ver ``_etapa_datos_figuras``)."""
+
+    from .graficos import estadisticos_boxplot_desde_conteos
+
+    conteos = conteos_variable(parcial, "acuerdo_ampliacion")
+    conteos.index.name = "acuerdo_ampliacion"
+
+    boxplots = {}
+    for factor in FACTORES:
+        tabla = (
+            conteos_variable(parcial, "acuerdo_ampliacion", [factor])
+            .unstack("valor", fill_value=0)
+            .reindex(parcial["orden"][factor])
+        )
+        boxplots[factor] = estadisticos_boxplot_desde_conteos(tabla, factor)
+
+    celdas = celdas_desde_parcial(parcial)
+    resumen = celdas.set_index("tratamiento")[["media", "n", "desviacion"]]
+    resumen["error_estandar"] = resumen["desviacion"] / np.sqrt(resumen["n"])
+
+    return {
+        "conteos_acuerdo": conteos.rename("count"),
+        "boxplots": boxplots,
+        "resumen_tratamientos": resumen,
+        "correlaciones": correlaciones_desde_parcial(parcial),
+    }
@@ -0,0 +1,492 @@
+"""Ejecución del análisis como un grafo de etapas con memoización en disco.
+
+Cada etapa declara de qué etapas depende y con qué parámetros se ejecuta. Su
+clave de caché es un hash de su nombre, su código, sus parámetros y las claves
+de sus dependencias, de modo que un cambio en cualquier entrada invalida la
+etapa y todo lo que depende de ella, y nada más.
+"""
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import logging
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .instrumentacion import Instrumentacion
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_DEFAULT: Path = Path(".cache") / "pipeline"
+CORRIDAS_DIR_DEFAULT: Path = Path("corridas")
+CORRIDAS_CONSERVADAS: int = 5
+
+
+def escribir_atomico(ruta: Path, contenido: bytes) -> None:
+    """Escribe ``contenido`` en ``ruta`` sin dejar nunca un archivo a medias.
+
+    Los datos se escriben en un temporal de la misma carpeta y luego se
+    renombran con :func:`os.replace`, que es atómico en el mismo sistema de
+    archivos.
+    """
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, prefix=f".{ruta.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(contenido)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        Path(temporal).unlink(missing_ok=True)
+        raise
+
+
+def huella_archivo(path: Path, tamano_bloque: int = 1 << 20) -> str:
+    """Devuelve el SHA-256 del contenido de ``path``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(tamano_bloque), b""):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def huella_codigo_fuente(carpeta: Path) -> str:
+    """Devuelve un hash combinado de todos los módulos ``.py`` de ``carpeta``."""
+    digest = hashlib.sha256()
+    for ruta in sorted(Path(carpeta).glob("*.py")):
+        digest.update(ruta.name.encode("utf-8"))
+        digest.update(ruta.read_bytes())
+    return digest.hexdigest()
+
+
+def huella_codigo(funcion: Callable[..., Any]) -> str:
+    """Hash del código fuente de la función (o de su nombre si no está disponible)."""
+    try:
+        fuente = inspect.getsource(funcion)
+    except (OSError, TypeError):
+        fuente = getattr(funcion, "__qualname__", repr(funcion))
+    return hashlib.sha256(fuente.encode("utf-8")).hexdigest()
+
+
+class DirectorioCorrida:
+    """Carpeta de una ejecución con un punto de control atómico por etapa.
+
+    ``manifiesto.json`` registra cada etapa terminada con su clave, de modo
+    que una ejecución interrumpida puede reanudarse desde la última etapa
+    completada sin repetir las anteriores. Solo se guardan las etapas con
+    ``cache=True``; :meth:`podar` borra las corridas más antiguas.
+    """
+
+    def __init__(self, ruta: Path) -> None:
+        self.ruta = Path(ruta)
+        self.ruta.mkdir(parents=True, exist_ok=True)
+        self._ruta_manifiesto = self.ruta / "manifiesto.json"
+        if self._ruta_manifiesto.exists():
+            self.manifiesto = json.loads(self._ruta_manifiesto.read_text(encoding="utf-8"))
+        else:
+            self.manifiesto = {
+                "creada": datetime.now().isoformat(timespec="seconds"),
+                "completada": False,
+                "etapas": {},
+            }
+            self._guardar_manifiesto()
+
+    @classmethod
+    def nueva(cls, base: Path = CORRIDAS_DIR_DEFAULT) -> "DirectorioCorrida":
+        """Crea una carpeta de corrida con marca de tiempo dentro de ``base``."""
+        marca = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        return cls(Path(base) / marca)
+
+    @classmethod
+    def ultima(cls, base: Path = CORRIDAS_DIR_DEFAULT) -> Optional["DirectorioCorrida"]:
+        """Devuelve la corrida más reciente de ``base`` o ``None`` si no hay."""
+        base = Path(base)
+        if not base.exists():
+            return None
+        candidatas = sorted(
+            ruta for ruta in base.iterdir() if (ruta / "manifiesto.json").exists()
+        )
+        return cls(candidatas[-1]) if candidatas else None
+
+    @staticmethod
+    def podar(base: Path = CORRIDAS_DIR_DEFAULT, conservar: int = CORRIDAS_CONSERVADAS) -> int:
+        """Borra las corridas de ``base`` salvo las ``conservar`` más recientes.
+
+        Returns
+        -------
+        int
+            Cantidad de carpetas de corrida borradas.
+        """
+
+        base = Path(base)
+        if not base.exists():
+            return 0
+        corridas = sorted(
+            ruta for ruta in base.iterdir() if (ruta / "manifiesto.json").exists()
+        )
+        antiguas = corridas[: max(len(corridas) - max(conservar, 0), 0)]
+        for ruta in antiguas:
+            shutil.rmtree(ruta, ignore_errors=True)
+        if antiguas:
+            logger.info("Se borraron %d corridas antiguas de '%s'.", len(antiguas), base.as_posix())
+        return len(antiguas)
+
+    def _guardar_manifiesto(self) -> None:
+        contenido = json.dumps(self.manifiesto, indent=2, ensure_ascii=False)
+        escribir_atomico(self._ruta_manifiesto, contenido.encode("utf-8"))
+
+    def cargar(self, nombre: str, clave: str) -> Tuple[bool, Any]:
+        """Lee el punto de control de ``nombre`` si corresponde a ``clave``."""
+        registro = self.manifiesto["etapas"].get(nombre)
+        if registro is None or registro.get("clave") != clave:
+            return False, None
+        ruta = self.ruta / registro["archivo"]
+        if not ruta.exists():
+            return False, None
+        with open(ruta, "rb") as archivo:
+            return True, pickle.load(archivo)
+
+    def guardar(self, nombre: str, clave: str, resultado: Any, segundos: float) -> None:
+        """Escribe el punto de control de ``nombre`` y lo registra en el manifiesto."""
+        archivo = f"{nombre}.pkl"
+        escribir_atomico(
+            self.ruta / archivo, pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        )
+        self.manifiesto["etapas"][nombre] = {
+            "clave": clave,
+            "archivo": archivo,
+            "segundos": round(segundos, 4),
+            "terminada": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._guardar_manifiesto()
+
+    def marcar_completada(self) -> None:
+        self.manifiesto["completada"] = True
+        self._guardar_manifiesto()
+
+
+@dataclass
+class Etapa:
+    """Nodo del grafo: una función y las etapas cuyos resultados recibe."""
+
+    nombre: str
+    funcion: Callable[..., Any]
+    dependencias: Tuple[str, ...] = ()
+    parametros: Dict[str, Any] = field(default_factory=dict)
+    cache: bool = True
+    validar: Optional[Callable[[Any], bool]] = None
+    paralela: bool = False
+
+
+def _inicializar_trabajador() -> None:
+    """Configura los procesos del pool con un backend gráfico no interactivo."""
+    import matplotlib
+
+    matplotlib.use("Agg", force=True)
+
+
+def _ejecutar_en_trabajador(
+    funcion: Callable[..., Any],
+    entradas: Dict[str, Any],
+    parametros: Dict[str, Any],
+    medir: bool = False,
+) -> Any:
+    """Ejecuta una etapa en un proceso del pool adjuntando los datos compartidos.
+
+    Con ``medir=True`` devuelve ``(resultado, evento)`` con las mediciones de
+    :func:`src.instrumentacion.medir_llamada`.
+    """
+    from .datos_compartidos import DatosCompartidos
+
+    entradas = {
+        nombre: valor.cargar() if isinstance(valor, DatosCompartidos) else valor
+        for nombre, valor in entradas.items()
+    }
+    if medir:
+        from .instrumentacion import medir_llamada
+
+        return medir_llamada(funcion, entradas, parametros)
+    return funcion(**entradas, **parametros)
+
+
+class Pipeline:
+    """Grafo acíclico de etapas con caché en disco direccionada por contenido.
+
+    Parameters
+    ----------
+    cache_dir:
+        Carpeta donde se guardan los resultados de las etapas. Con ``None`` no
+        se usa caché y todas las etapas se recalculan.
+    version:
+        Texto que se añade a todas las claves, por ejemplo una huella del código
+        de las funciones de análisis que usan las etapas.
+    max_workers:
+        Procesos del pool usado por las etapas registradas con
+        ``paralela=True``. Con ``0`` esas etapas se ejecutan en el proceso
+        principal.
+    compartidos_dir:
+        Si se indica, los DataFrames que recibe una etapa paralela se publican
+        una sola vez en esta carpeta como archivos mapeados en memoria (ver
+        :mod:`src.datos_compartidos`) y los procesos los adjuntan sin
+        copiarlos, en lugar de recibir cada uno una copia serializada. Se
+        borran al terminar :meth:`ejecutar`.
+    memoria:
+        Diccionario que conserva en memoria el último resultado de cada etapa
+        con caché, junto con su clave. Se consulta antes que la caché en
+        disco, de modo que un proceso de larga duración que comparte el mismo
+        diccionario entre ejecuciones reutiliza al instante las etapas cuyas
+        entradas no cambiaron. Guarda un solo resultado por etapa.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = CACHE_DIR_DEFAULT,
+        version: str = "",
+        max_workers: Optional[int] = None,
+        compartidos_dir: Optional[Path] = None,
+        memoria: Optional[Dict[str, Tuple[str, Any]]] = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.version = version
+        self.max_workers = max_workers
+        self.compartidos_dir = Path(compartidos_dir) if compartidos_dir is not None else None
+        self.memoria = memoria
+        self.etapas: Dict[str, Etapa] = {}
+        self.claves: Dict[str, str] = {}
+        self.recalculadas: List[str] = []
+        self.reutilizadas: List[str] = []
+
+    def agregar(
+        self,
+        nombre: str,
+        funcion: Callable[..., Any],
+        dependencias: Iterable[str] = (),
+        parametros: Optional[Dict[str, Any]] = None,
+        cache: bool = True,
+        validar: Optional[Callable[[Any], bool]] = None,
+        paralela: bool = False,
+    ) -> None:
+        """Registra una etapa.
+
+        ``funcion`` se invoca con el resultado de cada dependencia como
+        argumento con nombre, más los ``parametros``. ``validar`` permite
+        descartar un resultado en caché que ya no es utilizable (por ejemplo,
+        una figura cuyo archivo fue borrado).
+
+        Las etapas con ``paralela=True`` se envían a un proceso del pool en
+        cuanto sus dependencias están listas y el pipeline sigue con las
+        etapas siguientes; su resultado solo se espera cuando otra etapa lo
+        necesita. ``funcion`` y sus entradas deben poder serializarse con
+        :mod:`pickle`.
+        """
+
+        if nombre in self.etapas:
+            raise ValueError(f"La etapa '{nombre}' ya está registrada.")
+        dependencias = tuple(dependencias)
+        faltantes = [dep for dep in dependencias if dep not in self.etapas]
+        if faltantes:
+            raise KeyError(
+                f"La etapa '{nombre}' depende de etapas no registradas: {', '.join(faltantes)}."
+            )
+        self.etapas[nombre] = Etapa(
+            nombre, funcion, dependencias, dict(parametros or {}), cache, validar, paralela
+        )
+
+    def orden(self, objetivos: Optional[Iterable[str]] = None) -> List[str]:
+        """Etapas necesarias para ``objetivos`` en orden de ejecución.
+
+        Como las etapas solo pueden depender de etapas registradas antes, el
+        orden de registro ya es un orden topológico válido.
+        """
+
+        if objetivos is None:
+            return list(self.etapas)
+
+        pendientes = list(objetivos)
+        desconocidos = [nombre for nombre in pendientes if nombre not in self.etapas]
+        if desconocidos:
+            disponibles = ", ".join(self.etapas)
+            raise KeyError(
+                f"Etapas desconocidas: {', '.join(desconocidos)}. Disponibles: {disponibles}."
+            )
+
+        necesarias: set[str] = set()
+        while pendientes:
+            nombre = pendientes.pop()
+            if nombre not in necesarias:
+                necesarias.add(nombre)
+                pendientes.extend(self.etapas[nombre].dependencias)
+        return [nombre for nombre in self.etapas if nombre in necesarias]
+
+    def _clave(self, etapa: Etapa) -> str:
+        """Clave de caché a partir del código, parámetros y claves de entrada."""
+        digest = hashlib.sha256()
+        digest.update(self.version.encode("utf-8"))
+        digest.update(etapa.nombre.encode("utf-8"))
+        digest.update(huella_codigo(etapa.funcion).encode("utf-8"))
+        digest.update(repr(sorted(etapa.parametros.items())).encode("utf-8"))
+        for dependencia in etapa.dependencias:
+            digest.update(self.claves[dependencia].encode("utf-8"))
+        return digest.hexdigest()
+
+    def _ruta_cache(self, nombre: str, clave: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / f"{nombre}-{clave[:16]}.pkl"
+
+    def _leer_cache(self, ruta: Optional[Path]) -> Tuple[bool, Any]:
+        if ruta is None or not ruta.exists():
+            return False, None
+        try:
+            with open(ruta, "rb") as archivo:
+                return True, pickle.load(archivo)
+        except Exception:  # pragma: no cover - caché corrupta, se recalcula
+            return False, None
+
+    def _escribir_cache(self, ruta: Optional[Path], resultado: Any) -> None:
+        if ruta is None:
+            return
+        escribir_atomico(ruta, pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def ejecutar(
+        self,
+        objetivos: Optional[Iterable[str]] = None,
+        forzar: Iterable[str] = (),
+        corrida: Optional[DirectorioCorrida] = None,
+        instrumentacion: Optional["Instrumentacion"] = None,
+    ) -> Dict[str, Any]:
+        """Ejecuta las etapas necesarias y devuelve sus resultados por nombre.
+
+        Las etapas cuya clave ya está en caché (y cuyo resultado pasa
+        ``validar``) se reutilizan sin ejecutarse. ``forzar`` obliga a
+        recalcular las etapas indicadas. Si se indica ``corrida``, primero se
+        buscan sus puntos de control y cada etapa terminada con ``cache=True``
+        se guarda allí en cuanto concluye.
+
+        Con ``instrumentacion`` (ver :mod:`src.instrumentacion`) se mide el
+        tiempo, la CPU, la memoria y las filas de cada etapa ejecutada, dentro
+        del proceso que la ejecuta, y se marcan las reutilizadas.
+        """
+
+        forzar = set(forzar)
+        resultados: Dict[str, Any] = {}
+        pendientes: Dict[str, Tuple[Future, Optional[Path], float]] = {}
+        pool: Optional[ProcessPoolExecutor] = None
+        compartidos: Dict[str, Any] = {}
+        self.recalculadas, self.reutilizadas = [], []
+
+        def para_trabajador(entradas: Dict[str, Any]) -> Dict[str, Any]:
+            if self.compartidos_dir is None:
+                return entradas
+            import pandas as pd
+
+            from .datos_compartidos import compartir
+
+            enviadas = dict(entradas)
+            for dependencia, valor in entradas.items():
+                if isinstance(valor, pd.DataFrame):
+                    if dependencia not in compartidos:
+                        nombre = f"{dependencia}-{self.claves[dependencia][:16]}-{os.getpid()}"
+                        compartidos[dependencia] = compartir(valor, nombre, self.compartidos_dir)
+                    enviadas[dependencia] = compartidos[dependencia]
+            return enviadas
+
+        def registrar(nombre: str, resultado: Any, ruta: Optional[Path], inicio: float) -> None:
+            self._escribir_cache(ruta, resultado)
+            if self.memoria is not None and self.etapas[nombre].cache:
+                self.memoria[nombre] = (self.claves[nombre], resultado)
+            if corrida is not None and self.etapas[nombre].cache:
+                corrida.guardar(
+                    nombre, self.claves[nombre], resultado, time.perf_counter() - inicio
+                )
+            resultados[nombre] = resultado
+            self.recalculadas.append(nombre)
+
+        def resolver(nombre: str) -> None:
+            if nombre in pendientes:
+                futuro, ruta, inicio = pendientes.pop(nombre)
+                resultado = futuro.result()
+                if instrumentacion is not None:
+                    resultado, evento = resultado
+                    instrumentacion.registrar(nombre, evento, "paralela")
+                registrar(nombre, resultado, ruta, inicio)
+
+        try:
+            for nombre in self.orden(objetivos):
+                etapa = self.etapas[nombre]
+                clave = self._clave(etapa)
+                self.claves[nombre] = clave
+                ruta = self._ruta_cache(nombre, clave) if etapa.cache else None
+
+                if nombre not in forzar:
+                    encontrado, resultado = (False, None)
+                    if corrida is not None and etapa.cache:
+                        encontrado, resultado = corrida.cargar(nombre, clave)
+                    desde_corrida = encontrado
+                    if not encontrado and etapa.cache and self.memoria is not None:
+                        clave_memoria, resultado = self.memoria.get(nombre, (None, None))
+                        encontrado = clave_memoria == clave
+                    if not encontrado:
+                        encontrado, resultado = self._leer_cache(ruta)
+                        if encontrado and etapa.cache and self.memoria is not None:
+                            self.memoria[nombre] = (clave, resultado)
+                    if encontrado and (etapa.validar is None or etapa.validar(resultado)):
+                        resultados[nombre] = resultado
+                        self.reutilizadas.append(nombre)
+                        if instrumentacion is not None:
+                            instrumentacion.registrar_reutilizada(nombre)
+                        if corrida is not None and etapa.cache and not desde_corrida:
+                            corrida.guardar(nombre, clave, resultado, 0.0)
+                        continue
+
+                for dependencia in etapa.dependencias:
+                    resolver(dependencia)
+                entradas = {dep: resultados[dep] for dep in etapa.dependencias}
+                inicio = time.perf_counter()
+
+                if etapa.paralela and self.max_workers != 0:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(
+                            max_workers=self.max_workers, initializer=_inicializar_trabajador
+                        )
+                    futuro = pool.submit(
+                        _ejecutar_en_trabajador,
+                        etapa.funcion,
+                        para_trabajador(entradas),
+                        etapa.parametros,
+                        instrumentacion is not None,
+                    )
+                    pendientes[nombre] = (futuro, ruta, inicio)
+                    continue
+
+                if instrumentacion is None:
+                    resultado = etapa.funcion(**entradas, **etapa.parametros)
+                else:
+                    resultado = instrumentacion.ejecutar(
+                        nombre, etapa.funcion, entradas, etapa.parametros
+                    )
+                registrar(nombre, resultado, ruta, inicio)
+
+            for nombre in list(pendientes):
+                resolver(nombre)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            for datos in compartidos.values():
+                datos.liberar()
+
+        if corrida is not None:
+            corrida.marcar_completada()
+        return resultados
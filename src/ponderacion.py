@@ -0,0 +1,285 @@
+"""Ponderación de la encuesta por rastrillaje (ajuste proporcional iterativo).
+
+La muestra no reproduce la composición de la población en los factores del
+diseño (por ejemplo, sobran jóvenes y viajeros no frecuentes respecto del
+censo). :func:`ponderar` calcula un peso por respuesta de modo que las
+distribuciones marginales ponderadas de cada factor coincidan con las de
+``margenes``.
+
+El ajuste no recorre las filas: las respuestas se agregan primero en el cubo
+de conteos de los factores (2x3 para ``frecuencia_viaje`` x ``grupo_edad``),
+:func:`rastrillar` escala ese cubo eje por eje hasta que sus marginales
+coinciden con las metas y el peso de cada respuesta es el cociente entre el
+conteo ajustado y el observado de su celda. Cada iteración cuesta lo mismo
+con mil o con diez millones de respuestas.
+
+Las respuestas con un nivel que no figura en ``margenes`` (como
+``"Sin categoría"`` en ``grupo_edad``) o sin valor en algún factor quedan
+fuera del cubo y conservan peso 1.
+
+Con pesos desiguales la muestra informa menos que ``n`` respuestas
+independientes. :func:`momentos_ponderados` devuelve el tamaño efectivo de
+Kish, ``n_ef = (Σw)² / Σw²``, y los intervalos y pruebas ponderados usan
+``n_ef`` en lugar de ``n``, lo que equivale a multiplicar la varianza por el
+efecto de diseño ``n / n_ef``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOLERANCIA_RASTRILLAJE: float = 1e-10
+MAX_ITERACIONES_RASTRILLAJE: int = 100
+
+
+def rastrillar(
+    conteos: np.ndarray,
+    margenes: Tuple[np.ndarray, ...],
+    tolerancia: float = TOLERANCIA_RASTRILLAJE,
+    max_iteraciones: int = MAX_ITERACIONES_RASTRILLAJE,
+) -> Dict[str, object]:
+    """Ajusta ``conteos`` a las marginales ``margenes`` por ajuste proporcional iterativo.
+
+    Parameters
+    ----------
+    conteos:
+        Cubo de conteos con un eje por factor.
+    margenes:
+        Un arreglo por eje con el total buscado de cada nivel; todos deben
+        sumar lo mismo.
+    tolerancia:
+        Diferencia absoluta máxima admitida entre las marginales ajustadas y
+        las metas, relativa al total.
+
+    Returns
+    -------
+    dict
+        ``tabla`` (el cubo ajustado), ``iteraciones``, ``convergio`` y
+        ``error`` (la mayor diferencia relativa al terminar).
+
+    Raises
+    ------
+    ValueError
+        Si las formas no coinciden o si un nivel con meta positiva no tiene
+        respuestas, en cuyo caso ningún peso puede alcanzar la meta.
+    """
+
+    tabla = np.asarray(conteos, dtype=float)
+    metas = [np.asarray(meta, dtype=float) for meta in margenes]
+    if len(metas) != tabla.ndim:
+        raise ValueError("Se necesita una marginal por cada eje del cubo de conteos.")
+    total = tabla.sum()
+    for eje, meta in enumerate(metas):
+        if meta.shape != (tabla.shape[eje],):
+            raise ValueError(
+                f"La marginal del eje {eje} tiene {meta.size} niveles y el cubo {tabla.shape[eje]}."
+            )
+        if not np.isclose(meta.sum(), total):
+            raise ValueError("Todas las marginales deben sumar el total del cubo de conteos.")
+        observada = tabla.sum(axis=tuple(i for i in range(tabla.ndim) if i != eje))
+        if np.any((observada == 0) & (meta > 0)):
+            raise ValueError(
+                f"Hay niveles del eje {eje} sin respuestas en la muestra; no pueden ponderarse."
+            )
+
+    otros_ejes = [tuple(i for i in range(tabla.ndim) if i != eje) for eje in range(tabla.ndim)]
+    forma = [
+        tuple(-1 if i == eje else 1 for i in range(tabla.ndim)) for eje in range(tabla.ndim)
+    ]
+    error = np.inf
+    iteraciones = 0
+    while iteraciones < max_iteraciones:
+        iteraciones += 1
+        for eje, meta in enumerate(metas):
+            actual = tabla.sum(axis=otros_ejes[eje])
+            factor = np.divide(meta, actual, out=np.zeros_like(meta), where=actual > 0)
+            tabla = tabla * factor.reshape(forma[eje])
+        error = max(
+            float(np.abs(tabla.sum(axis=otros_ejes[eje]) - meta).max()) for eje, meta in enumerate(metas)
+        ) / max(total, 1.0)
+        if error <= tolerancia:
+            break
+
+    return {
+        "tabla": tabla,
+        "iteraciones": iteraciones,
+        "convergio": bool(error <= tolerancia),
+        "error": float(error),
+    }
+
+
+def ponderar(
+    df: pd.DataFrame,
+    margenes: Mapping[str, Mapping[str, float]],
+    tolerancia: float = TOLERANCIA_RASTRILLAJE,
+    max_iteraciones: int = MAX_ITERACIONES_RASTRILLAJE,
+) -> Dict[str, object]:
+    """Pesos de rastrillaje de cada respuesta de ``df`` (ver el módulo).
+
+    Parameters
+    ----------
+    margenes:
+        Para cada factor (columna de ``df``), la proporción o el conteo
+        poblacional de cada nivel, por ejemplo
+        ``{"grupo_edad": {"Joven": 0.25, ...}, "frecuencia_viaje": {...}}``.
+        Las metas de cada factor se normalizan para sumar las respuestas
+        ponderadas.
+
+    Returns
+    -------
+    dict
+        ``pesos`` (Series alineada con ``df``, de media 1 sobre las respuestas
+        ponderadas), ``tabla`` (una fila por celda con ``n``, ``peso`` y
+        ``n_ponderado``), ``iteraciones``, ``convergio``, ``n_efectivo``,
+        ``efecto_diseno``, ``filas_sin_ponderar`` y ``margenes``.
+
+    Raises
+    ------
+    ValueError
+        Si un factor no es columna de ``df`` o no se puede alcanzar alguna
+        meta (ver :func:`rastrillar`).
+    """
+
+    factores = list(margenes)
+    faltantes = [factor for factor in factores if factor not in df.columns]
+    if faltantes:
+        raise ValueError(f"Los factores de ponderación no son columnas: {', '.join(faltantes)}.")
+
+    niveles = [list(margenes[factor]) for factor in factores]
+    codigos = np.stack(
+        [
+            pd.Categorical(df[factor], categories=categorias).codes
+            for factor, categorias in zip(factores, niveles)
+        ]
+    )
+    en_cubo = (codigos >= 0).all(axis=0)
+    forma = tuple(len(categorias) for categorias in niveles)
+    celda = np.ravel_multi_index(codigos[:, en_cubo], forma)
+    conteos = np.bincount(celda, minlength=int(np.prod(forma))).reshape(forma)
+
+    total = float(conteos.sum())
+    metas = []
+    for eje, (factor, categorias) in enumerate(zip(factores, niveles)):
+        meta = np.array([float(margenes[factor][nivel]) for nivel in categorias])
+        if np.any(meta < 0) or meta.sum() <= 0:
+            raise ValueError(f"Las metas de '{factor}' deben ser no negativas y sumar más que 0.")
+        observada = conteos.sum(axis=tuple(i for i in range(conteos.ndim) if i != eje))
+        vacios = [nivel for nivel, n, m in zip(categorias, observada, meta) if n == 0 and m > 0]
+        if vacios:
+            raise ValueError(
+                f"No hay respuestas con {factor} = {', '.join(map(repr, vacios))}; "
+                "esos niveles no pueden ponderarse."
+            )
+        metas.append(meta / meta.sum() * total)
+    ajuste = rastrillar(conteos, tuple(metas), tolerancia, max_iteraciones)
+    if not ajuste["convergio"]:
+        logger.warning(
+            "El rastrillaje no convergió en %d iteraciones (error relativo %.2e).",
+            ajuste["iteraciones"],
+            ajuste["error"],
+        )
+
+    peso_celda = np.divide(
+        ajuste["tabla"], conteos, out=np.ones(forma), where=conteos > 0
+    ).ravel()
+    pesos = np.ones(len(df))
+    pesos[en_cubo] = peso_celda[celda]
+
+    indice = pd.MultiIndex.from_product(niveles, names=factores)
+    tabla = pd.DataFrame(
+        {
+            "n": conteos.ravel(),
+            "peso": peso_celda,
+            "n_ponderado": ajuste["tabla"].ravel(),
+        },
+        index=indice,
+    ).reset_index()
+
+    n_efectivo = float(pesos.sum() ** 2 / np.square(pesos).sum()) if len(pesos) else 0.0
+    resultado = {
+        "pesos": pd.Series(pesos, index=df.index, name="peso"),
+        "tabla": tabla,
+        "iteraciones": ajuste["iteraciones"],
+        "convergio": ajuste["convergio"],
+        "n_efectivo": n_efectivo,
+        "efecto_diseno": len(pesos) / n_efectivo if n_efectivo > 0 else float("nan"),
+        "filas_sin_ponderar": int((~en_cubo).sum()),
+        "margenes": {factor: dict(margenes[factor]) for factor in factores},
+    }
+    logger.info(
+        "Ponderación por rastrillaje (%s): %d iteraciones, n efectivo = %.1f, "
+        "efecto de diseño = %.3f.\n%s\n",
+        " x ".join(factores),
+        resultado["iteraciones"],
+        n_efectivo,
+        resultado["efecto_diseno"],
+        tabla.to_string(index=False),
+    )
+    return resultado
+
+
+def momentos_ponderados(
+    valores: pd.Series, pesos: pd.Series
+) -> Tuple[int, float, float, float]:
+    """``(n, media, desviación, n_efectivo)`` ponderados de ``valores``.
+
+    Se ignoran los valores faltantes. La varianza es
+    ``Σw(x - x̄)² / Σw · n / (n - 1)``, que coincide con la muestral cuando
+    todos los pesos son iguales.
+    """
+
+    datos = pd.DataFrame({"x": valores, "w": pesos.reindex(valores.index)}).dropna()
+    x = datos["x"].to_numpy(dtype=float)
+    w = datos["w"].to_numpy(dtype=float)
+    n = int(x.size)
+    if n == 0 or w.sum() <= 0:
+        return n, float("nan"), float("nan"), 0.0
+
+    suma_pesos = w.sum()
+    media = float(np.dot(w, x) / suma_pesos)
+    if n > 1:
+        varianza = np.dot(w, (x - media) ** 2) / suma_pesos * n / (n - 1)
+        desviacion = float(np.sqrt(varianza))
+    else:
+        desviacion = float("nan")
+    n_efectivo = float(suma_pesos**2 / np.dot(w, w))
+    return n, media, desviacion, n_efectivo
+
+
+def resumen_ponderacion(ponderacion: Mapping[str, object]) -> Dict[str, object]:
+    """El resultado de :func:`ponderar` sin los pesos por fila, para reportarlo."""
+    return {clave: valor for clave, valor in ponderacion.items() if clave != "pesos"}
+
+
+def cargar_margenes(ruta: Path) -> Dict[str, Dict[str, float]]:
+    """Lee las marginales poblacionales de un JSON ``{factor: {nivel: valor}}``.
+
+    Raises
+    ------
+    ValueError
+        Si el archivo no tiene esa forma o algún valor no es un número no
+        negativo.
+    """
+
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    if not isinstance(datos, dict) or not datos:
+        raise ValueError(f"'{ruta}' debe contener un objeto {{factor: {{nivel: proporción}}}}.")
+    margenes: Dict[str, Dict[str, float]] = {}
+    for factor, niveles in datos.items():
+        if not isinstance(niveles, dict) or not niveles:
+            raise ValueError(f"Las metas de '{factor}' en '{ruta}' deben ser {{nivel: proporción}}.")
+        for nivel, valor in niveles.items():
+            if isinstance(valor, bool) or not isinstance(valor, (int, float)) or valor < 0:
+                raise ValueError(
+                    f"La meta de '{factor}' = '{nivel}' en '{ruta}' debe ser un número no negativo."
+                )
+        margenes[str(factor)] = {str(nivel): float(valor) for nivel, valor in niveles.items()}
+    return margenes
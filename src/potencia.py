@@ -0,0 +1,245 @@
+"""Planificación de tamaño de muestra por simulación Monte Carlo.
+
+Las simulaciones se generan como arreglos de NumPy con forma
+``(simulaciones, celdas, n_por_celda)`` a partir de las distribuciones Likert
+observadas en cada tratamiento, y los estadísticos de la prueba t y de la
+ANOVA 2x3 se calculan en lote con sus fórmulas cerradas para diseños
+balanceados.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from .bayesiano import NIVELES_LIKERT
+
+NIVELES_FRECUENCIA: tuple[str, ...] = ("Frecuente", "No frecuente")
+NIVELES_EDAD: tuple[str, ...] = ("Joven", "Adulto", "Adulto mayor")
+TAMANOS_DEFAULT: tuple[int, ...] = (5, 10, 15, 20, 30, 40, 60, 80, 100)
+SIMULACIONES_POR_LOTE: int = 500
+N_SIMULACIONES_POTENCIA: int = 2000
+POTENCIA_OBJETIVO: float = 0.8
+# Semilla por defecto: las curvas son simulaciones y deben repetirse entre corridas.
+SEMILLA_POTENCIA: int = 20251104
+COLUMNAS_POTENCIA: tuple[str, ...] = (
+    "prueba_t",
+    "anova_frecuencia",
+    "anova_edad",
+    "anova_interaccion",
+)
+
+
+def ajustar_distribuciones_celdas(
+    df: pd.DataFrame, suavizado: float = 0.5
+) -> np.ndarray:
+    """Estima la distribución Likert de cada celda del diseño 2x3.
+
+    Returns
+    -------
+    numpy.ndarray
+        Arreglo con forma ``(2, 3, niveles)`` de probabilidades por celda en el
+        orden de :data:`NIVELES_FRECUENCIA` y :data:`NIVELES_EDAD`. Las celdas
+        sin respuestas heredan la distribución global. ``suavizado`` se suma a
+        cada conteo para evitar probabilidades nulas.
+    """
+
+    datos = df[df["grupo_edad"] != "Sin categoría"].dropna(subset=["acuerdo_ampliacion"])
+    indice = pd.MultiIndex.from_product([NIVELES_FRECUENCIA, NIVELES_EDAD])
+    tabla = (
+        pd.crosstab(
+            [datos["frecuencia_viaje"], datos["grupo_edad"]], datos["acuerdo_ampliacion"]
+        )
+        .reindex(index=indice, columns=NIVELES_LIKERT, fill_value=0)
+        .to_numpy(dtype=float)
+    )
+
+    global_ = tabla.sum(axis=0) + suavizado
+    global_ = global_ / global_.sum()
+
+    probabilidades = np.empty_like(tabla)
+    for fila, conteos in enumerate(tabla):
+        if conteos.sum() == 0:
+            probabilidades[fila] = global_
+        else:
+            suavizados = conteos + suavizado
+            probabilidades[fila] = suavizados / suavizados.sum()
+
+    return probabilidades.reshape(len(NIVELES_FRECUENCIA), len(NIVELES_EDAD), -1)
+
+
+def _simular_muestras(
+    probabilidades: np.ndarray, n_por_celda: int, n_simulaciones: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Genera ``n_simulaciones`` conjuntos con forma ``(sim, a, b, n)``."""
+
+    a, b, k = probabilidades.shape
+    acumuladas = np.cumsum(probabilidades, axis=-1)
+    acumuladas[..., -1] = 1.0
+    uniformes = rng.random((n_simulaciones, a, b, n_por_celda))
+    # Muestreo por transformada inversa, vectorizado sobre todas las celdas
+    indices = (uniformes[..., None] > acumuladas[None, :, :, None, :]).sum(axis=-1)
+    return NIVELES_LIKERT[np.minimum(indices, k - 1)].astype(np.float64)
+
+
+def estadisticos_t_lote(
+    muestras: np.ndarray, mu0: float = 5.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Estadístico t y p-valor de cola derecha para cada fila de ``muestras``."""
+
+    n = muestras.shape[1]
+    media = muestras.mean(axis=1)
+    desviacion = muestras.std(axis=1, ddof=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (media - mu0) / (desviacion / np.sqrt(n))
+    p_valor = stats.t.sf(t, df=n - 1)
+    return t, p_valor
+
+
+def estadisticos_anova_lote(muestras: np.ndarray) -> Dict[str, np.ndarray]:
+    """p-valores de la ANOVA de dos vías para un lote de diseños balanceados.
+
+    ``muestras`` tiene forma ``(sim, a, b, n)``. En un diseño balanceado las
+    sumas de cuadrados de tipo II coinciden con las de tipo I, por lo que se
+    usan las fórmulas cerradas de medias marginales.
+    """
+
+    _, a, b, n = muestras.shape
+    medias_celda = muestras.mean(axis=3)
+    media_global = medias_celda.mean(axis=(1, 2))
+    medias_a = medias_celda.mean(axis=2)
+    medias_b = medias_celda.mean(axis=1)
+
+    ss_a = n * b * ((medias_a - media_global[:, None]) ** 2).sum(axis=1)
+    ss_b = n * a * ((medias_b - media_global[:, None]) ** 2).sum(axis=1)
+    interaccion = (
+        medias_celda
+        - medias_a[:, :, None]
+        - medias_b[:, None, :]
+        + media_global[:, None, None]
+    )
+    ss_ab = n * (interaccion**2).sum(axis=(1, 2))
+    ss_error = ((muestras - medias_celda[..., None]) ** 2).sum(axis=(1, 2, 3))
+
+    gl_a, gl_b, gl_ab = a - 1, b - 1, (a - 1) * (b - 1)
+    gl_error = a * b * (n - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cme = ss_error / gl_error
+        f_a = (ss_a / gl_a) / cme
+        f_b = (ss_b / gl_b) / cme
+        f_ab = (ss_ab / gl_ab) / cme
+
+    return {
+        "frecuencia": stats.f.sf(f_a, gl_a, gl_error),
+        "edad": stats.f.sf(f_b, gl_b, gl_error),
+        "interaccion": stats.f.sf(f_ab, gl_ab, gl_error),
+    }
+
+
+def _potencia_lote(
+    probabilidades: np.ndarray,
+    n_por_celda: int,
+    n_simulaciones: int,
+    mu0: float,
+    alpha: float,
+    semilla: np.random.SeedSequence,
+) -> Dict[str, float]:
+    """Cuenta rechazos en un lote de simulaciones (se ejecuta en un proceso)."""
+
+    rng = np.random.default_rng(semilla)
+    muestras = _simular_muestras(probabilidades, n_por_celda, n_simulaciones, rng)
+
+    _, p_t = estadisticos_t_lote(muestras.reshape(n_simulaciones, -1), mu0=mu0)
+    p_anova = estadisticos_anova_lote(muestras)
+
+    rechazos = {"prueba_t": float(np.sum(p_t < alpha))}
+    for efecto, p_valores in p_anova.items():
+        rechazos[f"anova_{efecto}"] = float(np.sum(p_valores < alpha))
+    rechazos["n_por_celda"] = n_por_celda
+    rechazos["simulaciones"] = n_simulaciones
+    return rechazos
+
+
+def curvas_potencia(
+    df: pd.DataFrame,
+    tamanos: Iterable[int] = TAMANOS_DEFAULT,
+    n_simulaciones: int = N_SIMULACIONES_POTENCIA,
+    mu0: float = 5.0,
+    alpha: float = 0.05,
+    max_workers: Optional[int] = None,
+    semilla: Optional[int] = SEMILLA_POTENCIA,
+) -> pd.DataFrame:
+    """Estima la potencia de la prueba t y de la ANOVA 2x3 para cada tamaño.
+
+    Parameters
+    ----------
+    df:
+        DataFrame preparado con ``acuerdo_ampliacion``, ``frecuencia_viaje`` y
+        ``grupo_edad``; de él se ajustan las distribuciones por celda.
+    tamanos:
+        Números de encuestados por celda del diseño que se desean evaluar.
+    n_simulaciones:
+        Conjuntos sintéticos simulados por tamaño.
+    max_workers:
+        Procesos del pool. Con ``1`` todo se ejecuta en el proceso actual.
+    semilla:
+        Semilla de las simulaciones; el resultado no depende de
+        ``max_workers``. Con ``None`` cambia en cada llamada.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una fila por tamaño con ``n_por_celda``, ``n_total`` y la potencia de
+        ``prueba_t``, ``anova_frecuencia``, ``anova_edad`` y
+        ``anova_interaccion``.
+    """
+
+    probabilidades = ajustar_distribuciones_celdas(df)
+    tamanos = sorted({int(n) for n in tamanos if int(n) >= 2})
+    if not tamanos:
+        raise ValueError("Se requiere al menos un tamaño por celda mayor o igual a 2.")
+
+    tareas = []
+    for n in tamanos:
+        restantes = n_simulaciones
+        while restantes > 0:
+            lote = min(SIMULACIONES_POR_LOTE, restantes)
+            tareas.append((n, lote))
+            restantes -= lote
+    semillas = np.random.SeedSequence(semilla).spawn(len(tareas))
+
+    if max_workers == 1:
+        parciales = [
+            _potencia_lote(probabilidades, n, lote, mu0, alpha, s)
+            for (n, lote), s in zip(tareas, semillas)
+        ]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futuros = [
+                pool.submit(_potencia_lote, probabilidades, n, lote, mu0, alpha, s)
+                for (n, lote), s in zip(tareas, semillas)
+            ]
+            parciales = [futuro.result() for futuro in futuros]
+
+    acumulado = pd.DataFrame(parciales).groupby("n_por_celda").sum()
+    curvas = acumulado[list(COLUMNAS_POTENCIA)].div(acumulado["simulaciones"], axis=0).reset_index()
+    n_celdas = len(NIVELES_FRECUENCIA) * len(NIVELES_EDAD)
+    curvas.insert(1, "n_total", curvas["n_por_celda"] * n_celdas)
+    return curvas
+
+
+def tamano_minimo(
+    curvas: pd.DataFrame,
+    columnas: Sequence[str] = COLUMNAS_POTENCIA,
+    potencia_objetivo: float = POTENCIA_OBJETIVO,
+) -> Dict[str, Optional[int]]:
+    """Devuelve el menor ``n_por_celda`` que alcanza la potencia objetivo."""
+
+    resultado: Dict[str, Optional[int]] = {}
+    for columna in columnas:
+        suficientes = curvas.loc[curvas[columna] >= potencia_objetivo, "n_por_celda"]
+        resultado[columna] = int(suficientes.min()) if not suficientes.empty else None
+    return resultado
@@ -1,25 +1,71 @@
 """Pruebas de hipótesis asociadas al proyecto."""
 from __future__ import annotations
 
-from typing import Dict
+import logging
+from typing import Dict, Optional
 
+import numpy as np
 import pandas as pd
 from scipy import stats
 
+from .memoizacion import memoizar
 
+logger = logging.getLogger(__name__)
+
+
+@memoizar
 def prueba_media_mayor_que_5(
-    serie: pd.Series, mu0: float = 5.0, alpha: float = 0.05
+    serie: pd.Series,
+    mu0: float = 5.0,
+    alpha: float = 0.05,
+    pesos: Optional[pd.Series] = None,
 ) -> Dict[str, float]:
-    """Realiza una prueba t de una muestra para H1: media > mu0."""
+    """Realiza una prueba t de una muestra para H1: media > mu0.
+
+    Con ``pesos`` (ver :mod:`src.ponderacion`) la media y la desviación son
+    ponderadas y el estadístico usa el tamaño efectivo de Kish.
+    """
+    if pesos is not None:
+        from .ponderacion import momentos_ponderados
+
+        n, media, desviacion, n_efectivo = momentos_ponderados(serie, pesos)
+        if n == 0:
+            raise ValueError("La serie proporcionada no contiene datos válidos para la prueba.")
+        resultado = prueba_media_desde_momentos(n_efectivo, media, desviacion, mu0, alpha)
+        resultado["n_efectivo"] = float(n_efectivo)
+        return resultado
+
     datos = serie.dropna().astype(float)
     if datos.empty:
         raise ValueError("La serie proporcionada no contiene datos válidos para la prueba.")
 
     media_muestral = datos.mean()
     resultado_t = stats.ttest_1samp(datos, popmean=mu0, alternative="two-sided")
-    estadistico_t = float(resultado_t.statistic)
-    p_valor_bilateral = float(resultado_t.pvalue)
+    return _resultado_prueba(
+        media_muestral, float(resultado_t.statistic), float(resultado_t.pvalue), mu0, alpha
+    )
+
 
+def prueba_media_desde_momentos(
+    n: float, media: float, desviacion: float, mu0: float = 5.0, alpha: float = 0.05
+) -> Dict[str, float]:
+    """La prueba de :func:`prueba_media_mayor_que_5` a partir de ``n``, media y desviación."""
+    if n == 0:
+        raise ValueError("La serie proporcionada no contiene datos válidos para la prueba.")
+
+    estadistico_t = (media - mu0) / (desviacion / np.sqrt(n))
+    p_valor_bilateral = 2 * stats.t.sf(abs(estadistico_t), df=n - 1)
+    return _resultado_prueba(media, float(estadistico_t), float(p_valor_bilateral), mu0, alpha)
+
+
+def _resultado_prueba(
+    media_muestral: float,
+    estadistico_t: float,
+    p_valor_bilateral: float,
+    mu0: float,
+    alpha: float,
+) -> Dict[str, float]:
+    """Pasa el p-valor bilateral a cola derecha, registra la conclusión y arma el resultado."""
     if media_muestral > mu0:
         p_valor_unilateral = p_valor_bilateral / 2
     else:
@@ -27,21 +73,26 @@ def prueba_media_mayor_que_5(
 
     decision = "Rechazar H0" if p_valor_unilateral < alpha else "No rechazar H0"
 
-    print("Resultado de la prueba t de una muestra (cola derecha):")
-    print(f"Media muestral = {media_muestral:.3f}")
-    print(f"Estadístico t = {estadistico_t:.3f}")
-    print(f"p-valor unilateral = {p_valor_unilateral:.4f}")
+    logger.info(
+        "Resultado de la prueba t de una muestra (cola derecha):\n"
+        "Media muestral = %.3f\nEstadístico t = %.3f\np-valor unilateral = %.4f",
+        media_muestral,
+        estadistico_t,
+        p_valor_unilateral,
+    )
     if decision == "Rechazar H0":
-        print(
+        logger.info(
             "Conclusión: existe evidencia estadísticamente significativa para afirmar "
-            "que la media poblacional es mayor que", mu0,
-            "con un nivel de significancia de", alpha,
+            "que la media poblacional es mayor que %s con un nivel de significancia de %s",
+            mu0,
+            alpha,
         )
     else:
-        print(
+        logger.info(
             "Conclusión: no se encontró evidencia suficiente para afirmar que la media "
-            "poblacional supere", mu0,
-            "con un nivel de significancia de", alpha,
+            "poblacional supere %s con un nivel de significancia de %s",
+            mu0,
+            alpha,
         )
 
     return {
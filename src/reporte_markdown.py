@@ -1,11 +1,28 @@
-"""Generación automática del reporte estadístico en formato Markdown."""
+"""Generación automática del reporte estadístico en formato Markdown y HTML.
+
+El reporte se renderiza a partir del artefacto de resultados (ver
+:mod:`src.artefacto`), por lo que puede regenerarse sin volver a ejecutar el
+análisis. Las plantillas de las secciones se analizan una sola vez al
+importar el módulo y la salida se arma en una lista de fragmentos, así que
+renderizar miles de reportes (uno por ciudad, ola o segmento) cuesta poco
+más que formatear sus números; :func:`renderizar_lote` los reparte además
+entre varios procesos.
+"""
 from __future__ import annotations
 
+import html
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict
+from string import Formatter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
+from .artefacto import cargar_artefacto, construir_artefacto, resolver_tablas
+from .pipeline import escribir_atomico
+
 
 def _formatear_numero(valor: Any, decimales: int = 2) -> str:
     """Devuelve ``valor`` formateado con ``decimales`` decimales."""
@@ -54,19 +71,311 @@ def _describir_correlacion(valor: float) -> str:
     return f"{intensidad} ({sentido})"
 
 
-def _ruta_a_posix(ruta: Path | None) -> str:
+def _ruta_a_posix(ruta: Path | str | None) -> str:
     """Convierte una ruta a formato POSIX para usar en Markdown."""
     if ruta is None:
         return ""
-    return ruta.as_posix()
+    return Path(ruta).as_posix()
+
+
+def _imagen_markdown(texto: str, ruta: str, miniatura: str) -> str:
+    """Imagen del reporte; con miniatura se inserta esta y enlaza a la original."""
+    if miniatura:
+        return f"[![{texto}]({miniatura})]({ruta})\n\n"
+    return f"![{texto}]({ruta})\n\n"
+
+
+def tabla_metricas_figuras(metricas: pd.DataFrame) -> pd.DataFrame:
+    """Resume tamaño, tiempo de codificación y memoria pico por archivo de imagen.
+
+    Las figuras reutilizadas desde la caché muestran lo medido al dibujarlas.
+    Se imprime en consola; el reporte no la incluye porque cambia en cada
+    corrida.
+    """
+    if metricas.empty:
+        return metricas
+    return pd.DataFrame(
+        {
+            "figura": metricas["figura"],
+            "archivo": metricas["archivo"],
+            "formato": metricas["formato"],
+            "tamano_kb": (metricas["bytes"] / 1024).round(1),
+            "codificacion_s": pd.to_numeric(metricas["segundos"]).round(3),
+            "memoria_pico_mb": pd.to_numeric(metricas["memoria_pico_mb"]).round(1),
+        }
+    )
 
 
-def generar_reporte_markdown(
-    resultados: Dict[str, Any], rutas_figuras: Dict[str, Path], output_path: Path
-) -> None:
-    """Escribe un reporte Markdown con los resultados del análisis estadístico."""
+class _Plantilla:
+    """Plantilla con la sintaxis de :meth:`str.format` analizada una sola vez.
+
+    El texto se separa al construirla en fragmentos literales y campos, de modo
+    que renderizar solo consiste en formatear los campos y agregar los
+    fragmentos a una lista de salida, sin volver a analizar la plantilla ni
+    copiar cadenas intermedias.
+    """
+
+    __slots__ = ("partes",)
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+    def __init__(self, texto: str) -> None:
+        partes = []
+        for literal, campo, especificacion, conversion in Formatter().parse(texto):
+            if conversion:
+                raise ValueError(f"Conversión no soportada en la plantilla: !{conversion}")
+            partes.append((literal, campo, especificacion or ""))
+        self.partes: tuple[tuple[str, Optional[str], str], ...] = tuple(partes)
+
+    def escribir(self, salida: list[str], valores: Dict[str, Any]) -> None:
+        """Agrega la plantilla renderizada con ``valores`` a ``salida``."""
+        for literal, campo, especificacion in self.partes:
+            if literal:
+                salida.append(literal)
+            if campo is not None:
+                salida.append(format(valores[campo], especificacion))
+
+    def formatear(self, **valores: Any) -> str:
+        salida: list[str] = []
+        self.escribir(salida, valores)
+        return "".join(salida)
+
+
+# Plantillas de las secciones del reporte (se analizan al importar el módulo).
+_ENCABEZADO = _Plantilla(
+    """# Informe de resultados - Proyecto de Estadística
+
+{aviso_aproximado}## 1. Descripción general de la muestra
+
+- Tamaño de la muestra: {n_muestra} encuestados.
+- Variables de interés:
+  - Grado de acuerdo con la ampliación (1–10)
+  - Percepción de impacto en la economía (1–10)
+  - Percepción de necesidad de la obra (1–10)
+  - Factores: frecuencia de viaje y grupo etario.
+
+## 2. Análisis descriptivo
+
+"""
+)
+
+_DESCRIPTIVO = _Plantilla(
+    """### {titulo}
+
+- n = {n}
+- Media = {media}
+- Mediana = {mediana}
+- Moda = {moda}
+- Desviación estándar = {desviacion}
+- Cuartiles: Q1 = {q1}, Q2 = {q2}, Q3 = {q3}
+
+"""
+)
+
+_AVISO_APROXIMADO = _Plantilla(
+    "> **INFORME APROXIMADO (vista previa).** Los resultados se calcularon sobre una "
+    "muestra estratificada de {n_muestra} de "
+    "{n_poblacion} respuestas. Consulta la sección de "
+    "cotas de error de muestreo al final del documento.\n\n"
+)
+
+_AVISO_PONDERADO = _Plantilla(
+    "> **RESULTADOS PONDERADOS.** Los descriptivos, intervalos, la prueba de hipótesis y "
+    "la ANOVA se ponderaron por rastrillaje a las marginales de {factores} "
+    "(n efectivo = {n_efectivo:.1f}, efecto de diseño = {efecto_diseno:.3f}). "
+    "Consulta la sección de ponderación al final del documento.\n\n"
+)
+
+_INTERPRETACION_MEDIA = _Plantilla(
+    "Con un {nivel:.0f} % de confianza, el verdadero promedio poblacional de acuerdo con "
+    "la ampliación del aeropuerto se encuentra entre {li} y {ls}."
+)
+
+_INTERPRETACION_PROPORCION = _Plantilla(
+    "Con un {nivel:.0f} % de confianza, la proporción real de personas a favor de la ampliación "
+    "se ubica entre {li} y {ls}."
+)
+
+_INTERVALOS_Y_PRUEBA = _Plantilla(
+    """## 3. Intervalos de confianza
+
+### 3.1. Media del grado de acuerdo con la ampliación
+
+- n = {ic_media_n}
+- Media = {ic_media_media}
+- IC 95%: [{ic_media_li}, {ic_media_ls}]
+
+{interpretacion_media}
+
+### 3.2. Proporción de personas a favor de la ampliación
+
+- Definición de "a favor": calificación ≥ 6.
+- n = {ic_prop_n}
+- Proporción muestral = {ic_prop_p}
+- IC 95%: [{ic_prop_li}, {ic_prop_ls}]
+
+{interpretacion_prop}
+
+## 4. Prueba de hipótesis principal
+
+- Hipótesis:
+  - H0: μ ≤ {mu0}
+  - H1: μ > {mu0}
+- Estadístico t = {estadistico_t}
+- p-valor (cola derecha) = {p_valor}
+- Conclusión: {conclusion_prueba}
+
+## 5. ANOVA factorial 2×3 (Frecuencia de viaje × Grupo etario)
+
+"""
+)
+
+_CONCLUSION_RECHAZO = _Plantilla(
+    "Se rechaza la hipótesis nula y se concluye que la media poblacional supera a {mu0}."
+)
+_CONCLUSION_NO_RECHAZO = _Plantilla(
+    "No se rechaza la hipótesis nula; los datos no aportan evidencia suficiente para afirmar "
+    "que la media exceda a {mu0}."
+)
+
+_CONCLUSION_ACUERDO = _Plantilla(
+    "El grado de acuerdo con la ampliación presenta una media de "
+    "{media}, lo que sugiere una valoración favorable."
+)
+_CONCLUSION_PERCEPCIONES = _Plantilla(
+    "Las percepciones sobre el impacto económico ({media_economia}) y la necesidad de la obra ({media_necesidad}) "
+    "también muestran niveles altos en la escala de 1 a 10."
+)
+_CONCLUSION_PRUEBA = _Plantilla(
+    "La prueba t con hipótesis H0: μ ≤ {mu0} arroja p = {p_valor}, {decision}."
+)
+
+_RECOMENDACIONES = _Plantilla(
+    "Con una media de acuerdo de {media} y una proporción estimada a favor de {prop:.1%},"
+    " la ampliación cuenta con amplia aceptación social. Se recomienda comunicar los"
+    " beneficios económicos y la necesidad de la obra resaltando que {mensaje_prueba}"
+    " {mensaje_interaccion}"
+)
+
+_CORRELACION = _Plantilla(
+    "La correlación entre {texto} es {valor:.2f}, considerada {descripcion}."
+)
+
+_NORMALIDAD = _Plantilla(
+    """### {titulo}
+
+- n = {n}
+- Estadístico Shapiro-Wilk = {estad}
+- p-valor = {p}
+- Interpretación: {texto}
+
+"""
+)
+
+_BAYESIANO = _Plantilla(
+    """
+## 11. Análisis bayesiano
+
+- Media posterior del acuerdo (Dirichlet-multinomial) = {media}
+- Intervalo creíble {nivel:.0f}%: [{li}, {ls}]
+- P(μ > {umbral} | datos) = {prob}
+- Proporción posterior a favor (Beta-binomial) = {prop} [{prop_li}, {prop_ls}]
+
+"""
+)
+
+_COTAS = (
+    "\n## Cotas de error de muestreo (vista previa)\n\n"
+    "Cada estadístico se acompaña de su error estándar de muestreo (bootstrap "
+    "estratificado por tratamiento con corrección por población finita) y de la "
+    "cota aproximada al 95 % para el valor que se obtendría con todos los datos.\n\n"
+)
+
+_CALIDAD = _Plantilla(
+    "\n## Control de calidad de las respuestas\n\n"
+    "Se excluyeron {excluidas} de {filas} respuestas antes del análisis. Cada regla "
+    "cuenta las respuestas que marca y las que excluye; una respuesta marcada por "
+    "varias reglas se atribuye a la primera que la excluye.\n\n"
+)
+
+_PONDERACION = (
+    "\n## Ponderación por rastrillaje\n\n"
+    "Cada respuesta pesa el cociente entre el conteo ajustado y el observado de su "
+    "celda; los intervalos y la prueba usan el tamaño efectivo de Kish.\n\n"
+)
+
+_SECCIONES_DESCRIPTIVAS: tuple[tuple[str, str], ...] = (
+    ("acuerdo_ampliacion", "2.1. Grado de acuerdo con la ampliación"),
+    ("p2_economia", "2.2. Impacto en la economía"),
+    ("p3_necesidad", "2.3. Percepción de necesidad"),
+)
+
+_FIGURAS_REPORTE: tuple[tuple[str, str], ...] = (
+    ("hist_acuerdo", "Histograma del acuerdo"),
+    ("box_frecuencia", "Boxplot por frecuencia"),
+    ("box_edad", "Boxplot por grupo etario"),
+    ("barras_tratamientos", "Medias por tratamiento"),
+    ("correlaciones", "Matriz de correlaciones"),
+)
+
+_PARES_CORRELACION: tuple[tuple[str, str, str], ...] = (
+    ("acuerdo_ampliacion", "p2_economia", "acuerdo con la ampliación y el impacto económico"),
+    ("acuerdo_ampliacion", "p3_necesidad", "acuerdo con la ampliación y la percepción de necesidad"),
+    ("p2_economia", "p3_necesidad", "impacto económico y necesidad de la obra"),
+)
+
+
+def _bloque_codigo(salida: list[str], texto: str) -> None:
+    salida.append("```\n")
+    salida.append(texto)
+    salida.append("\n```\n")
+
+
+def _valores_descriptivo(titulo: str, datos: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "titulo": titulo,
+        "n": datos.get("n", "N/A"),
+        "media": _formatear_numero(datos.get("media")),
+        "mediana": _formatear_numero(datos.get("mediana")),
+        "moda": _formatear_moda(datos.get("moda")),
+        "desviacion": _formatear_numero(datos.get("desviacion")),
+        "q1": _formatear_numero(datos.get("q1")),
+        "q2": _formatear_numero(datos.get("q2")),
+        "q3": _formatear_numero(datos.get("q3")),
+    }
+
+
+def _valores_normalidad(titulo: str, datos: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "titulo": titulo,
+        "n": datos.get("n", "N/A"),
+        "estad": _formatear_numero(datos.get("estadistico")),
+        "p": _formatear_numero(datos.get("p_valor"), 4),
+        "texto": datos.get("decision_texto", ""),
+    }
+
+
+def _ruta_relativa(ruta: str, base: Optional[Path]) -> str:
+    """Expresa ``ruta`` (relativa al directorio de trabajo) desde la carpeta ``base``."""
+    if base is None or not ruta or Path(ruta).is_absolute():
+        return ruta
+    return Path(os.path.relpath(ruta, base)).as_posix()
+
+
+def renderizar_markdown(artefacto: Dict[str, Any], base: Optional[Path] = None) -> str:
+    """Devuelve el reporte Markdown a partir de un artefacto de resultados.
+
+    Parameters
+    ----------
+    base:
+        Carpeta donde se guardará el reporte. Las rutas de las figuras del
+        artefacto son relativas al directorio de trabajo y se reescriben
+        relativas a ``base`` para que los enlaces funcionen desde el reporte.
+    """
+
+    resultados = resolver_tablas(artefacto)
+    rutas_figuras = {
+        clave: _ruta_relativa(_ruta_a_posix(ruta), base)
+        for clave, ruta in artefacto.get("figuras", {}).items()
+    }
 
     descriptivos = resultados.get("descriptivos", {})
     acuerdo = descriptivos.get("acuerdo_ampliacion", {})
@@ -77,56 +386,17 @@ def generar_reporte_markdown(
     ic_prop = resultados.get("intervalos", {}).get("proporcion", {})
 
     prueba = resultados.get("prueba_hipotesis", {})
+    rechaza_h0 = prueba.get("decision") == "Rechazar H0"
+    mu0 = _formatear_numero(prueba.get("mu0"))
     anova = resultados.get("anova", {})
     normalidad = resultados.get("normalidad", {})
     normalidad_acuerdo = normalidad.get("acuerdo", {})
     normalidad_residuos = normalidad.get("residuos_anova")
 
-    n_muestra = resultados.get("n_muestra", 0)
-
-    # Interpretaciones de intervalos
-    interpretacion_media = (
-        "Con un {nivel:.0f} % de confianza, el verdadero promedio poblacional de acuerdo con "
-        "la ampliación del aeropuerto se encuentra entre {li} y {ls}."
-    ).format(
-        nivel=(1 - ic_media.get("alpha", 0)) * 100,
-        li=_formatear_numero(ic_media.get("limite_inferior")),
-        ls=_formatear_numero(ic_media.get("limite_superior")),
-    )
-
-    interpretacion_prop = (
-        "Con un {nivel:.0f} % de confianza, la proporción real de personas a favor de la ampliación "
-        "se ubica entre {li} y {ls}."
-    ).format(
-        nivel=(1 - ic_prop.get("alpha", 0)) * 100,
-        li=_formatear_numero(ic_prop.get("limite_inferior")),
-        ls=_formatear_numero(ic_prop.get("limite_superior")),
-    )
-
-    # Conclusión prueba de hipótesis
-    if prueba.get("decision") == "Rechazar H0":
-        conclusion_prueba = (
-            "Se rechaza la hipótesis nula y se concluye que la media poblacional supera a "
-            f"{_formatear_numero(prueba.get('mu0'), 2)}."
-        )
-    else:
-        conclusion_prueba = (
-            "No se rechaza la hipótesis nula; los datos no aportan evidencia suficiente para afirmar "
-            f"que la media exceda a {_formatear_numero(prueba.get('mu0'), 2)}."
-        )
-
-    tabla_anova_texto = anova.get("tabla_texto", "")
     conclusion_anova = anova.get("conclusion", "No se obtuvo un resultado interpretable del ANOVA.")
     mensaje_anova = anova.get("mensaje", "")
     tabla_anova = anova.get("tabla")
 
-    # Rutas de figuras
-    ruta_hist = _ruta_a_posix(rutas_figuras.get("hist_acuerdo"))
-    ruta_box_frec = _ruta_a_posix(rutas_figuras.get("box_frecuencia"))
-    ruta_box_edad = _ruta_a_posix(rutas_figuras.get("box_edad"))
-    ruta_barras = _ruta_a_posix(rutas_figuras.get("barras_tratamientos"))
-    ruta_corr = _ruta_a_posix(rutas_figuras.get("correlaciones"))
-
     correlaciones_obj = resultados.get("correlaciones")
     if isinstance(correlaciones_obj, pd.DataFrame):
         matriz_correlaciones = correlaciones_obj
@@ -135,30 +405,6 @@ def generar_reporte_markdown(
     else:
         matriz_correlaciones = pd.DataFrame()
 
-    descripcion_correlaciones: list[str] = []
-    pares_descripcion = [
-        ("acuerdo_ampliacion", "p2_economia", "acuerdo con la ampliación y el impacto económico"),
-        ("acuerdo_ampliacion", "p3_necesidad", "acuerdo con la ampliación y la percepción de necesidad"),
-        ("p2_economia", "p3_necesidad", "impacto económico y necesidad de la obra"),
-    ]
-    if not matriz_correlaciones.empty:
-        for col1, col2, texto in pares_descripcion:
-            if col1 in matriz_correlaciones.index and col2 in matriz_correlaciones.columns:
-                valor = matriz_correlaciones.loc[col1, col2]
-                descripcion_correlaciones.append(
-                    f"La correlación entre {texto} es {valor:.2f}, considerada {_describir_correlacion(valor)}."
-                )
-
-    porcentaje_favor = ic_prop.get("p_hat") or 0.0
-    if porcentaje_favor is None:
-        porcentaje_favor = 0.0
-
-    mensaje_prueba = (
-        "La prueba t rechaza la hipótesis nula y respalda que la media supera el umbral establecido."
-        if prueba.get("decision") == "Rechazar H0"
-        else "La prueba t no rechaza la hipótesis nula."
-    )
-
     mensaje_interaccion = ""
     if isinstance(tabla_anova, pd.DataFrame) and "PR(>F)" in tabla_anova.columns:
         etiqueta_interaccion = "C(frecuencia_viaje):C(grupo_edad)"
@@ -175,194 +421,378 @@ def generar_reporte_markdown(
                     " conviene monitorear diferencias entre segmentos."
                 )
 
-    texto_recomendaciones = (
-        "Con una media de acuerdo de {media} y una proporción estimada a favor de {prop},"
-        " la ampliación cuenta con amplia aceptación social. Se recomienda comunicar los"
-        " beneficios económicos y la necesidad de la obra resaltando que {mensaje_prueba}"
-        " {mensaje_interaccion}"
-    ).format(
-        media=_formatear_numero(acuerdo.get("media")),
-        prop=f"{porcentaje_favor:.1%}",
-        mensaje_prueba=mensaje_prueba,
-        mensaje_interaccion=mensaje_interaccion,
+    vista_previa = resultados.get("vista_previa")
+    ponderacion = resultados.get("ponderacion")
+    avisos = ""
+    if vista_previa:
+        avisos += _AVISO_APROXIMADO.formatear(
+            n_muestra=vista_previa.get("n_muestra", "N/A"),
+            n_poblacion=vista_previa.get("n_poblacion", "N/A"),
+        )
+    if ponderacion:
+        avisos += _AVISO_PONDERADO.formatear(
+            factores=" y ".join(ponderacion.get("margenes", {})),
+            n_efectivo=ponderacion.get("n_efectivo") or float("nan"),
+            efecto_diseno=ponderacion.get("efecto_diseno") or float("nan"),
+        )
+    salida: list[str] = []
+
+    # 1-2. Encabezado y descriptivos
+    _ENCABEZADO.escribir(
+        salida,
+        {
+            "aviso_aproximado": avisos,
+            "n_muestra": resultados.get("n_muestra", 0),
+        },
     )
-
-    # Conclusiones generales
-    conclusiones_generales = [
-        (
-            "El grado de acuerdo con la ampliación presenta una media de "
-            f"{_formatear_numero(acuerdo.get('media'))}, lo que sugiere una valoración favorable."
-        ),
-        (
-            "Las percepciones sobre el impacto económico ({media_economia}) y la necesidad de la obra ({media_necesidad}) "
-            "también muestran niveles altos en la escala de 1 a 10."
-        ).format(
+    for columna, titulo in _SECCIONES_DESCRIPTIVAS:
+        _DESCRIPTIVO.escribir(salida, _valores_descriptivo(titulo, descriptivos.get(columna, {})))
+
+    # 3-5. Intervalos, prueba de hipótesis y ANOVA
+    _INTERVALOS_Y_PRUEBA.escribir(
+        salida,
+        {
+            "ic_media_n": _formatear_numero(ic_media.get("n"), 0),
+            "ic_media_media": _formatear_numero(ic_media.get("media")),
+            "ic_media_li": _formatear_numero(ic_media.get("limite_inferior")),
+            "ic_media_ls": _formatear_numero(ic_media.get("limite_superior")),
+            "interpretacion_media": _INTERPRETACION_MEDIA.formatear(
+                nivel=(1 - ic_media.get("alpha", 0)) * 100,
+                li=_formatear_numero(ic_media.get("limite_inferior")),
+                ls=_formatear_numero(ic_media.get("limite_superior")),
+            ),
+            "ic_prop_n": _formatear_numero(ic_prop.get("n"), 0),
+            "ic_prop_p": _formatear_numero(ic_prop.get("p_hat")),
+            "ic_prop_li": _formatear_numero(ic_prop.get("limite_inferior")),
+            "ic_prop_ls": _formatear_numero(ic_prop.get("limite_superior")),
+            "interpretacion_prop": _INTERPRETACION_PROPORCION.formatear(
+                nivel=(1 - ic_prop.get("alpha", 0)) * 100,
+                li=_formatear_numero(ic_prop.get("limite_inferior")),
+                ls=_formatear_numero(ic_prop.get("limite_superior")),
+            ),
+            "mu0": mu0,
+            "estadistico_t": _formatear_numero(prueba.get("estadistico_t")),
+            "p_valor": _formatear_numero(prueba.get("p_valor_unilateral"), 4),
+            "conclusion_prueba": (
+                _CONCLUSION_RECHAZO if rechaza_h0 else _CONCLUSION_NO_RECHAZO
+            ).formatear(mu0=mu0),
+        },
+    )
+    if isinstance(tabla_anova, pd.DataFrame):
+        _bloque_codigo(salida, tabla_anova.to_string())
+        salida.append("\n")
+    if mensaje_anova:
+        salida.append(f"{mensaje_anova}\n\n")
+    salida.append(f"Interpretación: {conclusion_anova}\n\n")
+
+    # 6. Gráficas
+    salida.append("## 6. Gráficas\n\n")
+    if not rutas_figuras:
+        salida.append("Este reporte se generó sin gráficas.\n\n")
+    for clave, texto in _FIGURAS_REPORTE:
+        ruta = rutas_figuras.get(clave)
+        if ruta:
+            salida.append(_imagen_markdown(texto, ruta, rutas_figuras.get(f"{clave}_miniatura", "")))
+
+    # Las métricas de los archivos de imagen cambian en cada corrida; se
+    # informan en consola y en el artefacto, no en el reporte versionado.
+
+    # 7. Conclusiones generales
+    salida.append("## 7. Conclusiones generales\n\n")
+    conclusiones_generales = (
+        _CONCLUSION_ACUERDO.formatear(media=_formatear_numero(acuerdo.get("media"))),
+        _CONCLUSION_PERCEPCIONES.formatear(
             media_economia=_formatear_numero(economia.get("media")),
             media_necesidad=_formatear_numero(necesidad.get("media")),
         ),
-        (
-            "La prueba t con hipótesis H0: μ ≤ {mu0} arroja p = {p_valor}, {decision}."
-        ).format(
-            mu0=_formatear_numero(prueba.get("mu0")),
+        _CONCLUSION_PRUEBA.formatear(
+            mu0=mu0,
             p_valor=_formatear_numero(prueba.get("p_valor_unilateral"), 4),
             decision=(
                 "lo que respalda la afirmación de que la media supera el umbral."
-                if prueba.get("decision") == "Rechazar H0"
+                if rechaza_h0
                 else "por lo que no se evidencia una media superior al umbral."
             ),
         ),
         conclusion_anova,
+    )
+    for conclusion in conclusiones_generales:
+        salida.append(f"- {conclusion}\n")
+    salida.append("\n")
+
+    # 8. Normalidad
+    salida.append("## 8. Pruebas de normalidad\n\n")
+    if normalidad_acuerdo:
+        _NORMALIDAD.escribir(
+            salida,
+            _valores_normalidad("8.1. Variable de acuerdo con la ampliación", normalidad_acuerdo),
+        )
+    if normalidad_residuos:
+        _NORMALIDAD.escribir(
+            salida, _valores_normalidad("8.2. Residuos del modelo ANOVA", normalidad_residuos)
+        )
+
+    # 9. Correlaciones
+    salida.append("## 9. Correlación entre variables de opinión\n\n")
+    descripcion_correlaciones = [
+        _CORRELACION.formatear(
+            texto=texto,
+            valor=matriz_correlaciones.loc[col1, col2],
+            descripcion=_describir_correlacion(matriz_correlaciones.loc[col1, col2]),
+        )
+        for col1, col2, texto in _PARES_CORRELACION
+        if col1 in matriz_correlaciones.index and col2 in matriz_correlaciones.columns
     ]
+    if descripcion_correlaciones:
+        salida.append(
+            "Se observa la matriz de correlaciones en la figura correspondiente."
+            " A continuación se describen los coeficientes más relevantes:\n"
+        )
+        for descripcion in descripcion_correlaciones:
+            salida.append(f"- {descripcion}\n")
+        salida.append("\n")
+    else:
+        salida.append("No se pudieron calcular correlaciones confiables con los datos disponibles.\n\n")
+
+    # 10. Recomendaciones
+    salida.append("## 10. Recomendaciones\n\n")
+    _RECOMENDACIONES.escribir(
+        salida,
+        {
+            "media": _formatear_numero(acuerdo.get("media")),
+            "prop": ic_prop.get("p_hat") or 0.0,
+            "mensaje_prueba": (
+                "La prueba t rechaza la hipótesis nula y respalda que la media supera el umbral establecido."
+                if rechaza_h0
+                else "La prueba t no rechaza la hipótesis nula."
+            ),
+            "mensaje_interaccion": mensaje_interaccion,
+        },
+    )
+    salida.append("\n")
+
+    # 11. Análisis bayesiano
+    bayesiano = resultados.get("bayesiano")
+    if bayesiano:
+        post_media = bayesiano.get("general", {}).get("media", {})
+        post_prop = bayesiano.get("general", {}).get("proporcion", {})
+        _BAYESIANO.escribir(
+            salida,
+            {
+                "media": _formatear_numero(post_media.get("media_posterior")),
+                "nivel": (1 - post_media.get("alpha", 0)) * 100,
+                "li": _formatear_numero(post_media.get("limite_inferior")),
+                "ls": _formatear_numero(post_media.get("limite_superior")),
+                "umbral": _formatear_numero(post_media.get("umbral"), 0),
+                "prob": _formatear_numero(post_media.get("prob_mayor_umbral"), 3),
+                "prop": _formatear_numero(post_prop.get("media_posterior")),
+                "prop_li": _formatear_numero(post_prop.get("limite_inferior")),
+                "prop_ls": _formatear_numero(post_prop.get("limite_superior")),
+            },
+        )
+        por_tratamiento = bayesiano.get("por_tratamiento")
+        if isinstance(por_tratamiento, pd.DataFrame) and not por_tratamiento.empty:
+            _bloque_codigo(
+                salida, por_tratamiento.to_string(index=False, float_format="{:.3f}".format)
+            )
+
+    # Cotas de la vista previa
+    if vista_previa:
+        cotas = vista_previa.get("cotas")
+        salida.append(_COTAS)
+        if isinstance(cotas, pd.DataFrame) and not cotas.empty:
+            _bloque_codigo(salida, cotas.to_string(index=False, float_format="{:.4f}".format))
+
+    calidad = resultados.get("calidad")
+    if calidad:
+        conteos_calidad = calidad.get("conteos")
+        _CALIDAD.escribir(
+            salida,
+            {"excluidas": calidad.get("filas_excluidas", 0), "filas": calidad.get("filas", 0)},
+        )
+        if isinstance(conteos_calidad, pd.DataFrame) and not conteos_calidad.empty:
+            _bloque_codigo(salida, conteos_calidad.to_string(index=False))
+
+    if ponderacion:
+        tabla_ponderacion = ponderacion.get("tabla")
+        salida.append(_PONDERACION)
+        salida.append(
+            f"- Iteraciones: {ponderacion.get('iteraciones')}"
+            f" ({'convergió' if ponderacion.get('convergio') else 'no convergió'})\n"
+            f"- Respuestas fuera de las celdas ponderadas (peso 1):"
+            f" {ponderacion.get('filas_sin_ponderar', 0)}\n\n"
+        )
+        if isinstance(tabla_ponderacion, pd.DataFrame) and not tabla_ponderacion.empty:
+            _bloque_codigo(
+                salida, tabla_ponderacion.to_string(index=False, float_format="{:.3f}".format)
+            )
 
-    # =========================
-    # Construcción del Markdown
-    # =========================
-    contenido = f"""# Informe de resultados - Proyecto de Estadística
+    return "".join(salida)
 
-## 1. Descripción general de la muestra
 
-- Tamaño de la muestra: {n_muestra} encuestados.
-- Variables de interés:
-  - Grado de acuerdo con la ampliación (1–10)
-  - Percepción de impacto en la economía (1–10)
-  - Percepción de necesidad de la obra (1–10)
-  - Factores: frecuencia de viaje y grupo etario.
+_PATRON_IMAGEN_ENLAZADA = re.compile(r"^\[!\[(.*?)\]\((.*?)\)\]\((.*?)\)$")
+_PATRON_IMAGEN = re.compile(r"^!\[(.*?)\]\((.*?)\)$")
+_PATRON_NEGRITA = re.compile(r"\*\*(.+?)\*\*")
 
-## 2. Análisis descriptivo
 
-### 2.1. Grado de acuerdo con la ampliación
+def _en_linea_html(texto: str) -> str:
+    return _PATRON_NEGRITA.sub(r"<strong>\1</strong>", html.escape(texto, quote=False))
 
-- n = {acuerdo.get('n', 'N/A')}
-- Media = {_formatear_numero(acuerdo.get('media'))}
-- Mediana = {_formatear_numero(acuerdo.get('mediana'))}
-- Moda = {_formatear_moda(acuerdo.get('moda'))}
-- Desviación estándar = {_formatear_numero(acuerdo.get('desviacion'))}
-- Cuartiles: Q1 = {_formatear_numero(acuerdo.get('q1'))}, Q2 = {_formatear_numero(acuerdo.get('q2'))}, Q3 = {_formatear_numero(acuerdo.get('q3'))}
 
-### 2.2. Impacto en la economía
+def _bloque_codigo_html(lineas: list[str]) -> str:
+    texto = html.escape("\n".join(lineas), quote=False)
+    return f"<pre><code>{texto}</code></pre>"
 
-- n = {economia.get('n', 'N/A')}
-- Media = {_formatear_numero(economia.get('media'))}
-- Mediana = {_formatear_numero(economia.get('mediana'))}
-- Moda = {_formatear_moda(economia.get('moda'))}
-- Desviación estándar = {_formatear_numero(economia.get('desviacion'))}
-- Cuartiles: Q1 = {_formatear_numero(economia.get('q1'))}, Q2 = {_formatear_numero(economia.get('q2'))}, Q3 = {_formatear_numero(economia.get('q3'))}
 
-### 2.3. Percepción de necesidad
+def _markdown_a_html(markdown: str) -> str:
+    """Convierte el subconjunto de Markdown que usa el reporte a HTML.
 
-- n = {necesidad.get('n', 'N/A')}
-- Media = {_formatear_numero(necesidad.get('media'))}
-- Mediana = {_formatear_numero(necesidad.get('mediana'))}
-- Moda = {_formatear_moda(necesidad.get('moda'))}
-- Desviación estándar = {_formatear_numero(necesidad.get('desviacion'))}
-- Cuartiles: Q1 = {_formatear_numero(necesidad.get('q1'))}, Q2 = {_formatear_numero(necesidad.get('q2'))}, Q3 = {_formatear_numero(necesidad.get('q3'))}
+    Admite encabezados, listas anidadas con dos espacios, bloques de código,
+    citas, imágenes (enlazadas o no), negritas y párrafos.
+    """
 
-## 3. Intervalos de confianza
+    partes: list[str] = []
+    niveles_lista = 0
+    codigo: Optional[list[str]] = None
 
-### 3.1. Media del grado de acuerdo con la ampliación
+    def cerrar_listas(hasta: int = 0) -> None:
+        nonlocal niveles_lista
+        while niveles_lista > hasta:
+            partes.append("</li></ul>")
+            niveles_lista -= 1
 
-- n = {_formatear_numero(ic_media.get('n'), 0)}
-- Media = {_formatear_numero(ic_media.get('media'))}
-- IC 95%: [{_formatear_numero(ic_media.get('limite_inferior'))}, {_formatear_numero(ic_media.get('limite_superior'))}]
+    for linea in markdown.splitlines():
+        if codigo is not None:
+            if linea.startswith("```"):
+                partes.append(_bloque_codigo_html(codigo))
+                codigo = None
+            else:
+                codigo.append(linea)
+            continue
+        if linea.startswith("```"):
+            cerrar_listas()
+            codigo = []
+            continue
+
+        contenido = linea.lstrip(" ")
+        if contenido.startswith("- "):
+            nivel = (len(linea) - len(contenido)) // 2 + 1
+            if nivel > niveles_lista:
+                while niveles_lista < nivel:
+                    partes.append("<ul><li>")
+                    niveles_lista += 1
+            else:
+                cerrar_listas(nivel)
+                partes.append("</li><li>")
+            partes.append(_en_linea_html(contenido[2:]))
+            continue
+
+        cerrar_listas()
+        if not contenido:
+            continue
+        encabezado = re.match(r"^(#{1,6}) (.*)$", linea)
+        enlazada = _PATRON_IMAGEN_ENLAZADA.match(linea)
+        imagen = _PATRON_IMAGEN.match(linea)
+        if encabezado:
+            nivel = len(encabezado.group(1))
+            partes.append(f"<h{nivel}>{_en_linea_html(encabezado.group(2))}</h{nivel}>")
+        elif enlazada:
+            alt, miniatura, ruta = (html.escape(g) for g in enlazada.groups())
+            partes.append(f'<p><a href="{ruta}"><img src="{miniatura}" alt="{alt}"></a></p>')
+        elif imagen:
+            alt, ruta = (html.escape(g) for g in imagen.groups())
+            partes.append(f'<p><img src="{ruta}" alt="{alt}"></p>')
+        elif linea.startswith("> "):
+            partes.append(f"<blockquote><p>{_en_linea_html(linea[2:])}</p></blockquote>")
+        else:
+            partes.append(f"<p>{_en_linea_html(linea)}</p>")
+
+    cerrar_listas()
+    if codigo is not None:
+        partes.append(_bloque_codigo_html(codigo))
+    return "\n".join(partes)
+
+
+def renderizar_html(artefacto: Dict[str, Any], base: Optional[Path] = None) -> str:
+    """Devuelve el reporte como documento HTML autocontenido."""
+
+    cuerpo = _markdown_a_html(renderizar_markdown(artefacto, base))
+    return (
+        "<!DOCTYPE html>\n<html lang=\"es\">\n<head>\n<meta charset=\"utf-8\">\n"
+        "<title>Informe de resultados - Proyecto de Estadística</title>\n"
+        "<style>body{font-family:sans-serif;max-width:60em;margin:auto;padding:1em}"
+        "pre{background:#f5f5f5;padding:.5em;overflow-x:auto}img{max-width:100%}</style>\n"
+        f"</head>\n<body>\n{cuerpo}\n</body>\n</html>\n"
+    )
 
-{interpretacion_media}
 
-### 3.2. Proporción de personas a favor de la ampliación
+def escribir_reporte(artefacto: Dict[str, Any], output_path: Path) -> Path:
+    """Renderiza el artefacto en ``output_path``: HTML si termina en ``.html``, si no Markdown.
 
-- Definición de "a favor": calificación ≥ 6.
-- n = {_formatear_numero(ic_prop.get('n'), 0)}
-- Proporción muestral = {_formatear_numero(ic_prop.get('p_hat'))}
-- IC 95%: [{_formatear_numero(ic_prop.get('limite_inferior'))}, {_formatear_numero(ic_prop.get('limite_superior'))}]
+    El archivo se escribe de forma atómica: quien lo lea ve el reporte
+    anterior o el nuevo completo, nunca uno a medias.
+    """
 
-{interpretacion_prop}
+    output_path = Path(output_path)
+    base = output_path.parent
+    if output_path.suffix.lower() in (".html", ".htm"):
+        contenido = renderizar_html(artefacto, base)
+    else:
+        contenido = renderizar_markdown(artefacto, base)
+    escribir_atomico(output_path, contenido.encode("utf-8"))
+    return output_path
 
-## 4. Prueba de hipótesis principal
 
-- Hipótesis:
-  - H0: μ ≤ {_formatear_numero(prueba.get('mu0'))}
-  - H1: μ > {_formatear_numero(prueba.get('mu0'))}
-- Estadístico t = {_formatear_numero(prueba.get('estadistico_t'))}
-- p-valor (cola derecha) = {_formatear_numero(prueba.get('p_valor_unilateral'), 4)}
-- Conclusión: {conclusion_prueba}
+def renderizar_desde_artefacto(directorio: Path, output_path: Path) -> Path:
+    """Vuelve a generar el reporte leyendo solo el artefacto guardado en ``directorio``."""
 
-## 5. ANOVA factorial 2×3 (Frecuencia de viaje × Grupo etario)
+    return escribir_reporte(cargar_artefacto(directorio), output_path)
 
-"""
 
-    # Tabla ANOVA como bloque de código Markdown
-    if tabla_anova_texto:
-        contenido += "```\n"
-        contenido += tabla_anova_texto
-        contenido += "\n```\n\n"
+def _renderizar_trabajo(trabajo: Tuple[Path, Sequence[Path]]) -> List[Path]:
+    directorio, destinos = trabajo
+    artefacto = cargar_artefacto(directorio)
+    return [escribir_reporte(artefacto, destino) for destino in destinos]
 
-    if mensaje_anova:
-        contenido += f"{mensaje_anova}\n\n"
-
-    contenido += f"Interpretación: {conclusion_anova}\n\n"
-
-    # Gráficas
-    contenido += "## 6. Gráficas\n\n"
-    if ruta_hist:
-        contenido += f"![Histograma del acuerdo]({ruta_hist})\n\n"
-    if ruta_box_frec:
-        contenido += f"![Boxplot por frecuencia]({ruta_box_frec})\n\n"
-    if ruta_box_edad:
-        contenido += f"![Boxplot por grupo etario]({ruta_box_edad})\n\n"
-    if ruta_barras:
-        contenido += f"![Medias por tratamiento]({ruta_barras})\n\n"
-    if ruta_corr:
-        contenido += f"![Matriz de correlaciones]({ruta_corr})\n\n"
-
-    # Conclusiones finales
-    contenido += "## 7. Conclusiones generales\n\n"
-    for conclusion in conclusiones_generales:
-        contenido += f"- {conclusion}\n"
 
-    contenido += "\n"
+def renderizar_lote(
+    trabajos: Sequence[Tuple[Path, Sequence[Path]]], procesos: Optional[int] = None
+) -> List[Path]:
+    """Renderiza muchos reportes, cada uno desde su artefacto guardado.
 
-    contenido += "## 8. Pruebas de normalidad\n\n"
-    if normalidad_acuerdo:
-        contenido += "### 8.1. Variable de acuerdo con la ampliación\n\n"
-        contenido += (
-            "- n = {n}\n"
-            "- Estadístico Shapiro-Wilk = {estad}\n"
-            "- p-valor = {p}\n"
-            "- Interpretación: {texto}\n\n"
-        ).format(
-            n=normalidad_acuerdo.get("n", "N/A"),
-            estad=_formatear_numero(normalidad_acuerdo.get("estadistico")),
-            p=_formatear_numero(normalidad_acuerdo.get("p_valor"), 4),
-            texto=normalidad_acuerdo.get("decision_texto", ""),
-        )
+    Parameters
+    ----------
+    trabajos:
+        Pares ``(carpeta_del_artefacto, destinos)``; cada artefacto se lee una
+        vez y se escribe en todos sus destinos (p. ej. ``.md`` y ``.html``).
+    procesos:
+        Número de procesos. Por defecto uno por CPU; con ``0`` o ``1`` (o un
+        solo trabajo) se renderiza en el proceso actual. Los procesos reciben
+        solo rutas, no los resultados, y cada uno analiza las plantillas una
+        única vez al importar este módulo.
 
-    if normalidad_residuos:
-        contenido += "### 8.2. Residuos del modelo ANOVA\n\n"
-        contenido += (
-            "- n = {n}\n"
-            "- Estadístico Shapiro-Wilk = {estad}\n"
-            "- p-valor = {p}\n"
-            "- Interpretación: {texto}\n\n"
-        ).format(
-            n=normalidad_residuos.get("n", "N/A"),
-            estad=_formatear_numero(normalidad_residuos.get("estadistico")),
-            p=_formatear_numero(normalidad_residuos.get("p_valor"), 4),
-            texto=normalidad_residuos.get("decision_texto", ""),
-        )
+    Returns
+    -------
+    list of Path
+        Rutas escritas, en el orden de ``trabajos``.
+    """
+
+    if procesos is None:
+        procesos = os.cpu_count() or 1
+    procesos = min(procesos, len(trabajos))
+    if procesos <= 1:
+        return [ruta for trabajo in trabajos for ruta in _renderizar_trabajo(trabajo)]
+
+    # Bloques grandes para que el costo de enviar cada tarea sea despreciable
+    tamano_bloque = max(1, len(trabajos) // (procesos * 4))
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        escritas = pool.map(_renderizar_trabajo, trabajos, chunksize=tamano_bloque)
+        return [ruta for rutas in escritas for ruta in rutas]
 
-    contenido += "## 9. Correlación entre variables de opinión\n\n"
-    if descripcion_correlaciones:
-        contenido += (
-            "Se observa la matriz de correlaciones en la figura correspondiente."
-            " A continuación se describen los coeficientes más relevantes:\n"
-        )
-        for descripcion in descripcion_correlaciones:
-            contenido += f"- {descripcion}\n"
-        contenido += "\n"
-    else:
-        contenido += "No se pudieron calcular correlaciones confiables con los datos disponibles.\n\n"
 
-    contenido += "## 10. Recomendaciones\n\n"
-    contenido += f"{texto_recomendaciones}\n"
+def generar_reporte_markdown(
+    resultados: Dict[str, Any], rutas_figuras: Dict[str, Path], output_path: Path
+) -> None:
+    """Escribe un reporte Markdown con los resultados del análisis estadístico."""
 
-    # Escribir archivo
-    output_path.write_text(contenido, encoding="utf-8")
+    escribir_reporte(construir_artefacto(resultados, rutas_figuras), output_path)
@@ -0,0 +1,242 @@
+"""Objetos de resultado que devuelve :func:`src.analisis.ejecutar_analisis`.
+
+Son clases con ``__slots__`` e inmutables: ocupan menos memoria que los
+diccionarios que devuelven las funciones de cálculo y solo guardan lo que se
+reporta (por ejemplo, no conservan el modelo de statsmodels ni las matrices
+de imputaciones). Cada clase se construye con ``desde_dict`` a partir del
+resultado de la etapa correspondiente.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+import pandas as pd
+
+
+@dataclass(frozen=True, slots=True)
+class Descriptivos:
+    """Estadísticos descriptivos de una variable Likert."""
+
+    nombre: str
+    n: int
+    media: float
+    mediana: float
+    moda: tuple[float, ...]
+    desviacion: float
+    q1: float
+    q2: float
+    q3: float
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any], nombre: str = "") -> "Descriptivos":
+        return cls(
+            nombre=str(datos.get("nombre", nombre)),
+            n=int(datos["n"]),
+            media=float(datos["media"]),
+            mediana=float(datos["mediana"]),
+            moda=tuple(float(valor) for valor in datos.get("moda", ())),
+            desviacion=float(datos["desviacion"]),
+            q1=float(datos["q1"]),
+            q2=float(datos["q2"]),
+            q3=float(datos["q3"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class IntervaloConfianza:
+    """Intervalo de confianza para una media o una proporción."""
+
+    n: int
+    estimacion: float
+    error_estandar: float
+    limite_inferior: float
+    limite_superior: float
+    alpha: float
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "IntervaloConfianza":
+        return cls(
+            n=int(datos["n"]),
+            estimacion=float(datos.get("media", datos.get("p_hat", float("nan")))),
+            error_estandar=float(datos["error_estandar"]),
+            limite_inferior=float(datos["limite_inferior"]),
+            limite_superior=float(datos["limite_superior"]),
+            alpha=float(datos["alpha"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PruebaHipotesis:
+    """Prueba t de cola derecha para ``H1: μ > mu0``."""
+
+    media_muestral: float
+    estadistico_t: float
+    p_valor: float
+    decision: str
+    alpha: float
+    mu0: float
+
+    @property
+    def rechaza_h0(self) -> bool:
+        return self.p_valor < self.alpha
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "PruebaHipotesis":
+        return cls(
+            media_muestral=float(datos["media_muestral"]),
+            estadistico_t=float(datos["estadistico_t"]),
+            p_valor=float(datos["p_valor_unilateral"]),
+            decision=str(datos["decision"]),
+            alpha=float(datos["alpha"]),
+            mu0=float(datos["mu0"]),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ResultadoAnova:
+    """Tabla ANOVA 2x3 (tipo II) y su interpretación, sin el modelo ajustado."""
+
+    exito: bool
+    mensaje: str
+    conclusion: str
+    tabla: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "ResultadoAnova":
+        return cls(
+            exito=bool(datos.get("exito", False)),
+            mensaje=str(datos.get("mensaje", "")),
+            conclusion=str(datos.get("conclusion", "")),
+            tabla=datos.get("tabla"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class PruebaNormalidad:
+    """Resultado de Shapiro-Wilk."""
+
+    n: int
+    estadistico: float
+    p_valor: float
+    interpretacion: str
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "PruebaNormalidad":
+        return cls(
+            n=int(datos.get("n", 0)),
+            estadistico=float(datos.get("estadistico", float("nan"))),
+            p_valor=float(datos.get("p_valor", float("nan"))),
+            interpretacion=str(datos.get("decision_texto", "")),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Posterior:
+    """Resumen de una distribución posterior simulada."""
+
+    media_posterior: float
+    desviacion_posterior: float
+    limite_inferior: float
+    limite_superior: float
+    prob_mayor_umbral: float
+    umbral: float
+    alpha: float
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "Posterior":
+        return cls(**{nombre: float(datos[nombre]) for nombre in cls.__slots__})
+
+
+@dataclass(frozen=True, slots=True)
+class ResultadoBayesiano:
+    """Posteriores de la media de acuerdo y de la proporción a favor."""
+
+    media: Posterior
+    proporcion: Posterior
+    por_tratamiento: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "ResultadoBayesiano":
+        return cls(
+            media=Posterior.desde_dict(datos["general"]["media"]),
+            proporcion=Posterior.desde_dict(datos["general"]["proporcion"]),
+            por_tratamiento=datos.get("por_tratamiento"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ResultadoImputacion:
+    """Resultados combinados por reglas de Rubin sobre ``m`` imputaciones."""
+
+    m: int
+    imputados_por_columna: Dict[str, int]
+    ic_media: IntervaloConfianza
+    ic_proporcion: IntervaloConfianza
+    prueba_hipotesis: PruebaHipotesis
+    anova: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "ResultadoImputacion":
+        return cls(
+            m=int(datos["m"]),
+            imputados_por_columna=dict(datos["imputados_por_columna"]),
+            ic_media=IntervaloConfianza.desde_dict(datos["intervalos"]["media"]),
+            ic_proporcion=IntervaloConfianza.desde_dict(datos["intervalos"]["proporcion"]),
+            prueba_hipotesis=PruebaHipotesis.desde_dict(datos["prueba_hipotesis"]),
+            anova=datos.get("anova"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Ponderacion:
+    """Resumen de los pesos de rastrillaje, sin los pesos por respuesta."""
+
+    iteraciones: int
+    convergio: bool
+    n_efectivo: float
+    efecto_diseno: float
+    filas_sin_ponderar: int
+    tabla: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def desde_dict(cls, datos: Mapping[str, Any]) -> "Ponderacion":
+        return cls(
+            iteraciones=int(datos["iteraciones"]),
+            convergio=bool(datos["convergio"]),
+            n_efectivo=float(datos["n_efectivo"]),
+            efecto_diseno=float(datos["efecto_diseno"]),
+            filas_sin_ponderar=int(datos.get("filas_sin_ponderar", 0)),
+            tabla=datos.get("tabla"),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class ResultadoAnalisis:
+    """Resultado completo de una ejecución del análisis.
+
+    Los campos de etapas que no se ejecutaron (por ``objetivos``) quedan en
+    ``None`` o vacíos.
+    """
+
+    n_muestra: int = 0
+    descriptivos: Dict[str, Descriptivos] = field(default_factory=dict)
+    resumen_grupos: Optional[pd.DataFrame] = None
+    ic_media: Optional[IntervaloConfianza] = None
+    ic_proporcion: Optional[IntervaloConfianza] = None
+    prueba_hipotesis: Optional[PruebaHipotesis] = None
+    anova: Optional[ResultadoAnova] = None
+    normalidad: Dict[str, PruebaNormalidad] = field(default_factory=dict)
+    bayesiano: Optional[ResultadoBayesiano] = None
+    imputacion: Optional[ResultadoImputacion] = None
+    correlaciones: Optional[pd.DataFrame] = None
+    calidad: Optional[pd.DataFrame] = None
+    ponderacion: Optional[Ponderacion] = None
+    cotas: Optional[pd.DataFrame] = None
+    figuras: Dict[str, Path] = field(default_factory=dict)
+    metricas_figuras: Optional[pd.DataFrame] = None
+    reporte: Optional[Path] = None
+    artefacto: Optional[Path] = None
+    etapas_recalculadas: tuple[str, ...] = ()
+    etapas_reutilizadas: tuple[str, ...] = ()
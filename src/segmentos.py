@@ -0,0 +1,325 @@
+"""Análisis completo por separado para cada segmento de encuestados.
+
+Un segmento son las respuestas con un mismo nivel de ``grupo_edad``,
+``frecuencia_viaje`` o ``tratamiento``. Los niveles de
+:data:`NIVELES_SIN_SEGMENTO` (edades fuera de rango) no forman segmento. Los datos se cargan y preparan una
+sola vez y se publican como almacén compartido (ver
+:mod:`src.datos_compartidos`); las filas de cada segmento se obtienen de una
+sola pasada sobre los códigos enteros de cada factor. Cada segmento ejecuta
+después el pipeline completo (descriptivos, intervalos, prueba t,
+normalidad, figuras y reporte) en un proceso del pool, que adjunta los datos
+sin copiarlos y recibe solo los índices de sus filas.
+
+El resumen por grupos de los tres factores se calcula una vez sobre todas
+las respuestas y cada segmento toma de él sus celdas, que son las mismas que
+obtendría agrupando sus propias filas. Al final se escribe un índice con un
+enlace al reporte de cada segmento.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .config import DATA_PATH, DATOS_COMPARTIDOS_DIR, PERFIL_IMAGEN_DEFAULT, SEGMENTOS_DIR
+from .datos_compartidos import DatosCompartidos, compartir
+from .instrumentacion import incremento_memoria
+from .lote import fila_resumen, inicializar_trabajador
+from .pipeline import CACHE_DIR_DEFAULT, escribir_atomico, huella_archivo
+
+logger = logging.getLogger(__name__)
+
+FACTORES_SEGMENTO: tuple[str, ...] = ("grupo_edad", "frecuencia_viaje", "tratamiento")
+ARCHIVO_INDICE: str = "indice.md"
+ARCHIVO_RESUMEN: str = "resumen.csv"
+ARCHIVO_REPORTE: str = "reporte_estadistico.md"
+# Niveles de relleno, no de la población: "Sin categoría" agrupa edades fuera de rango
+NIVELES_SIN_SEGMENTO: tuple[str, ...] = ("Sin categoría",)
+
+
+@dataclass(frozen=True, eq=False, repr=False)
+class Segmento:
+    """Filas de un nivel de un factor dentro del almacén compartido.
+
+    ``resumen_grupos`` son las celdas del resumen por grupos de todas las
+    respuestas que pertenecen al segmento. La representación incluye solo el
+    factor, el nivel y la huella del archivo de datos, que es lo que
+    identifica al segmento en la caché del pipeline.
+    """
+
+    factor: str
+    nivel: str
+    datos: DatosCompartidos
+    filas: np.ndarray
+    huella_datos: str
+    resumen_grupos: pd.DataFrame
+
+    def __repr__(self) -> str:
+        return f"Segmento({self.factor!r}, {self.nivel!r}, {self.huella_datos!r})"
+
+    def cargar(self) -> pd.DataFrame:
+        """Adjunta los datos compartidos y devuelve solo las filas del segmento."""
+        return self.datos.cargar().iloc[self.filas]
+
+
+def dividir_por_codigos(codigos: np.ndarray, n_niveles: int) -> List[np.ndarray]:
+    """Posiciones de las filas de cada nivel a partir de sus códigos enteros.
+
+    Un único ordenamiento estable agrupa las filas por código; las filas sin
+    nivel (código ``-1``) se descartan. Cada arreglo conserva el orden
+    original de las filas.
+    """
+    orden = np.argsort(codigos, kind="stable")
+    faltantes = int(np.count_nonzero(codigos < 0))
+    conteos = np.bincount(codigos[codigos >= 0], minlength=n_niveles)
+    return np.split(orden[faltantes:], np.cumsum(conteos)[:-1])
+
+
+def _nombre_carpeta(nivel: str) -> str:
+    """Nombre de carpeta legible para un nivel (``"Adulto mayor"`` -> ``adulto_mayor``)."""
+    ascii_ = unicodedata.normalize("NFKD", str(nivel)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", ascii_.lower()).strip("_") or "sin_nombre"
+
+
+def construir_segmentos(
+    datos: DatosCompartidos,
+    huella_datos: str,
+    resumen_grupos: pd.DataFrame,
+    factores: Sequence[str] = FACTORES_SEGMENTO,
+) -> List[Segmento]:
+    """Divide los datos compartidos en un :class:`Segmento` por nivel de cada factor.
+
+    Se omiten los niveles sin filas y los de :data:`NIVELES_SIN_SEGMENTO`.
+    """
+
+    adjunto = datos.cargar()
+    segmentos: List[Segmento] = []
+    for factor in factores:
+        columna = adjunto[factor]
+        if isinstance(columna.dtype, pd.CategoricalDtype):
+            codigos, niveles = columna.cat.codes.to_numpy(), columna.cat.categories
+        else:
+            codigos, niveles = pd.factorize(columna, sort=True)
+        for nivel, filas in zip(niveles, dividir_por_codigos(codigos, len(niveles))):
+            if len(filas) == 0 or nivel in NIVELES_SIN_SEGMENTO:
+                continue
+            celdas = resumen_grupos[resumen_grupos[factor] == nivel].reset_index(drop=True)
+            segmentos.append(Segmento(factor, str(nivel), datos, filas, huella_datos, celdas))
+    return segmentos
+
+
+def analizar_segmento(
+    segmento: Segmento,
+    salida: Path,
+    figuras: bool = True,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    cache_dir: Optional[Path] = CACHE_DIR_DEFAULT,
+) -> Dict[str, Any]:
+    """Analiza un segmento escribiendo todo en ``salida`` y devuelve su fila del resumen.
+
+    Como en :func:`src.lote.analizar_libro`, los errores quedan en las
+    columnas ``estado`` y ``error`` en lugar de propagarse.
+    """
+
+    from .analisis import ejecutar_analisis
+
+    inicio = time.perf_counter()
+    fila: Dict[str, Any] = {
+        "factor": segmento.factor,
+        "nivel": segmento.nivel,
+        "salida": salida.as_posix(),
+    }
+    with incremento_memoria() as memoria:
+        try:
+            resultado = ejecutar_analisis(
+                segmento=segmento,
+                figuras=figuras,
+                reporte=True,
+                artefacto=True,
+                perfil_imagen=perfil_imagen,
+                figuras_dir=salida / "figuras",
+                reporte_path=salida / ARCHIVO_REPORTE,
+                artefacto_dir=salida / "resultados",
+                cache_dir=cache_dir,
+                procesos_figuras=0,
+            )
+        except Exception as exc:
+            fila.update(estado="error", error=f"{type(exc).__name__}: {exc}")
+        else:
+            fila.update(estado="ok", error="", **fila_resumen(resultado))
+    fila["segundos"] = time.perf_counter() - inicio
+    fila["incremento_memoria_mb"] = memoria["mb"]
+    return fila
+
+
+def _formatear(valor: Any, formato: str = "{:.2f}") -> str:
+    return "—" if valor is None or pd.isna(valor) else formato.format(valor)
+
+
+def renderizar_indice(resumen: pd.DataFrame, resumen_grupos: pd.DataFrame, n_total: int) -> str:
+    """Índice Markdown con un enlace y los resultados principales de cada segmento."""
+
+    lineas = [
+        "# Análisis por segmentos",
+        "",
+        f"Respuestas analizadas: {n_total}. Cada segmento tiene su propio reporte "
+        "completo (descriptivos, intervalos, prueba de hipótesis, normalidad y figuras).",
+        "",
+    ]
+    for factor, filas in resumen.groupby("factor", sort=False):
+        lineas += [f"## Por {factor}", ""]
+        for fila in filas.to_dict("records"):
+            enlace = f"[{fila['nivel']}]({fila['factor']}/{Path(fila['salida']).name}/{ARCHIVO_REPORTE})"
+            if fila["estado"] != "ok":
+                lineas.append(f"- {enlace}: error ({fila['error']})")
+                continue
+            lineas.append(
+                f"- {enlace}: n = {fila['n']}, media de acuerdo = {_formatear(fila.get('media_acuerdo'))} "
+                f"(IC 95%: {_formatear(fila.get('ic_media_li'))} – {_formatear(fila.get('ic_media_ls'))}), "
+                f"a favor = {_formatear(fila.get('proporcion_a_favor'), '{:.1%}')}, "
+                f"p-valor (μ > 5) = {_formatear(fila.get('p_valor_t'), '{:.4f}')}"
+            )
+        lineas.append("")
+    lineas += [
+        "## Resumen por grupos (todas las respuestas)",
+        "",
+        "```",
+        resumen_grupos.to_string(index=False, float_format="{:.3f}".format),
+        "```",
+        "",
+    ]
+    return "\n".join(lineas)
+
+
+def ejecutar_segmentos(
+    ruta_datos: Optional[Path] = None,
+    salida_dir: Path = SEGMENTOS_DIR,
+    factores: Sequence[str] = FACTORES_SEGMENTO,
+    procesos: Optional[int] = None,
+    figuras: bool = True,
+    perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+    usar_cache: bool = True,
+) -> pd.DataFrame:
+    """Ejecuta el análisis completo para cada nivel de cada factor de ``factores``.
+
+    Parameters
+    ----------
+    ruta_datos:
+        Archivo de respuestas. Por defecto :data:`src.config.DATA_PATH`.
+    salida_dir:
+        Carpeta de salida. Cada segmento escribe en
+        ``salida_dir/<factor>/<nivel>/`` (figuras, artefacto y reporte); el
+        índice se guarda en ``salida_dir/indice.md`` y la tabla resumen en
+        ``salida_dir/resumen.csv``.
+    factores:
+        Factores cuyos niveles definen los segmentos.
+    procesos:
+        Procesos en paralelo; por defecto uno por CPU. Con ``0`` o ``1`` los
+        segmentos se analizan uno tras otro en el proceso actual.
+    figuras, perfil_imagen:
+        Dibujan las gráficas de cada segmento.
+    usar_cache:
+        Usa la caché de etapas en disco; las claves de cada segmento incluyen
+        su factor, su nivel y la huella del archivo de datos.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una fila por segmento con su estado, los estadísticos principales, el
+        tiempo y cuánto subió la memoria residente durante su análisis
+        (``incremento_memoria_mb``).
+    """
+
+    from .cargar_datos import cargar_excel
+    from .descriptivos import resumen_por_grupo
+    from .limpiar_preparar import preparar_datos
+
+    ruta_datos = Path(ruta_datos or DATA_PATH)
+    desconocidos = [factor for factor in factores if factor not in FACTORES_SEGMENTO]
+    if desconocidos:
+        raise ValueError(
+            f"Factores desconocidos: {', '.join(desconocidos)}. "
+            f"Opciones: {', '.join(FACTORES_SEGMENTO)}."
+        )
+
+    preparado = preparar_datos(cargar_excel(ruta_datos))
+    resumen_grupos = resumen_por_grupo(preparado, list(FACTORES_SEGMENTO))
+    n_total = len(preparado)
+    huella_datos = huella_archivo(ruta_datos)
+    datos = compartir(
+        preparado, f"segmentos-{huella_datos[:16]}-{os.getpid()}", DATOS_COMPARTIDOS_DIR
+    )
+    del preparado
+
+    salida_dir = Path(salida_dir)
+    cache_dir = CACHE_DIR_DEFAULT if usar_cache else None
+    try:
+        segmentos = construir_segmentos(datos, huella_datos, resumen_grupos, factores)
+        salidas = [
+            salida_dir / segmento.factor / _nombre_carpeta(segmento.nivel) for segmento in segmentos
+        ]
+        argumentos = [
+            (segmento, salida, figuras, perfil_imagen, cache_dir)
+            for segmento, salida in zip(segmentos, salidas)
+        ]
+
+        if procesos is None:
+            procesos = min(len(segmentos), os.cpu_count() or 1)
+        filas: List[Optional[Dict[str, Any]]] = [None] * len(segmentos)
+        if procesos <= 1:
+            for i, args in enumerate(argumentos):
+                filas[i] = analizar_segmento(*args)
+                logger.info(
+                    "[%d/%d] %s = %s: %s",
+                    i + 1,
+                    len(segmentos),
+                    segmentos[i].factor,
+                    segmentos[i].nivel,
+                    filas[i]["estado"],
+                )
+        else:
+            with ProcessPoolExecutor(
+                max_workers=procesos,
+                initializer=inicializar_trabajador,
+                initargs=(None, figuras),
+            ) as pool:
+                futuros = {
+                    pool.submit(analizar_segmento, *args): i for i, args in enumerate(argumentos)
+                }
+                for completados, futuro in enumerate(as_completed(futuros), start=1):
+                    i = futuros[futuro]
+                    try:
+                        filas[i] = futuro.result()
+                    except Exception as exc:
+                        filas[i] = {
+                            "factor": segmentos[i].factor,
+                            "nivel": segmentos[i].nivel,
+                            "salida": salidas[i].as_posix(),
+                            "estado": "error",
+                            "error": f"{type(exc).__name__}: {exc}",
+                        }
+                    logger.info(
+                        "[%d/%d] %s = %s: %s",
+                        completados,
+                        len(segmentos),
+                        segmentos[i].factor,
+                        segmentos[i].nivel,
+                        filas[i]["estado"],
+                    )
+    finally:
+        datos.liberar()
+
+    resumen = pd.DataFrame(filas)
+    escribir_atomico(salida_dir / ARCHIVO_RESUMEN, resumen.to_csv(index=False).encode("utf-8"))
+    indice = renderizar_indice(resumen, resumen_grupos, n_total)
+    escribir_atomico(salida_dir / ARCHIVO_INDICE, indice.encode("utf-8"))
+    return resumen
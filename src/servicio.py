@@ -0,0 +1,359 @@
+"""Servicio HTTP local de consultas sobre los datos ya preparados.
+
+:class:`ServicioConsultas` carga y prepara el libro de respuestas una sola vez
+y responde en JSON preguntas puntuales con las mismas funciones del análisis:
+intervalos de confianza, prueba t, ANOVA, resúmenes por grupo, descriptivos y
+correlaciones. Cada consulta puede limitarse a un segmento con los parámetros
+``frecuencia_viaje``, ``grupo_edad`` o ``tratamiento``::
+
+    GET /intervalo/media?grupo_edad=Joven&alpha=0.1
+    GET /prueba/media?mu0=7&alpha=0.01
+    GET /resumen?por=grupo_edad,frecuencia_viaje
+
+El servidor usa solo :mod:`asyncio` de la biblioteca estándar. Los cálculos
+se ejecutan en un hilo aparte para no bloquear el bucle de eventos; las
+consultas idénticas que llegan a la vez comparten un único cálculo y los
+resultados se guardan en una caché LRU en memoria. Cualquier cliente HTTP
+local (``urllib``, ``curl``, un navegador) sirve para usarlo y probarlo.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import logging
+import math
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .config import DATA_PATH
+
+logger = logging.getLogger(__name__)
+
+HOST_DEFAULT: str = "127.0.0.1"
+PUERTO_DEFAULT: int = 8765
+MAX_CACHE_CONSULTAS: int = 256
+FACTORES_FILTRO: tuple[str, ...] = ("frecuencia_viaje", "grupo_edad", "tratamiento")
+COLUMNAS_OPINION: tuple[str, ...] = ("acuerdo_ampliacion", "p2_economia", "p3_necesidad")
+METODOS_CORRELACION: tuple[str, ...] = ("pearson", "spearman", "kendall")
+MODULOS_CONSULTAS: tuple[str, ...] = (
+    "src.intervalos_confianza",
+    "src.prueba_hipotesis",
+    "src.diseno_factorial",
+    "statsmodels.formula.api",
+)
+
+Clave = Tuple[str, Tuple[Tuple[str, Any], ...]]
+
+
+class ErrorConsulta(ValueError):
+    """Consulta mal formada; se responde con el código ``estado``."""
+
+    def __init__(self, mensaje: str, estado: HTTPStatus = HTTPStatus.BAD_REQUEST) -> None:
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _a_json(valor: Any) -> Any:
+    """Convierte resultados del análisis a tipos de JSON (``NaN`` como ``null``)."""
+    if isinstance(valor, pd.Series):
+        valor = valor.to_frame()
+    if isinstance(valor, pd.DataFrame):
+        return json.loads(valor.to_json(orient="split", force_ascii=False, double_precision=15))
+    if isinstance(valor, dict):
+        return {
+            str(clave): _a_json(contenido)
+            for clave, contenido in valor.items()
+            if clave not in ("modelo", "tabla_texto")
+        }
+    if isinstance(valor, (list, tuple, np.ndarray)):
+        return [_a_json(elemento) for elemento in valor]
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and math.isnan(valor):
+        return None
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    return str(valor)
+
+
+def _numero(parametros: Dict[str, str], nombre: str, defecto: float) -> float:
+    texto = parametros.get(nombre)
+    if texto is None:
+        return defecto
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise ErrorConsulta(f"El parámetro '{nombre}' debe ser numérico: {texto!r}.") from None
+    if not math.isfinite(valor):
+        raise ErrorConsulta(f"El parámetro '{nombre}' debe ser finito.")
+    return valor
+
+
+def _alpha(parametros: Dict[str, str]) -> float:
+    alpha = _numero(parametros, "alpha", 0.05)
+    if not 0 < alpha < 1:
+        raise ErrorConsulta("El parámetro 'alpha' debe estar entre 0 y 1.")
+    return alpha
+
+
+# ---------------------------------------------------------------------------
+# Consultas. Cada una recibe las filas del segmento pedido y los parámetros ya
+# validados, y devuelve un resultado serializable con _a_json.
+# ---------------------------------------------------------------------------
+
+
+def _consulta_intervalo_media(df: pd.DataFrame, alpha: float) -> Dict[str, Any]:
+    from .intervalos_confianza import intervalo_confianza_media
+
+    return intervalo_confianza_media(df["acuerdo_ampliacion"], alpha=alpha)
+
+
+def _consulta_intervalo_proporcion(df: pd.DataFrame, alpha: float) -> Dict[str, Any]:
+    from .intervalos_confianza import intervalo_confianza_proporcion
+
+    return intervalo_confianza_proporcion(df["a_favor"], alpha=alpha)
+
+
+def _consulta_prueba_media(df: pd.DataFrame, mu0: float, alpha: float) -> Dict[str, Any]:
+    from .prueba_hipotesis import prueba_media_mayor_que_5
+
+    return prueba_media_mayor_que_5(df["acuerdo_ampliacion"], mu0=mu0, alpha=alpha)
+
+
+def _consulta_anova(df: pd.DataFrame) -> Dict[str, Any]:
+    from .diseno_factorial import anova_2x3
+
+    return anova_2x3(df)
+
+
+def _consulta_resumen(df: pd.DataFrame, por: Tuple[str, ...]) -> pd.DataFrame:
+    from .descriptivos import resumen_por_grupo
+
+    return resumen_por_grupo(df, list(por))
+
+
+def _consulta_descriptivos(df: pd.DataFrame) -> Dict[str, Any]:
+    from .descriptivos import resumen_general
+
+    return resumen_general(df)
+
+
+def _consulta_correlaciones(df: pd.DataFrame, metodo: str) -> pd.DataFrame:
+    return df[list(COLUMNAS_OPINION)].corr(method=metodo)
+
+
+def _parametros_por(parametros: Dict[str, str]) -> Dict[str, Any]:
+    por = tuple(p for p in parametros.get("por", "tratamiento").split(",") if p)
+    desconocidos = [p for p in por if p not in FACTORES_FILTRO]
+    if not por or desconocidos:
+        raise ErrorConsulta(
+            f"El parámetro 'por' admite: {', '.join(FACTORES_FILTRO)} (separados por comas)."
+        )
+    return {"por": por}
+
+
+def _parametros_metodo(parametros: Dict[str, str]) -> Dict[str, Any]:
+    metodo = parametros.get("metodo", "pearson")
+    if metodo not in METODOS_CORRELACION:
+        raise ErrorConsulta(f"El parámetro 'metodo' admite: {', '.join(METODOS_CORRELACION)}.")
+    return {"metodo": metodo}
+
+
+# Ruta -> (consulta, lector de sus parámetros a partir de la query string).
+CONSULTAS: Dict[str, Tuple[Callable[..., Any], Callable[[Dict[str, str]], Dict[str, Any]]]] = {
+    "/intervalo/media": (_consulta_intervalo_media, lambda p: {"alpha": _alpha(p)}),
+    "/intervalo/proporcion": (_consulta_intervalo_proporcion, lambda p: {"alpha": _alpha(p)}),
+    "/prueba/media": (
+        _consulta_prueba_media,
+        lambda p: {"mu0": _numero(p, "mu0", 5.0), "alpha": _alpha(p)},
+    ),
+    "/anova": (_consulta_anova, lambda p: {}),
+    "/resumen": (_consulta_resumen, _parametros_por),
+    "/descriptivos": (_consulta_descriptivos, lambda p: {}),
+    "/correlaciones": (_consulta_correlaciones, _parametros_metodo),
+}
+
+
+class ServicioConsultas:
+    """Datos preparados en memoria más la caché y la coalescencia de consultas.
+
+    Parameters
+    ----------
+    preparado:
+        DataFrame ya preparado (ver :func:`src.limpiar_preparar.preparar_datos`);
+        no se modifica.
+    max_cache:
+        Número de resultados que se conservan; se descarta el menos usado.
+    hilos:
+        Hilos propios donde se calculan las consultas, separados del
+        ejecutor por defecto del bucle de eventos.
+    """
+
+    def __init__(
+        self, preparado: pd.DataFrame, max_cache: int = MAX_CACHE_CONSULTAS, hilos: int = 4
+    ) -> None:
+        self.preparado = preparado
+        self.max_cache = max_cache
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="consulta")
+        self._cache: "OrderedDict[Clave, Any]" = OrderedDict()
+        self._en_curso: Dict[Clave, asyncio.Future] = {}
+        self.estadisticas = {"consultas": 0, "aciertos": 0, "compartidas": 0, "calculadas": 0}
+
+    @classmethod
+    def desde_archivo(
+        cls, ruta_datos: Optional[Path] = None, max_cache: int = MAX_CACHE_CONSULTAS
+    ) -> "ServicioConsultas":
+        """Carga y prepara el libro de respuestas una única vez."""
+        from .cargar_datos import cargar_excel
+        from .limpiar_preparar import preparar_datos
+
+        return cls(preparar_datos(cargar_excel(ruta_datos or DATA_PATH)), max_cache)
+
+    def _segmento(self, filtros: Tuple[Tuple[str, str], ...]) -> pd.DataFrame:
+        df = self.preparado
+        for factor, nivel in filtros:
+            df = df[df[factor] == nivel]
+        if df.empty:
+            condicion = ", ".join(f"{factor} = {nivel!r}" for factor, nivel in filtros)
+            raise ErrorConsulta(f"No hay respuestas con {condicion}.", HTTPStatus.NOT_FOUND)
+        return df
+
+    def _calcular(
+        self, ruta: str, filtros: Tuple[Tuple[str, str], ...], argumentos: Dict[str, Any]
+    ) -> Any:
+        consulta, _ = CONSULTAS[ruta]
+        return _a_json(consulta(self._segmento(filtros), **argumentos))
+
+    async def responder(self, ruta: str, parametros: Dict[str, str]) -> Tuple[HTTPStatus, Any]:
+        """Resuelve una consulta y devuelve el código HTTP y el cuerpo JSON.
+
+        No requiere un servidor: puede llamarse directamente desde una
+        corrutina, por ejemplo para probar el servicio.
+        """
+
+        self.estadisticas["consultas"] += 1
+        if ruta == "/salud":
+            return HTTPStatus.OK, {
+                "estado": "ok",
+                "filas": int(len(self.preparado)),
+                "consultas_en_cache": len(self._cache),
+                **self.estadisticas,
+            }
+        if ruta not in CONSULTAS:
+            disponibles = ", ".join(("/salud", *CONSULTAS))
+            return HTTPStatus.NOT_FOUND, {
+                "error": f"Ruta desconocida: {ruta}. Disponibles: {disponibles}."
+            }
+
+        try:
+            argumentos = CONSULTAS[ruta][1](parametros)
+        except ErrorConsulta as exc:
+            return exc.estado, {"error": str(exc)}
+        filtros = tuple((f, parametros[f]) for f in FACTORES_FILTRO if f in parametros)
+        # Los parámetros ya interpretados forman la clave: alpha=0.05 y alpha=.050 coinciden
+        clave: Clave = (ruta, filtros + tuple(sorted(argumentos.items())))
+
+        if clave in self._cache:
+            self._cache.move_to_end(clave)
+            self.estadisticas["aciertos"] += 1
+            return HTTPStatus.OK, self._cache[clave]
+
+        futuro = self._en_curso.get(clave)
+        if futuro is not None:
+            self.estadisticas["compartidas"] += 1
+        else:
+            self.estadisticas["calculadas"] += 1
+            futuro = asyncio.get_running_loop().run_in_executor(
+                self._hilos, self._calcular, ruta, filtros, argumentos
+            )
+            self._en_curso[clave] = futuro
+            futuro.add_done_callback(lambda _: self._en_curso.pop(clave, None))
+
+        try:
+            resultado = await asyncio.shield(futuro)
+        except ErrorConsulta as exc:
+            return exc.estado, {"error": str(exc)}
+        except (ValueError, KeyError) as exc:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, {"error": f"{type(exc).__name__}: {exc}"}
+        except Exception as exc:
+            logger.exception("Error al resolver %s", ruta)
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(exc).__name__}: {exc}"}
+
+        if clave not in self._cache:
+            self._cache[clave] = resultado
+            while len(self._cache) > self.max_cache:
+                self._cache.popitem(last=False)
+        return HTTPStatus.OK, resultado
+
+    async def _atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        """Atiende una conexión HTTP/1.1 con una sola petición ``GET``."""
+        try:
+            linea = (await lector.readline()).decode("latin-1").split()
+            while (await lector.readline()) not in (b"\r\n", b"\n", b""):
+                pass  # Se ignoran los encabezados
+            if len(linea) != 3:
+                estado, cuerpo = HTTPStatus.BAD_REQUEST, {"error": "Petición HTTP mal formada."}
+            elif linea[0] != "GET":
+                estado, cuerpo = HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Solo se admite GET."}
+            else:
+                url = urlsplit(linea[1])
+                parametros = dict(parse_qsl(url.query))
+                estado, cuerpo = await self.responder(url.path.rstrip("/") or "/", parametros)
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+            escritor.write(
+                (
+                    f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+                    "Content-Type: application/json; charset=utf-8\r\n"
+                    f"Content-Length: {len(datos)}\r\n"
+                    "Connection: close\r\n\r\n"
+                ).encode("latin-1")
+                + datos
+            )
+            await escritor.drain()
+            logger.info("%s -> %d", " ".join(linea[:2]), estado.value)
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def iniciar(
+        self, host: str = HOST_DEFAULT, puerto: int = PUERTO_DEFAULT
+    ) -> asyncio.AbstractServer:
+        """Empieza a escuchar en ``host:puerto`` (``puerto=0`` elige uno libre)."""
+        return await asyncio.start_server(self._atender, host, puerto)
+
+
+def servir(
+    ruta_datos: Optional[Path] = None,
+    host: str = HOST_DEFAULT,
+    puerto: int = PUERTO_DEFAULT,
+    max_cache: int = MAX_CACHE_CONSULTAS,
+) -> None:
+    """Prepara los datos y atiende consultas hasta que se interrumpa el proceso."""
+
+    servicio = ServicioConsultas.desde_archivo(ruta_datos, max_cache)
+    # Las bibliotecas de las consultas se cargan antes de aceptar conexiones
+    for modulo in MODULOS_CONSULTAS:
+        importlib.import_module(modulo)
+
+    async def principal() -> None:
+        servidor = await servicio.iniciar(host, puerto)
+        direccion = servidor.sockets[0].getsockname()
+        logger.info(
+            "Servicio listo en http://%s:%d con %d respuestas preparadas.",
+            direccion[0],
+            direccion[1],
+            len(servicio.preparado),
+        )
+        async with servidor:
+            await servidor.serve_forever()
+
+    asyncio.run(principal())
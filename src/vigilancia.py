@@ -0,0 +1,254 @@
+"""Modo vigilancia: rehace el análisis cada vez que cambia el libro de respuestas.
+
+Durante el trabajo de campo el Excel se vuelve a exportar cada pocos minutos.
+:func:`vigilar` revisa periódicamente la fecha de modificación y el tamaño del
+archivo (sin depender de servicios de notificación del sistema) y, cuando
+cambian, espera a que el archivo deje de cambiar antes de leerlo, de modo que
+una ráfaga de escrituras produce una sola actualización.
+
+El proceso mantiene su estado en memoria entre actualizaciones
+(:class:`EstadoVigilancia`):
+
+- las filas ya preparadas, identificadas por el hash de su contenido, de modo
+  que solo se preparan las filas nuevas o modificadas;
+- el resultado de cada etapa del pipeline con su clave, de modo que las
+  etapas cuyas entradas no cambiaron no se recalculan;
+- las bibliotecas ya importadas y las figuras dibujadas en el propio proceso,
+  que se reutilizan desde la caché de figuras si sus datos agregados no
+  cambiaron.
+
+Si una nueva exportación no modifica ninguna respuesta, no se recalcula nada.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .cache_figuras import CacheFiguras
+from .config import DATA_PATH, PERFIL_IMAGEN_DEFAULT
+from .pipeline import CACHE_DIR_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_DEFAULT: float = 2.0
+ESPERA_DEFAULT: float = 3.0
+
+Firma = Tuple[int, int]
+
+
+@dataclass(frozen=True, eq=False, repr=False)
+class DatosPreparados:
+    """DataFrame ya preparado que el pipeline recibe en lugar de leer el Excel.
+
+    ``huella`` resume el contenido de las filas de origen y es lo único que
+    aparece en la representación, que forma parte de las claves del pipeline.
+    """
+
+    huella: str
+    datos: pd.DataFrame
+
+    def __repr__(self) -> str:
+        return f"DatosPreparados({self.huella!r})"
+
+
+def firma_archivo(ruta: Path) -> Optional[Firma]:
+    """Fecha de modificación (ns) y tamaño del archivo, o ``None`` si no existe."""
+    try:
+        estado = Path(ruta).stat()
+    except FileNotFoundError:
+        return None
+    return estado.st_mtime_ns, estado.st_size
+
+
+def esperar_cambio(
+    ruta: Path,
+    firma: Optional[Firma],
+    intervalo: float = INTERVALO_DEFAULT,
+    espera: float = ESPERA_DEFAULT,
+    detener: Callable[[], bool] = lambda: False,
+) -> Optional[Firma]:
+    """Bloquea hasta que ``ruta`` cambie respecto de ``firma`` y se estabilice.
+
+    El archivo se revisa cada ``intervalo`` segundos. Tras el primer cambio se
+    espera a que la firma se mantenga igual durante ``espera`` segundos, de
+    modo que una exportación que escribe el archivo en varios pasos se
+    procesa una sola vez y ya completa.
+
+    Returns
+    -------
+    tuple or None
+        La firma estable del archivo, o ``None`` si ``detener()`` devolvió
+        ``True`` antes de detectar un cambio.
+    """
+
+    while not detener():
+        time.sleep(intervalo)
+        nueva = firma_archivo(ruta)
+        if nueva is None or nueva == firma:
+            continue
+        estable_desde = time.monotonic()
+        while time.monotonic() - estable_desde < espera:
+            time.sleep(min(intervalo, espera))
+            actual = firma_archivo(ruta)
+            if actual != nueva:
+                nueva, estable_desde = actual, time.monotonic()
+        if nueva is not None:
+            return nueva
+    return None
+
+
+def _huellas_filas(crudo: pd.DataFrame) -> np.ndarray:
+    """Hash de 64 bits del contenido de cada fila, sin tener en cuenta el índice."""
+    return pd.util.hash_pandas_object(crudo, index=False).to_numpy()
+
+
+class EstadoVigilancia:
+    """Estado que el modo vigilancia conserva en memoria entre actualizaciones.
+
+    Parameters
+    ----------
+    ruta_datos:
+        Libro de respuestas vigilado. Por defecto :data:`src.config.DATA_PATH`.
+    figuras, perfil_imagen:
+        Dibujan las gráficas, en el propio proceso para aprovechar las
+        bibliotecas ya cargadas.
+    cache_dir, cache_figuras:
+        Caché de etapas en disco y caché de figuras; permiten que el primer
+        análisis tras reiniciar la vigilancia también reutilice resultados.
+    figuras_dir, reporte_path, artefacto_dir:
+        Salidas del análisis; por defecto las de :func:`src.analisis.construir_pipeline`.
+    """
+
+    def __init__(
+        self,
+        ruta_datos: Optional[Path] = None,
+        figuras: bool = True,
+        perfil_imagen: str = PERFIL_IMAGEN_DEFAULT,
+        cache_dir: Optional[Path] = CACHE_DIR_DEFAULT,
+        cache_figuras: Optional[CacheFiguras] = None,
+        figuras_dir: Optional[Path] = None,
+        reporte_path: Optional[Path] = None,
+        artefacto_dir: Optional[Path] = None,
+    ) -> None:
+        self.ruta_datos = Path(ruta_datos or DATA_PATH)
+        self.figuras = figuras
+        self.perfil_imagen = perfil_imagen
+        self.cache_dir = cache_dir
+        self.cache_figuras = cache_figuras
+        self.figuras_dir = figuras_dir
+        self.reporte_path = reporte_path
+        self.artefacto_dir = artefacto_dir
+        self.huellas: np.ndarray = np.empty(0, dtype=np.uint64)
+        self.preparado: Optional[pd.DataFrame] = None
+        self.memoria: Dict[str, Tuple[str, Any]] = {}
+
+    def ingerir(self, crudo: pd.DataFrame) -> Dict[str, int]:
+        """Actualiza las filas preparadas preparando solo las que no se conocían.
+
+        Las filas cuyo contenido ya se había preparado se toman de la versión
+        anterior; el resultado conserva el orden de ``crudo``.
+
+        Returns
+        -------
+        dict
+            ``filas`` (total), ``nuevas`` (filas nuevas o modificadas que se
+            prepararon) y ``eliminadas`` (filas anteriores que ya no están).
+        """
+
+        from .limpiar_preparar import preparar_datos
+
+        crudo = crudo.reset_index(drop=True)
+        huellas = _huellas_filas(crudo)
+        if self.preparado is None:
+            preparado, nuevas = preparar_datos(crudo), np.ones(len(crudo), dtype=bool)
+        else:
+            anteriores = pd.Series(np.arange(len(self.huellas)), index=self.huellas)
+            anteriores = anteriores[~anteriores.index.duplicated()]
+            posiciones = anteriores.reindex(huellas).to_numpy()
+            nuevas = np.isnan(posiciones)
+            conservadas = self.preparado.iloc[posiciones[~nuevas].astype(np.int64)]
+            conservadas.index = np.flatnonzero(~nuevas)
+            partes = [conservadas]
+            if nuevas.any():
+                partes.append(preparar_datos(crudo.iloc[np.flatnonzero(nuevas)]))
+            preparado = pd.concat(partes).sort_index() if len(partes) > 1 else conservadas
+            preparado.index = crudo.index
+
+        eliminadas = len(self.huellas) - int((~nuevas).sum())
+        self.huellas, self.preparado = huellas, preparado
+        return {"filas": len(crudo), "nuevas": int(nuevas.sum()), "eliminadas": max(eliminadas, 0)}
+
+    @property
+    def huella(self) -> str:
+        """Huella del contenido de todas las filas, en orden."""
+        return hashlib.sha256(self.huellas.tobytes()).hexdigest()
+
+    def actualizar(self) -> Dict[str, Any]:
+        """Lee el libro, incorpora sus cambios y rehace lo que haga falta del análisis.
+
+        Returns
+        -------
+        dict
+            Los conteos de :meth:`ingerir` más ``resultado``
+            (:class:`~src.resultados.ResultadoAnalisis`) y ``segundos``.
+        """
+
+        from .analisis import ejecutar_analisis
+        from .cargar_datos import cargar_excel
+
+        inicio = time.perf_counter()
+        cambios = self.ingerir(cargar_excel(self.ruta_datos))
+        resultado = ejecutar_analisis(
+            preparado=DatosPreparados(self.huella, self.preparado),
+            figuras=self.figuras,
+            reporte=True,
+            artefacto=True,
+            perfil_imagen=self.perfil_imagen,
+            figuras_dir=self.figuras_dir,
+            reporte_path=self.reporte_path,
+            artefacto_dir=self.artefacto_dir,
+            cache_dir=self.cache_dir,
+            cache_figuras=self.cache_figuras,
+            procesos_figuras=0,
+            memoria=self.memoria,
+        )
+        return {**cambios, "resultado": resultado, "segundos": time.perf_counter() - inicio}
+
+
+def vigilar(
+    estado: EstadoVigilancia,
+    intervalo: float = INTERVALO_DEFAULT,
+    espera: float = ESPERA_DEFAULT,
+    max_actualizaciones: Optional[int] = None,
+    detener: Callable[[], bool] = lambda: False,
+) -> Iterator[Dict[str, Any]]:
+    """Analiza el libro y vuelve a hacerlo cada vez que cambia.
+
+    Es un generador: produce el resumen de :meth:`EstadoVigilancia.actualizar`
+    tras el análisis inicial y tras cada cambio, hasta completar
+    ``max_actualizaciones`` (sin límite por defecto) o hasta que ``detener()``
+    devuelva ``True``. Si el libro no puede leerse (por ejemplo porque se está
+    escribiendo), se registra el error, se conserva el estado anterior y se
+    espera al siguiente cambio.
+    """
+
+    firma = firma_archivo(estado.ruta_datos)
+    actualizaciones = 0
+    while max_actualizaciones is None or actualizaciones < max_actualizaciones:
+        try:
+            yield estado.actualizar()
+        except (RuntimeError, KeyError, ValueError) as exc:
+            logger.error("No se pudo actualizar el análisis: %s", exc)
+        actualizaciones += 1
+        if max_actualizaciones is not None and actualizaciones >= max_actualizaciones:
+            break
+        firma = esperar_cambio(estado.ruta_datos, firma, intervalo, espera, detener)
+        if firma is None:
+            break
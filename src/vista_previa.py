@@ -0,0 +1,251 @@
+"""Modo de vista previa: muestra de reservorio estratificada y cotas de error.
+
+La muestra se construye en una sola pasada sobre el archivo, manteniendo un
+reservorio por ``tratamiento``. Al terminar se reduce a una asignación
+proporcional al tamaño observado de cada estrato (por restos mayores, de modo
+que suma exactamente el tamaño pedido), así la muestra es autoponderada y el
+resto del pipeline puede ejecutarse sin cambios.
+"""
+from __future__ import annotations
+
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .cargar_datos import iterar_lotes
+from .diseno_factorial import sumas_cuadrados_lote
+from .limpiar_preparar import preparar_datos
+
+TAMANO_MUESTRA_DEFAULT: int = 5_000
+N_BOOTSTRAP: int = 200
+# Semilla por defecto de la muestra y del bootstrap: la vista previa debe
+# repetirse entre corridas.
+SEMILLA_VISTA_PREVIA: int = 20251104
+COLUMNAS_OPINION: tuple[str, ...] = ("acuerdo_ampliacion", "p2_economia", "p3_necesidad")
+
+
+class _Reservorio:
+    """Reservorio de capacidad fija (algoritmo R) para un estrato."""
+
+    def __init__(self, capacidad: int, n_columnas: int) -> None:
+        self.capacidad = capacidad
+        self.filas = np.empty((capacidad, n_columnas), dtype=object)
+        self.vistos = 0
+
+    def agregar(self, valores: np.ndarray, rng: np.random.Generator) -> None:
+        """Incorpora un bloque de filas del estrato manteniendo la uniformidad."""
+        posiciones = self.vistos + np.arange(len(valores))
+        self.vistos += len(valores)
+
+        directas = posiciones < self.capacidad
+        self.filas[posiciones[directas]] = valores[directas]
+
+        candidatas = np.flatnonzero(~directas)
+        if candidatas.size == 0:
+            return
+        destinos = rng.integers(0, posiciones[candidatas] + 1)
+        aceptadas = destinos < self.capacidad
+        destinos, origen = destinos[aceptadas], candidatas[aceptadas]
+        # Si dos filas del bloque caen en la misma posición gana la más reciente
+        _, ultimos = np.unique(destinos[::-1], return_index=True)
+        ultimos = len(destinos) - 1 - ultimos
+        self.filas[destinos[ultimos]] = valores[origen[ultimos]]
+
+    def contenido(self) -> np.ndarray:
+        return self.filas[: min(self.vistos, self.capacidad)]
+
+
+def asignacion_proporcional(
+    tamano: int, poblacion: Dict[str, int], capacidad: Dict[str, int]
+) -> Dict[str, int]:
+    """Filas de cada estrato para una muestra de ``tamano`` proporcional a ``poblacion``.
+
+    Cada estrato recibe la parte entera de su cuota y las filas que faltan se
+    reparten por restos mayores (Hamilton), sin superar la ``capacidad`` de
+    cada estrato. El total es ``min(tamano, sum(capacidad))``.
+    """
+
+    estratos = list(poblacion)
+    total = sum(poblacion.values())
+    cuotas = np.array([tamano * poblacion[e] / total for e in estratos])
+    maximos = np.array([capacidad[e] for e in estratos])
+    asignadas = np.minimum(np.floor(cuotas).astype(int), maximos)
+    objetivo = min(tamano, int(maximos.sum()))
+    orden = np.argsort(-(cuotas - np.floor(cuotas)), kind="stable")
+    while asignadas.sum() < objetivo:
+        for i in orden:
+            if asignadas.sum() >= objetivo:
+                break
+            if asignadas[i] < maximos[i]:
+                asignadas[i] += 1
+    return dict(zip(estratos, asignadas.tolist()))
+
+
+def muestra_reservorio_estratificada(
+    path: Optional[Path] = None,
+    tamano: int = TAMANO_MUESTRA_DEFAULT,
+    tamano_lote: int = 10_000,
+    semilla: Optional[int] = SEMILLA_VISTA_PREVIA,
+) -> tuple[pd.DataFrame, Dict[str, int]]:
+    """Extrae una muestra estratificada por ``tratamiento`` en una sola pasada.
+
+    Returns
+    -------
+    tuple
+        El DataFrame muestreado con las columnas originales del archivo (listo
+        para :func:`src.limpiar_preparar.preparar_datos`) y el número de filas
+        observadas en cada estrato durante la pasada.
+    """
+
+    rng = np.random.default_rng(semilla)
+    reservorios: Dict[str, _Reservorio] = {}
+    encabezados: list = []
+
+    for lote in iterar_lotes(path, tamano_lote=tamano_lote):
+        encabezados = list(lote.columns)
+        estratos = preparar_datos(lote)["tratamiento"].to_numpy()
+        valores = lote.to_numpy(dtype=object)
+        for estrato in pd.unique(estratos):
+            if estrato not in reservorios:
+                reservorios[estrato] = _Reservorio(tamano, len(encabezados))
+            reservorios[estrato].agregar(valores[estratos == estrato], rng)
+
+    poblacion = {estrato: res.vistos for estrato, res in reservorios.items()}
+    total = sum(poblacion.values())
+    if total == 0:
+        raise ValueError("El archivo no contiene respuestas para construir la vista previa.")
+
+    asignacion = asignacion_proporcional(
+        tamano, poblacion, {estrato: len(res.contenido()) for estrato, res in reservorios.items()}
+    )
+    bloques = []
+    for estrato, reservorio in reservorios.items():
+        filas = reservorio.contenido()
+        elegidas = rng.choice(len(filas), size=asignacion[estrato], replace=False)
+        bloques.append(filas[np.sort(elegidas)])
+
+    muestra = pd.DataFrame(np.concatenate(bloques), columns=encabezados)
+    muestra = muestra.infer_objects()
+    return muestra, poblacion
+
+
+def _remuestreo_por_estrato(
+    estratos: np.ndarray, n_bootstrap: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Índices bootstrap ``(B, n)`` que remuestrean dentro de cada estrato.
+
+    Cada réplica conserva, posición por posición, el estrato de la fila
+    original, por lo que la matriz de diseño de la ANOVA es la misma en todas.
+    """
+
+    indices = np.empty((n_bootstrap, estratos.size), dtype=np.int64)
+    for estrato in np.unique(estratos):
+        filas = np.flatnonzero(estratos == estrato)
+        indices[:, filas] = filas[rng.integers(0, filas.size, size=(n_bootstrap, filas.size))]
+    return indices
+
+
+def cotas_error_muestreo(
+    df: pd.DataFrame,
+    poblacion: Dict[str, int],
+    alpha: float = 0.05,
+    mu0: float = 5.0,
+    n_bootstrap: int = N_BOOTSTRAP,
+    semilla: Optional[int] = SEMILLA_VISTA_PREVIA,
+) -> pd.DataFrame:
+    """Cotas de error de muestreo para los estadísticos del reporte.
+
+    Se usa un bootstrap estratificado por ``tratamiento`` calculado en lote
+    sobre todas las réplicas, y el error estándar se multiplica por la
+    corrección por población finita ``sqrt(1 - n/N)``.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Una fila por estadístico con ``estimacion``, ``error_estandar``,
+        ``cota_inferior`` y ``cota_superior``.
+    """
+
+    from scipy import stats
+
+    rng = np.random.default_rng(semilla)
+    datos = df.dropna(subset=["acuerdo_ampliacion"]).reset_index(drop=True)
+    n = len(datos)
+    N = max(sum(poblacion.values()), n)
+    correccion = np.sqrt(max(0.0, 1 - n / N))
+
+    estratos = datos["tratamiento"].to_numpy()
+    indices = _remuestreo_por_estrato(estratos, n_bootstrap, rng)
+
+    columnas = [col for col in COLUMNAS_OPINION if col in datos.columns]
+    valores = datos[columnas].to_numpy(dtype=float)
+    replicas = valores[indices]
+
+    estimaciones: Dict[str, tuple[float, np.ndarray]] = {}
+
+    def registrar(nombre: str, original: np.ndarray, bootstrap: np.ndarray) -> None:
+        estimaciones[nombre] = (float(original), bootstrap)
+
+    for j, columna in enumerate(columnas):
+        x, xb = valores[:, j], replicas[:, :, j]
+        registrar(f"{columna}.media", np.nanmean(x), np.nanmean(xb, axis=1))
+        registrar(f"{columna}.desviacion", np.nanstd(x, ddof=1), np.nanstd(xb, axis=1, ddof=1))
+        for nombre, q in (("q1", 0.25), ("mediana", 0.5), ("q3", 0.75)):
+            registrar(
+                f"{columna}.{nombre}", np.nanquantile(x, q), np.nanquantile(xb, q, axis=1)
+            )
+
+    acuerdo, acuerdo_b = valores[:, 0], replicas[:, :, 0]
+    registrar("a_favor.proporcion", np.mean(acuerdo >= 6), np.mean(acuerdo_b >= 6, axis=1))
+
+    def t_estadistico(x: np.ndarray, eje: int) -> np.ndarray:
+        return (x.mean(axis=eje) - mu0) / (x.std(axis=eje, ddof=1) / np.sqrt(x.shape[eje]))
+
+    registrar("prueba_t.estadistico_t", t_estadistico(acuerdo, 0), t_estadistico(acuerdo_b, 1))
+
+    for i, j in combinations(range(len(columnas)), 2):
+        col_i, col_j = columnas[i], columnas[j]
+        original = np.corrcoef(valores[:, i], valores[:, j])[0, 1]
+        xi = replicas[:, :, i] - replicas[:, :, i].mean(axis=1, keepdims=True)
+        xj = replicas[:, :, j] - replicas[:, :, j].mean(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bootstrap = (xi * xj).sum(axis=1) / np.sqrt((xi**2).sum(axis=1) * (xj**2).sum(axis=1))
+        registrar(f"correlacion.{col_i}~{col_j}", original, bootstrap)
+
+    validos = (datos["grupo_edad"] != "Sin categoría").to_numpy()
+    niveles_suficientes = (
+        datos.loc[validos, "frecuencia_viaje"].nunique() > 1
+        and datos.loc[validos, "grupo_edad"].nunique() > 1
+    )
+    if niveles_suficientes:
+        Y = np.column_stack([acuerdo[validos], acuerdo_b[:, validos].T])
+        sumas = sumas_cuadrados_lote(Y, datos.loc[validos])
+        rss, gl_error = sumas.pop("Residual")
+        for efecto, (ss, k) in sumas.items():
+            with np.errstate(divide="ignore", invalid="ignore"):
+                f = (ss / k) / (rss / gl_error)
+            registrar(f"anova.{efecto}.F", f[0], f[1:])
+
+    z = stats.norm.ppf(1 - alpha / 2)
+    filas = []
+    for nombre, (original, bootstrap) in estimaciones.items():
+        error = float(np.nanstd(bootstrap, ddof=1) * correccion)
+        cota_inferior = original - z * error
+        if nombre.endswith((".F", ".desviacion", ".proporcion")):
+            cota_inferior = max(0.0, cota_inferior)
+        filas.append(
+            {
+                "estadistico": nombre,
+                "estimacion": original,
+                "error_estandar": error,
+                "cota_inferior": cota_inferior,
+                "cota_superior": original + z * error,
+            }
+        )
+
+    tabla = pd.DataFrame(filas)
+    tabla.attrs.update({"n_muestra": n, "n_poblacion": N, "alpha": alpha})
+    return tabla